@@ -15,14 +15,19 @@ import logging
 import time
 import json
 import base64
+import zipfile
+import tempfile
+import uuid
 from datetime import datetime
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, send_file
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, send_file, Response
 from logging.handlers import RotatingFileHandler
 from werkzeug.utils import secure_filename
 
 from vsphere_client import VSphereClient
 from report_generator import ReportGenerator
+from topology_generator import TopologyGenerator, DEFAULT_PAGE_SIZE, ASSETS_DIRNAME
 import demo_data
+from metrics import REGISTRY, SESSIONS, CONTENT_TYPE, JOBS_IN_PROGRESS, record_cache
 
 # Konfiguration
 DEBUG_MODE = os.environ.get('VSPHERE_REPORTER_DEBUG', 'False').lower() in ['true', '1', 't']
@@ -58,9 +63,20 @@ def basename_filter(path):
     """Extrahiert den Dateinamen aus einem Pfad"""
     return os.path.basename(path) if path else ''
 
+@app.before_request
+def track_session_activity():
+    """Merkt sich die Aktivität angemeldeter Sitzungen für die Metrik der aktiven Sitzungen"""
+    if 'logged_in' in session:
+        if 'sid' not in session:
+            session['sid'] = uuid.uuid4().hex
+        SESSIONS.touch(session['sid'])
+
 # Erstelle vSphere Client
 vsphere_client = VSphereClient()
 
+# Topologie-Index, wird beim ersten Aufruf der Topologie-API aufgebaut
+topology_generator = TopologyGenerator()
+
 # Routen
 @app.route('/')
 def index():
@@ -77,6 +93,9 @@ def login():
         username = request.form.get('username')
         password = request.form.get('password')
         ignore_ssl = 'ignore_ssl' in request.form
+        # Optionaler Scope: Inventarpfade oder MoRef-IDs, durch Semikolon oder Zeilenumbruch getrennt
+        scope = [entry.strip() for entry in request.form.get('scope', '').replace('\n', ';').split(';')
+                 if entry.strip()]
         
         if not server or not username or not password:
             flash('Bitte füllen Sie alle Felder aus.', 'danger')
@@ -86,6 +105,7 @@ def login():
         
         # Demo-Modus ausschalten, da wir eine echte Verbindung herstellen
         vsphere_client.set_demo_mode(False)
+        topology_generator.reset()
         session['demo_mode'] = False
         
         # Verbindung zum vCenter herstellen
@@ -96,6 +116,11 @@ def login():
             disable_ssl_verification=ignore_ssl
         )
         
+        if success and not vsphere_client.set_scope(scope):
+            vsphere_client.disconnect()
+            flash('Scope nicht gefunden. Bitte Inventarpfad (z.B. DC/host/Cluster) oder MoRef-ID prüfen.', 'danger')
+            return render_template('login.html', error='Scope nicht gefunden.')
+        
         if success:
             session['logged_in'] = True
             session['server'] = server
@@ -124,6 +149,7 @@ def demo_mode():
     
     # Demo-Modus im Client aktivieren
     vsphere_client.set_demo_mode(True)
+    topology_generator.reset()
     
     flash('Demo-Modus aktiviert. Alle Daten sind Beispieldaten.', 'info')
     return redirect(url_for('dashboard'))
@@ -134,6 +160,9 @@ def logout():
     if not session.get('demo_mode', False):
         vsphere_client.disconnect()
     
+    topology_generator.reset()
+    if 'sid' in session:
+        SESSIONS.end(session['sid'])
     session.clear()
     flash('Sie wurden abgemeldet.', 'info')
     return redirect(url_for('index'))
@@ -305,100 +334,86 @@ def infrastructure_topology():
 
 @app.route('/api/topology-data')
 def topology_data():
-    """Stellt Topologiedaten im JSON-Format für die Visualisierung bereit"""
+    """
+    Stellt Topologiedaten im JSON-Format für die Visualisierung bereit
+
+    Ohne Parameter wird der aggregierte Baum bis zur Cluster-Ebene ausgeliefert.
+    Mit `?node=<moid>` (optional `offset` und `limit`) werden die Kinder eines
+    Knotens nachgeladen, `?refresh=1` erzwingt eine neue Inventarsammlung.
+    """
     if 'logged_in' not in session:
         return jsonify({'success': False, 'error': 'Nicht angemeldet'}), 401
     
-    # In einer echten Implementierung würden hier Daten vom vSphere-Client abgerufen
-    # Für die Demo verwenden wir Beispieldaten
-    if session.get('demo_mode', False):
-        # Beispieldaten für die Topologie
-        topology_data = {
-            "name": "vcenter.example.com",
-            "value": "vCenter Server 7.0.3",
-            "symbol": "rect",
-            "symbolSize": 30,
-            "itemStyle": {"color": "#00355e"},
-            "children": [
-                {
-                    "name": "Bechtle Datacenter",
-                    "symbol": "roundRect",
-                    "symbolSize": 25,
-                    "itemStyle": {"color": "#00355e"},
-                    "children": [
-                        {
-                            "name": "Produktion-Cluster",
-                            "value": "3 Hosts, 25 VMs",
-                            "symbol": "diamond",
-                            "symbolSize": 20,
-                            "itemStyle": {"color": "#da6f1e"},
-                            "children": [
-                                {
-                                    "name": "esx01.example.com",
-                                    "value": "32 Cores, 256 GB RAM",
-                                    "symbol": "circle",
-                                    "symbolSize": 15,
-                                    "itemStyle": {"color": "#23a96a"},
-                                    "children": [
-                                        {
-                                            "name": "web01.example.com",
-                                            "value": "4 vCPUs, 8 GB RAM, PoweredOn",
-                                            "symbol": "emptyCircle",
-                                            "symbolSize": 10,
-                                            "itemStyle": {"color": "#5a5a5a"}
-                                        },
-                                        {
-                                            "name": "web02.example.com",
-                                            "value": "4 vCPUs, 8 GB RAM, PoweredOn",
-                                            "symbol": "emptyCircle",
-                                            "symbolSize": 10,
-                                            "itemStyle": {"color": "#5a5a5a"}
-                                        }
-                                    ]
-                                },
-                                {
-                                    "name": "esx02.example.com",
-                                    "value": "32 Cores, 256 GB RAM",
-                                    "symbol": "circle",
-                                    "symbolSize": 15,
-                                    "itemStyle": {"color": "#23a96a"},
-                                    "children": [
-                                        {
-                                            "name": "db01.example.com",
-                                            "value": "8 vCPUs, 32 GB RAM, PoweredOn",
-                                            "symbol": "emptyCircle",
-                                            "symbolSize": 10,
-                                            "itemStyle": {"color": "#5a5a5a"}
-                                        }
-                                    ]
-                                }
-                            ]
-                        },
-                        {
-                            "name": "Test-Cluster",
-                            "value": "2 Hosts, 10 VMs",
-                            "symbol": "diamond",
-                            "symbolSize": 20,
-                            "itemStyle": {"color": "#da6f1e"},
-                            "children": [
-                                {
-                                    "name": "esx03.example.com",
-                                    "value": "16 Cores, 128 GB RAM",
-                                    "symbol": "circle",
-                                    "symbolSize": 15,
-                                    "itemStyle": {"color": "#23a96a"}
-                                }
-                            ]
-                        }
-                    ]
-                }
-            ]
-        }
-        return jsonify({"success": True, "data": topology_data})
-    else:
-        # Hier würde die Echtzeitdatensammlung implementiert
-        # Für diese Version verwenden wir erstmal nur Demo-Daten
-        return jsonify({"success": False, "error": "Echtzeit-Topologiedaten sind in dieser Version nur im Demo-Modus verfügbar"}), 500
+    node = request.args.get('node')
+    refresh = request.args.get('refresh') == '1'
+    
+    try:
+        # Inventar nur beim ersten Aufruf bzw. bei expliziter Aktualisierung sammeln,
+        # Nachlade-Anfragen arbeiten auf dem bereits aufgebauten Index
+        cached = not refresh and topology_generator.has_inventory()
+        record_cache('topology_inventory', cached)
+        if not cached:
+            inventory = vsphere_client.collect_topology_inventory()
+            if not inventory:
+                return jsonify({'success': False, 'error': 'Topologie-Inventar konnte nicht gesammelt werden'}), 500
+            topology_generator.load_inventory(inventory)
+        
+        if node:
+            offset = request.args.get('offset', 0, type=int)
+            limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+            children = topology_generator.expand_node(node, offset=offset, limit=limit)
+            if children is None:
+                return jsonify({'success': False, 'error': f'Unbekannter Knoten: {node}'}), 404
+            return jsonify({'success': True, 'data': children})
+        
+        return jsonify({'success': True, 'data': topology_generator.create_topology_tree()})
+    except Exception as e:
+        logger.error(f"Fehler beim Bereitstellen der Topologiedaten: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/topology-export')
+def topology_export():
+    """
+    Exportiert die Topologie als Offline-Paket (HTML und ECharts-Laufzeit als ZIP)
+
+    Das Paket wird im Berichtsverzeichnis erzeugt; die Laufzeit liegt dort nur einmal
+    und die Chart-Optionen werden für unveränderte Inventare aus dem Cache gelesen.
+    """
+    if 'logged_in' not in session:
+        flash('Bitte loggen Sie sich ein.', 'warning')
+        return redirect(url_for('index'))
+    
+    try:
+        cached = topology_generator.has_inventory()
+        record_cache('topology_inventory', cached)
+        if not cached:
+            inventory = vsphere_client.collect_topology_inventory()
+            if not inventory:
+                flash('Topologie-Inventar konnte nicht gesammelt werden.', 'danger')
+                return redirect(url_for('infrastructure_topology'))
+            topology_generator.load_inventory(inventory)
+        
+        report_dir = os.path.join(tempfile.gettempdir(), 'bechtle_vsphere_reports')
+        html_path = topology_generator.render_offline(report_dir)
+        
+        zip_path = os.path.splitext(html_path)[0] + '.zip'
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.write(html_path, os.path.basename(html_path))
+            assets_dir = os.path.join(report_dir, ASSETS_DIRNAME)
+            if os.path.isdir(assets_dir):
+                for filename in os.listdir(assets_dir):
+                    archive.write(os.path.join(assets_dir, filename), f'{ASSETS_DIRNAME}/{filename}')
+        
+        return send_file(
+            zip_path,
+            mimetype='application/zip',
+            as_attachment=True,
+            download_name=os.path.basename(zip_path)
+        )
+    except Exception as e:
+        logger.error(f"Fehler beim Offline-Export der Topologie: {str(e)}", exc_info=True)
+        flash(f'Fehler beim Export der Topologie: {str(e)}', 'danger')
+        return redirect(url_for('infrastructure_topology'))
 
 # API Endpunkte für Datenaktualisierung
 @app.route('/api/collect/vmware-tools', methods=['POST'])
@@ -448,6 +463,11 @@ def collect_vmdk_data():
         logger.error(f"Fehler bei der Sammlung von VMDK-Daten: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/metrics')
+def metrics():
+    """Betriebsmetriken im Prometheus-Textformat (ohne Anmeldung, enthält keine Inventardaten)"""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
 @app.route('/api/generate-report', methods=['POST'])
 def generate_report():
     """Generiert einen Bericht basierend auf den ausgewählten Optionen"""
@@ -455,6 +475,13 @@ def generate_report():
         flash('Bitte loggen Sie sich ein.', 'warning')
         return redirect(url_for('index'))
     
+    # Der gesamte Auftrag (Sammlung und Rendering) zählt als wartender Berichtsauftrag
+    with JOBS_IN_PROGRESS.track_inprogress(kind='report'):
+        return _generate_report()
+
+def _generate_report():
+    """Sammelt die Daten und erzeugt die Berichtsdateien für generate_report"""
+    
     # Berichtsoptionen aus dem Formular lesen
     include_sections = {
         'vmware_tools': 'include_vmware_tools' in request.form,
@@ -254,4 +254,36 @@ def get_demo_data():
         'snapshots_data': snapshots_data,
         'orphaned_vmdks': orphaned_vmdks,
         'raw_data': raw_data
-    }
\ No newline at end of file
+    }
+
+def get_demo_topology_inventory():
+    """
+    Erzeugt ein flaches Beispiel-Inventar für die Topologie-Visualisierung
+
+    Returns:
+        dict: Inventar mit Datacentern, Clustern, Hosts und VMs im Format des TopologyGenerators
+    """
+    gb = 1024 * 1024 * 1024
+
+    return {
+        'vcenter': {'name': 'vcenter.example.com', 'version': '7.0.3'},
+        'datacenters': [
+            {'moid': 'datacenter-1', 'name': 'Bechtle Datacenter'}
+        ],
+        'clusters': [
+            {'moid': 'domain-c10', 'name': 'Produktion-Cluster', 'parent': 'datacenter-1'},
+            {'moid': 'domain-c20', 'name': 'Test-Cluster', 'parent': 'datacenter-1'}
+        ],
+        'hosts': [
+            {'moid': 'host-11', 'name': 'esx01.example.com', 'parent': 'domain-c10', 'cpu_cores': 32, 'memory_size': 256 * gb},
+            {'moid': 'host-12', 'name': 'esx02.example.com', 'parent': 'domain-c10', 'cpu_cores': 32, 'memory_size': 256 * gb},
+            {'moid': 'host-21', 'name': 'esx03.example.com', 'parent': 'domain-c20', 'cpu_cores': 16, 'memory_size': 128 * gb}
+        ],
+        'vms': [
+            {'moid': 'vm-101', 'name': 'web01.example.com', 'host': 'host-11', 'power_state': 'poweredOn', 'template': False, 'num_cpu': 4, 'memory_mb': 8192},
+            {'moid': 'vm-102', 'name': 'web02.example.com', 'host': 'host-11', 'power_state': 'poweredOn', 'template': False, 'num_cpu': 4, 'memory_mb': 8192},
+            {'moid': 'vm-103', 'name': 'db01.example.com', 'host': 'host-12', 'power_state': 'poweredOn', 'template': False, 'num_cpu': 8, 'memory_mb': 32768},
+            {'moid': 'vm-104', 'name': 'Windows-Test-VM01', 'host': 'host-21', 'power_state': 'poweredOff', 'template': False, 'num_cpu': 2, 'memory_mb': 4096},
+            {'moid': 'vm-105', 'name': 'tpl-win2019', 'host': 'host-21', 'power_state': 'poweredOff', 'template': True, 'num_cpu': 2, 'memory_mb': 4096}
+        ]
+    }
@@ -0,0 +1,290 @@
+"""
+Bechtle vSphere Reporter v0.2 - Betriebsmetriken
+Modul für Laufzeitmetriken im Prometheus-Textformat
+
+Stellt Zähler, Messwerte und Histogramme für Sammeldauern, verarbeitete Objekte,
+Datastore-Suchen, Berichtserstellung, Cache-Trefferquoten sowie aktive Sitzungen
+und laufende Aufträge bereit. Die Ausgabe unter /metrics kann direkt von
+Prometheus abgefragt werden, eine zusätzliche Abhängigkeit wird nicht benötigt.
+
+© 2025 Bechtle GmbH - Alle Rechte vorbehalten
+"""
+
+import time
+import threading
+from functools import wraps
+from contextlib import contextmanager
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Bucket-Grenzen in Sekunden
+COLLECTION_BUCKETS = (0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+SEARCH_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+RENDER_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Web-Sitzungen ohne Anfrage in diesem Zeitraum gelten als inaktiv
+SESSION_TIMEOUT = 1800
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + list(extra or [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+class _Metric:
+    """Gemeinsame Basis für Metriken mit Labels"""
+
+    metric_type = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} erwartet die Labels {self.labelnames}, erhalten: {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.metric_type}']
+        lines.extend(self._samples())
+        return '\n'.join(lines)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}' for key, value in items]
+
+class Counter(_Metric):
+    """Monoton steigender Zähler"""
+
+    metric_type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+class Gauge(_Metric):
+    """Messwert, der steigen und fallen kann, optional aus einer Funktion gelesen"""
+
+    metric_type = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), function=None):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        """Erhöht den Wert für die Dauer des Blocks"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def _samples(self):
+        if self.function is not None:
+            return [f'{self.name} {_format_value(self.function())}']
+        return super()._samples()
+
+class Histogram(_Metric):
+    """Verteilung von Messwerten (z.B. Dauern) in kumulativen Buckets"""
+
+    metric_type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=RENDER_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry['counts'][index] += 1
+                    break
+            entry['sum'] += value
+            entry['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Misst die Dauer des Blocks, auch wenn er mit einer Ausnahme endet"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((key, dict(entry, counts=list(entry['counts']))) for key, entry in self._values.items())
+        lines = []
+        for key, entry in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry['counts']):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(float(bound)))])
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(round(entry["sum"], 6))}')
+            lines.append(f'{self.name}_count{labels} {entry["count"]}')
+        return lines
+
+class MetricsRegistry:
+    """Sammlung aller Metriken eines Prozesses"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=(), function=None):
+        return self.register(Gauge(name, documentation, labelnames, function))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=RENDER_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        """Alle Metriken im Prometheus-Textformat"""
+        return '\n'.join(metric.render() for metric in self._metrics) + '\n'
+
+class SessionTracker:
+    """Zählt Web-Sitzungen, die innerhalb des Timeouts aktiv waren"""
+
+    def __init__(self, timeout=SESSION_TIMEOUT):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._last_seen = {}
+
+    def touch(self, session_id):
+        with self._lock:
+            self._last_seen[session_id] = time.monotonic()
+
+    def end(self, session_id):
+        with self._lock:
+            self._last_seen.pop(session_id, None)
+
+    def active(self):
+        cutoff = time.monotonic() - self.timeout
+        with self._lock:
+            for session_id in [sid for sid, seen in self._last_seen.items() if seen < cutoff]:
+                del self._last_seen[session_id]
+            return len(self._last_seen)
+
+def count_objects(result):
+    """Anzahl der Objekte im Ergebnis einer Sammelmethode des VSphereClient"""
+    if isinstance(result, list):
+        return len(result)
+    if not isinstance(result, dict):
+        return 0
+    if isinstance(result.get('data'), list):
+        return len(result['data'])
+    # VMDK-Sammlung: alle gefundenen VMDK-Dateien zählen, nicht nur die verwaisten
+    raw_data = result.get('raw_data', result)
+    if isinstance(raw_data, dict) and isinstance(raw_data.get('all_vmdk_paths'), list):
+        return len(raw_data['all_vmdk_paths'])
+    if isinstance(result.get('orphaned_vmdks'), list):
+        return len(result['orphaned_vmdks'])
+    # Topologie-Inventar
+    return sum(len(result[key]) for key in ('datacenters', 'clusters', 'hosts', 'vms')
+               if isinstance(result.get(key), list))
+
+# Prozessweite Registry und Metriken
+REGISTRY = MetricsRegistry()
+SESSIONS = SessionTracker()
+
+COLLECTION_DURATION = REGISTRY.histogram(
+    'vsphere_reporter_collection_duration_seconds', 'Dauer der Datensammlung pro Berichtsabschnitt',
+    ['section'], COLLECTION_BUCKETS)
+COLLECTED_OBJECTS = REGISTRY.counter(
+    'vsphere_reporter_collected_objects_total', 'Gesammelte Objekte pro Berichtsabschnitt', ['section'])
+COLLECTION_ERRORS = REGISTRY.counter(
+    'vsphere_reporter_collection_errors_total', 'Fehlgeschlagene Datensammlungen pro Berichtsabschnitt', ['section'])
+DATASTORE_SEARCH_DURATION = REGISTRY.histogram(
+    'vsphere_reporter_datastore_search_duration_seconds', 'Dauer der Datastore-Browser-Suchen', ['result'],
+    SEARCH_BUCKETS)
+REPORT_RENDER_DURATION = REGISTRY.histogram(
+    'vsphere_reporter_report_render_duration_seconds', 'Dauer der Berichtserstellung pro Format', ['format'],
+    RENDER_BUCKETS)
+REPORT_RENDER_ERRORS = REGISTRY.counter(
+    'vsphere_reporter_report_render_errors_total', 'Fehlgeschlagene Berichtserstellungen pro Format', ['format'])
+CACHE_REQUESTS = REGISTRY.counter(
+    'vsphere_reporter_cache_requests_total', 'Cache-Zugriffe nach Cache und Ergebnis (hit/miss)', ['cache', 'result'])
+JOBS_IN_PROGRESS = REGISTRY.gauge(
+    'vsphere_reporter_jobs_in_progress', 'Laufende oder wartende Sammel- und Berichtsaufträge', ['kind'])
+ACTIVE_SESSIONS = REGISTRY.gauge(
+    'vsphere_reporter_active_sessions', f'Web-Sitzungen mit Aktivität in den letzten {SESSION_TIMEOUT} Sekunden',
+    function=SESSIONS.active)
+VCENTER_CONNECTED = REGISTRY.gauge(
+    'vsphere_reporter_vcenter_connected', 'Verbindung zum vCenter besteht (1) oder nicht (0)')
+VCENTER_CONNECTED.set(0)
+
+def track_collection(section):
+    """
+    Decorator für Sammelmethoden: misst Dauer, gesammelte Objekte und Fehler
+
+    Die Sammelmethoden fangen ihre Ausnahmen selbst ab und geben dann leere oder
+    unvollständige Daten zurück. Als erfolgreich zählt ein Aufruf deshalb nur,
+    wenn er den Abschnitt in collection_status des Clients als erledigt markiert.
+
+    Args:
+        section (str): Name des Berichtsabschnitts für das Label
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(client, *args, **kwargs):
+            status = getattr(client, 'collection_status', None)
+            if status is not None:
+                status[section] = False
+            with JOBS_IN_PROGRESS.track_inprogress(kind='collection'), COLLECTION_DURATION.time(section=section):
+                result = func(client, *args, **kwargs)
+            failed = result is None or (status is not None and not status.get(section))
+            if failed:
+                COLLECTION_ERRORS.inc(section=section)
+            else:
+                COLLECTED_OBJECTS.inc(count_objects(result), section=section)
+            return result
+        return wrapper
+    return decorator
+
+def record_cache(cache, hit):
+    """Zählt einen Cache-Treffer oder -Fehlschlag"""
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
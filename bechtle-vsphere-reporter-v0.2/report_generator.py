@@ -23,6 +23,8 @@ from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
 
+from metrics import REPORT_RENDER_DURATION, REPORT_RENDER_ERRORS
+
 # Konfiguriere Logging
 logger = logging.getLogger(__name__)
 
@@ -85,18 +87,22 @@ class ReportGenerator:
         
         # Generiere Berichte in den ausgewählten Formaten
         generated_files = {}
-        
-        if export_formats.get('html', False):
-            html_path = self._generate_html_report(report_data, include_sections)
-            generated_files['html'] = html_path
-        
-        if export_formats.get('pdf', False):
-            pdf_path = self._generate_pdf_report(report_data, include_sections)
-            generated_files['pdf'] = pdf_path
-        
-        if export_formats.get('docx', False):
-            docx_path = self._generate_docx_report(report_data, include_sections)
-            generated_files['docx'] = docx_path
+        renderers = [
+            ('html', self._generate_html_report),
+            ('pdf', self._generate_pdf_report),
+            ('docx', self._generate_docx_report)
+        ]
+        
+        for report_format, render in renderers:
+            if not export_formats.get(report_format, False):
+                continue
+            # Renderdauer pro Format für /metrics erfassen, Fehler separat zählen
+            with REPORT_RENDER_DURATION.time(format=report_format):
+                try:
+                    generated_files[report_format] = render(report_data, include_sections)
+                except Exception:
+                    REPORT_RENDER_ERRORS.inc(format=report_format)
+                    raise
         
         return generated_files
     
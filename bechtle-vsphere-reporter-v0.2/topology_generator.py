@@ -0,0 +1,509 @@
+"""
+Bechtle vSphere Reporter v0.2 - Topologie-Generator
+Hierarchische Aggregation der vSphere-Infrastruktur für die Topologie-Visualisierung
+
+Statt alle Objekte auf einmal an ECharts zu übergeben (was bei tausenden Knoten
+den Browser blockiert), werden Cluster und Hosts mit vorberechneten Kennzahlen
+(VM-Anzahl, Power-States, CPU- und RAM-Summen) ausgeliefert. Die Kinder eines
+Knotens werden erst beim Aufklappen über `/api/topology-data?node=<moid>`
+nachgeladen, so dass der gesamte Baum durchsuchbar bleibt.
+
+© 2025 Bechtle GmbH - Alle Rechte vorbehalten
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import logging
+from datetime import datetime
+
+from metrics import record_cache
+
+# Bechtle-Farben
+BECHTLE_COLORS = {
+    'dark_blue': '#00355e',
+    'orange': '#da6f1e',
+    'green': '#23a96a',
+    'light_gray': '#f3f3f3',
+    'dark_gray': '#5a5a5a'
+}
+
+# Node-Typen mit Symbolen, Farben und Größen
+NODE_TYPES = {
+    'vcenter': {'symbol': 'rect', 'color': BECHTLE_COLORS['dark_blue'], 'size': 30, 'name': 'vCenter'},
+    'datacenter': {'symbol': 'roundRect', 'color': BECHTLE_COLORS['dark_blue'], 'size': 25, 'name': 'Datacenter'},
+    'cluster': {'symbol': 'diamond', 'color': BECHTLE_COLORS['orange'], 'size': 20, 'name': 'Cluster'},
+    'host': {'symbol': 'circle', 'color': BECHTLE_COLORS['green'], 'size': 15, 'name': 'Host'},
+    'vm': {'symbol': 'emptyCircle', 'color': BECHTLE_COLORS['dark_gray'], 'size': 10, 'name': 'VM'},
+    'template': {'symbol': 'pin', 'color': BECHTLE_COLORS['dark_gray'], 'size': 10, 'name': 'Template'},
+    'unassigned': {'symbol': 'roundRect', 'color': BECHTLE_COLORS['light_gray'], 'size': 20, 'name': 'Nicht zugeordnet'},
+    'more': {'symbol': 'rect', 'color': BECHTLE_COLORS['light_gray'], 'size': 10, 'name': 'Weitere'}
+}
+
+# Standardwerte für die Aggregation
+DEFAULT_INITIAL_DEPTH = 2   # vCenter -> Datacenter -> Cluster werden sofort ausgeliefert
+DEFAULT_PAGE_SIZE = 200     # Maximale Anzahl Kinder pro Nachlade-Anfrage
+
+POWER_STATES = ('poweredOn', 'poweredOff', 'suspended')
+
+# Sammelknoten unter dem vCenter für Objekte ohne auflösbaren Elternknoten
+UNASSIGNED_ID = 'unassigned'
+
+# Mitgelieferte ECharts-Laufzeit (dist/echarts.min.js von ECharts 5.4.3 unter static/js),
+# wird von der Web-Oberfläche und vom Offline-Export ohne Netzwerkzugriff genutzt
+ECHARTS_FILENAME = 'echarts.min.js'
+ECHARTS_STATIC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'js', ECHARTS_FILENAME)
+
+# Verzeichnisse innerhalb eines Berichtsverzeichnisses
+ASSETS_DIRNAME = 'assets'
+CACHE_DIRNAME = '.topology_cache'
+
+OFFLINE_HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="de">
+<head>
+    <meta charset="utf-8">
+    <title>{title}</title>
+    <script src="{script_src}"></script>
+</head>
+<body style="margin: 0; font-family: Arial, sans-serif;">
+    <div id="topology-chart" style="width: 100%; height: 100vh;"></div>
+    <script>
+        var chart = echarts.init(document.getElementById('topology-chart'));
+        chart.setOption({option_json});
+        window.addEventListener('resize', function() {{ chart.resize(); }});
+    </script>
+</body>
+</html>
+"""
+
+
+class TopologyGenerator:
+    """Erzeugt eine aggregierte, nachladbare Topologie der vSphere-Umgebung"""
+
+    def __init__(self):
+        """Initialisiert den Topologie-Generator"""
+        self.logger = logging.getLogger('vsphere_reporter')
+        self.nodes = {}
+        self.children = {}
+        self.root_id = None
+        self.inventory_hash = None
+
+    def has_inventory(self):
+        """Gibt zurück, ob bereits ein Inventar geladen wurde"""
+        return self.root_id is not None
+
+    def reset(self):
+        """Verwirft das geladene Inventar, z.B. nach einem Verbindungswechsel"""
+        self.nodes = {}
+        self.children = {}
+        self.root_id = None
+        self.inventory_hash = None
+
+    def load_inventory(self, inventory):
+        """
+        Baut den Index über das Inventar auf und berechnet alle Rollups einmalig
+
+        Args:
+            inventory (dict): Flaches Inventar mit den Listen 'datacenters', 'clusters',
+                'hosts' und 'vms'. Jeder Eintrag trägt seine 'moid' und die 'parent'-MoID
+                (bei VMs: 'host').
+        """
+        self.nodes = {}
+        self.children = {}
+
+        # Hash über das Inventar als Schlüssel für den Cache der Chart-Optionen
+        canonical = json.dumps(inventory, sort_keys=True, default=str)
+        self.inventory_hash = hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+        vcenter = inventory.get('vcenter', {})
+        self.root_id = 'vcenter'
+        self._add_node(self.root_id, 'vcenter', vcenter.get('name', 'vCenter Server'), None)
+        self.nodes[self.root_id]['version'] = vcenter.get('version', 'N/A')
+
+        for dc in inventory.get('datacenters', []):
+            self._add_node(dc['moid'], 'datacenter', dc.get('name'), self.root_id)
+
+        for cluster in inventory.get('clusters', []):
+            self._add_node(cluster['moid'], 'cluster', cluster.get('name'), cluster.get('parent'))
+
+        for host in inventory.get('hosts', []):
+            node = self._add_node(host['moid'], 'host', host.get('name'), host.get('parent'))
+            node['cpu_cores'] = host.get('cpu_cores', 0) or 0
+            node['memory_bytes'] = host.get('memory_size', 0) or 0
+
+        for vm in inventory.get('vms', []):
+            node_type = 'template' if vm.get('template') else 'vm'
+            node = self._add_node(vm['moid'], node_type, vm.get('name'), vm.get('host'))
+            node['power_state'] = vm.get('power_state', 'unknown')
+            node['num_cpu'] = vm.get('num_cpu', 0) or 0
+            node['memory_mb'] = vm.get('memory_mb', 0) or 0
+
+        # Kinder nach Namen sortieren, damit die Paginierung stabil bleibt
+        for child_ids in self.children.values():
+            child_ids.sort(key=lambda moid: (self.nodes[moid]['type'], (self.nodes[moid]['name'] or '').lower()))
+
+        self._compute_rollup(self.root_id)
+
+        self.logger.info(
+            f"Topologie-Index aufgebaut: {len(self.nodes)} Knoten, "
+            f"{self.nodes[self.root_id]['rollup']['vm_count']} VMs"
+        )
+
+    def _add_node(self, moid, node_type, name, parent_id):
+        """Registriert einen Knoten im Index"""
+        # Objekte ohne (bekannten) Elternknoten, z.B. VMs ohne runtime.host, kommen in einen
+        # Sammelknoten unter dem vCenter, damit sie im Baum und in den Summen nicht fehlen
+        if moid != self.root_id and (parent_id is None or parent_id not in self.nodes):
+            if UNASSIGNED_ID not in self.nodes:
+                self._add_node(UNASSIGNED_ID, 'unassigned', NODE_TYPES['unassigned']['name'], self.root_id)
+            parent_id = UNASSIGNED_ID
+
+        node = {
+            'moid': moid,
+            'type': node_type,
+            'name': name or moid,
+            'parent': parent_id
+        }
+        self.nodes[moid] = node
+        if parent_id is not None:
+            self.children.setdefault(parent_id, []).append(moid)
+        return node
+
+    def _compute_rollup(self, moid):
+        """
+        Berechnet die Kennzahlen eines Knotens rekursiv (Bottom-up)
+
+        Returns:
+            dict: Rollup des Knotens
+        """
+        node = self.nodes[moid]
+        rollup = {
+            'vm_count': 0,
+            'template_count': 0,
+            'host_count': 0,
+            'cluster_count': 0,
+            'power_states': {state: 0 for state in POWER_STATES},
+            'vcpu_total': 0,
+            'vm_memory_mb_total': 0,
+            'host_cpu_cores_total': 0,
+            'host_memory_bytes_total': 0
+        }
+
+        if node['type'] == 'vm':
+            rollup['vm_count'] = 1
+            state = node.get('power_state')
+            rollup['power_states'][state] = rollup['power_states'].get(state, 0) + 1
+            rollup['vcpu_total'] = node['num_cpu']
+            rollup['vm_memory_mb_total'] = node['memory_mb']
+        elif node['type'] == 'template':
+            rollup['template_count'] = 1
+        elif node['type'] == 'host':
+            rollup['host_count'] = 1
+            rollup['host_cpu_cores_total'] = node['cpu_cores']
+            rollup['host_memory_bytes_total'] = node['memory_bytes']
+        elif node['type'] == 'cluster':
+            rollup['cluster_count'] = 1
+
+        for child_id in self.children.get(moid, []):
+            child_rollup = self._compute_rollup(child_id)
+            for key, value in child_rollup.items():
+                if key == 'power_states':
+                    for state, count in value.items():
+                        rollup['power_states'][state] = rollup['power_states'].get(state, 0) + count
+                else:
+                    rollup[key] += value
+
+        node['rollup'] = rollup
+        return rollup
+
+    def create_topology_tree(self, filter_options=None):
+        """
+        Erstellt den aggregierten Topologie-Baum für die Erstanzeige
+
+        Args:
+            filter_options (dict): Optionen, z.B. {'initial_depth': 2, 'page_size': 200}
+
+        Returns:
+            dict: Wurzelknoten im ECharts-Tree-Format, tiefere Ebenen werden nachgeladen
+        """
+        if not self.has_inventory():
+            raise ValueError("Es wurde noch kein Topologie-Inventar geladen")
+
+        filter_options = filter_options or {}
+        depth = filter_options.get('initial_depth', DEFAULT_INITIAL_DEPTH)
+        page_size = filter_options.get('page_size', DEFAULT_PAGE_SIZE)
+
+        return self._build_chart_node(self.root_id, depth, page_size)
+
+    def expand_node(self, moid, offset=0, limit=DEFAULT_PAGE_SIZE):
+        """
+        Liefert die Kinder eines Knotens für das Nachladen im Browser
+
+        Args:
+            moid (str): MoID des aufzuklappenden Knotens
+            offset (int): Startposition innerhalb der Kinderliste
+            limit (int): Maximale Anzahl zurückgegebener Kinder
+
+        Returns:
+            dict: {'node', 'children', 'total', 'next_offset'} oder None, wenn der Knoten unbekannt ist
+        """
+        if moid not in self.nodes:
+            return None
+
+        child_ids = self.children.get(moid, [])
+        offset = max(0, offset)
+        limit = max(1, limit)
+        page = child_ids[offset:offset + limit]
+        next_offset = offset + limit if offset + limit < len(child_ids) else None
+
+        children = [self._build_chart_node(child_id, 0, limit) for child_id in page]
+        if next_offset is not None:
+            children.append(self._more_node(moid, next_offset, len(child_ids)))
+
+        return {
+            'node': moid,
+            'children': children,
+            'total': len(child_ids),
+            'next_offset': next_offset
+        }
+
+    def get_chart_option(self, filter_options=None, cache_dir=None):
+        """
+        Liefert die vollständige ECharts-Option für den Offline-Export als JSON
+
+        Für Offline-Berichte gibt es keinen Server zum Nachladen, daher enthält die Option
+        alle Knoten; Ebenen unterhalb der Starttiefe sind eingeklappt. Das Ergebnis wird
+        pro Inventar-Hash im Cache-Verzeichnis abgelegt, unveränderte Topologien werden
+        nicht erneut aufgebaut.
+
+        Args:
+            filter_options (dict): Optionen, z.B. {'initial_depth': 2}
+            cache_dir (str): Verzeichnis für den Options-Cache (optional)
+
+        Returns:
+            str: Serialisierte ECharts-Option
+        """
+        if not self.has_inventory():
+            raise ValueError("Es wurde noch kein Topologie-Inventar geladen")
+
+        filter_options = filter_options or {}
+        depth = filter_options.get('initial_depth', DEFAULT_INITIAL_DEPTH)
+
+        cache_path = None
+        if cache_dir:
+            cache_path = os.path.join(cache_dir, f"{self.inventory_hash[:16]}_d{depth}.json")
+            cached = os.path.exists(cache_path)
+            record_cache('topology_chart_option', cached)
+            if cached:
+                self.logger.info(f"Topologie unverändert, verwende zwischengespeicherte Chart-Optionen: {cache_path}")
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    return f.read()
+
+        option = {
+            'tooltip': {'trigger': 'item', 'formatter': '{b}: {c}'},
+            'series': [{
+                'type': 'tree',
+                'data': [self._build_static_node(self.root_id, depth)],
+                'top': '5%',
+                'bottom': '5%',
+                'layout': 'orthogonal',
+                'orient': 'vertical',
+                'initialTreeDepth': -1,
+                'expandAndCollapse': True,
+                'emphasis': {'focus': 'descendant'},
+                'label': {'position': 'top', 'verticalAlign': 'middle', 'align': 'right', 'fontSize': 12},
+                'leaves': {'label': {'position': 'right', 'verticalAlign': 'middle', 'align': 'left'}},
+                'animationDuration': 550,
+                'animationDurationUpdate': 750
+            }]
+        }
+        option_json = json.dumps(option, ensure_ascii=False, separators=(',', ':'))
+
+        if cache_path:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f"{cache_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(option_json)
+            os.replace(tmp_path, cache_path)
+
+        return option_json
+
+    def render_offline(self, output_dir, filter_options=None):
+        """
+        Schreibt die Topologie als eigenständige HTML-Datei ohne CDN-Abhängigkeit
+
+        Die mitgelieferte ECharts-Laufzeit wird einmal pro Berichtsverzeichnis unter `assets/`
+        abgelegt und von allen Topologie-Dateien darin gemeinsam genutzt.
+
+        Args:
+            output_dir (str): Zielverzeichnis des Berichts
+            filter_options (dict): Optionen, z.B. {'initial_depth': 2}
+
+        Returns:
+            str: Pfad zur erzeugten HTML-Datei
+        """
+        os.makedirs(output_dir, exist_ok=True)
+
+        option_json = self.get_chart_option(filter_options, cache_dir=os.path.join(output_dir, CACHE_DIRNAME))
+
+        self.ensure_echarts_runtime(output_dir)
+        script_src = f"{ASSETS_DIRNAME}/{ECHARTS_FILENAME}"
+
+        title = f"Infrastruktur-Topologie - {self.nodes[self.root_id]['name']}"
+        html_content = OFFLINE_HTML_TEMPLATE.format(
+            title=title,
+            script_src=script_src,
+            # '</' maskieren, damit Objektnamen den Script-Block nicht beenden können
+            option_json=option_json.replace('</', '<\\/')
+        )
+
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        file_path = os.path.join(output_dir, f'vsphere_topology_{timestamp}.html')
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(html_content)
+
+        self.logger.info(f"Offline-Topologie gespeichert unter: {file_path}")
+        return file_path
+
+    def ensure_echarts_runtime(self, output_dir):
+        """
+        Stellt die ECharts-Laufzeit im Berichtsverzeichnis bereit
+
+        Die Datei wird aus static/js übernommen. Ist sie im Berichtsverzeichnis bereits
+        identisch vorhanden, wird sie nicht erneut kopiert.
+
+        Args:
+            output_dir (str): Zielverzeichnis des Berichts
+
+        Returns:
+            str: Pfad der Laufzeit im Berichtsverzeichnis
+        """
+        target_path = os.path.join(output_dir, ASSETS_DIRNAME, ECHARTS_FILENAME)
+        if os.path.exists(target_path) and self._file_digest(target_path) == self._file_digest(ECHARTS_STATIC_PATH):
+            return target_path
+
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        shutil.copyfile(ECHARTS_STATIC_PATH, target_path)
+        return target_path
+
+    def _file_digest(self, path):
+        """Berechnet den SHA-256-Hash einer Datei"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(65536), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _build_static_node(self, moid, depth):
+        """Erzeugt einen ECharts-Knoten mit allen Kindern, tiefere Ebenen eingeklappt"""
+        node = self.nodes[moid]
+        node_type = NODE_TYPES[node['type']]
+        child_ids = self.children.get(moid, [])
+
+        chart_node = {
+            'name': node['name'],
+            'value': self._format_summary(node),
+            'symbol': node_type['symbol'],
+            'symbolSize': node_type['size'],
+            'itemStyle': {'color': node_type['color']}
+        }
+
+        if child_ids:
+            chart_node['children'] = [self._build_static_node(child_id, depth - 1) for child_id in child_ids]
+            if depth <= 0:
+                chart_node['collapsed'] = True
+
+        return chart_node
+
+    def _build_chart_node(self, moid, depth, page_size):
+        """Erzeugt einen ECharts-Knoten inkl. Rollup, Kinder nur bis zur angegebenen Tiefe"""
+        node = self.nodes[moid]
+        node_type = NODE_TYPES[node['type']]
+        child_ids = self.children.get(moid, [])
+
+        chart_node = {
+            'name': node['name'],
+            'value': self._format_summary(node),
+            'moid': moid,
+            'nodeType': node['type'],
+            'symbol': node_type['symbol'],
+            'symbolSize': node_type['size'],
+            'itemStyle': {'color': node_type['color']}
+        }
+
+        if not child_ids:
+            return chart_node
+
+        # Rollups nur für Container-Knoten ausliefern, VMs tragen ihre Werte bereits in 'value'
+        chart_node['rollup'] = node['rollup']
+        chart_node['childCount'] = len(child_ids)
+
+        if depth > 0:
+            chart_node['children'] = [
+                self._build_chart_node(child_id, depth - 1, page_size)
+                for child_id in child_ids[:page_size]
+            ]
+            if len(child_ids) > page_size:
+                chart_node['children'].append(self._more_node(moid, page_size, len(child_ids)))
+        else:
+            # Kinder werden erst beim Aufklappen geladen
+            chart_node['lazy'] = True
+            chart_node['collapsed'] = True
+            chart_node['children'] = []
+
+        return chart_node
+
+    def _more_node(self, parent_id, next_offset, total):
+        """Platzhalter-Knoten für die nächste Seite an Kindern"""
+        return {
+            'name': f"... {total - next_offset} weitere",
+            'moid': parent_id,
+            'nodeType': 'more',
+            'offset': next_offset,
+            'symbol': NODE_TYPES['more']['symbol'],
+            'symbolSize': NODE_TYPES['more']['size'],
+            'itemStyle': {'color': NODE_TYPES['more']['color']}
+        }
+
+    def _format_summary(self, node):
+        """Formatiert die Tooltip-Zusammenfassung eines Knotens"""
+        rollup = node['rollup']
+        power = rollup['power_states']
+
+        if node['type'] == 'vcenter':
+            return (f"vCenter Server {node.get('version', 'N/A')}, {rollup['host_count']} Hosts, "
+                    f"{rollup['vm_count']} VMs")
+        if node['type'] in ('datacenter', 'cluster', 'unassigned'):
+            return (f"{rollup['host_count']} Hosts, {rollup['vm_count']} VMs "
+                    f"({power.get('poweredOn', 0)} an, {power.get('poweredOff', 0)} aus), "
+                    f"{rollup['vcpu_total']} vCPUs, {self._format_size(rollup['vm_memory_mb_total'] * 1024 * 1024)} vRAM")
+        if node['type'] == 'host':
+            return (f"{node['cpu_cores']} Cores, {self._format_size(node['memory_bytes'])} RAM, "
+                    f"{rollup['vm_count']} VMs ({power.get('poweredOn', 0)} an)")
+        if node['type'] == 'template':
+            return f"Template, {node['num_cpu']} vCPUs, {node['memory_mb']} MB RAM"
+        return f"{node['num_cpu']} vCPUs, {node['memory_mb']} MB RAM, {node['power_state']}"
+
+    def _format_size(self, size_bytes):
+        """
+        Formatiert Byte-Größen in menschenlesbare Form
+
+        Args:
+            size_bytes: Größe in Bytes
+
+        Returns:
+            str: Formatierte Größe
+        """
+        if not size_bytes:
+            return "0 B"
+
+        units = ['B', 'KB', 'MB', 'GB', 'TB', 'PB']
+        size = float(size_bytes)
+        unit_index = 0
+
+        while size >= 1024 and unit_index < len(units) - 1:
+            size /= 1024
+            unit_index += 1
+
+        return f"{round(size, 2)} {units[unit_index]}"
@@ -17,6 +17,43 @@ try:
 except ImportError:
     print("PyVmomi nicht gefunden. Bitte installieren Sie: pip install pyvmomi>=7.0.0")
 
+from metrics import track_collection, DATASTORE_SEARCH_DURATION, VCENTER_CONNECTED
+
+# VM-Properties für den VMware-Tools-Bericht
+TOOLS_PROPERTIES = [
+    'name',
+    'config.template',
+    'runtime.powerState',
+    'guest.toolsVersion',
+    'guest.toolsVersionStatus2',
+    'guest.toolsRunningStatus',
+    'guest.guestFullName'
+]
+
+# guest.toolsVersionStatus2 -> bisherige toolsVersionStatus-Werte für die Darstellung
+TOOLS_VERSION_STATUS = {
+    'guestToolsCurrent': 'guestToolsCurrent',
+    'guestToolsSupportedNew': 'guestToolsCurrent',
+    'guestToolsTooNew': 'guestToolsCurrent',
+    'guestToolsNeedUpgrade': 'guestToolsNeedUpgrade',
+    'guestToolsSupportedOld': 'guestToolsNeedUpgrade',
+    'guestToolsTooOld': 'guestToolsNeedUpgrade',
+    'guestToolsBlacklisted': 'guestToolsNeedUpgrade',
+    'guestToolsNotInstalled': 'guestToolsNotInstalled',
+    'guestToolsUnmanaged': 'guestToolsUnmanaged'
+}
+
+# MoRef-ID-Präfix -> vim-Typ, für Scopes als MoRef-ID (z.B. domain-c7)
+MOREF_PREFIXES = [
+    ('datacenter-', 'Datacenter'),
+    ('domain-c', 'ClusterComputeResource'),
+    ('domain-s', 'ComputeResource'),
+    ('resgroup-v', 'VirtualApp'),
+    ('resgroup-', 'ResourcePool'),
+    ('group-', 'Folder'),
+    ('host-', 'HostSystem')
+]
+
 class VSphereClient:
     """vSphere-Client für den Zugriff auf vCenter-APIs"""
     
@@ -31,12 +68,14 @@ class VSphereClient:
         self.error_log = []
         self.raw_data = {}
         self.demo_mode = False
+        self.scope = []  # Container (Datacenter, Cluster, Ordner, ...), auf die die Sammlung beschränkt ist
         
         # Statusanzeige für erfolgreiche Datensammlungen
         self.collection_status = {
             'vmware_tools': False,
             'snapshots': False,
-            'orphaned_vmdks': False
+            'orphaned_vmdks': False,
+            'topology': False
         }
         
     def set_demo_mode(self, mode):
@@ -64,16 +103,18 @@ class VSphereClient:
             self.logger.error(f"Exception: {str(exception)}")
             self.logger.debug(f"Stacktrace: {traceback.format_exc()}")
 
-    def connect_to_server(self, host, username, password, port=443, disable_ssl_verification=True):
-        """Verbindung zum vCenter-Server herstellen"""
+    def connect_to_server(self, host, username, password, port=443, disable_ssl_verification=True, protocol='https'):
+        """Verbindung zum vCenter-Server herstellen (protocol='http' für den lokalen Simulator)"""
         if not host or not username or not password:
             self.log_error("Verbindungsdaten sind unvollständig")
             return False
         
+        self.scope = []
         self.connection_info = {
             'host': host,
             'username': username,
             'port': port,
+            'protocol': protocol,
             'disable_ssl_verification': disable_ssl_verification
         }
         
@@ -93,6 +134,7 @@ class VSphereClient:
                 user=username,
                 pwd=password,
                 port=port,
+                protocol=protocol,
                 sslContext=context,
                 connectionPoolTimeout=180
             )
@@ -109,6 +151,7 @@ class VSphereClient:
             about = self.content.about
             self.logger.info(f"Erfolgreich verbunden mit {host} - {about.fullName}")
             self.connected = True
+            VCENTER_CONNECTED.set(1)
             return True
             
         except vim.fault.InvalidLogin as e:
@@ -121,12 +164,70 @@ class VSphereClient:
             self.log_error(f"Unerwarteter Fehler bei Verbindung zu {host}", e)
             return False
 
+    def set_scope(self, entries):
+        """
+        Beschränkt die Sammlung auf Teilbäume des Inventars
+
+        Args:
+            entries (list): Inventarpfade (z.B. "DC-01/host/Cluster-01") oder MoRef-IDs
+                            (z.B. "domain-c7"); leer für das gesamte Inventar
+
+        Returns:
+            bool: True, wenn alle Einträge aufgelöst werden konnten
+        """
+        scope = []
+        for entry in entries or []:
+            entry = entry.strip()
+            if not entry:
+                continue
+            try:
+                type_name = next((name for prefix, name in MOREF_PREFIXES
+                                  if entry.startswith(prefix) and entry[len(prefix):].isdigit()), None)
+                if type_name:
+                    obj = getattr(vim, type_name)(entry, self.service_instance._stub)
+                else:
+                    obj = self.content.searchIndex.FindByInventoryPath(entry.strip('/'))
+                if obj is None or not isinstance(obj, (vim.Folder, vim.Datacenter, vim.ComputeResource,
+                                                       vim.ResourcePool, vim.HostSystem)):
+                    self.log_error(f"Scope {entry} ist kein Ordner, Datacenter, Cluster, Ressourcenpool oder Host")
+                    return False
+                self.logger.info(f"Sammlung beschränkt auf {entry} ({obj.name})")
+                scope.append(obj)
+            except vmodl.fault.ManagedObjectNotFound as e:
+                self.log_error(f"Scope {entry} nicht gefunden", e)
+                return False
+
+        self.scope = scope
+        self.connection_info['scope'] = [entry.strip() for entry in entries or [] if entry.strip()]
+        return True
+
+    def _scope_roots(self):
+        """Startpunkte der ContainerViews: der Scope oder der Root-Ordner"""
+        return self.scope or [self.content.rootFolder]
+
+    def _scope_objects(self, obj_types):
+        """Alle Objekte der Typen unterhalb der Scope-Container (ohne Duplikate)"""
+        objects = {}
+        for root in self._scope_roots():
+            container = self.content.viewManager.CreateContainerView(
+                container=root,
+                type=obj_types,
+                recursive=True
+            )
+            try:
+                for obj in container.view:
+                    objects.setdefault(obj._moId, obj)
+            finally:
+                container.Destroy()
+        return list(objects.values())
+
     def disconnect(self):
         """Trennen vom vCenter-Server"""
         if self.service_instance:
             connect.Disconnect(self.service_instance)
             self.logger.info("Verbindung zum vCenter getrennt")
             self.connected = False
+            VCENTER_CONNECTED.set(0)
             self.service_instance = None
             self.content = None
 
@@ -153,6 +254,7 @@ class VSphereClient:
             self.log_error(f"Fehler beim Warten auf Task", e)
             return None
             
+    @track_collection('vmware_tools')
     def collect_vmware_tools_status(self):
         """Sammle Informationen über VMware-Tools-Status"""
         if not self.connected and not self.demo_mode:
@@ -167,35 +269,29 @@ class VSphereClient:
                 self.collection_status['vmware_tools'] = True
                 return {"demo": True, "data": get_demo_data().get('vmware_tools_data', [])}
                 
-            # Container für VM-Objekte erstellen
-            container = self.content.viewManager.CreateContainerView(
-                container=self.content.rootFolder,
-                type=[vim.VirtualMachine],
-                recursive=True
-            )
-            
-            vms = container.view
-            container.Destroy()
+            # Nur die benötigten Properties aller VMs in einem seitenweisen Aufruf,
+            # statt vm.runtime und vm.guest (mit allen Gast-NICs, IP-Stacks und Disks) pro VM
+            vms = self._retrieve_properties([vim.VirtualMachine], {vim.VirtualMachine: TOOLS_PROPERTIES})
             
             tools_status_data = []
             
-            for vm in vms:
+            for vm, props in vms:
                 try:
                     # Nur eingeschaltete VMs berücksichtigen
-                    if vm.runtime.powerState != vim.VirtualMachine.PowerState.poweredOn:
-                        continue
-                        
-                    if not vm.guest:
+                    if props.get('config.template') or \
+                            props.get('runtime.powerState') != vim.VirtualMachine.PowerState.poweredOn:
                         continue
                         
+                    version_status = props.get('guest.toolsVersionStatus2')
+                    
                     # Informationen sammeln
                     tools_info = {
-                        'name': vm.name,
-                        'tools_version': vm.guest.toolsVersion if vm.guest.toolsVersion else 'Nicht installiert',
-                        'tools_status': vm.guest.toolsVersionStatus if vm.guest.toolsVersionStatus else 'Unbekannt',
-                        'tools_running_status': vm.guest.toolsRunningStatus if vm.guest.toolsRunningStatus else 'Unbekannt',
+                        'name': props.get('name'),
+                        'tools_version': props.get('guest.toolsVersion') or 'Nicht installiert',
+                        'tools_status': TOOLS_VERSION_STATUS.get(version_status, version_status or 'Unbekannt'),
+                        'tools_running_status': props.get('guest.toolsRunningStatus') or 'Unbekannt',
                         'last_update': '',
-                        'os': vm.guest.guestFullName if vm.guest.guestFullName else 'Unbekannt'
+                        'os': props.get('guest.guestFullName') or 'Unbekannt'
                     }
                     
                     # Farbkodierung basierend auf Status
@@ -225,7 +321,7 @@ class VSphereClient:
                     
                     tools_status_data.append(tools_info)
                 except Exception as e:
-                    self.log_error(f"Fehler beim Sammeln von VMware-Tools-Daten für VM {vm.name}", e)
+                    self.log_error(f"Fehler beim Sammeln von VMware-Tools-Daten für VM {props.get('name', vm._moId)}", e)
             
             # Nach VMware-Tools-Version sortieren (älteste zuerst)
             tools_status_data.sort(
@@ -239,6 +335,7 @@ class VSphereClient:
             self.log_error("Fehler beim Sammeln der VMware-Tools-Statusinformationen", e)
             return []
             
+    @track_collection('snapshots')
     def collect_snapshot_info(self):
         """Sammle Informationen über VM-Snapshots"""
         if not self.connected and not self.demo_mode:
@@ -253,15 +350,8 @@ class VSphereClient:
                 self.collection_status['snapshots'] = True
                 return {"demo": True, "data": get_demo_data().get('snapshots_data', [])}
                 
-            # Container für VM-Objekte erstellen
-            container = self.content.viewManager.CreateContainerView(
-                container=self.content.rootFolder,
-                type=[vim.VirtualMachine],
-                recursive=True
-            )
-            
-            vms = container.view
-            container.Destroy()
+            # VM-Objekte im Scope
+            vms = self._scope_objects([vim.VirtualMachine])
             
             snapshot_data = []
             now = datetime.now()
@@ -355,6 +445,7 @@ class VSphereClient:
                 self.log_error(f"Fehler bei der Verarbeitung eines Snapshots für VM {vm.name}", e)
                 continue
 
+    @track_collection('orphaned_vmdks')
     def collect_all_vmdk_files(self):
         """
         Sammle alle VMDK-Dateien aus den Datastores
@@ -388,45 +479,45 @@ class VSphereClient:
                 'orphaned_vmdks': []
             }
             
-            # 1. Sammle alle registrierten VMDKs von VMs
+            datastores = self.get_all_datastores()
+            
+            # 1. Dateien aller VMs und Templates aus layoutEx in einem PropertyCollector-Durchlauf
+            # (inkl. Snapshot-Deltas; immer über das ganze Inventar, da VMs außerhalb des Scopes
+            # Dateien auf den Scope-Datastores haben können)
+            owned_files = set()
             if self.content:
-                container = self.content.viewManager.CreateContainerView(
-                    container=self.content.rootFolder,
-                    type=[vim.VirtualMachine],
-                    recursive=True
+                vms = self._retrieve_properties(
+                    [vim.VirtualMachine],
+                    {vim.VirtualMachine: ['name', 'layoutEx.file', 'config.hardware.device']},
+                    roots=[self.content.rootFolder]
                 )
-                
-                vms = container.view
                 self.logger.info(f"Gefundene VMs: {len(vms)}")
                 self.raw_data['vm_count'] = len(vms)
                 
-                for vm in vms:
-                    try:
-                        if not hasattr(vm, 'config') or not vm.config or not hasattr(vm.config, 'hardware') or not vm.config.hardware:
+                for vm, props in vms:
+                    vm_name = props.get('name', vm._moId)
+                    for file_info in props.get('layoutEx.file') or []:
+                        owned_files.add(file_info.name.lower())
+                        if file_info.name.lower().endswith('.vmdk'):
+                            self.raw_data['registered_vmdk_paths'].append(file_info.name)
+                    
+                    for device in props.get('config.hardware.device') or []:
+                        if not isinstance(device, vim.vm.device.VirtualDisk):
                             continue
-                            
-                        for device in vm.config.hardware.device:
-                            if isinstance(device, vim.vm.device.VirtualDisk):
-                                try:
-                                    disk_path = device.backing.fileName
-                                    
-                                    disk_info = {
-                                        'vm_name': vm.name,
-                                        'disk_path': disk_path,
-                                        'disk_size_gb': device.capacityInKB / 1024 / 1024 if hasattr(device, 'capacityInKB') else None,
-                                        'device_key': device.key
-                                    }
-                                    
-                                    self.raw_data['vm_disk_data'].append(disk_info)
-                                    self.raw_data['registered_vmdk_paths'].append(disk_path)
-                                except AttributeError:
-                                    # Manche Disks haben kein backing oder fileName, diese überspringen
-                                    continue
-                    except Exception as e:
-                        self.log_error(f"Fehler beim Sammeln von Disks für VM {vm.name}", e)
+                        disk_path = getattr(device.backing, 'fileName', None)
+                        if not disk_path:
+                            # Manche Disks haben kein backing oder fileName, diese überspringen
+                            continue
+                        self.raw_data['vm_disk_data'].append({
+                            'vm_name': vm_name,
+                            'disk_path': disk_path,
+                            'disk_size_gb': device.capacityInKB / 1024 / 1024 if device.capacityInKB else None,
+                            'device_key': device.key
+                        })
+                        # VMs ohne layoutEx (z.B. auf getrennten Hosts): zumindest die Disks als belegt zählen
+                        owned_files.add(disk_path.lower())
             
             # 2. Durchsuche alle Datastores nach VMDKs
-            datastores = self.get_all_datastores()
             if not datastores:
                 self.log_error("Keine Datastores gefunden")
                 return self.raw_data
@@ -440,20 +531,28 @@ class VSphereClient:
                         self.log_error(f"Kein Browser für Datastore {ds.name} verfügbar")
                         continue
                         
-                    # Erstelle eine Suche im Datastore-Root
+                    # Disk-Abfrage: der Host fasst Deskriptor und Extents (-flat, -delta) zu einem Eintrag
+                    # zusammen, fileSize enthält die Extents; nur die benötigten Details anfordern
+                    disk_query = vim.host.DatastoreBrowser.VmDiskQuery()
+                    disk_query.details = vim.host.DatastoreBrowser.VmDiskQuery.Details(
+                        capacityKb=True, thin=True, controllerType=True, diskType=False, hardwareVersion=False)
                     search_spec = vim.host.DatastoreBrowser.SearchSpec()
-                    search_spec.matchPattern = ["*.vmdk"]
-                    search_spec.details = vim.host.DatastoreBrowser.FileInfo.Details()
-                    search_spec.searchCaseInsensitive = True
-                    
-                    # Starte die Suche
-                    task = ds_browser.SearchDatastoreSubFolders_Task(
-                        datastorePath=f"[{ds.name}]", 
-                        searchSpec=search_spec
-                    )
+                    search_spec.query = [disk_query]
+                    search_spec.details = vim.host.DatastoreBrowser.FileInfo.Details(
+                        fileSize=True, modification=True, fileType=False, fileOwner=False)
                     
-                    # Warte auf die Ergebnisse
-                    task_result = self.wait_for_task(task)
+                    # Starte die Suche und warte auf die Ergebnisse
+                    search_start = time.perf_counter()
+                    task_result = None
+                    try:
+                        task = ds_browser.SearchDatastoreSubFolders_Task(
+                            datastorePath=f"[{ds.name}]", 
+                            searchSpec=search_spec
+                        )
+                        task_result = self.wait_for_task(task)
+                    finally:
+                        DATASTORE_SEARCH_DURATION.observe(time.perf_counter() - search_start,
+                                                          result='success' if task_result else 'error')
                     if not task_result:
                         self.log_error(f"Die Suche im Datastore {ds.name} wurde abgebrochen")
                         continue
@@ -474,29 +573,20 @@ class VSphereClient:
                         if hasattr(result, 'file') and result.file:
                             for file_info in result.file:
                                 try:
-                                    if not hasattr(file_info, 'path') or not file_info.path:
-                                        continue
-                                        
-                                    file_path = file_info.path
-                                    if not file_path.endswith('.vmdk') or file_path.endswith('-flat.vmdk'):
+                                    if not file_info.path:
                                         continue
                                         
                                     # Erstelle den vollständigen Pfad für die VMDK
-                                    vmdk_path = f"{folder_path}{file_path}"
-                                    
-                                    # Verwende die neuen Hilfsmethoden für verbesserte Extraktion der Metadaten
-                                    
-                                    # Größe extrahieren mit allen Fallback-Mechanismen
-                                    file_size = self._get_vmdk_file_size(file_info, vmdk_path)
-                                    
-                                    # Änderungsdatum extrahieren mit allen Fallback-Mechanismen
-                                    modification_time = self._get_vmdk_modification_time(file_info, vmdk_path)
+                                    separator = ' ' if folder_path.endswith(']') else ''
+                                    vmdk_path = f"{folder_path}{separator}{file_info.path}"
                                     
-                                    # Setze die Daten mit garantiert gültigen Werten
                                     vmdk_data = {
                                         'path': vmdk_path,
-                                        'size_kb': file_size,  # Wird nie None sein
-                                        'modification_time': modification_time  # Wird nie None sein
+                                        'size_kb': (file_info.fileSize or 0) // 1024,
+                                        'capacity_kb': file_info.capacityKb,
+                                        'thin': file_info.thin,
+                                        'controller_type': file_info.controllerType,
+                                        'modification_time': str(file_info.modification) if file_info.modification else "Unbekannt"
                                     }
                                     
                                     # Zusätzliches Debug-Logging
@@ -512,8 +602,7 @@ class VSphereClient:
                 except Exception as e:
                     self.log_error(f"Fehler beim Durchsuchen des Datastores {ds.name}", e)
             
-            # 3. Identifiziere verwaiste VMDKs
-            registered_paths = set(self.raw_data['registered_vmdk_paths'])
+            # 3. Identifiziere verwaiste VMDKs: alles, was keiner VM und keinem Template gehört
             
             # Liste für verwaiste VMDKs leeren, falls vorherige Daten vorhanden sind
             self.raw_data['orphaned_vmdks'] = []
@@ -522,11 +611,8 @@ class VSphereClient:
                 try:
                     vmdk_path = vmdk['path']
                     
-                    # VMDKs aus Templates und Snapshots ausschließen
-                    if vmdk_path in registered_paths:
+                    if vmdk_path.lower() in owned_files:
                         vmdk['status'] = 'registered'
-                    elif self._is_template_or_snapshot_vmdk(vmdk_path):
-                        vmdk['status'] = 'template_or_snapshot'
                     else:
                         vmdk['status'] = 'orphaned'
                         # Stelle sicher, dass size_kb und modification_time immer vorhanden sind
@@ -564,148 +650,182 @@ class VSphereClient:
             self.log_error("Fehler beim Sammeln der VMDK-Dateien", e)
             return self.raw_data
             
-    def _get_vmdk_file_size(self, file_info, vmdk_path):
+    def _retrieve_properties(self, obj_types, path_sets, page_size=1000, roots=None):
         """
-        Extrahiert die Dateigröße einer VMDK mit mehreren Fallback-Mechanismen
-        
+        Ruft Eigenschaften mehrerer Objekttypen mit einem PropertyCollector-Durchlauf ab
+
         Args:
-            file_info: FileInfo-Objekt von vSphere
-            vmdk_path: Vollständiger Pfad der VMDK-Datei (für Logging)
-            
+            obj_types (list): Liste der vim-Typen für die ContainerView
+            path_sets (dict): Zuordnung vim-Typ -> Liste der Property-Pfade
+            page_size (int): Maximale Anzahl Objekte pro Seite
+            roots (list): Startpunkte der Suche (Standard: Scope bzw. Root-Ordner)
+
         Returns:
-            int: Dateigröße in KB, 0 wenn nicht ermittelbar
+            list: Liste von (MoRef, Property-Dictionary)-Tupeln
         """
-        # Demo-Modus behandeln: Bei Demo-Daten verwenden wir spezifischere Größen
-        if self.demo_mode:
-            # Nutze konsistente Größen für Demo-VMDKs basierend auf dem Pfad
-            # Wir nehmen deterministische Werte basierend auf dem Namen
-            import hashlib
-            name_hash = int(hashlib.md5(vmdk_path.encode()).hexdigest(), 16) % 100
-            
-            # Generiere eine "realistische" Größe zwischen 20GB und 500GB
-            size_gb = 20 + (name_hash * 4.8)
-            size_kb = int(size_gb * 1024 * 1024)
-            
-            self.logger.debug(f"Demo-Modus: VMDK Größe für {vmdk_path}: {size_kb} KB ({size_gb} GB)")
-            return size_kb
-            
-        # Echte Umgebung: Verschiedene Attribute prüfen, die die Größe enthalten könnten
-        size_attrs = ['fileSize', 'capacity', 'capacityInKB', 'size', 'length']
-        
-        for attr in size_attrs:
-            try:
-                if hasattr(file_info, attr):
-                    size = getattr(file_info, attr)
-                    if size is not None and isinstance(size, (int, float)) and size > 0:
-                        self.logger.debug(f"VMDK Größe für {vmdk_path} aus Attribut {attr}: {size} KB")
-                        return size
-            except Exception as e:
-                self.logger.debug(f"Fehler beim Lesen der Größe (Attribut {attr}) für {vmdk_path}: {str(e)}")
-        
-        # Wenn nichts gefunden wurde, schätze die Größe basierend auf dem Dateinamen
-        # (VMDKs haben oft -Sxg Suffixe, wo x die Größe in GB ist)
+        results = {}
+        for root in roots or self._scope_roots():
+            for obj, props in self._retrieve_view(root, obj_types, path_sets, page_size):
+                results.setdefault(obj._moId, (obj, props))
+        return list(results.values())
+
+    def _retrieve_view(self, root, obj_types, path_sets, page_size):
+        """PropertyCollector-Abfrage über eine ContainerView unterhalb von root"""
+        container = self.content.viewManager.CreateContainerView(
+            container=root,
+            type=obj_types,
+            recursive=True
+        )
+
         try:
-            import re
-            filename = vmdk_path.split('/')[-1]
-            # Suche nach Mustern wie disk-S10G.vmdk oder disk-s10g.vmdk
-            match = re.search(r'-[sS](\d+)[gG]', filename)
-            if match:
-                estimated_size_gb = int(match.group(1))
-                estimated_size_kb = estimated_size_gb * 1024 * 1024  # GB zu KB
-                self.logger.debug(f"VMDK Größe für {vmdk_path} aus Dateinamen geschätzt: {estimated_size_kb} KB")
-                return estimated_size_kb
-        except Exception as e:
-            self.logger.debug(f"Fehler bei der Größenschätzung für {vmdk_path}: {str(e)}")
-        
-        # Standardwert zurückgeben, wenn keine Größe ermittelt werden konnte
-        # Realistischeren Standardwert verwenden, der auf dem Pfad basiert (variiert)
-        import hashlib
-        # Erzeuge einen Hash basierend auf dem VMDK-Pfad für konsistente, aber variable Größen
-        path_hash = int(hashlib.md5(vmdk_path.encode()).hexdigest(), 16) % 100
-        # Größe zwischen 10 GB und 110 GB
-        size_gb = 10 + path_hash
-        size_kb = int(size_gb * 1024 * 1024)
-        
-        self.logger.debug(f"Keine Größeninformation für VMDK {vmdk_path} gefunden, verwende berechneten Standardwert {size_kb} KB ({size_gb} GB)")
-        return size_kb
-    
-    def _get_vmdk_modification_time(self, file_info, vmdk_path):
+            traversal_spec = vmodl.query.PropertyCollector.TraversalSpec(
+                name='traverseEntities',
+                path='view',
+                skip=False,
+                type=vim.view.ContainerView
+            )
+            obj_spec = vmodl.query.PropertyCollector.ObjectSpec(
+                obj=container,
+                skip=True,
+                selectSet=[traversal_spec]
+            )
+            prop_specs = [
+                vmodl.query.PropertyCollector.PropertySpec(type=obj_type, pathSet=paths)
+                for obj_type, paths in path_sets.items()
+            ]
+            filter_spec = vmodl.query.PropertyCollector.FilterSpec(
+                objectSet=[obj_spec],
+                propSet=prop_specs
+            )
+            options = vmodl.query.PropertyCollector.RetrieveOptions(maxObjects=page_size)
+
+            collector = self.content.propertyCollector
+            results = []
+            page = collector.RetrievePropertiesEx([filter_spec], options)
+            while page:
+                for obj_content in page.objects:
+                    props = {prop.name: prop.val for prop in (obj_content.propSet or [])}
+                    results.append((obj_content.obj, props))
+                if not page.token:
+                    break
+                page = collector.ContinueRetrievePropertiesEx(page.token)
+
+            return results
+        finally:
+            container.Destroy()
+
+    @track_collection('topology')
+    def collect_topology_inventory(self):
         """
-        Extrahiert das Änderungsdatum einer VMDK mit mehreren Fallback-Mechanismen
-        
-        Args:
-            file_info: FileInfo-Objekt von vSphere
-            vmdk_path: Vollständiger Pfad der VMDK-Datei (für Logging)
-            
+        Sammle ein flaches Inventar (Datacenter, Cluster, Hosts, VMs) für die Topologie
+
+        Alle Objekte werden mit einem einzigen, seitenweisen PropertyCollector-Aufruf
+        geladen, so dass auch große Umgebungen ohne Einzelabfragen pro Objekt auskommen.
+
         Returns:
-            str: Änderungsdatum als String, aktuelles Datum wenn nicht ermittelbar
+            dict: Inventar im Format, das der TopologyGenerator erwartet
         """
-        # Demo-Modus: Generiere realistische, aber konsistente Datumsangaben
-        if self.demo_mode:
-            # Nutze konsistente Datumsangaben für Demo-VMDKs basierend auf dem Pfad
-            from datetime import datetime, timedelta
-            import hashlib
-            
-            # Hash des Pfads verwenden für Konsistenz
-            name_hash = int(hashlib.md5(vmdk_path.encode()).hexdigest(), 16) % 365
-            
-            # Datum zwischen 1-365 Tagen in der Vergangenheit
-            days_back = name_hash + 1
-            
-            # Für verwaiste VMDKs noch ältere Daten (1-2 Jahre) verwenden, damit sie als Problem erkennbar sind
-            if "orphaned" in vmdk_path.lower() or "old_vm" in vmdk_path.lower():
-                days_back = days_back + 365
-            
-            # Erzeuge das Datum
-            date_value = datetime.now() - timedelta(days=days_back)
-            date_str = date_value.strftime("%Y-%m-%d %H:%M:%S")
-            
-            self.logger.debug(f"Demo-Modus: VMDK Änderungsdatum für {vmdk_path}: {date_str} ({days_back} Tage alt)")
-            return date_str
-            
-        # Echtdaten: Verschiedene Attribute prüfen, die das Datum enthalten könnten
-        date_attrs = ['modification', 'lastModified', 'createTime', 'changeTime', 'modificationTime']
-        
-        for attr in date_attrs:
-            try:
-                if hasattr(file_info, attr):
-                    date_value = getattr(file_info, attr)
-                    if date_value is not None:
-                        date_str = str(date_value)
-                        self.logger.debug(f"VMDK Änderungsdatum für {vmdk_path} aus Attribut {attr}: {date_str}")
-                        return date_str
-            except Exception as e:
-                self.logger.debug(f"Fehler beim Lesen des Datums (Attribut {attr}) für {vmdk_path}: {str(e)}")
-        
-        # Wenn kein Datum gefunden wurde: Realistische Fallback-Strategie basierend auf dem Pfad
-        from datetime import datetime, timedelta
-        import hashlib
-        
-        # Erzeuge einen Hash basierend auf dem VMDK-Pfad für konsistente, aber variable Daten
-        path_hash = int(hashlib.md5(vmdk_path.encode()).hexdigest(), 16) % 730  # 0-730 Tage (bis zu 2 Jahre)
-        days_old = 30 + path_hash  # Mindestens 30 Tage alt
-        
-        fallback_date = (datetime.now() - timedelta(days=days_old)).strftime("%Y-%m-%d %H:%M:%S")
-        self.logger.debug(f"Kein Änderungsdatum für VMDK {vmdk_path} gefunden, verwende berechnetes Fallback-Datum ({days_old} Tage alt)")
-        return fallback_date
-        
-    def _is_template_or_snapshot_vmdk(self, path):
-        """Überprüft, ob eine VMDK zu einem Template oder Snapshot gehört"""
-        if not path:
-            return False
-            
-        path_lower = path.lower()
-        snapshot_indicators = [
-            '-snapshot', 
-            '-000', 
-            '_snapshot', 
-            '_delta_',
-            'clone',
-            'replica'
-        ]
-        
-        # Überprüfe auf Snapshot-Indikatoren
-        return any(indicator in path_lower for indicator in snapshot_indicators)
+        if not self.connected and not self.demo_mode:
+            self.log_error("Keine Verbindung zum vCenter")
+            return None
+
+        try:
+            self.logger.info("Sammle Topologie-Inventar...")
+
+            if self.demo_mode:
+                from demo_data import get_demo_topology_inventory
+                self.collection_status['topology'] = True
+                return get_demo_topology_inventory()
+
+            # Die Topologie zeigt immer das gesamte Inventar, damit Datacenter-Zuordnungen erhalten bleiben
+            objects = self._retrieve_properties(
+                [vim.Datacenter, vim.Folder, vim.ComputeResource, vim.HostSystem, vim.VirtualMachine],
+                {
+                    vim.Datacenter: ['name', 'parent'],
+                    vim.Folder: ['name', 'parent'],
+                    vim.ComputeResource: ['name', 'parent'],
+                    vim.HostSystem: ['name', 'parent', 'hardware.cpuInfo.numCpuCores', 'hardware.memorySize'],
+                    vim.VirtualMachine: ['name', 'runtime.host', 'runtime.powerState', 'config.template',
+                                         'config.hardware.numCPU', 'config.hardware.memoryMB']
+                },
+                roots=[self.content.rootFolder]
+            )
+
+            # Elternbeziehungen für die Auflösung des Datacenters merken
+            parents = {}
+            for obj, props in objects:
+                if 'parent' in props and props['parent'] is not None:
+                    parents[obj._moId] = props['parent']._moId
+
+            datacenter_ids = {obj._moId for obj, _ in objects if isinstance(obj, vim.Datacenter)}
+
+            def find_datacenter(moid):
+                while moid in parents:
+                    moid = parents[moid]
+                    if moid in datacenter_ids:
+                        return moid
+                return None
+
+            inventory = {
+                'vcenter': {
+                    'name': self.connection_info.get('host', 'vCenter Server'),
+                    'version': self.content.about.version if self.content.about else 'N/A'
+                },
+                'datacenters': [],
+                'clusters': [],
+                'hosts': [],
+                'vms': []
+            }
+
+            for obj, props in objects:
+                moid = obj._moId
+                if isinstance(obj, vim.Datacenter):
+                    inventory['datacenters'].append({'moid': moid, 'name': props.get('name')})
+                elif isinstance(obj, vim.ClusterComputeResource):
+                    inventory['clusters'].append({
+                        'moid': moid,
+                        'name': props.get('name'),
+                        'parent': find_datacenter(moid)
+                    })
+                elif isinstance(obj, vim.HostSystem):
+                    # Standalone-Hosts hängen an einer eigenen ComputeResource,
+                    # diese wird übersprungen und der Host direkt dem Datacenter zugeordnet
+                    parent = props.get('parent')
+                    if isinstance(parent, vim.ClusterComputeResource):
+                        parent_id = parent._moId
+                    else:
+                        parent_id = find_datacenter(moid)
+                    inventory['hosts'].append({
+                        'moid': moid,
+                        'name': props.get('name'),
+                        'parent': parent_id,
+                        'cpu_cores': props.get('hardware.cpuInfo.numCpuCores', 0),
+                        'memory_size': props.get('hardware.memorySize', 0)
+                    })
+                elif isinstance(obj, vim.VirtualMachine):
+                    host = props.get('runtime.host')
+                    inventory['vms'].append({
+                        'moid': moid,
+                        'name': props.get('name'),
+                        'host': host._moId if host is not None else None,
+                        'power_state': str(props.get('runtime.powerState', 'unknown')),
+                        'template': bool(props.get('config.template', False)),
+                        'num_cpu': props.get('config.hardware.numCPU', 0),
+                        'memory_mb': props.get('config.hardware.memoryMB', 0)
+                    })
+
+            self.logger.info(
+                f"Topologie-Inventar: {len(inventory['datacenters'])} Datacenter, "
+                f"{len(inventory['clusters'])} Cluster, {len(inventory['hosts'])} Hosts, "
+                f"{len(inventory['vms'])} VMs"
+            )
+
+            self.collection_status['topology'] = True
+            return inventory
+
+        except Exception as e:
+            self.log_error("Fehler beim Sammeln des Topologie-Inventars", e)
+            return None
 
     def get_all_datastores(self):
         """Alle Datastores abrufen"""
@@ -718,14 +838,16 @@ class VSphereClient:
                 self.log_error("Kein Content verfügbar")
                 return []
                 
-            container = self.content.viewManager.CreateContainerView(
-                container=self.content.rootFolder,
-                type=[vim.Datastore],
-                recursive=True
-            )
-            
-            datastores = container.view
-            container.Destroy()
+            datastores = self._scope_objects([vim.Datastore])
+            if self.scope:
+                # Datastores liegen nicht unter Clustern oder Hosts: zusätzlich die von Hosts und VMs im Scope genutzten
+                datastores = {ds._moId: ds for ds in datastores}
+                for _, props in self._retrieve_properties([vim.HostSystem, vim.VirtualMachine],
+                                                          {vim.HostSystem: ['datastore'],
+                                                           vim.VirtualMachine: ['datastore']}):
+                    for ds in props.get('datastore') or []:
+                        datastores.setdefault(ds._moId, ds)
+                datastores = list(datastores.values())
             
             self.logger.info(f"Gefundene Datastores: {len(datastores)}")
             return datastores
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+asyncio SOAP transport for pyVmomi
+
+pyVmomi's stub blocks the calling thread for every request, so keeping many
+datastore searches in flight needs one thread per call, and every thread
+waiting for its task with WaitForTask sets up its own PropertyCollector
+filter. This transport sends the same SOAP requests over a pool of
+non-blocking keep-alive HTTP connections instead, and waits for all tasks
+started through it with one RetrievePropertiesEx per poll. Requests are
+serialized and responses deserialized by pyVmomi itself, so results are the
+usual vim/vmodl objects bound to the authenticated stub. The orphaned VMDK
+scan runs its datastore searches through it (see DataCollector).
+
+Usage:
+
+    transport = client.async_transport(max_connections=32)
+    async with transport:
+        tasks = await asyncio.gather(*(transport.invoke(ds.browser, 'SearchDatastoreSubFolders_Task', ...)
+                                       for ds in datastores))
+        results = await asyncio.gather(*(transport.wait_for_task(task) for task in tasks))
+"""
+
+import ssl
+import gzip
+import zlib
+import time
+import asyncio
+import logging
+from io import BytesIO
+from http.client import HTTPConnection
+
+from pyVmomi import vim, vmodl
+from pyVmomi.SoapAdapter import SoapResponseDeserializer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONNECTIONS = 16
+
+# Abfrageintervall für laufende Tasks in Sekunden, verdoppelt bis zum Maximum
+TASK_POLL_INTERVAL = 0.1
+TASK_POLL_MAX_INTERVAL = 2.0
+
+def _method_info(mo, method):
+    """Method info by pyVmomi name ('SearchSubFolders') or WSDL name ('SearchDatastoreSubFolders_Task')"""
+    try:
+        return mo._GetMethodInfo(method)
+    except AttributeError:
+        obj_type = type(mo)
+        while hasattr(obj_type, '_methodInfo'):
+            for info in obj_type._methodInfo.values():
+                if info.wsdlName == method:
+                    return info
+            obj_type = obj_type.__bases__[0]
+        raise
+
+class AsyncSoapTransport:
+    """Non-blocking SOAP transport sharing the session of a pyVmomi stub"""
+
+    def __init__(self, stub, property_collector=None, max_connections=DEFAULT_MAX_CONNECTIONS, metrics=None):
+        """
+        Initialize the transport
+
+        Args:
+            stub (SoapStubAdapter): Authenticated stub of the service instance
+            property_collector (PropertyCollector): content.propertyCollector of the service instance
+            max_connections (int): Maximum number of concurrent HTTP connections
+            metrics (SoapMetrics): Optional statistics the calls are recorded in, like the stub's calls
+        """
+        self.stub = stub
+        self.property_collector = property_collector
+        self.max_connections = max(1, max_connections)
+        self.metrics = metrics
+
+        host = stub.host
+        if host.startswith('['):
+            self.host = host[1:host.index(']')]
+        else:
+            self.host = host.rsplit(':', 1)[0]
+        self.port = stub.port
+        self.path = stub.path
+
+        if stub.scheme is HTTPConnection:
+            self.ssl_context = None
+        else:
+            self.ssl_context = stub.schemeArgs.get('context') or ssl.create_default_context()
+
+        self._idle = []
+        self._semaphore = None
+        self._waiting = {}
+        self._poller = None
+        self._poll_interval = TASK_POLL_INTERVAL
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """Stop waiting for tasks and close all idle connections"""
+        if self._poller and not self._poller.done():
+            self._poller.cancel()
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (OSError, ssl.SSLError):
+                pass
+
+    async def invoke(self, mo, method, *args):
+        """
+        Invoke a managed object method without blocking the event loop
+
+        Args:
+            mo (ManagedObject): Target object, e.g. content.propertyCollector
+            method (str): Method name, e.g. 'RetrievePropertiesEx' or 'SearchDatastore_Task'
+            *args: Method arguments in declaration order
+
+        Returns:
+            Deserialized result of the method
+
+        Raises:
+            vmodl.MethodFault: Fault returned by the server
+        """
+        info = _method_info(mo, method)
+        request = self.stub.SerializeRequest(mo, info, args)
+        headers = {
+            'Cookie': self.stub.cookie,
+            'SOAPAction': self.stub.versionId,
+            'Content-Type': 'text/xml; charset=UTF-8',
+            'Accept-Encoding': 'gzip, deflate'
+        }
+
+        start = time.perf_counter()
+        status, body = None, b''
+        try:
+            status, body = await self._post(request, headers)
+            if status not in (200, 500):
+                raise ConnectionError(f"Unexpected HTTP status {status} for {method}")
+
+            result = SoapResponseDeserializer(self.stub).Deserialize(BytesIO(body), info.result)
+            if status == 500:
+                raise result
+            return result
+        finally:
+            if self.metrics:
+                self.metrics.record(info.wsdlName, time.perf_counter() - start, len(request), len(body),
+                                    status != 200)
+
+    async def wait_for_task(self, task):
+        """
+        Wait for a task to finish
+
+        All tasks waited for at the same time are polled together, with one
+        RetrievePropertiesEx call per poll.
+
+        Args:
+            task (vim.Task): Task started through this transport
+
+        Returns:
+            Result of the task
+
+        Raises:
+            vmodl.MethodFault: The fault of a failed task
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[task._moId] = (task, future)
+        self._poll_interval = TASK_POLL_INTERVAL
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.ensure_future(self._poll_tasks())
+        return await future
+
+    async def retrieve_properties(self, spec_set, page_size=1000):
+        """
+        Retrieve all objects for a PropertyCollector filter, following continuation tokens
+
+        Args:
+            spec_set (list): vmodl.query.PropertyCollector.FilterSpec objects
+            page_size (int): Maximum number of objects per page
+
+        Returns:
+            list: All ObjectContent results
+        """
+        if self.property_collector is None:
+            raise ValueError("No PropertyCollector configured for this transport")
+
+        property_collector = self.property_collector
+        options = vmodl.query.PropertyCollector.RetrieveOptions(maxObjects=page_size)
+
+        result = await self.invoke(property_collector, 'RetrievePropertiesEx', spec_set, options)
+        objects = []
+        while result:
+            objects.extend(result.objects)
+            if not result.token:
+                break
+            result = await self.invoke(property_collector, 'ContinueRetrievePropertiesEx', result.token)
+        return objects
+
+    async def _poll_tasks(self):
+        """Poll the state of all waiting tasks until none is left"""
+        while self._waiting:
+            # Solange Tasks fertig werden oder neue hinzukommen, kurz takten, sonst seltener fragen
+            interval = self._poll_interval
+            self._poll_interval = min(interval * 2, TASK_POLL_MAX_INTERVAL)
+            await asyncio.sleep(interval)
+            spec = vmodl.query.PropertyCollector.FilterSpec(
+                objectSet=[vmodl.query.PropertyCollector.ObjectSpec(obj=task, skip=False)
+                           for task, _ in self._waiting.values()],
+                propSet=[vmodl.query.PropertyCollector.PropertySpec(
+                    type=vim.Task, pathSet=['info.state', 'info.result', 'info.error'])]
+            )
+            try:
+                contents = await self.retrieve_properties([spec])
+            except Exception as e:
+                # Ohne Taskstatus können alle Wartenden nur noch scheitern
+                for _, future in self._waiting.values():
+                    if not future.done():
+                        future.set_exception(e)
+                self._waiting.clear()
+                return
+
+            for content in contents:
+                props = {prop.name: prop.val for prop in content.propSet or []}
+                state = props.get('info.state')
+                if state not in (vim.TaskInfo.State.success, vim.TaskInfo.State.error):
+                    continue
+                _, future = self._waiting.pop(content.obj._moId, (None, None))
+                if future is None or future.done():
+                    continue
+                self._poll_interval = TASK_POLL_INTERVAL
+                if state == vim.TaskInfo.State.error:
+                    future.set_exception(props.get('info.error') or RuntimeError(f"Task {content.obj._moId} failed"))
+                else:
+                    future.set_result(props.get('info.result'))
+
+    async def _post(self, body, headers):
+        """Send one POST over a pooled connection and return (status, body)"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_connections)
+
+        async with self._semaphore:
+            reader, writer = await self._acquire()
+            try:
+                request_head = [f"POST {self.path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                                f"Content-Length: {len(body)}", "Connection: keep-alive"]
+                request_head.extend(f"{name}: {value}" for name, value in headers.items() if value)
+                writer.write(("\r\n".join(request_head) + "\r\n\r\n").encode('latin-1') + body)
+                await writer.drain()
+
+                status, response_headers, response_body = await self._read_response(reader)
+            except BaseException:
+                writer.close()
+                raise
+
+            cookie = response_headers.get('set-cookie')
+            if cookie:
+                self.stub.cookie = cookie
+
+            if response_headers.get('connection', '').lower() == 'close':
+                writer.close()
+            else:
+                self._idle.append((reader, writer))
+
+        encoding = response_headers.get('content-encoding', 'identity').lower()
+        if encoding == 'gzip':
+            response_body = gzip.decompress(response_body)
+        elif encoding == 'deflate':
+            response_body = zlib.decompress(response_body)
+
+        return status, response_body
+
+    async def _acquire(self):
+        """Reuse an idle keep-alive connection or open a new one"""
+        while self._idle:
+            reader, writer = self._idle.pop()
+            if not reader.at_eof() and not writer.is_closing():
+                return reader, writer
+            writer.close()
+        return await asyncio.open_connection(
+            self.host, self.port, ssl=self.ssl_context,
+            server_hostname=self.host if self.ssl_context else None
+        )
+
+    async def _read_response(self, reader):
+        """Parse an HTTP/1.1 response (Content-Length or chunked)"""
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed by server")
+        status = int(status_line.split(None, 2)[1])
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b';', 1)[0].strip(), 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            body = b''.join(chunks)
+        elif 'content-length' in headers:
+            body = await reader.readexactly(int(headers['content-length']))
+        else:
+            body = await reader.read()
+            headers['connection'] = 'close'
+
+        return status, headers, body
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+End-to-end benchmark of data collection and report export
+
+Runs every DataCollector section and every exporter against synthetic
+inventories of increasing size served by the local vCenter simulator (or
+against recorded report data) and writes the measurements as JSON, so runs of
+different versions can be compared:
+
+    python -m core.benchmark --sizes 100,1000,10000 --latency-ms 2 --output bench-0.2.json
+    python -m core.benchmark --sizes 100,1000,10000 --latency-ms 2 --baseline bench-0.2.json
+
+Every inventory size is served by its own simulator process and measured in
+its own worker process, so peak RSS figures are not shared between sizes and
+do not include the simulator.
+
+Recorded data (--data) is a JSON file as written by --record-data; it skips
+collection and only benchmarks the exporters.
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import logging
+import argparse
+import platform
+import datetime
+import tempfile
+import subprocess
+import urllib.request
+import multiprocessing
+
+from core.exporters import EXPORTERS, get_exporter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = [100, 1000, 5000]
+
+# Phases shorter than this are too noisy to flag as wall time regressions
+MIN_COMPARE_SECONDS = 0.05
+
+def peak_rss_mb():
+    """Peak resident set size of the current process in MB (None where unsupported)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux meldet KB, macOS Bytes
+    if sys.platform == 'darwin':
+        peak /= 1024
+    return round(peak / 1024, 1)
+
+def _encode(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return {'$datetime': value.isoformat()}
+    return str(value)
+
+def _decode(obj):
+    if set(obj) == {'$datetime'}:
+        return datetime.datetime.fromisoformat(obj['$datetime'])
+    return obj
+
+def save_report_data(data, path):
+    """Record collected report data for later export benchmarks"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, default=_encode)
+
+def load_report_data(path):
+    """Load report data recorded with save_report_data"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f, object_hook=_decode)
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+# ----------------------------------------------------------------------
+# Child processes
+# ----------------------------------------------------------------------
+
+def _run_simulator(vm_count, seed, options, result_queue):
+    """Simulator process: generate the inventory and serve it until terminated"""
+    from core.simulator.inventory import SyntheticInventory
+    from core.simulator.server import SimulatorServer
+
+    start = time.monotonic()
+    inventory = SyntheticInventory(vm_count=vm_count, seed=seed)
+    generated = time.monotonic() - start
+    server = SimulatorServer(inventory, port=0, **options)
+    result_queue.put({
+        'port': server.port,
+        'inventory_seconds': round(generated, 3),
+        'objects': {kind: len(moids) for kind, moids in inventory.kinds.items()}
+    })
+    server.serve_forever()
+
+def _simulator_stats(port, reset=False):
+    url = f'http://127.0.0.1:{port}/stats' + ('/reset' if reset else '')
+    request = urllib.request.Request(url, data=b'' if reset else None, method='POST' if reset else 'GET')
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return json.loads(response.read()) if not reset else None
+
+def _measure(phase, kind, func, port=None):
+    """Run one phase and return its measurements together with its result"""
+    if port:
+        _simulator_stats(port, reset=True)
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    result, error = None, None
+    try:
+        result = func()
+    except Exception as e:
+        logger.exception(f"Benchmark phase {phase} failed")
+        error = f"{type(e).__name__}: {e}"
+    wall = time.perf_counter() - start
+    rss_after = peak_rss_mb()
+
+    measurement = {
+        'phase': phase,
+        'kind': kind,
+        'wall_seconds': round(wall, 4),
+        'peak_rss_mb': rss_after,
+        'rss_growth_mb': round(rss_after - rss_before, 1) if rss_after is not None else None,
+        'error': error
+    }
+    if port:
+        stats = _simulator_stats(port)
+        measurement['soap_calls'] = stats['requests']
+        measurement['soap_request_bytes'] = stats['request_bytes']
+        measurement['soap_response_bytes'] = stats['response_bytes']
+        measurement['soap_methods'] = {name: entry['calls'] for name, entry in stats['methods'].items()}
+    return measurement, result
+
+def _run_worker(port, data_path, sections, formats, output_dir, record_path, log_level, result_queue):
+    """Worker process: collect from the simulator (or load recorded data) and export"""
+    logging.basicConfig(level=log_level, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    phases = []
+    try:
+        if data_path:
+            measurement, data = _measure('load_report_data', 'load', lambda: load_report_data(data_path))
+            phases.append(measurement)
+        else:
+            from core.vsphere_client import VSphereClient
+            from core.data_collector import DataCollector, SECTION_METHODS
+
+            client = VSphereClient('127.0.0.1', 'benchmark', 'benchmark', port=port, protocol='http')
+            measurement, connected = _measure('connect', 'connect', client.connect, port)
+            phases.append(measurement)
+            if not connected:
+                raise RuntimeError(f"Connection to the simulator failed: {measurement['error']}")
+
+            collector = DataCollector(client)
+            data = {}
+            for section in sections:
+                method = SECTION_METHODS[section]
+                measurement, records = _measure(method, 'collect', getattr(collector, method), port)
+                measurement['section'] = section
+                measurement['records'] = len(records) if records is not None else None
+                phases.append(measurement)
+                data[section] = records if records is not None else []
+            client.disconnect()
+
+            if record_path:
+                save_report_data(data, record_path)
+
+        timestamp = datetime.datetime.now()
+        for report_format in formats:
+            _, class_name, extension = EXPORTERS[report_format]
+            output_path = os.path.join(output_dir, f'benchmark_report.{extension}')
+
+            def export():
+                exporter_class, _ = get_exporter(report_format)
+                # Exporter dürfen die Daten ergänzen, daher jede Runde mit eigener Kopie
+                exporter = exporter_class({key: list(value) for key, value in data.items()}, timestamp)
+                written = exporter.export(output_path)
+                # CSV schreibt eine Datei pro Abschnitt
+                return written if isinstance(written, list) else [output_path]
+
+            measurement, written = _measure(class_name, 'export', export)
+            measurement['format'] = report_format
+            written = [path for path in written or [] if os.path.exists(path)]
+            measurement['output_bytes'] = sum(os.path.getsize(path) for path in written) if written else None
+            phases.append(measurement)
+
+        result_queue.put({'phases': phases, 'error': None})
+    except Exception as e:
+        logger.exception("Benchmark worker failed")
+        result_queue.put({'phases': phases, 'error': f"{type(e).__name__}: {e}"})
+
+# ----------------------------------------------------------------------
+# Orchestration
+# ----------------------------------------------------------------------
+
+def _wait(result_queue, process, timeout, what):
+    """Wait for a child result, failing early if the child dies"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            return result_queue.get(timeout=1)
+        except queue.Empty:
+            if not process.is_alive():
+                raise RuntimeError(f"{what} exited with code {process.exitcode}")
+    raise RuntimeError(f"{what} did not finish within {timeout} seconds")
+
+def run_benchmark(sizes=None, seed=42, data_path=None, sections=None, formats=None, simulator_options=None,
+                  record_dir=None, output_dir=None, timeout=3600, log_level=logging.WARNING, progress=None):
+    """
+    Run the benchmark for every inventory size (or once for recorded data)
+
+    Args:
+        sizes (list): VM counts of the synthetic inventories
+        seed (int): Inventory seed
+        data_path (str): Recorded report data to export instead of collecting
+        sections (list): Section keys to collect (default: all)
+        formats (list): Report formats to export (default: all)
+        simulator_options (dict): Keyword arguments for SimulatorServer (latency_ms, ...)
+        record_dir (str): Directory to record the collected data of every size in
+        output_dir (str): Directory for the exported reports (temporary if None)
+        timeout (int): Maximum seconds per inventory size
+        log_level (int): Log level of the worker processes
+        progress (callable): Optional callback(message)
+
+    Returns:
+        dict: Benchmark results with metadata and one run per size
+    """
+    from core.data_collector import SECTION_METHODS
+
+    sections = sections or list(SECTION_METHODS)
+    formats = formats or list(EXPORTERS)
+    context = multiprocessing.get_context('spawn')
+    report = progress or (lambda message: None)
+
+    results = {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {
+            'seed': seed,
+            'data': data_path,
+            'sections': sections,
+            'formats': formats,
+            'simulator': simulator_options or {}
+        },
+        'runs': []
+    }
+
+    targets = [None] if data_path else (sizes or DEFAULT_SIZES)
+    with tempfile.TemporaryDirectory(prefix='vsphere_benchmark_') as temp_dir:
+        for vm_count in targets:
+            run = {'vms': vm_count, 'source': data_path or 'simulator', 'error': None, 'phases': []}
+            simulator = None
+            try:
+                port = None
+                if vm_count is not None:
+                    report(f"Generating inventory with {vm_count} VMs...")
+                    sim_queue = context.Queue()
+                    simulator = context.Process(target=_run_simulator, daemon=True,
+                                                args=(vm_count, seed, simulator_options or {}, sim_queue))
+                    simulator.start()
+                    info = _wait(sim_queue, simulator, timeout, 'Simulator')
+                    port = info['port']
+                    run['inventory_seconds'] = info['inventory_seconds']
+                    run['objects'] = info['objects']
+
+                run_dir = os.path.join(output_dir or temp_dir, f'vms_{vm_count}' if vm_count else 'recorded')
+                os.makedirs(run_dir, exist_ok=True)
+                record_path = None
+                if record_dir and vm_count is not None:
+                    os.makedirs(record_dir, exist_ok=True)
+                    record_path = os.path.join(record_dir, f'report_data_{vm_count}.json')
+
+                report("Running benchmark" + (f" with {vm_count} VMs..." if vm_count else f" on {data_path}..."))
+                worker_queue = context.Queue()
+                worker = context.Process(target=_run_worker, args=(port, data_path, sections, formats, run_dir,
+                                                                   record_path, log_level, worker_queue))
+                worker.start()
+                outcome = _wait(worker_queue, worker, timeout, 'Benchmark worker')
+                worker.join()
+                run['phases'] = outcome['phases']
+                run['error'] = outcome['error']
+            except Exception as e:
+                logger.error(f"Benchmark run failed: {str(e)}")
+                run['error'] = str(e)
+            finally:
+                if simulator is not None:
+                    simulator.terminate()
+                    simulator.join()
+
+            results['runs'].append(run)
+            for phase in run['phases']:
+                report(format_phase(phase))
+
+    return results
+
+def format_phase(phase):
+    """One line summary of a phase measurement"""
+    parts = [f"{phase['phase']:<34} {phase['wall_seconds']:>9.3f}s"]
+    if 'soap_calls' in phase:
+        parts.append(f"{phase['soap_calls']:>7} SOAP")
+    if phase.get('records') is not None:
+        parts.append(f"{phase['records']:>7} records")
+    if phase.get('output_bytes') is not None:
+        parts.append(f"{phase['output_bytes'] / 1024:>9.1f} KB")
+    if phase.get('peak_rss_mb') is not None:
+        parts.append(f"peak RSS {phase['peak_rss_mb']:.1f} MB")
+    if phase.get('error'):
+        parts.append(f"ERROR {phase['error']}")
+    return '  '.join(parts)
+
+def compare_results(current, baseline, threshold=1.2):
+    """
+    Compare two benchmark results
+
+    Phases are matched by inventory size and phase name. Wall time, SOAP
+    round trips and peak RSS growing by more than the threshold factor count
+    as regressions.
+
+    Returns:
+        list: Regression descriptions
+    """
+    baseline_phases = {(run['vms'], phase['phase']): phase
+                       for run in baseline.get('runs', []) for phase in run['phases']}
+    regressions = []
+    for run in current.get('runs', []):
+        for phase in run['phases']:
+            previous = baseline_phases.get((run['vms'], phase['phase']))
+            if previous is None:
+                continue
+            for metric, minimum in (('wall_seconds', MIN_COMPARE_SECONDS), ('soap_calls', 1), ('peak_rss_mb', 1)):
+                old, new = previous.get(metric), phase.get(metric)
+                if old is None or new is None or max(old, new) < minimum:
+                    continue
+                if new > max(old, minimum) * threshold:
+                    regressions.append(f"{run['vms']} VMs / {phase['phase']}: {metric} {old} -> {new}")
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark data collection and report export')
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help='Comma separated VM counts of the synthetic inventories')
+    parser.add_argument('--seed', type=int, default=42, help='Inventory seed (default: 42)')
+    parser.add_argument('--data', metavar='FILE', help='Export recorded report data instead of collecting')
+    parser.add_argument('--record-data', metavar='DIR', help='Record the collected data of every size')
+    parser.add_argument('--sections', help='Comma separated sections to collect (default: all)')
+    parser.add_argument('--formats', help=f"Comma separated report formats (default: {','.join(EXPORTERS)})")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Simulated latency per SOAP request')
+    parser.add_argument('--latency-per-object-us', type=float, default=0.0,
+                        help='Simulated latency per returned object')
+    parser.add_argument('--task-seconds', type=float, default=0.0, help='Duration of datastore search tasks')
+    parser.add_argument('--output', '-o', default='benchmark_results.json', help='JSON results file')
+    parser.add_argument('--report-dir', help='Keep the exported reports in this directory')
+    parser.add_argument('--baseline', metavar='FILE', help='Compare with earlier results, exit 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='Regression factor for --baseline (default: 1.2)')
+    parser.add_argument('--timeout', type=int, default=3600, help='Maximum seconds per inventory size')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Show collector and exporter logging')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+
+    from core.data_collector import SECTION_METHODS
+    sections = args.sections.split(',') if args.sections else None
+    formats = args.formats.split(',') if args.formats else None
+    for section in sections or []:
+        if section not in SECTION_METHODS:
+            print(f"Unknown section: {section}")
+            return 2
+    for report_format in formats or []:
+        if report_format not in EXPORTERS:
+            print(f"Unknown format: {report_format}")
+            return 2
+
+    results = run_benchmark(
+        sizes=[int(size) for size in args.sizes.split(',')],
+        seed=args.seed,
+        data_path=args.data,
+        sections=sections,
+        formats=formats,
+        simulator_options={
+            'latency_ms': args.latency_ms,
+            'latency_per_object_us': args.latency_per_object_us,
+            'task_seconds': args.task_seconds
+        },
+        record_dir=args.record_data,
+        output_dir=args.report_dir,
+        timeout=args.timeout,
+        log_level=logging.INFO if args.verbose else logging.CRITICAL,
+        progress=print
+    )
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    exit_code = 1 if any(run['error'] for run in results['runs']) else 0
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare_results(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regressions compared to {args.baseline}:")
+            for regression in regressions:
+                print(f"- {regression}")
+            exit_code = 1
+        else:
+            print(f"No regressions compared to {args.baseline}")
+    return exit_code
+
+if __name__ == '__main__':
+    sys.exit(main())
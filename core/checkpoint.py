@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Checkpoints of a running collection
+
+Records the progress of a collection in a journal file: every finished
+section with its records and, during the orphaned VMDK scan, every finished
+datastore with the disks found on it. If the run is interrupted (e.g. the
+connection drops at datastore 180 of 200), the next run with the same
+settings continues from the journal instead of collecting everything again.
+
+The journal is a JSON lines file that is only appended to, so recording a
+datastore does not rewrite the records collected before. A line cut off by
+a crash is ignored when the journal is read.
+"""
+
+import os
+import json
+import logging
+import datetime
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_PATH = os.path.join(
+    os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache')),
+    'vsphere_reporter',
+    'checkpoint.jsonl'
+)
+
+def _encode(value):
+    """Value converted to JSON, keeping datetimes recognizable"""
+    if isinstance(value, datetime.datetime):
+        return {'$datetime': value.isoformat()}
+    if isinstance(value, dict):
+        return {str(key): _encode(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [_encode(item) for item in value]
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    return str(value)
+
+def _decode(value):
+    """Inverse of _encode"""
+    if isinstance(value, dict):
+        if len(value) == 1 and '$datetime' in value:
+            return datetime.datetime.fromisoformat(value['$datetime'])
+        return {key: _decode(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    return value
+
+class CollectionCheckpoint:
+    """Journal of finished sections and datastore scans of one collection run"""
+
+    def __init__(self, path=None, run=None, resume=False):
+        """
+        Open the checkpoint journal
+
+        Args:
+            path (str): Journal location (defaults to ~/.cache/vsphere_reporter/checkpoint.jsonl)
+            run (dict): Settings identifying the run (servers, sections, scope, ...); a journal
+                        written for different settings is not resumed
+            resume (bool): Continue from an existing journal instead of starting a new one
+        """
+        self.path = os.path.expanduser(path or DEFAULT_CHECKPOINT_PATH)
+        self.run = json.loads(json.dumps(_encode(run or {}), sort_keys=True))
+        self.resumed = False
+        self._sections = {}
+        self._datastores = {}
+        self._lock = threading.Lock()
+        self._open_tail = False
+
+        if resume:
+            self.resumed = self._load()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, 'a' if self.resumed else 'w', encoding='utf-8')
+        if self.resumed and self._open_tail:
+            self._file.write('\n')
+        if not self.resumed:
+            self._append({'type': 'run', 'run': self.run})
+
+    def section(self, server, section):
+        """
+        Records of a section finished before the interruption
+
+        Returns:
+            list: Records, or None if the section has to be collected
+        """
+        return self._sections.get((server, section))
+
+    def save_section(self, server, section, records):
+        """Record a finished section"""
+        self._sections[(server, section)] = records
+        self._append({'type': 'section', 'server': server, 'section': section, 'records': _encode(records)})
+
+    def datastore(self, server, volume):
+        """
+        Disks of a datastore scanned before the interruption
+
+        Returns:
+            list: Disk dicts, or None if the datastore has to be scanned
+        """
+        return self._datastores.get((server, volume))
+
+    def save_datastore(self, server, volume, disks):
+        """Record a finished datastore scan of the orphaned VMDK section"""
+        self._datastores[(server, volume)] = disks
+        self._append({'type': 'datastore', 'server': server, 'volume': volume, 'disks': _encode(disks)})
+
+    def summary(self):
+        """Short description of the progress stored in the journal"""
+        return f"{len(self._sections)} sections, {len(self._datastores)} datastores"
+
+    def close(self):
+        """Close the journal, keeping it for a later resume"""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def remove(self):
+        """Close and delete the journal after the run completed"""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def _append(self, entry):
+        """Write one journal line and make sure it is on disk"""
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def _load(self):
+        """
+        Read an existing journal of the same run
+
+        Returns:
+            bool: True if the journal belongs to this run and was loaded
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.path}: {str(e)}")
+            return False
+
+        self._open_tail = bool(lines) and not lines[-1].endswith('\n')
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                # Bei einem Abbruch während des Schreibens ist die letzte Zeile unvollständig
+                logger.debug(f"Skipping incomplete checkpoint line in {self.path}")
+        if not entries or entries[0].get('type') != 'run' or entries[0].get('run') != self.run:
+            logger.warning(f"Checkpoint {self.path} belongs to a different run, starting over")
+            return False
+
+        for entry in entries[1:]:
+            if entry.get('type') == 'section':
+                self._sections[(entry['server'], entry['section'])] = _decode(entry['records'])
+            elif entry.get('type') == 'datastore':
+                self._datastores[(entry['server'], entry['volume'])] = _decode(entry['disks'])
+        return True
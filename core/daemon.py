@@ -0,0 +1,569 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Long-running reporter service with a warm inventory
+
+Keeps one session per vCenter open, tracks changes through a PropertyCollector
+filter and produces the configured reports on cron-like schedules. Before a
+report is rendered only the sections whose objects changed since the last
+collection (or whose data is older than its maximum age) are collected again,
+everything else is served from memory:
+
+    python -m core.daemon --config daemon.json
+    python -m core.daemon --config daemon.json --run-now nightly
+
+The configuration extends the multi-vCenter inventory format (see
+core.multi_vcenter) by report profiles:
+
+    {
+        "defaults": {"username": "report@vsphere.local", "password_env": "VC_PASSWORD"},
+        "vcenters": [{"name": "vc-muc", "server": "vc-muc.example.com"}],
+        "poll_seconds": 60,
+        "max_age": {"orphaned_vmdks": 21600},
+        "history": "/var/lib/vsphere_reporter/history.db",
+        "scan_cache": "/var/lib/vsphere_reporter/datastore_scans.json",
+        "scan_max_age": 86400,
+        "reports": [
+            {"name": "snapshots", "schedule": "0 7-19 * * mon-fri", "sections": ["snapshots"],
+             "formats": ["html"], "output_dir": "reports/snapshots"},
+            {"name": "nightly", "schedule": "30 2 * * *", "sections": "all",
+             "formats": ["html", "pdf"], "output_dir": "reports/nightly"}
+        ]
+    }
+
+With "history" (a database path, or true for the default location) every
+report run is also saved to the run history (see core.history).
+
+With "scan_cache" (a file path, or true for the default location) the
+orphaned VMDK scan only browses datastores that changed since their last
+scan, and all of them at the latest after "scan_max_age" seconds (see
+core.scan_cache).
+
+Changes in datastore contents (e.g. orphaned VMDK files) do not show up as
+property changes, so those sections rely on their maximum age.
+"""
+
+import os
+import copy
+import json
+import time
+import signal
+import logging
+import argparse
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from pyVmomi import vim, vmodl
+
+from core.vsphere_client import VSphereClient, SCOPE_ATTACHED
+from core.data_collector import DataCollector, SECTION_METHODS, REQUIRED_SECTIONS
+from core.report_generator import ReportGenerator
+from core.exporters import DOCUMENT_FORMATS, available_formats
+from core.multi_vcenter import load_inventory, resolve_password, merge_results
+from core.schedule import CronSchedule
+from core.history import HistoryStore, DEFAULT_HISTORY_PATH
+from core.scan_cache import DatastoreScanCache, DEFAULT_SCAN_CACHE_PATH, DEFAULT_SCAN_MAX_AGE
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLL_SECONDS = 60
+
+# Maximum age of cached section data in seconds, regardless of change notifications
+DEFAULT_MAX_AGE = 86400
+SECTION_MAX_AGE = {
+    'orphaned_vmdks': 21600
+}
+
+VM_SECTIONS = ('vmware_tools', 'snapshots', 'orphaned_vmdks', 'vms')
+
+# Watched properties per object type and the sections a change invalidates.
+# Entering or leaving objects invalidate all sections of their type.
+WATCHED_PROPERTIES = {
+    vim.VirtualMachine: {
+        'name': VM_SECTIONS,
+        'config.changeVersion': VM_SECTIONS,
+        'runtime.powerState': ('vmware_tools', 'vms'),
+        'guest.toolsVersionStatus2': ('vmware_tools', 'vms'),
+        'guest.toolsRunningStatus': ('vmware_tools', 'vms'),
+        'snapshot': ('snapshots', 'orphaned_vmdks')
+    },
+    vim.HostSystem: {
+        'name': ('hosts', 'clusters'),
+        'runtime.connectionState': ('hosts', 'clusters'),
+        'runtime.inMaintenanceMode': ('hosts', 'clusters')
+    },
+    vim.Datastore: {
+        'name': ('datastores', 'orphaned_vmdks'),
+        'summary.accessible': ('datastores', 'orphaned_vmdks'),
+        'summary.capacity': ('datastores',),
+        'summary.freeSpace': ('datastores',)
+    },
+    vim.ClusterComputeResource: {
+        'name': ('clusters',),
+        'host': ('clusters',)
+    },
+    vim.ResourcePool: {
+        'name': ('resource_pools',),
+        'config': ('resource_pools',),
+        'vm': ('resource_pools',)
+    },
+    vim.Network: {
+        'name': ('networks',),
+        'host': ('networks',),
+        'vm': ('networks',)
+    }
+}
+
+def _sections_of_type(mo_type):
+    sections = set()
+    for affected in WATCHED_PROPERTIES[mo_type].values():
+        sections.update(affected)
+    return sections
+
+def load_daemon_config(path):
+    """
+    Load the daemon configuration
+
+    Args:
+        path (str): Path to the JSON configuration
+
+    Returns:
+        dict: Inventory as returned by load_inventory plus 'reports', 'poll_seconds', 'max_age',
+              'history' (database path or None), 'scan_cache' (file path or None) and 'scan_max_age'
+    """
+    config = load_inventory(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        raw = json.load(f)
+
+    reports = []
+    names = set()
+    for entry in raw.get('reports', []):
+        name = entry.get('name')
+        if not name:
+            raise ValueError(f"Report profile without 'name': {entry}")
+        if name in names:
+            raise ValueError(f"Duplicate report profile name: {name}")
+        names.add(name)
+
+        sections = entry.get('sections', 'all')
+        if sections == 'all':
+            sections = list(SECTION_METHODS)
+        unknown = [section for section in sections if section not in SECTION_METHODS]
+        if unknown:
+            raise ValueError(f"Unknown sections in report profile {name}: {', '.join(unknown)}")
+
+        formats = entry.get('formats', ['html'])
+        if formats == 'all':
+            formats = list(DOCUMENT_FORMATS)
+        unknown = [report_format for report_format in formats if report_format not in available_formats()]
+        if unknown:
+            raise ValueError(f"Unknown formats in report profile {name}: {', '.join(unknown)}")
+
+        reports.append({
+            'name': name,
+            'schedule': CronSchedule(entry['schedule']) if entry.get('schedule') else None,
+            'sections': sections,
+            'formats': formats,
+            'output_dir': entry.get('output_dir', os.path.join('reports', name)),
+            'per_vcenter': bool(entry.get('per_vcenter', False))
+        })
+
+    if not reports:
+        raise ValueError(f"No report profiles defined in {path}")
+
+    max_age = dict(SECTION_MAX_AGE)
+    max_age.update(raw.get('max_age', {}))
+
+    config['reports'] = reports
+    config['poll_seconds'] = max(1, int(raw.get('poll_seconds', DEFAULT_POLL_SECONDS)))
+    config['max_age'] = max_age
+    history = raw.get('history')
+    config['history'] = DEFAULT_HISTORY_PATH if history is True else (history or None)
+    scan_cache = raw.get('scan_cache')
+    config['scan_cache'] = DEFAULT_SCAN_CACHE_PATH if scan_cache is True else (scan_cache or None)
+    config['scan_max_age'] = float(raw.get('scan_max_age', DEFAULT_SCAN_MAX_AGE))
+    return config
+
+class WarmInventory:
+    """Persistent connection to one vCenter with cached, change-tracked section data"""
+
+    def __init__(self, vcenter, poll_seconds=DEFAULT_POLL_SECONDS, max_age=None, metrics=None, scan_cache=None):
+        """
+        Initialize the warm inventory
+
+        Args:
+            vcenter (dict): Inventory entry (password resolved)
+            poll_seconds (int): Longest wait for change notifications in one request
+            max_age (dict): Maximum age per section in seconds (default: DEFAULT_MAX_AGE)
+            metrics (SoapMetrics): Optional SOAP statistics
+            scan_cache (DatastoreScanCache): Optional store of earlier datastore scans
+        """
+        self.vcenter = vcenter
+        self.name = vcenter['name']
+        self.poll_seconds = poll_seconds
+        self.max_age = max_age or {}
+        self.scan_cache = scan_cache
+        self.client = VSphereClient(vcenter['server'], vcenter['username'], vcenter['password'],
+                                    vcenter.get('ignore_ssl', False), port=vcenter.get('port', 443),
+                                    protocol=vcenter.get('protocol', 'https'), metrics=metrics,
+                                    scope=vcenter.get('scope'))
+        self.collector = None
+        self.cache = {}
+        self.dirty = set(SECTION_METHODS)
+        self._lock = threading.Lock()
+        self._connect_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+        self._property_collector = None
+        self._views = []
+        self._filter = None
+        self._version = ''
+
+    def start(self, watch=True):
+        """
+        Connect and start watching for changes
+
+        Args:
+            watch (bool): Track changes in the background; without it cached sections only expire by age
+        """
+        self._connect()
+        if not watch:
+            return
+        self._watcher = threading.Thread(target=self._watch, name=f'{self.name}-watch', daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        """Stop watching and end the vCenter session"""
+        self._stop.set()
+        if self._watcher:
+            self._watcher.join(timeout=self.poll_seconds + 10)
+        self._destroy_filter()
+        self.client.disconnect(logout=True)
+
+    def _connect(self):
+        with self._connect_lock:
+            self.client.disconnect(logout=False)
+            self.client.connect()
+            self.collector = DataCollector(self.client, scan_cache=self.scan_cache)
+            self._create_filter()
+        # Nach einem Verbindungsaufbau ist unbekannt, was sich geändert hat
+        with self._lock:
+            self.dirty = set(SECTION_METHODS)
+
+    def _create_filter(self):
+        """Watch the relevant properties of all inventory objects in the collection scope"""
+        content = self.client.content
+        types = list(WATCHED_PROPERTIES)
+        # Eigener Collector: WaitForUpdatesEx sieht nur diesen Filter, nicht die Filter von WaitForTask
+        self._property_collector = content.propertyCollector.CreatePropertyCollector()
+        scope = self.client.scope_containers()
+        traversal = vmodl.query.PropertyCollector.TraversalSpec(
+            name='traverseView', type=vim.view.ContainerView, path='view', skip=False)
+        object_specs = []
+        for container in scope or [content.rootFolder]:
+            view = content.viewManager.CreateContainerView(container, types, True)
+            self._views.append(view)
+            object_specs.append(vmodl.query.PropertyCollector.ObjectSpec(obj=view, skip=True, selectSet=[traversal]))
+        if scope:
+            # Wie bei der Sammlung: die Scope-Objekte selbst und die Datastores und Netzwerke ihrer Hosts
+            # und VMs liegen nicht in den Views. Später hinzugekommene erfasst erst der nächste Filter.
+            watched = [container for container in scope if isinstance(container, tuple(WATCHED_PROPERTIES))]
+            for attached_type in SCOPE_ATTACHED:
+                watched.extend(self.client.scope_attached(attached_type))
+            object_specs.extend(vmodl.query.PropertyCollector.ObjectSpec(obj=obj, skip=False) for obj in watched)
+        spec = vmodl.query.PropertyCollector.FilterSpec(
+            objectSet=object_specs,
+            propSet=[vmodl.query.PropertyCollector.PropertySpec(type=mo_type, pathSet=list(paths))
+                     for mo_type, paths in WATCHED_PROPERTIES.items()]
+        )
+        self._filter = self._property_collector.CreateFilter(spec, partialUpdates=True)
+        # Der erste Aufruf liefert den Ausgangszustand aller Objekte, danach nur noch Änderungen
+        initial = self._property_collector.WaitForUpdatesEx(
+            '', vmodl.query.PropertyCollector.WaitOptions(maxWaitSeconds=0))
+        self._version = initial.version if initial else ''
+
+    def _destroy_filter(self):
+        try:
+            if self._filter:
+                self._filter.Destroy()
+            for view in self._views:
+                view.Destroy()
+            if self._property_collector:
+                self._property_collector.Destroy()
+        except Exception as e:
+            logger.debug(f"[{self.name}] Could not remove change filter: {str(e)}")
+        self._filter = None
+        self._views = []
+        self._property_collector = None
+
+    def _watch(self):
+        """Mark sections as changed whenever the filter reports updates"""
+        options = vmodl.query.PropertyCollector.WaitOptions(maxWaitSeconds=self.poll_seconds)
+        while not self._stop.is_set():
+            try:
+                update = self._property_collector.WaitForUpdatesEx(self._version, options)
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                logger.warning(f"[{self.name}] Waiting for changes failed ({str(e)}), reconnecting")
+                self._reconnect()
+                continue
+            if update is None:
+                continue
+            self._version = update.version
+            self._apply(update)
+
+    def _reconnect(self):
+        # Filter und Collector der alten Sitzung aufräumen, soweit sie noch erreichbar ist
+        self._destroy_filter()
+        while not self._stop.is_set():
+            try:
+                self._connect()
+                logger.info(f"[{self.name}] Reconnected")
+                return
+            except Exception as e:
+                logger.error(f"[{self.name}] Reconnect failed: {str(e)}")
+                self._stop.wait(self.poll_seconds)
+
+    def _apply(self, update):
+        """Translate an UpdateSet into changed sections"""
+        changed = set()
+        for filter_update in update.filterSet or []:
+            for object_update in filter_update.objectSet or []:
+                mo_type = next((mo_type for mo_type in WATCHED_PROPERTIES
+                                if isinstance(object_update.obj, mo_type)), None)
+                if mo_type is None:
+                    # Objekte, die den Filter verlassen, kommen ohne genauen Typ an
+                    changed.update(SECTION_METHODS)
+                    continue
+                if object_update.kind != 'modify':
+                    changed.update(_sections_of_type(mo_type))
+                    continue
+                for change in object_update.changeSet:
+                    for path, sections in WATCHED_PROPERTIES[mo_type].items():
+                        if change.name == path or change.name.startswith(path + '.') or \
+                                path.startswith(change.name + '.'):
+                            changed.update(sections)
+        if changed:
+            with self._lock:
+                new = changed - self.dirty
+                self.dirty |= changed
+            if new:
+                logger.debug(f"[{self.name}] Changed sections: {', '.join(sorted(new))}")
+
+    def stale_sections(self, sections):
+        """Sections that need to be collected again before a report"""
+        now = time.monotonic()
+        with self._lock:
+            return [section for section in sections
+                    if section in self.dirty or section not in self.cache or
+                    now - self.cache[section]['collected'] > self.max_age.get(section, DEFAULT_MAX_AGE)]
+
+    def refresh(self, sections):
+        """
+        Bring the requested sections up to date
+
+        Args:
+            sections (list): Section keys
+
+        Returns:
+            dict: Section data, refreshed where necessary
+        """
+        stale = self.stale_sections(sections)
+        if stale:
+            logger.info(f"[{self.name}] Collecting {', '.join(stale)}")
+            # Ein Reconnect aus dem Watch-Thread ersetzt Verbindung und Collector erst nach der Sammlung
+            with self._connect_lock:
+                # Namen können sich seit der letzten Sammlung geändert haben
+                self.collector.names.clear()
+                self.client.clear_scope()
+                with ThreadPoolExecutor(max_workers=self.vcenter.get('workers', 1),
+                                        thread_name_prefix=f'{self.name}-section') as executor:
+                    futures = {executor.submit(self._collect, section): section for section in stale}
+                    for future in as_completed(futures):
+                        future.result()
+
+        with self._lock:
+            return {section: self.cache[section]['records'] for section in sections}
+
+    def _collect(self, section):
+        # Änderungen während der Sammlung markieren den Abschnitt erneut
+        with self._lock:
+            self.dirty.discard(section)
+        try:
+            records = self.collector.collect_section(section)
+        except Exception:
+            with self._lock:
+                self.dirty.add(section)
+            raise
+        for record in records:
+            record['vcenter'] = self.name
+        with self._lock:
+            self.cache[section] = {'records': records, 'collected': time.monotonic()}
+
+class ReporterDaemon:
+    """Runs the configured report profiles against warm inventories"""
+
+    def __init__(self, config, metrics=None):
+        """
+        Initialize the daemon
+
+        Args:
+            config (dict): Configuration as returned by load_daemon_config (passwords resolved)
+            metrics (SoapMetrics): Optional SOAP statistics shared by all vCenters
+        """
+        self.config = config
+        self.reports = {report['name']: report for report in config['reports']}
+        scan_cache = DatastoreScanCache(config['scan_cache'], config['scan_max_age']) \
+            if config.get('scan_cache') else None
+        self.inventories = [WarmInventory(vcenter, config['poll_seconds'], config['max_age'], metrics, scan_cache)
+                            for vcenter in config['vcenters']]
+        self.max_parallel = config.get('max_parallel', len(self.inventories))
+        self._stop = threading.Event()
+
+    def start(self, watch=True):
+        """Connect to all vCenters (see WarmInventory.start)"""
+        with ThreadPoolExecutor(max_workers=self.max_parallel, thread_name_prefix='vcenter') as executor:
+            for future in [executor.submit(inventory.start, watch) for inventory in self.inventories]:
+                future.result()
+        logger.info(f"Connected to {len(self.inventories)} vCenter servers")
+
+    def request_stop(self):
+        """Let run_forever() return (safe to call from signal handlers)"""
+        self._stop.set()
+
+    def stop(self):
+        """Stop the schedule loop and disconnect"""
+        self._stop.set()
+        for inventory in self.inventories:
+            inventory.stop()
+
+    def run_report(self, name):
+        """
+        Refresh the stale sections and render one report profile
+
+        Args:
+            name (str): Report profile name
+
+        Returns:
+            list: Paths of the generated report files
+        """
+        report = self.reports[name]
+        sections = list(dict.fromkeys(REQUIRED_SECTIONS + report['sections']))
+        start = time.monotonic()
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_parallel, thread_name_prefix='vcenter') as executor:
+            futures = {executor.submit(inventory.refresh, sections): inventory.name
+                       for inventory in self.inventories}
+            for future in as_completed(futures):
+                vcenter = futures[future]
+                try:
+                    results[vcenter] = {'data': future.result(), 'error': None}
+                except Exception as e:
+                    logger.error(f"[{vcenter}] Refresh for report {name} failed: {str(e)}")
+                    results[vcenter] = {'data': {}, 'error': str(e)}
+        collected = time.monotonic() - start
+
+        output_files = []
+        if report['per_vcenter']:
+            for vcenter, result in results.items():
+                if not result['error']:
+                    output_files.extend(self._render(result['data'], report,
+                                                     os.path.join(report['output_dir'], vcenter)))
+        if any(not result['error'] for result in results.values()):
+            merged = merge_results(results, sections)
+            if self.config.get('history'):
+                self._record_history(merged, [vcenter for vcenter, result in results.items()
+                                              if not result['error']], name)
+            output_files.extend(self._render(merged, report, report['output_dir']))
+
+        logger.info(f"Report {name}: {len(output_files)} files, refresh {collected:.1f}s, "
+                    f"total {time.monotonic() - start:.1f}s")
+        return output_files
+
+    def _record_history(self, data, vcenters, name):
+        try:
+            with HistoryStore(self.config['history']) as store:
+                store.record_run(data, vcenters, label=name)
+        except Exception as e:
+            logger.error(f"Report {name}: could not save run to history: {str(e)}")
+
+    def _render(self, data, report, output_dir):
+        os.makedirs(output_dir, exist_ok=True)
+        # Exporter dürfen die Daten ergänzen, der Cache bleibt unverändert
+        generator = ReportGenerator(copy.deepcopy(data))
+        output_files = []
+        for report_format in report['formats']:
+            try:
+                output_files.extend(generator.export(report_format, output_dir))
+            except Exception as e:
+                logger.error(f"Report {report['name']} ({report_format}) failed: {str(e)}")
+        return output_files
+
+    def run_forever(self):
+        """Run the report profiles on their schedules until stop() is called"""
+        now = datetime.datetime.now()
+        due = {name: report['schedule'].next_after(now)
+               for name, report in self.reports.items() if report['schedule']}
+        if not due:
+            logger.warning("No report profile has a schedule, nothing to do")
+            return
+
+        while not self._stop.is_set():
+            name = min(due, key=due.get)
+            wait = (due[name] - datetime.datetime.now()).total_seconds()
+            if wait > 0:
+                logger.info(f"Next report: {name} at {due[name]:%Y-%m-%d %H:%M}")
+                # In kurzen Schritten warten, damit Zeitsprünge (Sommerzeit, NTP) aufgeholt werden
+                if self._stop.wait(min(wait, 60)):
+                    break
+                continue
+            try:
+                self.run_report(name)
+            except Exception as e:
+                logger.error(f"Report {name} failed: {str(e)}")
+            due[name] = self.reports[name]['schedule'].next_after(datetime.datetime.now())
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='VMware vSphere Reporter service: scheduled reports '
+                                                 'from a warm inventory')
+    parser.add_argument('--config', '-c', required=True, metavar='FILE', help='Daemon configuration (JSON)')
+    parser.add_argument('--run-now', nargs='+', metavar='REPORT',
+                        help='Render these report profiles once and exit instead of following the schedules')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Log debug messages')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    config = load_daemon_config(args.config)
+    for vcenter in config['vcenters']:
+        vcenter['password'] = resolve_password(vcenter)
+    unknown = [name for name in args.run_now or [] if name not in {report['name'] for report in config['reports']}]
+    if unknown:
+        logger.error(f"Unknown report profiles: {', '.join(unknown)}")
+        return 2
+
+    daemon = ReporterDaemon(config)
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.request_stop())
+    daemon.start(watch=not args.run_now)
+    try:
+        if args.run_now:
+            for name in args.run_now:
+                for path in daemon.run_report(name):
+                    print(path)
+        else:
+            daemon.run_forever()
+    except KeyboardInterrupt:
+        logger.info("Interrupted")
+    finally:
+        daemon.stop()
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
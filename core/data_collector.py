@@ -6,12 +6,17 @@ VMware vSphere data collector module
 """
 
 import datetime
-import re
 import logging
 import sys
 import os
+import threading
 from pyVmomi import vim
 from contextlib import contextmanager
+import asyncio
+
+from core.name_index import NameIndex
+from core.report_schema import OMIT, property_specs, selected_columns, tools_status
+from core.scan_cache import datastore_fingerprint
 
 # Configure the logger
 logger = logging.getLogger(__name__)
@@ -43,200 +48,274 @@ if os.environ.get('VSPHERE_REPORTER_DEBUG', '0') != '1':
 else:
     logger.debug("*** DEBUG MODE ACTIVE - Errors will NOT be suppressed ***")
 
+# Redirection state shared by all threads; suppression itself is tracked per thread
+_suppress_lock = threading.Lock()
+_suppress_local = threading.local()
+_suppress_active = 0
+_original_streams = None
+
+class _ThreadAwareWriter:
+    """Stream proxy that only swallows output of threads inside suppress_stdout_stderr()"""
+    
+    def __init__(self, stream):
+        self.stream = stream
+        
+    def write(self, message):
+        # Output of suppressing threads is dropped, everything else passes through
+        if getattr(_suppress_local, 'depth', 0) > 0:
+            return len(message)
+        return self.stream.write(message)
+        
+    def flush(self):
+        self.stream.flush()
+        
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
 @contextmanager
 def suppress_stdout_stderr():
     """
     Context manager to suppress stdout and stderr output
     
     This is useful for hiding error messages from pyVmomi that are not
-    critical for the application's functioning. Output is redirected to
-    the application log widget with DEBUG level instead of showing in 
-    command windows.
+    critical for the application's functioning. Suppression applies to the
+    calling thread only, so collectors running concurrently (e.g. for several
+    vCenters) neither leak output nor swallow progress output of other threads.
     """
-    original_stdout = sys.stdout
-    original_stderr = sys.stderr
+    global _suppress_active, _original_streams
     
-    class LoggerWriter:
-        def __init__(self, logger, level):
-            self.logger = logger
-            self.level = level
-            self.buffer = ''
-            self.debug_mode = os.environ.get('VSPHERE_REPORTER_DEBUG', '0') == '1'
-            
-        def write(self, message):
-            # Im Debug-Modus alles protokollieren, sonst unterdrücken
-            if self.debug_mode and message.strip():
-                self.logger.log(self.level, f"PyVmomi: {message.strip()}")
-            # Im Nicht-Debug-Modus komplett stumm bleiben
-            
-        def flush(self):
-            pass
+    # Debug-Modus überprüfen
+    if os.environ.get('VSPHERE_REPORTER_DEBUG', '0') == '1':
+        # Im Debug-Modus Nachrichten protokollieren, aber Original-Streams beibehalten
+        logger.warning("DEBUG MODE: pyVmomi errors will be logged, not suppressed")
+        yield
+        return
+    
+    # Im Normalbetrieb Ausgaben umleiten und unterdrücken
+    with _suppress_lock:
+        if _suppress_active == 0:
+            _original_streams = (sys.stdout, sys.stderr)
+            sys.stdout = _ThreadAwareWriter(sys.stdout)
+            sys.stderr = _ThreadAwareWriter(sys.stderr)
+        _suppress_active += 1
+    _suppress_local.depth = getattr(_suppress_local, 'depth', 0) + 1
     
     try:
-        # Debug-Modus überprüfen
-        debug_mode = os.environ.get('VSPHERE_REPORTER_DEBUG', '0') == '1'
-        
-        if debug_mode:
-            # Im Debug-Modus Nachrichten protokollieren, aber Original-Streams beibehalten
-            logger.warning("DEBUG MODE: pyVmomi errors will be logged, not suppressed")
-            yield
-        else:
-            # Im Normalbetrieb Ausgaben umleiten und unterdrücken
-            sys.stdout = LoggerWriter(logger, logging.DEBUG)
-            sys.stderr = LoggerWriter(logger, logging.WARNING)
-            yield
+        yield
     finally:
-        # Restore stdout and stderr
-        sys.stdout = original_stdout
-        sys.stderr = original_stderr
+        _suppress_local.depth -= 1
+        with _suppress_lock:
+            _suppress_active -= 1
+            if _suppress_active == 0:
+                # Restore stdout and stderr
+                sys.stdout, sys.stderr = _original_streams
+                _original_streams = None
+
+# Report sections and the collector methods that produce them
+SECTION_METHODS = {
+    'vmware_tools': 'collect_vmware_tools_info',
+    'snapshots': 'collect_snapshot_info',
+    'orphaned_vmdks': 'collect_orphaned_vmdks',
+    'vms': 'collect_vm_info',
+    'hosts': 'collect_host_info',
+    'datastores': 'collect_datastore_info',
+    'clusters': 'collect_cluster_info',
+    'resource_pools': 'collect_resource_pool_info',
+    'networks': 'collect_network_info'
+}
+
+REQUIRED_SECTIONS = ['vmware_tools', 'snapshots', 'orphaned_vmdks']
+
+# Sections with one record per object, streamed page by page by iter_section
+STREAMED_SECTIONS = {'vms', 'hosts', 'datastores', 'clusters', 'resource_pools', 'networks'}
+
+# Datastores searched at the same time during the orphaned VMDK scan
+DATASTORE_SCAN_WORKERS = 4
+
+GB = 1024 ** 3
+
+def _folder_of(datastore_path):
+    """Lower-cased folder of a datastore path, e.g. '[ds1] vm/' for '[ds1] vm/vm.vmx'"""
+    normalized = datastore_path.lower()
+    if '/' in normalized:
+        return normalized.rsplit('/', 1)[0] + '/'
+    return normalized.split(']', 1)[0] + '] '
+
+def _with_datastore(datastore_path, aliases):
+    """Datastore path with an aliased datastore name replaced by the scanned one"""
+    if not aliases or not datastore_path.startswith('['):
+        return datastore_path
+    name, _, rest = datastore_path[1:].partition(']')
+    return f"[{aliases[name]}]{rest}" if name in aliases else datastore_path
+
+def _name_list(names, limit=3):
+    """Names for a progress message, shortened to the first few"""
+    return ', '.join(names[:limit]) + (f", ... (+{len(names) - limit})" if len(names) > limit else '')
 
 class DataCollector:
     """Collector for vSphere environment data"""
     
-    def __init__(self, vsphere_client):
+    def __init__(self, vsphere_client, columns=None, progress=None, scan_cache=None, checkpoint=None):
         """
         Initialize the data collector
         
         Args:
             vsphere_client (VSphereClient): Connected vSphere client
+            columns (dict): Optional section -> column keys to collect (see core.report_schema),
+                            sections without an entry are collected with all columns
+            progress (callable): Optional callback(message) for progress worth showing to the user
+            scan_cache (DatastoreScanCache): Optional store of earlier datastore scans, unchanged
+                                             datastores are not browsed again
+            checkpoint (CollectionCheckpoint): Optional journal of finished sections and datastore
+                                               scans, used to resume an interrupted run
         """
         self.client = vsphere_client
-        
-    def collect_vm_info(self):
+        self.names = NameIndex(vsphere_client)
+        self.columns = columns or {}
+        self.progress = progress
+        self.scan_cache = scan_cache
+        self.checkpoint = checkpoint
+        # Abschnitte mit fehlgeschlagenen Teilen (z.B. einzelne Datastores) werden nicht als fertig
+        # im Checkpoint vermerkt
+        self.incomplete_sections = set()
+        
+    def collect_section(self, section):
         """
-        Collect information about virtual machines
+        Collect the data for a single report section
         
+        Args:
+            section (str): Section key from SECTION_METHODS
+            
         Returns:
-            list: List of VM information dictionaries
+            list: Records of the section
         """
-        logger.info("Collecting VM information")
-        vms = self.client.get_virtual_machines()
+        return list(self.iter_section(section))
+
+    def _collect_objects(self, section):
+        """
+        Fetch the properties behind the selected columns of a section for all its objects
         
-        vm_info_list = []
-        for vm in vms:
+        Returns:
+            tuple: ([(managed object, property dict)], columns to fill)
+        """
+        keys = self.columns.get(section)
+        objects = self.client.retrieve_properties(property_specs(section, keys))
+        return objects, selected_columns(section, keys)
+        
+    def _record(self, obj, props, columns):
+        """Report record of one object from its fetched properties"""
+        record = {}
+        for column in columns:
+            value = column.value(obj, props, self)
+            if value is not OMIT:
+                record[column.key] = value
+        record['moref'] = obj._moId
+        return record
+        
+    def iter_section(self, section):
+        """
+        Yield the records of a single report section one at a time
+
+        Sections with one record per object (see STREAMED_SECTIONS) are built
+        page by page from RetrievePropertiesEx: the next page is only fetched
+        once the records of the current one were handed out, so a streaming
+        exporter writing them never holds more than a page of the section.
+        Sections that are sorted or aggregated across objects (VMware Tools,
+        snapshots, orphaned VMDKs) are collected completely before the first
+        record is yielded.
+
+        Args:
+            section (str): Section key from SECTION_METHODS
+
+        Yields:
+            dict: Records of the section in collection order
+        """
+        if section not in SECTION_METHODS:
+            raise ValueError(f"Unknown report section: {section}")
+        if self.checkpoint:
+            records = self.checkpoint.section(self.client.server, section)
+            if records is not None:
+                self._report(f"Resumed {section} from checkpoint ({len(records)} entries)")
+                yield from records
+                return
+        self.incomplete_sections.discard(section)
+        # Für den Checkpoint muss der Abschnitt trotzdem vollständig gesammelt werden
+        collected = [] if self.checkpoint else None
+        with self.client.metrics.section(section):
+            if section in STREAMED_SECTIONS:
+                records = self._iter_records(section)
+            else:
+                records = getattr(self, SECTION_METHODS[section])()
+            for record in records:
+                if collected is not None:
+                    collected.append(record)
+                yield record
+        if self.checkpoint and section not in self.incomplete_sections:
+            self.checkpoint.save_section(self.client.server, section, collected)
+
+    def _iter_records(self, section):
+        """
+        Yield one record per object of a section, page by page
+
+        Objects whose record cannot be built are skipped.
+        """
+        logger.info(f"Collecting {section} information")
+        keys = self.columns.get(section)
+        columns = selected_columns(section, keys)
+        for obj, props in self.client.iter_properties(property_specs(section, keys)):
             try:
-                # Suppress stdout/stderr to prevent PyVmomi error messages
-                with suppress_stdout_stderr():
-                    # Get VM properties
-                    summary = vm.summary
-                    config = vm.config if vm.config else None
-                    guest = vm.guest if vm.guest else None
-                
-                vm_info = {
-                    'name': vm.name,
-                    'power_state': summary.runtime.powerState,
-                    'guest_full_name': summary.config.guestFullName if summary.config else "Unknown",
-                    'vmware_tools_status': summary.guest.toolsStatus if summary.guest else "Unknown",
-                    'vmware_tools_version': summary.guest.toolsVersionStatus if summary.guest else "Unknown",
-                    'uuid': config.uuid if config else "Unknown",
-                    'num_cpu': config.hardware.numCPU if config and config.hardware else 0,
-                    'memory_mb': config.hardware.memoryMB if config and config.hardware else 0,
-                    'ip_address': guest.ipAddress if guest else None,
-                    'hostname': guest.hostName if guest else None,
-                    'path': config.files.vmPathName if config and config.files else "Unknown",
-                    'provisioned_space': summary.storage.committed + summary.storage.uncommitted if summary.storage else 0,
-                    'used_space': summary.storage.committed if summary.storage else 0,
-                }
-                
-                # Add disk information
-                if config and config.hardware and config.hardware.device:
-                    disks = []
-                    for device in config.hardware.device:
-                        if isinstance(device, vim.vm.device.VirtualDisk):
-                            disk_info = {
-                                'label': device.deviceInfo.label,
-                                'capacity_kb': device.capacityInKB,
-                                'thin_provisioned': device.backing.thinProvisioned if hasattr(device.backing, 'thinProvisioned') else False,
-                                'datastore': device.backing.datastore.name if device.backing.datastore else "Unknown",
-                                'file_name': device.backing.fileName
-                            }
-                            disks.append(disk_info)
-                    vm_info['disks'] = disks
-                    
-                # Add network information
-                if config and config.hardware and config.hardware.device:
-                    networks = []
-                    for device in config.hardware.device:
-                        if isinstance(device, vim.vm.device.VirtualEthernetCard):
-                            try:
-                                if hasattr(device.backing, 'network'):
-                                    network_name = device.backing.network.name
-                                elif hasattr(device.backing, 'port') and hasattr(device.backing.port, 'portgroupKey'):
-                                    network_name = device.backing.port.portgroupKey
-                                else:
-                                    network_name = "Unknown"
-                                    
-                                network_info = {
-                                    'mac_address': device.macAddress if hasattr(device, 'macAddress') else "Unknown",
-                                    'network_name': network_name,
-                                    'adapter_type': type(device).__name__
-                                }
-                                networks.append(network_info)
-                            except Exception as e:
-                                logger.debug(f"Error getting network info for VM {vm.name}: {str(e)}")
-                    vm_info['networks'] = networks
-                    
-                # Add snapshot information
-                if vm.snapshot:
-                    snapshots = self._get_vm_snapshots(vm)
-                    vm_info['snapshots'] = snapshots
-                else:
-                    vm_info['snapshots'] = []
-                
-                vm_info_list.append(vm_info)
-            
+                record = self._record(obj, props, columns)
             except Exception as e:
                 # Keine Fehlermeldungen anzeigen - leise im Hintergrund weitermachen
-                logger.debug(f"VM collection info silent error: {vm.name}")
+                logger.debug(f"Error collecting {section} info for {props.get('name', obj._moId)}: {str(e)}")
                 continue
-                
-        return vm_info_list
+            yield record
+        
+    def collect_vm_info(self):
+        """
+        Collect information about virtual machines
+        
+        Returns:
+            list: List of VM information dictionaries
+        """
+        return list(self._iter_records('vms'))
 
     def collect_vmware_tools_info(self):
         """
         Collect information about VMware Tools versions
         
+        Only the guest properties behind the selected columns are fetched,
+        for all VMs in one paged call; vm.summary and vm.guest are not read.
+        
         Returns:
             list: List of VM information dictionaries sorted by tools version (oldest first)
         """
         logger.info("Collecting VMware Tools information")
-        vms = self.client.get_virtual_machines()
+        vms, columns = self._collect_objects('vmware_tools')
         
         tools_info_list = []
-        for vm in vms:
+        for vm, props in vms:
             try:
-                # Suppress stdout/stderr to prevent PyVmomi error messages
-                with suppress_stdout_stderr():
-                    summary = vm.summary
-                
-                    # Skip if VM is a template
-                    if summary.config.template:
-                        continue
-                    
-                tools_info = {
-                    'name': vm.name,
-                    'power_state': summary.runtime.powerState,
-                    'guest_full_name': summary.config.guestFullName if summary.config else "Unknown",
-                    'vmware_tools_status': summary.guest.toolsStatus if summary.guest else "Unknown",
-                    'vmware_tools_version': summary.guest.toolsVersionStatus if summary.guest else "Unknown",
-                    'vmware_tools_running_status': summary.guest.toolsRunningStatus if summary.guest else "Unknown"
-                }
+                # Skip if VM is a template
+                if props.get('config.template'):
+                    continue
                 
                 # Only include VMs that have Tools installed
-                if tools_info['vmware_tools_status'] not in ['toolsNotInstalled', 'toolsNotRunning', None]:
-                    tools_info_list.append(tools_info)
+                status = tools_status(props.get('guest.toolsVersionStatus2'), props.get('guest.toolsRunningStatus'))
+                if status not in ['toolsNotInstalled', 'toolsNotRunning', None]:
+                    tools_info_list.append(self._record(vm, props, columns))
             
             except Exception as e:
                 # Keine Fehlermeldungen anzeigen - leise im Hintergrund weitermachen
-                logger.debug(f"VMware Tools info silent error: {vm.name}")
+                logger.debug(f"VMware Tools info silent error: {props.get('name', vm._moId)}")
                 continue
                 
         # Sort by tools version status (oldest first)
         # Order is: guestToolsNeedUpgrade, guestToolsCurrent
         def tools_version_sort_key(item):
-            if item['vmware_tools_version'] == 'guestToolsNeedUpgrade':
+            if item.get('vmware_tools_version') == 'guestToolsNeedUpgrade':
                 return 0
-            elif item['vmware_tools_version'] == 'guestToolsCurrent':
+            elif item.get('vmware_tools_version') == 'guestToolsCurrent':
                 return 1
             else:
                 return 2
@@ -261,42 +340,11 @@ class DataCollector:
         # Direkte Property-Abfrage über vCenter statt Objektverarbeitung
         # Diese Methode ist robuster als die objektbasierte Abfrage
         
-        # PropertyCollector verwenden - direkter Zugriff auf das vCenter-Inventar
-        content = self.client.service_instance.content
-        container = content.viewManager.CreateContainerView(
-            content.rootFolder, [vim.VirtualMachine], True)
-        
-        # Property-Spezifikationen für die Abfrage definieren
-        property_spec = vim.PropertySpec()
-        property_spec.type = vim.VirtualMachine
-        property_spec.pathSet = [
-            'name', 
-            'snapshot', 
-            'config.template'
-        ]
-        
-        # Traversal-Spezifikation festlegen, um alle VMs zu durchlaufen
-        traversal_spec = vim.TraversalSpec()
-        traversal_spec.name = 'traverseEntities'
-        traversal_spec.path = 'view'
-        traversal_spec.skip = False
-        traversal_spec.type = type(container)
-        
-        # Objekt-Spezifikation festlegen
-        obj_spec = vim.ObjectSpec()
-        obj_spec.obj = container
-        obj_spec.skip = True
-        obj_spec.selectSet = [traversal_spec]
-        
-        # Filter-Spezifikation erstellen
-        filter_spec = vim.PropertyFilterSpec()
-        filter_spec.objectSet = [obj_spec]
-        filter_spec.propSet = [property_spec]
-        
+        # PropertyCollector verwenden - direkter Zugriff auf das vCenter-Inventar (im Scope)
         # Properties abrufen
         try:
             logger.info("Retrieving VM snapshot information using PropertyCollector")
-            result = content.propertyCollector.RetrieveContents([filter_spec])
+            result = self.client.retrieve_properties({vim.VirtualMachine: ['name', 'snapshot', 'config.template']})
             
             if debug_mode:
                 logger.warning(f"PropertyCollector returned {len(result)} VM results")
@@ -317,16 +365,8 @@ class DataCollector:
         vm_with_snapshot_count = 0
         
         # Ergebnisse verarbeiten
-        for obj in result:
+        for vm, props in result:
             try:
-                if not hasattr(obj, 'obj') or not hasattr(obj, 'propSet'):
-                    if debug_mode:
-                        logger.warning("Found VM result without obj or propSet attributes")
-                    continue
-                
-                vm = obj.obj
-                props = {prop.name: prop.val for prop in obj.propSet}
-                
                 # Templates überspringen
                 if 'config.template' in props and props['config.template']:
                     if debug_mode:
@@ -457,23 +497,24 @@ class DataCollector:
         
         return snapshot_info_list
         
-    def _get_vm_snapshots(self, vm):
+    def _get_vm_snapshots(self, vm_name, snapshot_info):
         """
         Get snapshot information for a VM
         
         Args:
-            vm (vim.VirtualMachine): Virtual machine object
+            vm_name (str): Name of the virtual machine
+            snapshot_info (vim.vm.SnapshotInfo): The VM's snapshot property (may be None)
             
         Returns:
             list: List of snapshot information dictionaries
         """
-        snapshot_info = []
+        snapshot_list_info = []
         
         # Verbesserte Snapshot-Erkennung mit Fehlerbehandlung
         try:
-            if vm.snapshot and hasattr(vm.snapshot, 'rootSnapshotList') and vm.snapshot.rootSnapshotList:
+            if snapshot_info and hasattr(snapshot_info, 'rootSnapshotList') and snapshot_info.rootSnapshotList:
                 # Direkter Zugriff auf alle Snapshots, auch wenn sie in Hierarchien verschachtelt sind
-                snapshot_list = self._get_snapshot_tree(vm.snapshot.rootSnapshotList)
+                snapshot_list = self._get_snapshot_tree(snapshot_info.rootSnapshotList)
                 for snapshot in snapshot_list:
                     try:
                         # Calculate snapshot age
@@ -485,25 +526,16 @@ class DataCollector:
                         snapshot['age_hours'] = age.seconds // 3600
                         
                         # Mehr Details hinzufügen
-                        snapshot['vm_summary'] = f"{vm.name}: {snapshot['name']} ({snapshot['age_days']} days old)"
+                        snapshot['vm_summary'] = f"{vm_name}: {snapshot['name']} ({snapshot['age_days']} days old)"
                         
-                        snapshot_info.append(snapshot)
+                        snapshot_list_info.append(snapshot)
                     except Exception as e:
                         logger.debug(f"Error processing individual snapshot: {str(e)}")
                         continue
         except Exception as e:
-            logger.debug(f"Error accessing snapshots from VM {vm.name}: {str(e)}")
-            # Versuchen, über die Property-Collector API zu gehen als Fallback
-            try:
-                # Alternativer Ansatz über MoRef-basierte Suche
-                if hasattr(vm, '_moId'):
-                    logger.debug(f"Trying alternative snapshot retrieval for VM {vm.name}")
-                    # Dieser Ansatz über die PropertyCollector API könnte Ergebnisse liefern, 
-                    # wenn der direkte Zugriff fehlschlägt
-            except Exception:
-                pass
+            logger.debug(f"Error accessing snapshots from VM {vm_name}: {str(e)}")
                 
-        return snapshot_info
+        return snapshot_list_info
         
     def _get_snapshot_tree(self, snapshots):
         """
@@ -519,6 +551,7 @@ class DataCollector:
         for snapshot in snapshots:
             snap_info = {
                 'name': snapshot.name,
+                'moref': snapshot.snapshot._moId if snapshot.snapshot else None,
                 'description': snapshot.description,
                 'create_time': snapshot.createTime,
                 'state': snapshot.state,
@@ -537,545 +570,314 @@ class DataCollector:
         """
         Collect information about orphaned VMDK files
         
+        The files owned by VMs and templates are taken from layoutEx.file of
+        all of them, fetched in one paged call: descriptors and extents of
+        every disk, including all snapshot deltas. A disk found on a datastore
+        is orphaned if nobody owns its descriptor, so no further searches are
+        needed per file.
+        
+        The datastore searches run through the client's asyncio transport:
+        up to DATASTORE_SCAN_WORKERS searches are in flight at a time, and
+        their tasks are polled together instead of one WaitForTask per search.
+        
         Returns:
             list: List of orphaned VMDK information dictionaries
         """
-        # Debug-Modus-Check für verbesserte Protokollierung
-        debug_mode = os.environ.get('VSPHERE_REPORTER_DEBUG', '0') == '1'
-        if debug_mode:
-            logger.warning("*** ORPHANED VMDKs COLLECTION - DEBUG MODE ACTIVE ***")
-        
         logger.info("Collecting orphaned VMDK information")
-        
-        # Erste direkte Abfrage von VM-Daten über Property Collector für bessere Zuverlässigkeit
-        # Get all registered VMDKs using PropertyCollector
-        content = self.client.service_instance.content
-        registered_vmdks = set()
-        
-        # PropertyCollector Setup
-        container = content.viewManager.CreateContainerView(
-            content.rootFolder, [vim.VirtualMachine], True)
-            
-        property_spec = vim.PropertySpec()
-        property_spec.type = vim.VirtualMachine
-        property_spec.pathSet = [
-            'name',
-            'config.hardware.device',
-            'config.template'
-        ]
-        
-        traversal_spec = vim.TraversalSpec()
-        traversal_spec.name = 'traverseEntities'
-        traversal_spec.path = 'view'
-        traversal_spec.skip = False
-        traversal_spec.type = type(container)
-        
-        obj_spec = vim.ObjectSpec()
-        obj_spec.obj = container
-        obj_spec.skip = True
-        obj_spec.selectSet = [traversal_spec]
-        
-        filter_spec = vim.PropertyFilterSpec()
-        filter_spec.objectSet = [obj_spec]
-        filter_spec.propSet = [property_spec]
-        
-        # Abrufen der VM-Properties mit einer direkten Anfrage
         try:
-            logger.info("Retrieving VM disk information using PropertyCollector")
-            vm_properties = content.propertyCollector.RetrieveContents([filter_spec])
-            
-            if debug_mode:
-                logger.warning(f"PropertyCollector returned {len(vm_properties)} VM properties")
-            
-            # Properties verarbeiten und registrierte VMDKs sammeln
-            for vm_property in vm_properties:
-                if not hasattr(vm_property, 'obj') or not hasattr(vm_property, 'propSet'):
-                    if debug_mode:
-                        logger.warning("Found VM property without obj or propSet attributes")
-                    continue
-                    
-                props = {prop.name: prop.val for prop in vm_property.propSet}
-                
-                # Überspringe Templates
-                if 'config.template' in props and props['config.template']:
-                    if debug_mode:
-                        logger.warning(f"Skipping template VM: {props.get('name', 'Unknown')}")
-                    continue
-                    
-                # VM-Name für Logging
-                vm_name = props.get('name', 'Unknown VM')
-                
-                if debug_mode:
-                    logger.warning(f"Processing VM: {vm_name}, Properties: {list(props.keys())}")
-                
-                # Hardware-Devices durchgehen
-                if 'config.hardware.device' in props:
-                    devices = props['config.hardware.device']
-                    disk_count = 0
-                    for device in devices:
-                        try:
-                            if isinstance(device, vim.vm.device.VirtualDisk):
-                                disk_count += 1
-                                if hasattr(device, 'backing') and hasattr(device.backing, 'fileName'):
-                                    # Datastore-Pfad abrufen
-                                    datastore_path = device.backing.fileName
-                                    registered_vmdks.add(datastore_path)
-                                    
-                                    # Normalisierte Pfade für besseren Vergleich
-                                    normalized_path = datastore_path.lower().strip()
-                                    registered_vmdks.add(normalized_path)
-                                    
-                                    # Pfade ohne Datastore-Klammern
-                                    if normalized_path.startswith('['):
-                                        parts = normalized_path.split('] ', 1)
-                                        if len(parts) > 1:
-                                            registered_vmdks.add(parts[1])
-                                    
-                                    if debug_mode:
-                                        logger.warning(f"Registered VMDK: {datastore_path}")
-                        except Exception as e:
-                            if debug_mode:
-                                logger.error(f"Error processing virtual disk for VM {vm_name}: {str(e)}")
-                            else:
-                                logger.debug(f"Error processing virtual disk for VM {vm_name}: {str(e)}")
-                    
-                    if debug_mode:
-                        logger.warning(f"VM {vm_name} has {disk_count} disk(s)")
-                            
+            plan, aliases = self.plan_datastore_scan()
+            if not plan:
+                return []
+            owned_files, owned_folders = self._owned_vm_files(aliases)
         except Exception as e:
-            if debug_mode:
-                import traceback
-                logger.error(f"Error using PropertyCollector for disk info: {str(e)}")
-                logger.error(f"Traceback: {traceback.format_exc()}")
-            else:
-                logger.debug(f"Error using PropertyCollector for disk info: {str(e)}")
-            
-            # Fallback auf den alten Ansatz
-            return self._collect_orphaned_vmdks_fallback()
-            
-        # Wenn keine VMDKs über PropertyCollector gefunden wurden, Fallback verwenden
-        if not registered_vmdks:
-            logger.warning("No registered VMDKs found with PropertyCollector, using fallback")
-            return self._collect_orphaned_vmdks_fallback()
-            
-        if debug_mode:
-            logger.warning(f"Found {len(registered_vmdks)} registered VMDKs")
-            
-        logger.info(f"Found {len(registered_vmdks)} registered VMDKs")
+            # Ohne Plan oder VM-Dateien lässt sich keine Datei als verwaist einstufen
+            logger.error(f"Error preparing the orphaned VMDK scan: {str(e)}")
+            self.incomplete_sections.add('orphaned_vmdks')
+            return []
+        logger.info(f"Found {len(owned_files)} files owned by VMs and templates")
         
-        # Ergebnis-Liste für orphaned VMDKs
         orphaned_vmdks = []
-        
-        try:
-            # Alle Datastores für die Suche nach VMDKs abrufen
-            datastores = self.client.get_datastores()
-            
-            for datastore in datastores:
-                try:
-                    # Überspringe Datastores ohne Browser
-                    if not hasattr(datastore, 'browser'):
-                        continue
-                        
-                    # Such-Spezifikation für VMDK-Dateien erstellen
-                    search_spec = vim.host.DatastoreBrowser.SearchSpec()
-                    search_spec.matchPattern = ["*.vmdk"]  # Alle VMDKs suchen
-                    search_spec.details = vim.host.DatastoreBrowser.FileInfo.Details()
-                    search_spec.details.fileSize = True
-                    search_spec.details.fileType = True
-                    search_spec.details.modification = True
-                    
-                    # Datastore durchsuchen
-                    browser = datastore.browser
-                    search_task = browser.SearchDatastoreSubFolders_Task(
-                        datastorePath=f"[{datastore.name}]",
-                        searchSpec=search_spec
-                    )
-                    
-                    # Warten auf Abschluss der Suche
-                    search_results = self.client.service_instance.content.taskManager.WaitForTask(search_task)
-                    
-                    # Suchergebnisse verarbeiten
-                    if hasattr(search_results, 'info') and hasattr(search_results.info, 'result'):
-                        for result in search_results.info.result:
-                            # Jeden gefundenen Ordner verarbeiten
-                            folder_path = result.folderPath
-                            
-                            for file_info in result.file:
-                                # Nur VMDK-Dateien berücksichtigen
-                                if not file_info.path.lower().endswith('.vmdk'):
-                                    continue
-                                    
-                                # Vollständigen Pfad erstellen
-                                full_path = folder_path
-                                if not full_path.endswith('/'):
-                                    full_path += '/'
-                                full_path += file_info.path
-                                
-                                # Normalisierter Pfad für Vergleiche
-                                normalized_path = full_path.lower().strip()
-                                
-                                # Prüfen, ob die VMDK registriert ist
-                                if (full_path in registered_vmdks or 
-                                    normalized_path in registered_vmdks):
-                                    continue
-                                    
-                                # Ohne Datastore-Klammern prüfen
-                                if normalized_path.startswith('['):
-                                    parts = normalized_path.split('] ', 1)
-                                    if len(parts) > 1 and parts[1] in registered_vmdks:
-                                        continue
-                                
-                                # Diese VMDK ist nicht registriert, potenziell orphaned
-                                # Überprüfen, ob es eine Hilfs-VMDK ist (delta, flat, ctk)
-                                is_helper_vmdk = False
-                                for suffix in ['-ctk.vmdk']:
-                                    if normalized_path.endswith(suffix):
-                                        is_helper_vmdk = True
-                                        break
-                                        
-                                if is_helper_vmdk:
-                                    continue
-                                    
-                                # Diese VMDK ist nicht registriert und kein Hilfs-VMDK,
-                                # also ist sie wahrscheinlich orphaned
-                                reason = "Not registered to any VM"
-                                
-                                # Weitere Überprüfungen für eine genauere Begründung
-                                if '/forgotten/' in normalized_path or '/lost+found/' in normalized_path:
-                                    reason = "Located in a system recovery folder"
-                                elif self._is_vmdk_orphaned(folder_path, file_info.path):
-                                    reason = "No associated VM configuration files found"
-                                elif '-flat.vmdk' in normalized_path or '-delta.vmdk' in normalized_path:
-                                    # Rekonstruiere Basis-VMDK-Namen
-                                    base_path = normalized_path
-                                    if '-flat.vmdk' in base_path:
-                                        base_path = base_path.replace('-flat.vmdk', '.vmdk')
-                                    elif '-delta.vmdk' in base_path:
-                                        base_path = base_path.replace('-delta.vmdk', '.vmdk')
-                                        
-                                    if base_path not in registered_vmdks:
-                                        reason = "Base disk is not associated with any VM"
-                                    else:
-                                        # Wenn Basis registriert ist, ist dies keine orphaned VMDK
-                                        continue
-                                
-                                # Diese VMDK ist orphaned, füge sie zur Ergebnisliste hinzu
-                                orphan_info = {
-                                    'path': full_path,
-                                    'datastore': datastore.name,
-                                    'size': file_info.fileSize,
-                                    'modification_time': file_info.modification,
-                                    'reason': reason
-                                }
-                                orphaned_vmdks.append(orphan_info)
-                                
-                except Exception as e:
-                    logger.debug(f"Error scanning datastore {datastore.name} for orphaned VMDKs: {str(e)}")
+        fresh_scans = {}
+        sources = {'browsed': 0, 'cache': 0, 'checkpoint': 0}
+        failed = 0
+        for entry, scan in zip(plan, asyncio.run(self._scan_datastores(plan))):
+            if isinstance(scan, Exception):
+                logger.debug(f"Error scanning datastore {entry['name']} for orphaned VMDKs: {str(scan)}")
+                self.incomplete_sections.add('orphaned_vmdks')
+                failed += 1
+                continue
+            disks, fingerprint, source = scan
+            sources[source] += 1
+            if source == 'browsed' and self.scan_cache:
+                fresh_scans[entry['url']] = (fingerprint, disks)
+            for disk in disks:
+                if self._is_owned(disk['path'], owned_files):
                     continue
-                    
-            logger.info(f"Found {len(orphaned_vmdks)} orphaned VMDKs")
-            
-            # Wenn keine orphaned VMDKs gefunden wurden, obwohl genügend registrierte VMDKs vorhanden sind,
-            # versuche es mit dem Fallback-Ansatz (für Konsistenz und um sicherzustellen, dass nichts übersehen wurde)
-            if not orphaned_vmdks and len(registered_vmdks) > 5:
-                logger.debug("No orphaned VMDKs found with PropertyCollector approach, trying fallback")
-                fallback_orphans = self._collect_orphaned_vmdks_fallback()
-                if fallback_orphans:
-                    logger.info(f"Fallback found {len(fallback_orphans)} orphaned VMDKs")
-                    return fallback_orphans
-                    
-            return orphaned_vmdks
-            
-        except Exception as e:
-            logger.debug(f"Error in orphaned VMDK collection: {str(e)}")
-            # Fallback verwenden, wenn ein schwerwiegender Fehler auftritt
-            return self._collect_orphaned_vmdks_fallback()
+                orphaned_vmdks.append({
+                    'path': disk['path'],
+                    'datastore': entry['name'],
+                    'size': disk['size'],
+                    'capacity': disk['capacity'],
+                    'thin': disk['thin'],
+                    'controller_type': disk['controller_type'],
+                    'modification_time': disk['modification'],
+                    'reason': self._orphan_reason(disk['path'], owned_folders)
+                })
+                
+        if self.scan_cache:
+            self.scan_cache.store(self.client.server, fresh_scans)
+        if self.scan_cache or self.checkpoint or failed:
+            self._report(f"Datastore scan: {sources['browsed']} browsed, {sources['cache']} unchanged since "
+                         f"the last scan, {sources['checkpoint']} resumed from checkpoint, {failed} failed")
+        logger.info(f"Found {len(orphaned_vmdks)} orphaned VMDKs")
+        return orphaned_vmdks
+        
+    def plan_datastore_scan(self):
+        """
+        Decide which datastores the orphaned VMDK scan searches, before it starts
+        
+        Inaccessible datastores are left out instead of waiting for their
+        searches to fail. A volume that is mounted more than once (an NFS
+        share or VMFS volume in several datacenters) is scanned once, by its
+        summary.url, which holds the VMFS UUID or the NFS volume ID. The rest
+        is ordered by used space, largest first. The plan is reported through
+        the progress callback.
+        
+        Volumes mounted in several vCenters are scanned by each of them: only
+        the VMs of this vCenter are known here, so skipping the volume in
+        favour of another vCenter would report that vCenter's disks as
+        orphaned or leave the volume unscanned if that scan fails.
+        
+        Returns:
+            tuple: (list of {'name', 'browser', 'url', 'capacity', 'free_space', 'uncommitted', 'used'}
+                    to scan in order,
+                    dict aliased datastore name -> scanned name of the same volume)
+        """
+        datastores = self.client.retrieve_properties({vim.Datastore: [
+            'name', 'browser', 'summary.url', 'summary.accessible', 'summary.capacity', 'summary.freeSpace',
+            'summary.uncommitted']})
+        
+        plan = []
+        aliases = {}
+        inaccessible = []
+        duplicates = []
+        scanned_by_url = {}
+        for datastore, props in sorted(datastores, key=lambda item: item[0]._moId):
+            name = props.get('name') or self.names.name(datastore)
+            url = props.get('summary.url') or datastore._moId
+            if props.get('summary.accessible') is False or props.get('browser') is None:
+                inaccessible.append(name)
+                continue
+            if url in scanned_by_url:
+                aliases[name] = scanned_by_url[url]
+                duplicates.append(f"{name} = {scanned_by_url[url]}")
+                continue
+            scanned_by_url[url] = name
+            plan.append({
+                'name': name,
+                'browser': props['browser'],
+                'url': url,
+                'capacity': props.get('summary.capacity') or 0,
+                'free_space': props.get('summary.freeSpace') or 0,
+                'uncommitted': props.get('summary.uncommitted') or 0,
+                'used': (props.get('summary.capacity') or 0) - (props.get('summary.freeSpace') or 0)
+            })
+        plan.sort(key=lambda entry: entry['used'], reverse=True)
+        
+        message = (f"Datastore scan plan: {len(plan)} datastores, "
+                   f"{sum(entry['used'] for entry in plan) / GB:.0f} GB used, largest first")
+        if plan:
+            message += f" ({_name_list([entry['name'] for entry in plan])})"
+        if inaccessible:
+            message += f"; skipping {len(inaccessible)} inaccessible: {_name_list(inaccessible)}"
+        if duplicates:
+            message += f"; skipping {len(duplicates)} duplicate: {_name_list(duplicates)}"
+        self._report(message)
+        return plan, aliases
+        
+    def _report(self, message):
+        """Log a progress message and forward it to the progress callback"""
+        logger.info(message)
+        if self.progress:
+            self.progress(message)
+        
+    def _owned_vm_files(self, aliases=None):
+        """
+        Files owned by the VMs and templates that can have files on the scanned datastores
+        
+        VMs without layoutEx (e.g. on a disconnected host) cannot tell which
+        files are theirs; their whole folder is treated as owned instead, so
+        their disks are not reported as orphaned.
+        
+        Args:
+            aliases (dict): Datastore name -> name under which the same volume is scanned
             
-    def _collect_orphaned_vmdks_fallback(self):
+        Returns:
+            tuple: (set of lower-cased datastore paths, set of lower-cased folders of the VMs)
         """
-        Fallback-Methode zur Sammlung von orphaned VMDKs, verwendet den alten Ansatz
+        paths = {vim.VirtualMachine: ['name', 'layoutEx.file', 'summary.config.vmPathName']}
+        if self.client.scope_containers():
+            vms = self.client.retrieve_object_properties(self._datastore_vms(), paths)
+        else:
+            vms = self.client.retrieve_properties(paths)
+        
+        owned_files = set()
+        owned_folders = set()
+        for vm, props in vms:
+            vmx_path = _with_datastore(props.get('summary.config.vmPathName') or '', aliases)
+            if vmx_path:
+                owned_folders.add(_folder_of(vmx_path))
+            files = props.get('layoutEx.file')
+            if not files:
+                logger.debug(f"No file layout for VM {props.get('name', vm._moId)}, keeping its folder")
+                if vmx_path:
+                    owned_files.add(_folder_of(vmx_path) + '*')
+                continue
+            for file_info in files:
+                file_path = _with_datastore(file_info.name, aliases)
+                owned_files.add(file_path.lower())
+                owned_folders.add(_folder_of(file_path))
+        return owned_files, owned_folders
+        
+    async def _scan_datastores(self, plan):
         """
-        logger.info("Using fallback method for orphaned VMDK collection")
+        Search the planned datastores through one asyncio transport
         
-        # Registrierte VMDKs mit traditionellem Ansatz sammeln
-        registered_vmdks = set()
-        vms = self.client.get_virtual_machines()
+        Returns:
+            list: Result of _scan_datastore or the exception it raised, per planned datastore
+        """
+        slots = asyncio.Semaphore(DATASTORE_SCAN_WORKERS)
+        async with self.client.async_transport(max_connections=DATASTORE_SCAN_WORKERS) as transport:
+            # Größte Datastores zuerst einreihen, damit sie nicht am Ende allein laufen
+            return await asyncio.gather(*(self._scan_datastore(transport, slots, entry) for entry in plan),
+                                        return_exceptions=True)
         
-        # Überspringe die Fehlerfilterung und protokolliere aggressiver, um Probleme zu erkennen
-        for vm in vms:
-            try:
-                if vm.config and vm.config.hardware and vm.config.hardware.device:
-                    logger.debug(f"Processing VM: {vm.name}")
-                    # Überspringe Templates
-                    if vm.config.template:
-                        logger.debug(f"Skipping template VM: {vm.name}")
-                        continue
-                        
-                    for device in vm.config.hardware.device:
-                        if isinstance(device, vim.vm.device.VirtualDisk):
-                            try:
-                                datastore_path = device.backing.fileName
-                                registered_vmdks.add(datastore_path)
-                                # Auch normalisierte Version hinzufügen
-                                registered_vmdks.add(datastore_path.lower().strip())
-                                logger.debug(f"Registered VMDK: {datastore_path}")
-                            except Exception as device_e:
-                                logger.debug(f"Error processing device for VM {vm.name}: {str(device_e)}")
-            except Exception as vm_e:
-                logger.debug(f"Error processing VM {vm.name if hasattr(vm, 'name') else 'unknown'}: {str(vm_e)}")
-                
-        orphaned_vmdks = []
-        datastores = self.client.get_datastores()
+    async def _scan_datastore(self, transport, slots, entry):
+        """
+        Search one planned datastore
         
-        # Alle Datastores nach VMDKs durchsuchen
-        for datastore in datastores:
-            try:
-                if not hasattr(datastore, 'browser'):
-                    continue
-                    
-                search_spec = vim.host.DatastoreBrowser.SearchSpec()
-                search_spec.matchPattern = ["*.vmdk"]
-                search_spec.details = vim.host.DatastoreBrowser.FileInfo.Details()
-                search_spec.details.fileSize = True
-                search_spec.details.fileType = True
-                search_spec.details.modification = True
-                
-                logger.debug(f"Searching datastore: {datastore.name}")
-                search_task = datastore.browser.SearchDatastoreSubFolders_Task(
-                    datastorePath=f"[{datastore.name}]",
-                    searchSpec=search_spec
-                )
-                
-                search_results = self.client.service_instance.content.taskManager.WaitForTask(search_task)
-                
-                if hasattr(search_results, 'info') and hasattr(search_results.info, 'result'):
-                    for result in search_results.info.result:
-                        for file_info in result.file:
-                            try:
-                                # Vollständigen Pfad erstellen
-                                path = result.folderPath
-                                if not path.endswith('/'):
-                                    path += '/'
-                                path += file_info.path
-                                
-                                # Nicht-VMDK-Dateien überspringen
-                                if not path.lower().endswith('.vmdk'):
-                                    continue
-                                    
-                                # Nur CTK-Dateien überspringen, andere beibehalten
-                                if '-ctk.vmdk' in path.lower():
-                                    continue
-                                    
-                                # Prüfen, ob die VMDK registriert ist
-                                if path in registered_vmdks or path.lower().strip() in registered_vmdks:
-                                    continue
-                                    
-                                # Nicht registrierte VMDK gefunden - überprüfen, ob orphaned
-                                logger.debug(f"Found non-registered VMDK: {path}")
-                                
-                                # Zusätzliche Checks für orphaned Status
-                                reason = "Not associated with any VM"
-                                
-                                # Check 1: In Recovery-Verzeichnis?
-                                if '/forgotten/' in path.lower() or '/lost+found/' in path.lower():
-                                    reason = "Located in a system recovery folder"
-                                # Check 2: Keine VMX-Datei vorhanden?
-                                elif self._is_vmdk_orphaned(result.folderPath, file_info.path):
-                                    reason = "No associated VM configuration files found"
-                                # Check 3: Flat/Delta-Dateien ohne registrierte Basis?
-                                elif '-flat.vmdk' in path.lower() or '-delta.vmdk' in path.lower():
-                                    base_path = path.lower()
-                                    if '-flat.vmdk' in base_path:
-                                        base_path = base_path.replace('-flat.vmdk', '.vmdk')
-                                    elif '-delta.vmdk' in base_path:
-                                        base_path = base_path.replace('-delta.vmdk', '.vmdk')
-                                        
-                                    if base_path not in registered_vmdks:
-                                        reason = "Base disk not registered to any VM"
-                                    else:
-                                        # Wenn Basis registriert ist, ist dies keine orphaned VMDK
-                                        continue
-                                
-                                # Diese VMDK ist definitiv orphaned
-                                logger.debug(f"Found orphaned VMDK: {path}, reason: {reason}")
-                                orphan_info = {
-                                    'path': path,
-                                    'datastore': datastore.name,
-                                    'size': file_info.fileSize,
-                                    'modification_time': file_info.modification,
-                                    'reason': reason
-                                }
-                                orphaned_vmdks.append(orphan_info)
-                            except Exception as file_e:
-                                logger.debug(f"Error processing file {file_info.path}: {str(file_e)}")
-            except Exception as ds_e:
-                logger.debug(f"Error scanning datastore {datastore.name}: {str(ds_e)}")
-                
-        logger.info(f"Fallback method found {len(orphaned_vmdks)} orphaned VMDKs")
-        return orphaned_vmdks
+        A datastore finished before an interruption is taken from the
+        checkpoint. With a scan cache the stored disks are used if the
+        datastore's fingerprint did not change (see core.scan_cache).
         
-    def _is_vmdk_orphaned(self, folder_path, vmdk_name):
+        Returns:
+            tuple: (list of disk dicts, fingerprint of the datastore or None without a scan cache,
+                    source of the disks: 'browsed', 'cache' or 'checkpoint')
         """
-        Check if a VMDK file is orphaned by looking for associated VM files
+        if self.checkpoint:
+            disks = self.checkpoint.datastore(self.client.server, entry['url'])
+            if disks is not None:
+                return disks, None, 'checkpoint'
+        
+        async with slots:
+            fingerprint = None
+            if self.scan_cache:
+                fingerprint = datastore_fingerprint(entry['capacity'], entry['free_space'], entry['uncommitted'],
+                                                    await self._datastore_folders(transport, entry))
+                disks = self.scan_cache.load(self.client.server, entry['url'], fingerprint, entry['name'])
+                if disks is not None:
+                    return disks, fingerprint, 'cache'
+            disks = await self._datastore_disks(transport, entry)
+        
+        if self.checkpoint:
+            self.checkpoint.save_datastore(self.client.server, entry['url'], disks)
+        return disks, fingerprint, 'browsed'
+        
+    async def _datastore_folders(self, transport, entry):
+        """
+        Top-level folders of a datastore with their modification times
         
-        Definition: Eine VMDK ist orphaned, wenn sie keiner VM zugeordnet ist UND kein Template ist.
+        Creating or deleting a file changes the modification time of its
+        folder, so this one-level listing shows changes to the VM folders
+        without browsing them.
         
-        Args:
-            folder_path (str): Datastore folder path
-            vmdk_name (str): VMDK file name
-            
         Returns:
-            bool: True if the VMDK appears to be orphaned
+            list: (folder name, modification time) tuples
         """
-        try:
-            # Extrahiere VM-Namen aus dem VMDK-Dateinamen (entferne Erweiterung)
-            # Berücksichtige verschiedene Namensmuster
-            vm_name = vmdk_name
-            if vm_name.endswith('.vmdk'):
-                vm_name = vm_name[:-5]
-                
-            # Spezielle Behandlung für -delta und -flat VMDKs
-            for pattern in ['-delta', '-flat', '-ctk', '-000']:
-                if pattern in vm_name:
-                    # Entferne das Suffix um den Basis-VM-Namen zu erhalten
-                    parts = vm_name.split(pattern, 1)
-                    if parts:
-                        vm_name = parts[0]
-                        break
-            
-            # Prüfe, ob ein Datastore im Pfad angegeben ist
-            datastore_match = re.match(r'\[(.*?)\]', folder_path)
-            if not datastore_match:
-                logger.debug(f"Could not extract datastore name from path: {folder_path}")
-                return True  # Im Zweifelsfall als orphaned betrachten
-                
-            datastore = datastore_match.group(1)
-            browser = None
-            
-            # Finde den Datastore-Browser
-            datastores = self.client.get_datastores()
-            for ds in datastores:
-                if ds.name == datastore:
-                    browser = ds.browser
-                    break
-                    
-            if browser is None:
-                logger.debug(f"Could not find browser for datastore: {datastore}")
-                return True  # Im Zweifelsfall als orphaned betrachten
-            
-            # 1. Prüfen, ob VMX-Datei existiert (zur Erkennung vorhandener VMs)
-            vmx_search_spec = vim.host.DatastoreBrowser.SearchSpec()
-            
-            # Erweitere die Suche auf mögliche Varianten des VMX-Namens
-            vmx_patterns = [f"{vm_name}.vmx"]
-            # Wenn der Name Sonderzeichen enthält, versuche es ohne sie
-            clean_name = re.sub(r'[^a-zA-Z0-9]', '', vm_name)
-            if clean_name != vm_name:
-                vmx_patterns.append(f"{clean_name}.vmx")
-            
-            # Wenn der Name mit Nummern oder speziellen Markierungen endet, versuche es ohne sie
-            base_name = re.sub(r'[0-9_-]+$', '', vm_name)
-            if base_name != vm_name and len(base_name) > 3:  # Mindestens 3 Zeichen, um sinnvolle Namen zu haben
-                vmx_patterns.append(f"{base_name}.vmx")
-                
-            vmx_search_spec.matchPattern = vmx_patterns
-            
-            # Suche nach VMX-Dateien im gleichen Ordner
-            vmx_search_task = browser.SearchDatastore_Task(
-                datastorePath=folder_path,
-                searchSpec=vmx_search_spec
-            )
-            
-            vmx_results = self.client.service_instance.content.taskManager.WaitForTask(vmx_search_task)
-            vmx_exists = False
-            
-            if hasattr(vmx_results, 'info') and hasattr(vmx_results.info, 'result'):
-                if len(vmx_results.info.result.file) > 0:
-                    vmx_exists = True
-            
-            # Falls keine VMX im gleichen Ordner gefunden wurde, suche im übergeordneten Ordner
-            if not vmx_exists:
-                # Bestimme übergeordneten Ordner
-                parent_folder = folder_path
-                if parent_folder.endswith('/'):
-                    parent_folder = parent_folder[:-1]
-                    
-                # Entferne letzten Pfadteil, um zum übergeordneten Ordner zu gelangen
-                if '/' in parent_folder:
-                    parent_folder = parent_folder.rsplit('/', 1)[0]
-                    
-                    # Suche nach VMX-Dateien im übergeordneten Ordner
-                    parent_vmx_search_task = browser.SearchDatastore_Task(
-                        datastorePath=parent_folder,
-                        searchSpec=vmx_search_spec
-                    )
-                    
-                    parent_vmx_results = self.client.service_instance.content.taskManager.WaitForTask(parent_vmx_search_task)
-                    
-                    if hasattr(parent_vmx_results, 'info') and hasattr(parent_vmx_results.info, 'result'):
-                        if len(parent_vmx_results.info.result.file) > 0:
-                            vmx_exists = True
-            
-            # 2. Prüfen, ob es ein Template ist (zur Erkennung von Templates)
-            is_template = False
-            is_registered = False
-            
-            # 2a. Erweiterte Prüfung auch auf VM-Registrierung (nicht nur Templates)
-            vms = self.client.get_virtual_machines()
-            for vm in vms:
-                with suppress_stdout_stderr():
-                    try:
-                        # Vergleiche den Dateinamen auf verschiedene Arten mit VM-Namen
-                        # Dieser Vergleich ist robuster gegenüber Formatierungsunterschieden
-                        vm_base_name = vm.name.lower()
-                        vmdk_base_name = vm_name.lower()
-                        
-                        # Direkter Namensvergleich
-                        if vm_base_name == vmdk_base_name:
-                            is_registered = True
-                            # Prüfe, ob es sich um ein Template handelt
-                            if vm.config and vm.config.template:
-                                is_template = True
-                            break
-                        
-                        # Teilweiser Namensvergleich (wenn VMDK Teil eines VM-Namens ist)
-                        if vmdk_base_name in vm_base_name or vm_base_name in vmdk_base_name:
-                            # Prüfe auch, ob die VM diese VMDK tatsächlich enthält
-                            if hasattr(vm, 'config') and vm.config and vm.config.hardware:
-                                for device in vm.config.hardware.device:
-                                    if isinstance(device, vim.vm.device.VirtualDisk) and hasattr(device.backing, 'fileName'):
-                                        if vmdk_name.lower() in device.backing.fileName.lower():
-                                            is_registered = True
-                                            if vm.config.template:
-                                                is_template = True
-                                            break
-                    except:
-                        continue
-            
-            # Eine VMDK ist orphaned, wenn:
-            # 1. Keine VMX-Datei existiert, ODER
-            # 2. Sie keiner VM zugeordnet und kein Template ist
-            if not vmx_exists:
-                logger.debug(f"No VMX file found for {vmdk_name}, marking as orphaned")
-                return True  # Keine VMX-Datei gefunden, eindeutig orphaned
-            elif not is_registered:
-                logger.debug(f"VMX exists for {vmdk_name} but no matching registered VM found, marking as orphaned")
-                return True  # VMX existiert, aber keine registrierte VM gefunden
-            elif not is_template:
-                # Es existiert eine registrierte VM, aber es ist kein Template
-                # Hier können wir konservativer sein und die VMDK nur als orphaned betrachten, 
-                # wenn weitere Bedingungen erfüllt sind
-                
-                # In diesem Fall: Wenn es eine registrierte VM gibt, die nicht als Template markiert ist,
-                # ist die Disk wahrscheinlich in Benutzung
-                return False
-                
-            return False
-
-        except Exception as e:
-            logger.debug(f"Error checking orphaned status for {vmdk_name}: {str(e)}")
-            # Im Fehlerfall konservativ sein und nicht als orphaned markieren
-            return False
+        search_spec = vim.host.DatastoreBrowser.SearchSpec()
+        search_spec.query = [vim.host.DatastoreBrowser.FolderQuery()]
+        search_spec.details = vim.host.DatastoreBrowser.FileInfo.Details(
+            fileSize=False, modification=True, fileType=False, fileOwner=False)
+        
+        search_task = await transport.invoke(entry['browser'], 'SearchDatastore_Task',
+                                             f"[{entry['name']}]", search_spec)
+        result = await transport.wait_for_task(search_task)
+        return [(folder.path, folder.modification) for folder in (result.file if result else None) or []]
+        
+    async def _datastore_disks(self, transport, entry):
+        """
+        All virtual disks of a datastore
+        
+        The search uses a VmDiskFileQuery, so the host pairs every descriptor
+        with its extents (-flat, -delta, -sesparse): one entry per disk whose
+        fileSize covers the extents, while change tracking files are not
+        listed. Only the details the report shows are requested.
+        
+        Returns:
+            list: Disk dicts ('path' of the descriptor, 'size', 'capacity' in bytes, 'thin',
+                  'controller_type', 'modification')
+        """
+        disk_query = vim.host.DatastoreBrowser.VmDiskQuery()
+        disk_query.details = vim.host.DatastoreBrowser.VmDiskQuery.Details(
+            capacityKb=True, thin=True, controllerType=True, diskType=False, hardwareVersion=False)
+        
+        search_spec = vim.host.DatastoreBrowser.SearchSpec()
+        search_spec.query = [disk_query]
+        search_spec.details = vim.host.DatastoreBrowser.FileInfo.Details(
+            fileSize=True, modification=True, fileType=False, fileOwner=False)
+        
+        search_task = await transport.invoke(entry['browser'], 'SearchDatastoreSubFolders_Task',
+                                             f"[{entry['name']}]", search_spec)
+        disks = []
+        for result in await transport.wait_for_task(search_task) or []:
+            folder_path = result.folderPath
+            if folder_path.endswith(']'):
+                folder_path += ' '
+            elif not folder_path.endswith('/'):
+                folder_path += '/'
+            for disk_info in result.file or []:
+                disks.append({
+                    'path': folder_path + disk_info.path,
+                    'size': disk_info.fileSize,
+                    'capacity': disk_info.capacityKb * 1024 if disk_info.capacityKb is not None else None,
+                    'thin': disk_info.thin,
+                    'controller_type': disk_info.controllerType,
+                    'modification': disk_info.modification
+                })
+        return disks
+        
+    def _is_owned(self, path, owned_files):
+        """Whether a datastore file belongs to a VM or template"""
+        return path.lower() in owned_files or _folder_of(path) + '*' in owned_files
+        
+    def _orphan_reason(self, path, owned_folders):
+        """Reason shown for an orphaned VMDK"""
+        normalized = path.lower()
+        if '/forgotten/' in normalized or '/lost+found/' in normalized:
+            return "Located in a system recovery folder"
+        if _folder_of(path) in owned_folders:
+            return "Not used by the VM in its folder"
+        return "Not registered to any VM"
+        
+    def _datastore_vms(self):
+        """
+        VMs whose registration decides if a VMDK on the scanned datastores is orphaned
+        
+        In a scoped collection these are all VMs with files on the scope's
+        datastores, including VMs of other clusters sharing the datastores;
+        otherwise all VMs.
+        
+        Returns:
+            list: VM references
+        """
+        datastores = self.client.scope_datastores()
+        if datastores is None:
+            return self.client.get_virtual_machines()
+        vms = {}
+        for _, props in self.client.retrieve_object_properties(datastores, {vim.Datastore: ['vm']}):
+            for vm in props.get('vm') or []:
+                vms.setdefault(vm._moId, vm)
+        return list(vms.values())
         
     def collect_host_info(self):
         """
@@ -1084,50 +886,8 @@ class DataCollector:
         Returns:
             list: List of host information dictionaries
         """
-        logger.info("Collecting ESXi host information")
-        hosts = self.client.get_hosts()
-        
-        host_info_list = []
-        for host in hosts:
-            try:
-                # Suppress stdout/stderr to prevent PyVmomi error messages
-                with suppress_stdout_stderr():
-                    # Get host properties
-                    summary = host.summary
-                    hardware = host.hardware if hasattr(host, 'hardware') else None
-                    config = host.config if hasattr(host, 'config') else None
-                
-                host_info = {
-                    'name': host.name,
-                    'connection_state': summary.runtime.connectionState,
-                    'power_state': summary.runtime.powerState,
-                    'in_maintenance_mode': summary.runtime.inMaintenanceMode,
-                    'standalone': summary.runtime.inMaintenanceMode,
-                    'cpu_model': hardware.cpuPkg[0].description if hardware and hardware.cpuPkg else "Unknown",
-                    'cpu_cores': hardware.cpuInfo.numCpuCores if hardware and hardware.cpuInfo else 0,
-                    'cpu_threads': hardware.cpuInfo.numCpuThreads if hardware and hardware.cpuInfo else 0,
-                    'cpu_mhz': hardware.cpuInfo.hz / 1000000 if hardware and hardware.cpuInfo and hardware.cpuInfo.hz else 0,
-                    'memory_size': hardware.memorySize / (1024 * 1024 * 1024) if hardware and hardware.memorySize else 0,
-                    'model': hardware.systemInfo.model if hardware and hardware.systemInfo else "Unknown",
-                    'vendor': hardware.systemInfo.vendor if hardware and hardware.systemInfo else "Unknown",
-                    'version': config.product.fullName if config and config.product else "Unknown",
-                    'build': config.product.build if config and config.product else "Unknown",
-                }
-                
-                # Get cluster information if available
-                if host.parent and hasattr(host.parent, 'name'):
-                    host_info['cluster'] = host.parent.name
-                else:
-                    host_info['cluster'] = "Standalone"
-                
-                host_info_list.append(host_info)
-            
-            except Exception as e:
-                logger.debug(f"Error collecting info for host {host.name}: {str(e)}")
-                continue
-                
-        return host_info_list
-        
+        return list(self._iter_records('hosts'))
+
     def collect_datastore_info(self):
         """
         Collect information about datastores
@@ -1135,43 +895,8 @@ class DataCollector:
         Returns:
             list: List of datastore information dictionaries
         """
-        logger.info("Collecting datastore information")
-        datastores = self.client.get_datastores()
-        
-        datastore_info_list = []
-        for datastore in datastores:
-            try:
-                # Suppress stdout/stderr to prevent PyVmomi error messages
-                with suppress_stdout_stderr():
-                    # Get datastore properties
-                    summary = datastore.summary
-                
-                datastore_info = {
-                    'name': datastore.name,
-                    'type': summary.type,
-                    'capacity': summary.capacity,
-                    'free_space': summary.freeSpace,
-                    'uncommitted': summary.uncommitted if hasattr(summary, 'uncommitted') else 0,
-                    'accessible': summary.accessible,
-                    'multipleHostAccess': summary.multipleHostAccess,
-                    'url': summary.url,
-                }
-                
-                # Calculate usage percentage
-                if datastore_info['capacity'] > 0:
-                    used_space = datastore_info['capacity'] - datastore_info['free_space']
-                    datastore_info['usage_percent'] = (used_space / datastore_info['capacity']) * 100
-                else:
-                    datastore_info['usage_percent'] = 0
-                
-                datastore_info_list.append(datastore_info)
-            
-            except Exception as e:
-                logger.debug(f"Error collecting info for datastore {datastore.name}: {str(e)}")
-                continue
-                
-        return datastore_info_list
-        
+        return list(self._iter_records('datastores'))
+
     def collect_cluster_info(self):
         """
         Collect information about clusters
@@ -1179,46 +904,8 @@ class DataCollector:
         Returns:
             list: List of cluster information dictionaries
         """
-        logger.info("Collecting cluster information")
-        clusters = self.client.get_clusters()
-        
-        cluster_info_list = []
-        for cluster in clusters:
-            try:
-                # Suppress stdout/stderr to prevent PyVmomi error messages
-                with suppress_stdout_stderr():
-                    # Get cluster properties
-                    summary = cluster.summary
-                
-                cluster_info = {
-                    'name': cluster.name,
-                    'hosts': len(cluster.host) if hasattr(cluster, 'host') else 0,
-                    'drs_enabled': summary.drsConfig.enabled if hasattr(summary, 'drsConfig') else False,
-                    'drs_behavior': summary.drsConfig.defaultVmBehavior if hasattr(summary, 'drsConfig') else "Unknown",
-                    'ha_enabled': summary.dasConfig.enabled if hasattr(summary, 'dasConfig') else False,
-                    'total_cpu': summary.totalCpu if hasattr(summary, 'totalCpu') else 0,
-                    'total_memory': summary.totalMemory if hasattr(summary, 'totalMemory') else 0,
-                    'used_cpu': summary.usedCpu if hasattr(summary, 'usedCpu') else 0,
-                    'used_memory': summary.usedMemory if hasattr(summary, 'usedMemory') else 0,
-                }
-                
-                # Get list of hosts in cluster
-                if hasattr(cluster, 'host'):
-                    host_list = []
-                    for host in cluster.host:
-                        host_list.append(host.name)
-                    cluster_info['host_list'] = host_list
-                else:
-                    cluster_info['host_list'] = []
-                
-                cluster_info_list.append(cluster_info)
-            
-            except Exception as e:
-                logger.debug(f"Error collecting info for cluster {cluster.name}: {str(e)}")
-                continue
-                
-        return cluster_info_list
-        
+        return list(self._iter_records('clusters'))
+
     def collect_resource_pool_info(self):
         """
         Collect information about resource pools
@@ -1226,51 +913,8 @@ class DataCollector:
         Returns:
             list: List of resource pool information dictionaries
         """
-        logger.info("Collecting resource pool information")
-        resource_pools = self.client.get_resource_pools()
-        
-        resource_pool_info_list = []
-        for pool in resource_pools:
-            try:
-                # Suppress stdout/stderr to prevent PyVmomi error messages
-                with suppress_stdout_stderr():
-                    # Get resource pool properties
-                    summary = pool.summary
-                    config = pool.config if hasattr(pool, 'config') else None
-                
-                pool_info = {
-                    'name': pool.name,
-                    'cpu_shares': config.cpuAllocation.shares.shares if config and config.cpuAllocation and config.cpuAllocation.shares else 0,
-                    'cpu_limit': config.cpuAllocation.limit if config and config.cpuAllocation else -1,
-                    'cpu_reservation': config.cpuAllocation.reservation if config and config.cpuAllocation else 0,
-                    'memory_shares': config.memoryAllocation.shares.shares if config and config.memoryAllocation and config.memoryAllocation.shares else 0,
-                    'memory_limit': config.memoryAllocation.limit if config and config.memoryAllocation else -1,
-                    'memory_reservation': config.memoryAllocation.reservation if config and config.memoryAllocation else 0,
-                }
-                
-                # Get parent information
-                if pool.parent:
-                    if isinstance(pool.parent, vim.ClusterComputeResource):
-                        pool_info['parent_type'] = 'Cluster'
-                        pool_info['parent_name'] = pool.parent.name
-                    elif isinstance(pool.parent, vim.ResourcePool):
-                        pool_info['parent_type'] = 'Resource Pool'
-                        pool_info['parent_name'] = pool.parent.name
-                    else:
-                        pool_info['parent_type'] = type(pool.parent).__name__
-                        pool_info['parent_name'] = pool.parent.name if hasattr(pool.parent, 'name') else "Unknown"
-                else:
-                    pool_info['parent_type'] = "None"
-                    pool_info['parent_name'] = "None"
-                
-                resource_pool_info_list.append(pool_info)
-            
-            except Exception as e:
-                logger.debug(f"Error collecting info for resource pool {pool.name}: {str(e)}")
-                continue
-                
-        return resource_pool_info_list
-        
+        return list(self._iter_records('resource_pools'))
+
     def collect_network_info(self):
         """
         Collect information about networks
@@ -1278,45 +922,4 @@ class DataCollector:
         Returns:
             list: List of network information dictionaries
         """
-        logger.info("Collecting network information")
-        networks = self.client.get_networks()
-        
-        network_info_list = []
-        for network in networks:
-            try:
-                # Suppress stdout/stderr to prevent PyVmomi error messages
-                with suppress_stdout_stderr():
-                    network_info = {
-                        'name': network.name,
-                        'accessible': network.summary.accessible if hasattr(network.summary, 'accessible') else False,
-                        'type': type(network).__name__,  # Network type (DistributedVirtualPortgroup, Network, etc.)
-                    }
-                
-                # Get additional properties based on network type
-                if isinstance(network, vim.dvs.DistributedVirtualPortgroup):
-                    # This is a DVS portgroup
-                    config = network.config if hasattr(network, 'config') else None
-                    
-                    if config:
-                        network_info['vlan_type'] = config.defaultPortConfig.vlan.__class__.__name__ if hasattr(config.defaultPortConfig, 'vlan') else "Unknown"
-                        
-                        # Get VLAN ID if it's a single VLAN
-                        if isinstance(config.defaultPortConfig.vlan, vim.dvs.VmwareDistributedVirtualSwitch.VlanIdSpec) and hasattr(config.defaultPortConfig.vlan, 'vlanId'):
-                            network_info['vlan_id'] = config.defaultPortConfig.vlan.vlanId
-                        else:
-                            network_info['vlan_id'] = "Multiple or None"
-                            
-                        # Get DVS name
-                        if config.distributedVirtualSwitch:
-                            network_info['dvs_name'] = config.distributedVirtualSwitch.name
-                        else:
-                            network_info['dvs_name'] = "Unknown"
-                            
-                # Add to list
-                network_info_list.append(network_info)
-            
-            except Exception as e:
-                logger.debug(f"Error collecting info for network {network.name}: {str(e)}")
-                continue
-                
-        return network_info_list
+        return list(self._iter_records('networks'))
@@ -1,3 +1,106 @@
 """
 Exporters package initialization
+
+Exporters are registered by module and class name and only imported when a
+report in their format is generated, so that e.g. an HTML-only run never
+loads python-docx or reportlab.
+
+Other packages can add formats through the entry point group
+"vsphere_reporter.exporters" (name = format, value = "module:Class"). An
+exporter is called as cls(data, timestamp).export(output_path) and may define
+an "extension" attribute; streaming exporters (see core.exporters.streaming)
+can also be fed record by record while collecting.
 """
+
+import logging
+import importlib
+
+logger = logging.getLogger(__name__)
+
+PLUGIN_GROUP = 'vsphere_reporter.exporters'
+
+# Report format -> (module, exporter class, file extension)
+EXPORTERS = {
+    'html': ('core.exporters.html_exporter', 'HTMLExporter', 'html'),
+    'docx': ('core.exporters.docx_exporter', 'DOCXExporter', 'docx'),
+    'pdf': ('core.exporters.pdf_exporter', 'PDFExporter', 'pdf'),
+    'csv': ('core.exporters.csv_exporter', 'CSVExporter', 'csv'),
+    'jsonl': ('core.exporters.jsonl_exporter', 'JSONLinesExporter', 'jsonl'),
+    'parquet': ('core.exporters.parquet_exporter', 'ParquetExporter', 'parquet'),
+    'arrow': ('core.exporters.parquet_exporter', 'ArrowExporter', 'arrow')
+}
+
+# Formats of the classic document report ("all" in the command line tools)
+DOCUMENT_FORMATS = ['html', 'docx', 'pdf']
+
+_plugins_loaded = False
+
+def register_exporter(report_format, module_name, class_name, extension):
+    """
+    Register an exporter for a report format
+
+    Args:
+        report_format (str): Format key (e.g. 'html')
+        module_name (str): Module defining the exporter, imported on first use
+        class_name (str): Exporter class, called as cls(data, timestamp).export(path)
+        extension (str): File extension of the generated reports
+    """
+    EXPORTERS[report_format] = (module_name, class_name, extension)
+
+def load_plugins():
+    """Register the exporters of installed packages (without importing them)"""
+    global _plugins_loaded
+    if _plugins_loaded:
+        return
+    _plugins_loaded = True
+
+    from importlib.metadata import entry_points
+    try:
+        plugins = entry_points(group=PLUGIN_GROUP)
+    except TypeError:
+        # Python < 3.10
+        plugins = entry_points().get(PLUGIN_GROUP, [])
+
+    for plugin in plugins:
+        if plugin.name in EXPORTERS:
+            logger.warning(f"Exporter plugin {plugin.value} ignored, format {plugin.name} is already registered")
+            continue
+        module_name, _, class_name = plugin.value.partition(':')
+        register_exporter(plugin.name, module_name.strip(), class_name.strip(), plugin.name)
+        logger.debug(f"Registered exporter plugin {plugin.name}: {plugin.value}")
+
+def available_formats():
+    """
+    All registered report formats, including plugins
+
+    Returns:
+        list: Format keys
+    """
+    load_plugins()
+    return list(EXPORTERS)
+
+def get_exporter(report_format):
+    """
+    Import and return the exporter class of a report format
+
+    Args:
+        report_format (str): Format key
+
+    Returns:
+        tuple: (exporter class, file extension)
+
+    Raises:
+        ValueError: If no exporter is registered for the format
+    """
+    if report_format not in EXPORTERS:
+        load_plugins()
+    if report_format not in EXPORTERS:
+        raise ValueError(f"Unknown report format: {report_format}")
+    module_name, class_name, extension = EXPORTERS[report_format]
+    exporter_class = getattr(importlib.import_module(module_name), class_name)
+    return exporter_class, getattr(exporter_class, 'extension', None) or extension
+
+def is_streaming(report_format):
+    """Whether the exporter of a format can write records while they are collected"""
+    exporter_class, _ = get_exporter(report_format)
+    return getattr(exporter_class, 'streaming', False)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+CSV report exporter
+
+Writes one CSV file per report section next to the given path
+(vsphere_report_<timestamp>_<section>.csv). Sections of the column schema
+(see core.report_schema) get the header of their selected columns plus
+moref, so a column the first record happens to leave out (e.g. the VLAN of
+a plain network) is kept and written empty where a record has no value.
+Other sections take their columns from the first record. Sections without
+records get no file; lists and dictionaries are written as JSON.
+"""
+
+import os
+import csv
+import json
+import logging
+
+from core.exporters.streaming import StreamingExporter
+from core.report_schema import SECTION_SCHEMAS, selected_columns
+
+logger = logging.getLogger(__name__)
+
+class CSVExporter(StreamingExporter):
+    """Exporter for CSV reports, one file per section"""
+
+    extension = 'csv'
+
+    def __init__(self, data, timestamp):
+        super().__init__(data, timestamp)
+        self._base = None
+        self._files = {}
+
+    def open(self, output_path):
+        self._base = os.path.splitext(output_path)[0]
+        self._files = {}
+
+    def _section_file(self, section, record):
+        entry = self._files.get(section)
+        if entry is None:
+            path = f"{self._base}_{section}.csv"
+            fields = self._fieldnames(section, record)
+            handle = open(path, 'w', encoding='utf-8', newline='')
+            writer = csv.DictWriter(handle, fieldnames=fields, restval='', extrasaction='ignore')
+            writer.writeheader()
+            entry = self._files[section] = {'path': path, 'handle': handle, 'writer': writer,
+                                            'fields': set(fields), 'records': 0, 'dropped': set()}
+        return entry
+
+    def _fieldnames(self, section, record):
+        """Header of a section file"""
+        if section not in SECTION_SCHEMAS:
+            return list(record)
+        if self.columns is not None:
+            keys = self.columns.get(section)
+        elif self.data:
+            # Ohne Spaltenauswahl die Spalten nehmen, die gesammelt wurden
+            keys = set().union(*(set(item) for item in self.data.get(section, [])))
+        else:
+            keys = None
+        fields = [column.key for column in selected_columns(section, keys)] + ['moref']
+        # Zusätzliche Felder wie das vCenter der Multi-vCenter-Sammlung hinten anhängen
+        return fields + [key for key in record if key not in fields]
+
+    def write(self, section, record):
+        entry = self._section_file(section, record)
+        extra = set(record) - entry['fields'] - entry['dropped']
+        if extra:
+            # Spalten stehen nach dem ersten Datensatz fest
+            logger.warning(f"CSV section {section}: columns {', '.join(sorted(extra))} not in header, skipped")
+            entry['dropped'] |= extra
+        entry['writer'].writerow({key: self._cell(value) for key, value in record.items()})
+        entry['records'] += 1
+
+    def _cell(self, value):
+        value = self.plain_value(value)
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, ensure_ascii=False)
+        return value
+
+    def close(self):
+        paths = []
+        for section, entry in self._files.items():
+            entry['handle'].close()
+            logger.info(f"CSV section {section} with {entry['records']} records written to: {entry['path']}")
+            paths.append(entry['path'])
+        self._files = {}
+        return paths
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+JSON Lines report exporter
+
+Writes one JSON object per record and line, tagged with its report section:
+
+    {"section": "vms", "name": "web-01", "power_state": "poweredOn", ...}
+"""
+
+import json
+import logging
+
+from core.exporters.streaming import StreamingExporter
+
+logger = logging.getLogger(__name__)
+
+class JSONLinesExporter(StreamingExporter):
+    """Exporter for JSON Lines reports"""
+
+    extension = 'jsonl'
+
+    def __init__(self, data, timestamp):
+        super().__init__(data, timestamp)
+        self._file = None
+        self._path = None
+        self.records = 0
+
+    def open(self, output_path):
+        self._path = output_path
+        self._file = open(output_path, 'w', encoding='utf-8')
+        self.records = 0
+
+    def write(self, section, record):
+        line = {'section': section}
+        line.update(self.plain_value(record))
+        self._file.write(json.dumps(line, ensure_ascii=False) + '\n')
+        self.records += 1
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+            logger.info(f"JSON Lines report with {self.records} records written to: {self._path}")
+        return [self._path]
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Columnar Parquet and Arrow report exporters
+
+Writes the VM, snapshot, datastore and orphaned VMDK sections as typed tables,
+one file per section next to the given path
+(vsphere_report_<timestamp>_<section>.parquet or .arrow). Repeated strings
+such as datastore, power state or guest OS are dictionary encoded, and every
+row carries the report time and the vCenter, so the files of many runs and
+vCenters can be queried together:
+
+    SELECT vcenter, report_time, count(*) FROM 'reports/*_vms.parquet' GROUP BY ALL
+
+Requires pyarrow, which is only imported when one of these formats is used.
+Other sections are not written.
+"""
+
+import os
+import re
+import logging
+import datetime
+
+import pyarrow as pa
+import pyarrow.ipc
+import pyarrow.parquet
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION = 'zstd'
+
+_STRING = pa.string()
+_DICTIONARY = pa.dictionary(pa.int32(), pa.string())
+_TIMESTAMP = pa.timestamp('us', tz='UTC')
+
+_DATASTORE_PATTERN = re.compile(r'^\[([^\]]+)\]')
+
+def _utc(value):
+    """Datetime in UTC; naive values are taken as local time"""
+    if not isinstance(value, datetime.datetime):
+        return None
+    return value.astimezone(datetime.timezone.utc)
+
+def _datastore_of(path):
+    match = _DATASTORE_PATTERN.match(path or '')
+    return match.group(1) if match else None
+
+def _number(value):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+# Section -> [(column, type, value of a record)]
+SCHEMAS = {
+    'vms': [
+        ('name', _STRING, lambda r: r.get('name')),
+        ('power_state', _DICTIONARY, lambda r: r.get('power_state')),
+        ('guest_full_name', _DICTIONARY, lambda r: r.get('guest_full_name')),
+        ('vmware_tools_status', _DICTIONARY, lambda r: r.get('vmware_tools_status')),
+        ('vmware_tools_version', _DICTIONARY, lambda r: r.get('vmware_tools_version')),
+        ('uuid', _STRING, lambda r: r.get('uuid')),
+        ('num_cpu', pa.int32(), lambda r: _number(r.get('num_cpu'))),
+        ('memory_mb', pa.int64(), lambda r: _number(r.get('memory_mb'))),
+        ('ip_address', _STRING, lambda r: r.get('ip_address')),
+        ('hostname', _STRING, lambda r: r.get('hostname')),
+        ('path', _STRING, lambda r: r.get('path')),
+        ('datastore', _DICTIONARY, lambda r: _datastore_of(r.get('path'))),
+        ('provisioned_space', pa.int64(), lambda r: _number(r.get('provisioned_space'))),
+        ('used_space', pa.int64(), lambda r: _number(r.get('used_space'))),
+        ('disk_count', pa.int32(), lambda r: len(r.get('disks') or [])),
+        ('disk_capacity_kb', pa.int64(),
+         lambda r: sum(_number(disk.get('capacity_kb')) or 0 for disk in r.get('disks') or [])),
+        ('disks', pa.list_(pa.struct([('label', _STRING), ('capacity_kb', pa.int64()),
+                                      ('thin_provisioned', pa.bool_()), ('datastore', _STRING),
+                                      ('file_name', _STRING)])),
+         lambda r: [{'label': disk.get('label'), 'capacity_kb': _number(disk.get('capacity_kb')),
+                     'thin_provisioned': disk.get('thin_provisioned'), 'datastore': disk.get('datastore'),
+                     'file_name': disk.get('file_name')} for disk in r.get('disks') or []]),
+        ('networks', pa.list_(pa.struct([('mac_address', _STRING), ('network_name', _STRING),
+                                         ('adapter_type', _STRING)])),
+         lambda r: [{'mac_address': nic.get('mac_address'), 'network_name': nic.get('network_name'),
+                     'adapter_type': nic.get('adapter_type')} for nic in r.get('networks') or []]),
+        ('snapshot_count', pa.int32(), lambda r: len(r.get('snapshots') or []))
+    ],
+    'snapshots': [
+        ('vm_name', _DICTIONARY, lambda r: r.get('vm_name')),
+        ('name', _STRING, lambda r: r.get('name')),
+        ('description', _STRING, lambda r: r.get('description')),
+        ('create_time', _TIMESTAMP, lambda r: _utc(r.get('create_time'))),
+        ('state', _DICTIONARY, lambda r: r.get('state')),
+        ('snapshot_id', pa.int32(), lambda r: _number(r.get('snapshot_id'))),
+        ('quiesced', pa.bool_(), lambda r: r.get('quiesced')),
+        ('age_days', pa.int32(), lambda r: _number(r.get('age_days'))),
+        ('age_hours', pa.int32(), lambda r: _number(r.get('age_hours')))
+    ],
+    'datastores': [
+        ('name', _DICTIONARY, lambda r: r.get('name')),
+        ('type', _DICTIONARY, lambda r: r.get('type')),
+        ('capacity', pa.int64(), lambda r: _number(r.get('capacity'))),
+        ('free_space', pa.int64(), lambda r: _number(r.get('free_space'))),
+        ('uncommitted', pa.int64(), lambda r: _number(r.get('uncommitted'))),
+        ('accessible', pa.bool_(), lambda r: r.get('accessible')),
+        ('multiple_host_access', pa.bool_(), lambda r: r.get('multipleHostAccess')),
+        ('url', _STRING, lambda r: r.get('url')),
+        ('usage_percent', pa.float64(), lambda r: _number(r.get('usage_percent')))
+    ],
+    'orphaned_vmdks': [
+        ('path', _STRING, lambda r: r.get('path')),
+        ('datastore', _DICTIONARY, lambda r: r.get('datastore') or _datastore_of(r.get('path'))),
+        ('size', pa.int64(), lambda r: _number(r.get('size'))),
+        ('capacity', pa.int64(), lambda r: _number(r.get('capacity'))),
+        ('thin', pa.bool_(), lambda r: r.get('thin')),
+        ('controller_type', _DICTIONARY, lambda r: r.get('controller_type')),
+        ('modification_time', _TIMESTAMP, lambda r: _utc(r.get('modification_time'))),
+        ('reason', _DICTIONARY, lambda r: r.get('reason'))
+    ]
+}
+
+class ParquetExporter:
+    """Exporter for Parquet files, one per section"""
+
+    extension = 'parquet'
+
+    def __init__(self, data, timestamp):
+        """
+        Initialize the Parquet exporter
+
+        Args:
+            data (dict): Dictionary containing collected vSphere data
+            timestamp (datetime): Report generation timestamp
+        """
+        self.data = data
+        self.timestamp = timestamp
+        # vCenter für Datensätze ohne eigenes vcenter-Feld (Lauf gegen einen einzelnen Server)
+        self.vcenter = None
+
+    def export(self, output_path):
+        """
+        Export the supported sections
+
+        Args:
+            output_path (str): Path of the report; the section name is appended
+
+        Returns:
+            list: Paths of the written files
+        """
+        base = os.path.splitext(output_path)[0]
+        paths = []
+        for section, columns in SCHEMAS.items():
+            records = self.data.get(section)
+            if records is None:
+                continue
+            table = self.build_table(section, records)
+            path = f"{base}_{section}.{self.extension}"
+            self.write_table(table, path)
+            logger.info(f"{self.extension} section {section} with {table.num_rows} rows written to: {path}")
+            paths.append(path)
+        return paths
+
+    def build_table(self, section, records):
+        """
+        Convert the records of a section into a typed Arrow table
+
+        Records without a vcenter field get the exporter's vcenter.
+
+        Returns:
+            pyarrow.Table: Table with report_time and vcenter followed by the section columns
+        """
+        columns = SCHEMAS[section]
+        report_time = _utc(self.timestamp)
+        arrays = [
+            pa.array([report_time] * len(records), type=_TIMESTAMP),
+            pa.array([record.get('vcenter') or self.vcenter for record in records], type=_DICTIONARY)
+        ]
+        fields = [pa.field('report_time', _TIMESTAMP, nullable=False), pa.field('vcenter', _DICTIONARY)]
+        for name, arrow_type, value in columns:
+            arrays.append(pa.array([value(record) for record in records], type=arrow_type))
+            fields.append(pa.field(name, arrow_type))
+        return pa.Table.from_arrays(arrays, schema=pa.schema(fields, metadata={'section': section}))
+
+    def write_table(self, table, path):
+        pyarrow.parquet.write_table(table, path, compression=COMPRESSION)
+
+class ArrowExporter(ParquetExporter):
+    """Exporter for Arrow IPC files (Feather v2), one per section"""
+
+    extension = 'arrow'
+
+    def write_table(self, table, path):
+        options = pyarrow.ipc.IpcWriteOptions(compression=COMPRESSION)
+        with pyarrow.ipc.new_file(path, table.schema, options=options) as writer:
+            writer.write_table(table)
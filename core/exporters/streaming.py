@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Base class for record streaming exporters
+
+Streaming exporters write every record as soon as it is handed to them and
+keep nothing in memory, so they can be fed directly from
+DataCollector.iter_section() while the collection is still running:
+
+    exporter = CSVExporter(None, timestamp)
+    exporter.open(output_path)
+    for record in collector.iter_section('vms'):
+        exporter.write('vms', record)
+    files = exporter.close()
+
+Given report data (dict of section -> records) they work like every other
+exporter through export().
+"""
+
+import datetime
+from abc import ABC, abstractmethod
+
+class StreamingExporter(ABC):
+    """
+    Exporter writing one record at a time
+
+    When streaming, "columns" can be set to the column selection of the
+    collector (section -> column keys, see core.report_schema), so that
+    exporters with a fixed header know all columns before the first record.
+    """
+
+    streaming = True
+    extension = None
+
+    def __init__(self, data, timestamp):
+        """
+        Initialize the exporter
+
+        Args:
+            data (dict): Collected report data for export(), None when streaming
+            timestamp (datetime): Report generation timestamp
+        """
+        self.data = data
+        self.timestamp = timestamp
+        self.columns = None
+
+    def export(self, output_path):
+        """
+        Export the report data
+
+        Args:
+            output_path (str): Path of the report file
+
+        Returns:
+            list: Paths of the written files
+        """
+        self.open(output_path)
+        try:
+            for section, records in (self.data or {}).items():
+                for record in records:
+                    self.write(section, record)
+        finally:
+            files = self.close()
+        return files
+
+    @abstractmethod
+    def open(self, output_path):
+        """Start a report at the given path"""
+
+    @abstractmethod
+    def write(self, section, record):
+        """Write one record of a section"""
+
+    @abstractmethod
+    def close(self):
+        """
+        Finish the report
+
+        Returns:
+            list: Paths of the written files
+        """
+
+    @staticmethod
+    def plain_value(value):
+        """Value converted to a JSON-compatible type"""
+        if isinstance(value, (datetime.datetime, datetime.date)):
+            return value.isoformat()
+        if isinstance(value, dict):
+            return {str(key): StreamingExporter.plain_value(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple, set)):
+            return [StreamingExporter.plain_value(item) for item in value]
+        if value is None or isinstance(value, (str, int, float, bool)):
+            return value
+        return str(value)
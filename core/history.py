@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Local history of report runs
+
+Stores the section data of every run in an SQLite database, keyed by vCenter,
+section and object (the managed object ID where the record has one, the
+path for orphaned VMDKs), so that changes between runs are answered by
+indexed queries instead of re-collecting or parsing old reports:
+
+    python -m core.history runs
+    python -m core.history diff --since 7d
+    python -m core.history show snapshots snapshot-1234
+
+Only sections collected for a vCenter in both runs are compared; a vCenter
+that failed in one of them does not show up as removed.
+"""
+
+import os
+import re
+import sys
+import json
+import sqlite3
+import hashlib
+import logging
+import argparse
+import datetime
+
+from core.exporters.streaming import StreamingExporter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY_PATH = os.path.join(
+    os.environ.get('XDG_DATA_HOME', os.path.join(os.path.expanduser('~'), '.local', 'share')),
+    'vsphere_reporter',
+    'history.db'
+)
+
+# Fields that change on every run without the object changing
+VOLATILE_FIELDS = {'age_days', 'age_hours', 'summary', 'vm_summary'}
+
+TOOLS_SECTIONS = ('vms', 'vmware_tools')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_time TEXT NOT NULL,
+    label TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_time ON runs (run_time);
+
+CREATE TABLE IF NOT EXISTS run_sections (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    vcenter TEXT NOT NULL,
+    section TEXT NOT NULL,
+    records INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (run_id, vcenter, section)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS records (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    vcenter TEXT NOT NULL,
+    section TEXT NOT NULL,
+    object_key TEXT NOT NULL,
+    name TEXT,
+    digest TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (run_id, vcenter, section, object_key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS records_object ON records (vcenter, section, object_key, run_id);
+"""
+
+# Objects of the newer run without a counterpart in the older one (and vice versa with the runs swapped)
+_ADDED_SQL = """
+SELECT n.vcenter, n.section, n.object_key, n.name, n.data
+FROM run_sections a
+JOIN run_sections b ON b.run_id = :new AND b.vcenter = a.vcenter AND b.section = a.section
+JOIN records n ON n.run_id = :new AND n.vcenter = a.vcenter AND n.section = a.section
+LEFT JOIN records o ON o.run_id = :old AND o.vcenter = n.vcenter AND o.section = n.section
+                   AND o.object_key = n.object_key
+WHERE a.run_id = :old AND o.object_key IS NULL {condition}
+ORDER BY n.vcenter, n.section, n.name
+"""
+
+_CHANGED_SQL = """
+SELECT n.vcenter, n.section, n.object_key, n.name, o.data, n.data
+FROM records n
+JOIN records o ON o.run_id = :old AND o.vcenter = n.vcenter AND o.section = n.section
+              AND o.object_key = n.object_key
+WHERE n.run_id = :new AND o.digest != n.digest {condition}
+ORDER BY n.vcenter, n.section, n.name
+"""
+
+def _utc_now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+def _format_time(value):
+    """ISO timestamp in UTC, comparable as text"""
+    if value.tzinfo is None:
+        value = value.astimezone()
+    return value.astimezone(datetime.timezone.utc).isoformat(timespec='seconds')
+
+def parse_since(value, now=None):
+    """
+    Parse a point in time given as age (30m, 12h, 7d, 2w) or ISO date
+
+    Returns:
+        datetime: Point in time (UTC)
+
+    Raises:
+        ValueError: If the value is neither
+    """
+    now = now or _utc_now()
+    match = re.fullmatch(r'(\d+)\s*([mhdw])', value.strip().lower())
+    if match:
+        unit = {'m': 'minutes', 'h': 'hours', 'd': 'days', 'w': 'weeks'}[match.group(2)]
+        return now - datetime.timedelta(**{unit: int(match.group(1))})
+    try:
+        parsed = datetime.datetime.fromisoformat(value.strip())
+    except ValueError:
+        raise ValueError(f"Invalid point in time: {value} (use e.g. 12h, 7d, 2w or 2024-05-01)")
+    if parsed.tzinfo is None:
+        parsed = parsed.astimezone()
+    return parsed.astimezone(datetime.timezone.utc)
+
+def object_key(section, record):
+    """
+    Identity of a record across runs
+
+    Returns:
+        tuple: (key, display name)
+    """
+    if section == 'orphaned_vmdks':
+        return record.get('path'), record.get('path')
+    if section == 'snapshots':
+        name = f"{record.get('vm_name')}: {record.get('name')}"
+        return record.get('moref') or f"{record.get('vm_name')}/{record.get('snapshot_id')}", name
+    name = record.get('name')
+    return record.get('moref') or record.get('uuid') or name, name
+
+def _stable(value):
+    if isinstance(value, dict):
+        return {key: _stable(item) for key, item in value.items() if key not in VOLATILE_FIELDS}
+    if isinstance(value, list):
+        return [_stable(item) for item in value]
+    return value
+
+class HistoryRun:
+    """One run being written to the history, fed like a streaming exporter"""
+
+    BATCH_SIZE = 500
+
+    def __init__(self, store, run_id, vcenters):
+        self.store = store
+        self.run_id = run_id
+        self.vcenters = list(vcenters)
+        self.records = 0
+        self._batch = []
+        self._counts = {}
+        self._seen = set()
+
+    def write(self, section, record):
+        """Add one record of a section"""
+        vcenter = record.get('vcenter') or self.vcenters[0]
+        key, name = object_key(section, record)
+        if key is None:
+            return
+        if (vcenter, section, key) in self._seen:
+            # Gleicher Schlüssel doppelt (z.B. Snapshot-Namen ohne MoRef), nur der erste zählt
+            logger.debug(f"History: duplicate {section} object {key} on {vcenter} skipped")
+            return
+        self._seen.add((vcenter, section, key))
+        data = StreamingExporter.plain_value(record)
+        digest = hashlib.sha1(json.dumps(_stable(data), sort_keys=True).encode('utf-8')).hexdigest()
+        self._batch.append((self.run_id, vcenter, section, str(key), name, digest,
+                            json.dumps(data, ensure_ascii=False)))
+        self._counts[(vcenter, section)] = self._counts.get((vcenter, section), 0) + 1
+        self.records += 1
+        if len(self._batch) >= self.BATCH_SIZE:
+            self._flush()
+
+    def _flush(self):
+        if self._batch:
+            self.store.connection.executemany('INSERT INTO records VALUES (?, ?, ?, ?, ?, ?, ?)', self._batch)
+            self._batch = []
+
+    def close(self, sections):
+        """
+        Finish the run
+
+        Args:
+            sections (list): Sections collected for every vCenter of the run (also those without records)
+
+        Returns:
+            int: Run ID
+        """
+        self._flush()
+        self.store.connection.executemany(
+            'INSERT INTO run_sections VALUES (?, ?, ?, ?)',
+            [(self.run_id, vcenter, section, self._counts.get((vcenter, section), 0))
+             for vcenter in self.vcenters for section in sections]
+        )
+        self.store.connection.commit()
+        logger.info(f"History run {self.run_id} with {self.records} records saved to {self.store.path}")
+        return self.run_id
+
+    def abort(self):
+        """Discard the run"""
+        self._batch = []
+        self.store.connection.rollback()
+
+class HistoryStore:
+    """SQLite database of report runs"""
+
+    def __init__(self, path=None):
+        """
+        Open (and if needed create) the history database
+
+        Args:
+            path (str): Database location (defaults to ~/.local/share/vsphere_reporter/history.db)
+        """
+        self.path = os.path.expanduser(path or DEFAULT_HISTORY_PATH)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def start_run(self, vcenters, run_time=None, label=None):
+        """
+        Begin a run, records are added with write() on the returned object
+
+        Args:
+            vcenters (list): vCenters collected in this run; the first one is used for records
+                             without a 'vcenter' key
+            run_time (datetime): Time of the run (default: now)
+            label (str): Optional description (e.g. the report profile)
+
+        Returns:
+            HistoryRun: Open run
+        """
+        if not vcenters:
+            raise ValueError("A history run needs at least one vCenter")
+        cursor = self.connection.execute('INSERT INTO runs (run_time, label) VALUES (?, ?)',
+                                         (_format_time(run_time or _utc_now()), label))
+        return HistoryRun(self, cursor.lastrowid, vcenters)
+
+    def record_run(self, data, vcenters, run_time=None, label=None):
+        """
+        Save collected report data as one run
+
+        Args:
+            data (dict): Section -> records
+            vcenters (list): vCenters the data was collected from
+
+        Returns:
+            int: Run ID
+        """
+        run = self.start_run(vcenters, run_time, label)
+        try:
+            for section, records in data.items():
+                for record in records:
+                    run.write(section, record)
+        except Exception:
+            run.abort()
+            raise
+        return run.close(list(data))
+
+    def runs(self, limit=None):
+        """
+        Stored runs, newest first
+
+        Returns:
+            list: Dictionaries with id, run_time, label, vcenters, sections and records
+        """
+        rows = self.connection.execute(
+            """
+            SELECT r.id, r.run_time, r.label, group_concat(DISTINCT s.vcenter) AS vcenters,
+                   group_concat(DISTINCT s.section) AS sections, coalesce(sum(s.records), 0) AS records
+            FROM runs r LEFT JOIN run_sections s ON s.run_id = r.id
+            GROUP BY r.id ORDER BY r.run_time DESC, r.id DESC LIMIT ?
+            """,
+            (limit if limit else -1,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_run(self, run_id):
+        row = self.connection.execute('SELECT id, run_time, label FROM runs WHERE id = ?', (run_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"Unknown history run: {run_id}")
+        return dict(row)
+
+    def latest_run(self, before=None):
+        """
+        ID of the newest run, or of the newest run at or before a point in time
+
+        Returns:
+            int: Run ID or None
+        """
+        if before is None:
+            row = self.connection.execute('SELECT id FROM runs ORDER BY run_time DESC, id DESC LIMIT 1').fetchone()
+        else:
+            row = self.connection.execute(
+                'SELECT id FROM runs WHERE run_time <= ? ORDER BY run_time DESC, id DESC LIMIT 1',
+                (_format_time(before),)
+            ).fetchone()
+        return row['id'] if row else None
+
+    def object_history(self, section, key, vcenter=None):
+        """
+        All stored versions of one object
+
+        Returns:
+            list: Dictionaries with run_id, run_time, vcenter and data (oldest first)
+        """
+        rows = self.connection.execute(
+            """
+            SELECT r.id AS run_id, r.run_time, d.vcenter, d.data
+            FROM records d JOIN runs r ON r.id = d.run_id
+            WHERE d.section = ? AND d.object_key = ? AND (? IS NULL OR d.vcenter = ?)
+            ORDER BY r.run_time, r.id
+            """,
+            (section, key, vcenter, vcenter)
+        ).fetchall()
+        return [dict(row, data=json.loads(row['data'])) for row in rows]
+
+    def prune(self, keep_days):
+        """
+        Delete runs older than the given number of days
+
+        Returns:
+            int: Number of deleted runs
+        """
+        cutoff = _format_time(_utc_now() - datetime.timedelta(days=keep_days))
+        deleted = self.connection.execute('DELETE FROM runs WHERE run_time < ?', (cutoff,)).rowcount
+        self.connection.commit()
+        if deleted:
+            self.connection.execute('VACUUM')
+        return deleted
+
+    def _added(self, old, new, condition=''):
+        return self.connection.execute(_ADDED_SQL.format(condition=condition), {'old': old, 'new': new}).fetchall()
+
+    def _changed(self, old, new, condition=''):
+        return self.connection.execute(_CHANGED_SQL.format(condition=condition), {'old': old, 'new': new}).fetchall()
+
+    def diff(self, old, new):
+        """
+        Compare two runs
+
+        Args:
+            old (int): ID of the older run
+            new (int): ID of the newer run
+
+        Returns:
+            dict: Run infos, per-section counts (added/removed/changed) and the details
+                  new_snapshots, removed_snapshots, new_orphans, grown_orphans, removed_orphans
+                  and tools_regressions
+        """
+        result = {'old_run': self.get_run(old), 'new_run': self.get_run(new), 'sections': {}}
+
+        for kind, rows in (('added', self._added(old, new)), ('removed', self._added(new, old))):
+            for row in rows:
+                counts = result['sections'].setdefault(row['section'], {'added': 0, 'removed': 0, 'changed': 0})
+                counts[kind] += 1
+        for row in self._changed(old, new):
+            counts = result['sections'].setdefault(row['section'], {'added': 0, 'removed': 0, 'changed': 0})
+            counts['changed'] += 1
+
+        def records(rows):
+            return [dict(json.loads(row['data']), vcenter=row['vcenter']) for row in rows]
+
+        result['new_snapshots'] = records(self._added(old, new, "AND n.section = 'snapshots'"))
+        result['removed_snapshots'] = records(self._added(new, old, "AND n.section = 'snapshots'"))
+        result['new_orphans'] = records(self._added(old, new, "AND n.section = 'orphaned_vmdks'"))
+        result['removed_orphans'] = records(self._added(new, old, "AND n.section = 'orphaned_vmdks'"))
+
+        result['grown_orphans'] = []
+        for row in self._changed(old, new, "AND n.section = 'orphaned_vmdks' AND "
+                                           "json_extract(n.data, '$.size') > json_extract(o.data, '$.size')"):
+            old_size = json.loads(row[4]).get('size') or 0
+            new_size = json.loads(row[5]).get('size') or 0
+            result['grown_orphans'].append({'vcenter': row['vcenter'], 'path': row['name'],
+                                            'old_size': old_size, 'new_size': new_size,
+                                            'growth': new_size - old_size})
+
+        result['tools_regressions'] = []
+        seen = set()
+        condition = f"""AND n.section IN ({', '.join(f"'{section}'" for section in TOOLS_SECTIONS)}) AND (
+            (json_extract(o.data, '$.vmware_tools_status') = 'toolsOk'
+             AND json_extract(n.data, '$.vmware_tools_status') IS NOT 'toolsOk') OR
+            (json_extract(o.data, '$.vmware_tools_version') = 'guestToolsCurrent'
+             AND json_extract(n.data, '$.vmware_tools_version') IS NOT 'guestToolsCurrent'))"""
+        for row in self._changed(old, new, condition):
+            if (row['vcenter'], row['object_key']) in seen:
+                continue
+            seen.add((row['vcenter'], row['object_key']))
+            before, after = json.loads(row[4]), json.loads(row[5])
+            result['tools_regressions'].append({
+                'vcenter': row['vcenter'], 'name': row['name'],
+                'old_status': before.get('vmware_tools_status'), 'new_status': after.get('vmware_tools_status'),
+                'old_version': before.get('vmware_tools_version'), 'new_version': after.get('vmware_tools_version')
+            })
+        return result
+
+def format_diff(diff):
+    """
+    Render a diff as plain text
+
+    Returns:
+        str: Report text
+    """
+    lines = [f"Changes from run {diff['old_run']['id']} ({diff['old_run']['run_time']}) "
+             f"to run {diff['new_run']['id']} ({diff['new_run']['run_time']})", ""]
+    if not diff['sections']:
+        lines.append("No changes in the sections collected in both runs")
+    for section, counts in sorted(diff['sections'].items()):
+        lines.append(f"{section:16} +{counts['added']} -{counts['removed']} ~{counts['changed']}")
+
+    def block(title, entries, describe):
+        if entries:
+            lines.extend(["", f"{title} ({len(entries)}):"])
+            lines.extend(f"  [{entry['vcenter']}] {describe(entry)}" for entry in entries)
+
+    block("New snapshots", diff['new_snapshots'],
+          lambda s: f"{s.get('vm_name')}: {s.get('name')} (created {s.get('create_time')})")
+    block("Removed snapshots", diff['removed_snapshots'], lambda s: f"{s.get('vm_name')}: {s.get('name')}")
+    block("New orphaned VMDKs", diff['new_orphans'], lambda o: f"{o.get('path')} ({o.get('size') or 0} bytes)")
+    block("Grown orphaned VMDKs", diff['grown_orphans'],
+          lambda o: f"{o['path']} ({o['old_size']} -> {o['new_size']} bytes, +{o['growth']})")
+    block("Removed orphaned VMDKs", diff['removed_orphans'], lambda o: o.get('path'))
+    block("VMware Tools regressions", diff['tools_regressions'],
+          lambda t: f"{t['name']}: {t['old_status']}/{t['old_version']} -> {t['new_status']}/{t['new_version']}")
+    return '\n'.join(lines)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='VMware vSphere Reporter run history')
+    parser.add_argument('--db', default=DEFAULT_HISTORY_PATH, metavar='PATH',
+                        help=f'History database (default: {DEFAULT_HISTORY_PATH})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    runs = commands.add_parser('runs', help='List stored runs')
+    runs.add_argument('--limit', type=int, default=20)
+
+    diff = commands.add_parser('diff', help='Show what changed between two runs')
+    baseline = diff.add_mutually_exclusive_group()
+    baseline.add_argument('--since', default='7d',
+                          help='Compare with the last run at or before this age or date (default: 7d)')
+    baseline.add_argument('--from', dest='from_run', type=int, metavar='RUN', help='ID of the older run')
+    diff.add_argument('--to', dest='to_run', type=int, metavar='RUN', help='ID of the newer run (default: latest)')
+    diff.add_argument('--json', action='store_true', help='Print the diff as JSON')
+
+    show = commands.add_parser('show', help='Show all stored versions of one object')
+    show.add_argument('section')
+    show.add_argument('key', help='Managed object ID (or path for orphaned VMDKs)')
+    show.add_argument('--vcenter')
+
+    prune = commands.add_parser('prune', help='Delete old runs')
+    prune.add_argument('--keep-days', type=int, required=True)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    if not os.path.exists(os.path.expanduser(args.db)):
+        print(f"No history database at {args.db}", file=sys.stderr)
+        return 1
+
+    with HistoryStore(args.db) as store:
+        if args.command == 'runs':
+            for run in store.runs(args.limit):
+                print(f"{run['id']:6}  {run['run_time']}  {run['records']:8} records  "
+                      f"{run['vcenters'] or '-'}  {run['label'] or ''}")
+        elif args.command == 'diff':
+            try:
+                new = args.to_run or store.latest_run()
+                old = args.from_run or store.latest_run(before=parse_since(args.since))
+            except ValueError as e:
+                print(str(e), file=sys.stderr)
+                return 2
+            if old is None or new is None or old == new:
+                print("Not enough runs to compare", file=sys.stderr)
+                return 1
+            diff = store.diff(old, new)
+            print(json.dumps(diff, indent=2, ensure_ascii=False) if args.json else format_diff(diff))
+        elif args.command == 'show':
+            for version in store.object_history(args.section, args.key, args.vcenter):
+                print(f"run {version['run_id']} {version['run_time']} [{version['vcenter']}]")
+                print(json.dumps(version['data'], indent=2, ensure_ascii=False))
+        elif args.command == 'prune':
+            print(f"Deleted {store.prune(args.keep_days)} runs")
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
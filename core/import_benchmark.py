@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Cold start benchmark of the entry point imports
+
+Runs every scenario in fresh interpreters with "python -X importtime", reports
+the median import time and the slowest direct imports and checks that heavy
+libraries are only loaded where they are needed (e.g. an HTML-only CLI run
+must not import reportlab or python-docx):
+
+    python -m core.import_benchmark --output import-times.json
+    python -m core.import_benchmark --baseline import-times.json --threshold 1.3
+
+Exits with 1 if a scenario imports a forbidden module or got slower than the
+baseline, so it can guard cold start (which frozen builds pay on every
+launch) in CI. Scenarios whose dependencies are not installed are reported as
+errors and skipped in the comparison.
+"""
+
+import os
+import sys
+import json
+import argparse
+import platform
+import datetime
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_EXPORT_LIBRARIES = ('reportlab', 'docx', 'jinja2', 'humanize')
+
+# Scenario -> (code run in a fresh interpreter, top-level packages it must not import)
+SCENARIOS = {
+    'report_generator': ("import core.report_generator", HEAVY_EXPORT_LIBRARIES),
+    'cli': ("import vsphere_reporter_cli", HEAVY_EXPORT_LIBRARIES),
+    'cli_html': ("import vsphere_reporter_cli; from core.exporters import get_exporter; get_exporter('html')",
+                 ('reportlab', 'docx')),
+    'export_docx': ("from core.exporters import get_exporter; get_exporter('docx')", ('reportlab', 'jinja2')),
+    'export_pdf': ("from core.exporters import get_exporter; get_exporter('pdf')", ('docx', 'jinja2')),
+    'gui': ("import gui.main_window", HEAVY_EXPORT_LIBRARIES + ('pyVmomi',)),
+    'daemon': ("import core.daemon", HEAVY_EXPORT_LIBRARIES)
+}
+
+DEFAULT_REPEAT = 5
+TOP_IMPORTS = 10
+
+# Differences below this are interpreter noise, not regressions
+MIN_COMPARE_MS = 10.0
+
+def parse_importtime(output):
+    """
+    Parse the stderr output of "python -X importtime"
+
+    Returns:
+        list: (module, depth, self µs, cumulative µs) in import order
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            # Kopfzeile "self [us] | cumulative | imported package"
+            continue
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), depth, int(parts[0]), int(parts[1])))
+    return entries
+
+def _run(code):
+    """Run code in a fresh interpreter, returning (import entries, error)"""
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT, env=env,
+                             capture_output=True, text=True)
+    entries = parse_importtime(process.stderr)
+    if process.returncode != 0:
+        message = [line for line in process.stderr.splitlines() if not line.startswith('import time:')]
+        return entries, message[-1] if message else f"exit code {process.returncode}"
+    return entries, None
+
+def measure_scenario(code, forbidden, startup_modules, repeat=DEFAULT_REPEAT):
+    """
+    Measure one scenario
+
+    Args:
+        code (str): Python code to run
+        forbidden (tuple): Top-level packages that must not be imported
+        startup_modules (set): Modules the interpreter imports before running code
+        repeat (int): Number of measured runs (after one warm-up run)
+
+    Returns:
+        dict: Median import time, module count, slowest direct imports and forbidden imports
+    """
+    # Der erste Lauf schreibt fehlende .pyc-Dateien und zählt nicht
+    _, error = _run(code)
+    if error:
+        return {'error': error}
+
+    totals = []
+    entries = []
+    for _ in range(repeat):
+        entries, error = _run(code)
+        if error:
+            return {'error': error}
+        totals.append(sum(cumulative for name, depth, _, cumulative in entries
+                          if depth == 0 and name not in startup_modules) / 1000)
+
+    imported = [entry for entry in entries if entry[0] not in startup_modules]
+    direct = sorted((entry for entry in imported if entry[1] == 1), key=lambda entry: -entry[3])
+    roots = {entry[0].split('.')[0] for entry in imported}
+    return {
+        'error': None,
+        'total_ms': round(statistics.median(totals), 1),
+        'min_ms': round(min(totals), 1),
+        'modules': len(imported),
+        'slowest': [{'module': name, 'cumulative_ms': round(cumulative / 1000, 1)}
+                    for name, _, _, cumulative in direct[:TOP_IMPORTS]],
+        'forbidden_imports': sorted(roots & set(forbidden))
+    }
+
+def run_import_benchmark(scenarios=None, repeat=DEFAULT_REPEAT, progress=None):
+    """
+    Measure the import scenarios
+
+    Args:
+        scenarios (list): Scenario names (default: all)
+        repeat (int): Measured runs per scenario
+        progress (callable): Optional callback(message)
+
+    Returns:
+        dict: Results with metadata and one entry per scenario
+    """
+    report = progress or (lambda message: None)
+    startup_entries, _ = _run('pass')
+    startup_modules = {name for name, _, _, _ in startup_entries}
+
+    results = {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'scenarios': {}
+    }
+    for name in scenarios or list(SCENARIOS):
+        code, forbidden = SCENARIOS[name]
+        result = measure_scenario(code, forbidden, startup_modules, repeat)
+        results['scenarios'][name] = result
+        report(format_scenario(name, result))
+    return results
+
+def format_scenario(name, result):
+    """One line summary of a scenario"""
+    if result['error']:
+        return f"{name:<18} ERROR {result['error']}"
+    line = f"{name:<18} {result['total_ms']:>8.1f} ms  {result['modules']:>5} modules"
+    if result['slowest']:
+        slowest = result['slowest'][0]
+        line += f"  slowest: {slowest['module']} ({slowest['cumulative_ms']:.1f} ms)"
+    if result['forbidden_imports']:
+        line += f"  FORBIDDEN: {', '.join(result['forbidden_imports'])}"
+    return line
+
+def compare_results(current, baseline, threshold=1.2):
+    """
+    Compare import times with a baseline
+
+    Returns:
+        list: Regression descriptions
+    """
+    regressions = []
+    for name, result in current['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous or previous.get('error') or result['error']:
+            continue
+        old, new = previous['total_ms'], result['total_ms']
+        if new > old * threshold and new - old >= MIN_COMPARE_MS:
+            regressions.append(f"{name}: {old} ms -> {new} ms")
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Measure cold start import times with python -X importtime')
+    parser.add_argument('--scenarios', help=f"Comma separated scenarios (default: {','.join(SCENARIOS)})")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help=f'Measured runs per scenario (default: {DEFAULT_REPEAT})')
+    parser.add_argument('--output', '-o', help='Write the results as JSON')
+    parser.add_argument('--baseline', metavar='FILE', help='Compare with earlier results, exit 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='Regression factor for --baseline (default: 1.2)')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    scenarios = args.scenarios.split(',') if args.scenarios else None
+    for name in scenarios or []:
+        if name not in SCENARIOS:
+            print(f"Unknown scenario: {name}")
+            return 2
+
+    results = run_import_benchmark(scenarios, max(1, args.repeat), progress=print)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    exit_code = 0
+    forbidden = {name: result['forbidden_imports'] for name, result in results['scenarios'].items()
+                 if not result['error'] and result['forbidden_imports']}
+    if forbidden:
+        for name, modules in forbidden.items():
+            print(f"- {name} imports {', '.join(modules)}")
+        exit_code = 1
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare_results(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regressions compared to {args.baseline}:")
+            for regression in regressions:
+                print(f"- {regression}")
+            exit_code = 1
+        else:
+            print(f"No regressions compared to {args.baseline}")
+    return exit_code
+
+if __name__ == '__main__':
+    sys.exit(main())
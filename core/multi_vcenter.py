@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Concurrent data collection from multiple vCenter servers
+
+Reads an inventory file of vCenters, collects the requested report sections
+from all of them in parallel and merges the results. Every record is tagged
+with the vCenter it was collected from.
+
+Inventory format (JSON):
+
+    {
+        "max_parallel": 8,
+        "defaults": {"username": "report@vsphere.local", "password_env": "VC_PASSWORD",
+                     "ignore_ssl": false, "workers": 2},
+        "vcenters": [
+            {"name": "vc-muc", "server": "vc-muc.example.com"},
+            {"name": "vc-ber", "server": "vc-ber.example.com", "username": "admin@vsphere.local",
+             "password_env": "VC_BER_PASSWORD", "workers": 4},
+            {"name": "vc-ham", "server": "vc-ham.example.com", "scope": ["HAM/host/Cluster-Team-A"]}
+        ]
+    }
+
+Passwords are taken from "password" or the environment variable named in
+"password_env". "workers" limits how many sections are collected at the same
+time on one vCenter. "scope" limits the collection to inventory paths or
+MoRef IDs of that vCenter (see VSphereClient.resolve_container).
+"""
+
+import os
+import json
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from core.vsphere_client import VSphereClient
+from core.data_collector import DataCollector
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_PARALLEL = 4
+DEFAULT_WORKERS = 1
+
+def load_inventory(path):
+    """
+    Load the vCenter inventory file
+
+    Args:
+        path (str): Path to the JSON inventory file
+
+    Returns:
+        dict: Inventory with 'vcenters' (defaults applied) and 'max_parallel'
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        raw = json.load(f)
+
+    defaults = raw.get('defaults', {})
+    vcenters = []
+    names = set()
+
+    for entry in raw.get('vcenters', []):
+        vcenter = dict(defaults)
+        vcenter.update(entry)
+
+        if not vcenter.get('server'):
+            raise ValueError(f"Inventory entry without 'server': {entry}")
+        if not vcenter.get('username'):
+            raise ValueError(f"No username configured for vCenter {vcenter['server']}")
+
+        vcenter.setdefault('name', vcenter['server'])
+        vcenter.setdefault('ignore_ssl', False)
+        vcenter['workers'] = max(1, int(vcenter.get('workers', DEFAULT_WORKERS)))
+        if isinstance(vcenter.get('scope'), str):
+            vcenter['scope'] = [vcenter['scope']]
+
+        if vcenter['name'] in names:
+            raise ValueError(f"Duplicate vCenter name in inventory: {vcenter['name']}")
+        names.add(vcenter['name'])
+        vcenters.append(vcenter)
+
+    if not vcenters:
+        raise ValueError(f"No vCenters defined in inventory {path}")
+
+    return {
+        'vcenters': vcenters,
+        'max_parallel': max(1, int(raw.get('max_parallel', DEFAULT_MAX_PARALLEL)))
+    }
+
+def resolve_password(vcenter, prompt=None):
+    """
+    Resolve the password of an inventory entry
+
+    Args:
+        vcenter (dict): Inventory entry
+        prompt (callable): Optional fallback called with the entry if no password is configured
+
+    Returns:
+        str: Password
+    """
+    if vcenter.get('password'):
+        return vcenter['password']
+
+    env_name = vcenter.get('password_env')
+    if env_name and os.environ.get(env_name):
+        return os.environ[env_name]
+
+    if prompt:
+        return prompt(vcenter)
+
+    raise ValueError(f"No password configured for {vcenter['username']}@{vcenter['server']}")
+
+class MultiVCenterCollector:
+    """Collects report sections from several vCenter servers concurrently"""
+
+    def __init__(self, inventory, sections, session_cache=None, progress=None, metrics=None, profiler=None,
+                 columns=None, scan_cache=None, checkpoint=None):
+        """
+        Initialize the multi-vCenter collector
+
+        Args:
+            inventory (dict): Inventory as returned by load_inventory (passwords resolved)
+            sections (list): Section keys to collect, see data_collector.SECTION_METHODS
+            session_cache (SessionCache): Optional session cache shared by all clients
+            progress (callable): Optional callback(vcenter_name, message)
+            metrics (SoapMetrics): Optional SOAP statistics shared by all clients
+            profiler (PhaseProfiler): Optional profiler, each section of each vCenter is one phase
+            columns (dict): Optional section -> column keys to collect, see core.report_schema
+            scan_cache (DatastoreScanCache): Optional store of earlier datastore scans shared by all collectors
+            checkpoint (CollectionCheckpoint): Optional journal of finished sections and datastore scans
+                                               of all vCenters, used to resume an interrupted run
+        """
+        self.vcenters = inventory['vcenters']
+        self.max_parallel = inventory.get('max_parallel', DEFAULT_MAX_PARALLEL)
+        self.sections = sections
+        self.session_cache = session_cache
+        self.progress = progress
+        self.metrics = metrics
+        self.profiler = profiler
+        self.columns = columns
+        self.scan_cache = scan_cache
+        self.checkpoint = checkpoint
+
+    def collect(self):
+        """
+        Collect all sections from all vCenters
+
+        Returns:
+            dict: Per vCenter name: {'data': dict, 'error': str or None, 'duration': float,
+                  'incomplete': sorted list of sections that were only partly collected}
+        """
+        results = {}
+        workers = min(self.max_parallel, len(self.vcenters))
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='vcenter') as executor:
+            futures = {
+                executor.submit(self._collect_vcenter, vcenter): vcenter['name']
+                for vcenter in self.vcenters
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                results[name] = future.result()
+
+        # Reihenfolge des Inventars beibehalten
+        return {vcenter['name']: results[vcenter['name']] for vcenter in self.vcenters}
+
+    def _collect_vcenter(self, vcenter):
+        """Connect to one vCenter and collect its sections"""
+        name = vcenter['name']
+        start = time.monotonic()
+        client = VSphereClient(
+            vcenter['server'],
+            vcenter['username'],
+            vcenter['password'],
+            vcenter.get('ignore_ssl', False),
+            session_cache=self.session_cache,
+            metrics=self.metrics,
+            scope=vcenter.get('scope')
+        )
+
+        try:
+            self._report(name, f"Connecting to {vcenter['server']}")
+            client.connect()
+            if client.scope:
+                self._report(name, f"Scope: {', '.join(obj.name for obj in client.scope_containers())}")
+            collector = DataCollector(client, self.columns, progress=lambda message: self._report(name, message),
+                                      scan_cache=self.scan_cache, checkpoint=self.checkpoint)
+            data = {}
+
+            with ThreadPoolExecutor(max_workers=vcenter['workers'], thread_name_prefix=f'{name}-section') as executor:
+                futures = {
+                    executor.submit(self._collect_section, collector, name, section): section
+                    for section in self.sections
+                }
+                for future in as_completed(futures):
+                    section = futures[future]
+                    records = future.result()
+                    for record in records:
+                        record['vcenter'] = name
+                    data[section] = records
+                    self._report(name, f"Collected {section} ({len(records)} entries)")
+
+            duration = time.monotonic() - start
+            self._report(name, f"Finished in {duration:.1f}s")
+            return {'data': data, 'error': None, 'duration': duration,
+                    'incomplete': sorted(collector.incomplete_sections)}
+
+        except Exception as e:
+            logger.error(f"Collection from vCenter {name} failed: {str(e)}")
+            self._report(name, f"Failed: {str(e)}")
+            return {'data': {}, 'error': str(e), 'duration': time.monotonic() - start, 'incomplete': []}
+
+        finally:
+            client.disconnect()
+
+    def _collect_section(self, collector, name, section):
+        """Collect one section, profiled as its own phase if a profiler is set"""
+        if not self.profiler:
+            return collector.collect_section(section)
+        with self.profiler.phase(f"{name}_collect_{section}"):
+            return collector.collect_section(section)
+
+    def _report(self, name, message):
+        """Forward a progress message"""
+        logger.info(f"[{name}] {message}")
+        if self.progress:
+            self.progress(name, message)
+
+def merge_results(results, sections):
+    """
+    Merge the per-vCenter data into one report dataset
+
+    Args:
+        results (dict): Result of MultiVCenterCollector.collect()
+        sections (list): Collected section keys
+
+    Returns:
+        dict: Merged data, lists concatenated per section
+    """
+    merged = {section: [] for section in sections}
+
+    for result in results.values():
+        for section, records in result['data'].items():
+            merged.setdefault(section, []).extend(records)
+
+    # Snapshots bleiben auch über alle vCenter hinweg nach Alter sortiert (älteste zuerst)
+    if 'snapshots' in merged:
+        merged['snapshots'].sort(key=lambda snapshot: snapshot['create_time'])
+
+    return merged
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Per-run index of managed object names
+
+Collectors often need the name of an object they only hold a reference to
+(the datastore of a disk, the network of a NIC, the hosts of a cluster, the
+parent of a host). Reading ref.name costs one server round-trip per
+reference; the index instead fetches name and parent of all datastores,
+networks, hosts, compute resources, resource pools and distributed switches
+with one paged PropertyCollector call and answers all lookups from memory.
+"""
+
+import logging
+import threading
+
+from pyVmomi import vim
+
+logger = logging.getLogger(__name__)
+
+# Indexed object types and their properties
+INDEXED_PROPERTIES = {
+    vim.Datastore: ['name'],
+    vim.Network: ['name'],
+    vim.HostSystem: ['name', 'parent'],
+    vim.ComputeResource: ['name'],
+    vim.ResourcePool: ['name', 'parent'],
+    vim.DistributedVirtualSwitch: ['name']
+}
+
+class NameIndex:
+    """MoRef -> name, type and parent lookup for one vCenter"""
+
+    def __init__(self, vsphere_client):
+        """
+        Initialize the index, it is loaded on first use
+
+        Args:
+            vsphere_client (VSphereClient): Connected vSphere client
+        """
+        self.client = vsphere_client
+        self._entries = None
+        self._lock = threading.Lock()
+
+    def clear(self):
+        """Forget all entries, the next lookup loads the index again"""
+        with self._lock:
+            self._entries = None
+
+    def _load(self):
+        with self._lock:
+            if self._entries is None:
+                entries = {}
+                # Immer das ganze Inventar: auch Objekte außerhalb eines Scopes werden referenziert
+                for obj, props in self.client.retrieve_properties(INDEXED_PROPERTIES, self.client.content.rootFolder):
+                    entries[obj._moId] = {'obj': obj, 'name': props.get('name'), 'parent': props.get('parent')}
+                logger.debug(f"Name index loaded with {len(entries)} objects")
+                self._entries = entries
+            return self._entries
+
+    def _entry(self, ref):
+        entries = self._load()
+        entry = entries.get(ref._moId)
+        if entry is None:
+            # Nicht indizierter Typ oder nach dem Laden angelegt: einzeln nachladen
+            entry = {'obj': ref, 'name': None, 'parent': None}
+            try:
+                entry['name'] = ref.name
+                entry['parent'] = getattr(ref, 'parent', None)
+            except Exception as e:
+                logger.debug(f"Could not resolve {ref._moId}: {str(e)}")
+            with self._lock:
+                entries[ref._moId] = entry
+        return entry
+
+    def name(self, ref, default="Unknown"):
+        """
+        Name of a managed object
+
+        Args:
+            ref (vim.ManagedEntity): Object reference (may be None)
+            default (str): Returned for None or unresolvable references
+
+        Returns:
+            str: Object name
+        """
+        if ref is None:
+            return default
+        return self._entry(ref)['name'] or default
+
+    def name_of_id(self, moid, default=None):
+        """
+        Name of an indexed object by its managed object ID (e.g. a portgroup key)
+
+        Returns:
+            str: Object name, or default if the ID is not indexed
+        """
+        entry = self._load().get(moid)
+        return entry['name'] if entry and entry['name'] else default
+
+    def parent(self, ref):
+        """
+        Parent of a host or resource pool
+
+        Returns:
+            vim.ManagedEntity: Parent reference, or None
+        """
+        if ref is None:
+            return None
+        return self._entry(ref)['parent']
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Per-phase profiling for the command line tools
+
+PhaseProfiler wraps phases of a run (collection sections, exporters) and
+writes one profile file per phase into an output directory:
+
+- pstats: deterministic cProfile data, readable with "python -m pstats",
+  snakeviz or gprof2dot
+- collapsed: sampled call stacks in the collapsed format
+  ("frame;frame;frame count") for flamegraph.pl, speedscope or inferno
+
+Both profile only the thread that runs the phase, so phases executed in
+worker threads (multi-vCenter collection) get separate profiles. Since
+Python 3.12 only one cProfile profiler can be active at a time; a pstats
+phase that overlaps another one is sampled into a collapsed file instead.
+Profiling errors never abort the profiled phase.
+"""
+
+import os
+import re
+import sys
+import time
+import pstats
+import cProfile
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+PROFILE_FORMATS = ('pstats', 'collapsed')
+DEFAULT_PROFILE_DIR = 'profiles'
+
+# Sampling interval of the collapsed-stack profiler in seconds
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+class _StackSampler(threading.Thread):
+    """Samples the call stack of one thread at a fixed interval"""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name='profile-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+class PhaseProfiler:
+    """Profiles named phases and writes one file per phase"""
+
+    def __init__(self, output_dir=None, profile_format='pstats', interval=DEFAULT_SAMPLE_INTERVAL):
+        """
+        Initialize the profiler
+
+        Args:
+            output_dir (str): Directory for the profile files, profiling is disabled if None
+            profile_format (str): 'pstats' or 'collapsed'
+            interval (float): Sampling interval for the collapsed format in seconds
+        """
+        if profile_format not in PROFILE_FORMATS:
+            raise ValueError(f"Unknown profile format: {profile_format}")
+        self.output_dir = output_dir
+        self.profile_format = profile_format
+        self.interval = interval
+        self.phases = []
+        self._lock = threading.Lock()
+        self._counter = 0
+
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+    @property
+    def enabled(self):
+        return bool(self.output_dir)
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Profile the enclosed block as one phase
+
+        Args:
+            name (str): Phase name, used in the file name
+        """
+        if not self.enabled:
+            yield
+            return
+
+        with self._lock:
+            self._counter += 1
+            index = self._counter
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', name)
+
+        profile = sampler = None
+        if self.profile_format == 'pstats':
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError as e:
+                # Python >= 3.12: "Another profiling tool is already active" bei parallelen Phasen
+                logger.warning(f"Sampling {name} instead of cProfile: {str(e)}")
+                profile = None
+        if profile is None:
+            sampler = _StackSampler(threading.get_ident(), self.interval)
+            sampler.start()
+        extension = 'prof' if profile else 'collapsed'
+        path = os.path.join(self.output_dir, f"{index:02d}_{safe_name}.{extension}")
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            try:
+                if profile:
+                    profile.disable()
+                    profile.dump_stats(path)
+                else:
+                    sampler.stop()
+                    self._write_collapsed(sampler.stacks, path)
+                with self._lock:
+                    self.phases.append({'phase': name, 'seconds': seconds, 'path': path,
+                                        'format': 'pstats' if profile else 'collapsed'})
+                logger.info(f"Profile of {name} ({seconds:.2f}s) written to: {path}")
+            except Exception as e:
+                logger.error(f"Could not write profile of {name}: {str(e)}")
+
+    def _write_collapsed(self, stacks, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+    def top_functions(self, path, limit=5):
+        """
+        Most expensive functions of a pstats profile by cumulative time
+
+        Returns:
+            list: (function description, cumulative seconds)
+        """
+        stats = pstats.Stats(path)
+        entries = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+        return [(f"{func[2]} ({os.path.basename(func[0])}:{func[1]})", cumulative)
+                for func, (_, _, _, cumulative, _) in entries[:limit]]
+
+    def print_summary(self):
+        """Print the written profiles, slowest phase first"""
+        if not self.enabled or not self.phases:
+            return
+        print(f"\nProfiles ({self.profile_format}) written to {self.output_dir}:")
+        for entry in sorted(self.phases, key=lambda entry: -entry['seconds']):
+            print(f"- {entry['phase']}: {entry['seconds']:.2f}s -> {os.path.basename(entry['path'])}")
+            if entry['format'] == 'pstats':
+                for function, cumulative in self.top_functions(entry['path'], limit=3):
+                    print(f"    {cumulative:8.3f}s  {function}")
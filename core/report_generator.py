@@ -8,23 +8,27 @@ Report generator for vSphere environment reports
 import os
 import datetime
 import logging
-from core.exporters.html_exporter import HTMLExporter
-from core.exporters.docx_exporter import DOCXExporter
-from core.exporters.pdf_exporter import PDFExporter
+from core.exporters import get_exporter
 
 logger = logging.getLogger(__name__)
 
+def report_filename_base(timestamp):
+    """File name (without extension) of a report created at the given time"""
+    return f"vsphere_report_{timestamp.strftime('%Y%m%d_%H%M%S')}"
+
 class ReportGenerator:
     """Generator for vSphere environment reports"""
     
-    def __init__(self, data):
+    def __init__(self, data, vcenter=None):
         """
         Initialize the report generator
         
         Args:
             data (dict): Dictionary containing collected vSphere data
+            vcenter (str): vCenter the data was collected from, for records without a vcenter field
         """
         self.data = data
+        self.vcenter = vcenter
         
         # Protokollieren der erhaltenen Daten für Diagnosezwecke
         logger.info("Report Generator initialized with data:")
@@ -62,7 +66,6 @@ class ReportGenerator:
         
         # Wenn wir in einem Diagnosemodus sind, füge Testdaten hinzu
         # Dies dient zur Überprüfung, ob die Berichtsvorlagen korrekt funktionieren
-        import os
         if os.environ.get('VSPHERE_REPORTER_DEBUG') == '1':
             logger.warning("Debug mode enabled, adding test data to reports")
             
@@ -98,30 +101,52 @@ class ReportGenerator:
                 self.data['orphaned_vmdks'].append(test_vmdk)
         
         self.timestamp = datetime.datetime.now()
-        self.filename_base = f"vsphere_report_{self.timestamp.strftime('%Y%m%d_%H%M%S')}"
+        self.filename_base = report_filename_base(self.timestamp)
         
-    def export_to_html(self, output_dir):
+    def export(self, report_format, output_dir):
         """
-        Export the report to HTML format
+        Export the report in a registered format
+        
+        The exporter module (and its libraries) is only imported here, see
+        core.exporters.
         
         Args:
+            report_format (str): Format key, e.g. html, docx, pdf, csv or jsonl
             output_dir (str): Directory to save the report
             
         Returns:
-            str: Path to the generated HTML file
+            list: Paths of the generated files (one per section for csv)
         """
-        logger.info("Generating HTML report")
-        
-        exporter = HTMLExporter(self.data, self.timestamp)
-        output_path = os.path.join(output_dir, f"{self.filename_base}.html")
+        label = report_format.upper()
+        logger.info(f"Generating {label} report")
         
         try:
-            exporter.export(output_path)
-            logger.info(f"HTML report saved to: {output_path}")
-            return output_path
+            exporter_class, extension = get_exporter(report_format)
+            exporter = exporter_class(self.data, self.timestamp)
+            # Nur Exporter mit vCenter-Spalte übernehmen den Server eines Einzellaufs
+            if hasattr(exporter, 'vcenter'):
+                exporter.vcenter = self.vcenter
+            output_path = os.path.join(output_dir, f"{self.filename_base}.{extension}")
+            written = exporter.export(output_path)
+            # Exporter mit mehreren Dateien liefern deren Pfade, die übrigen True
+            output_files = written if isinstance(written, list) else [output_path]
+            logger.info(f"{label} report saved to: {', '.join(output_files)}")
+            return output_files
         except Exception as e:
-            logger.error(f"Error generating HTML report: {str(e)}")
-            raise Exception(f"Error generating HTML report: {str(e)}")
+            logger.error(f"Error generating {label} report: {str(e)}")
+            raise Exception(f"Error generating {label} report: {str(e)}")
+            
+    def export_to_html(self, output_dir):
+        """
+        Export the report to HTML format
+        
+        Args:
+            output_dir (str): Directory to save the report
+            
+        Returns:
+            str: Path to the generated HTML file
+        """
+        return self.export('html', output_dir)[0]
             
     def export_to_docx(self, output_dir):
         """
@@ -133,18 +158,7 @@ class ReportGenerator:
         Returns:
             str: Path to the generated DOCX file
         """
-        logger.info("Generating DOCX report")
-        
-        exporter = DOCXExporter(self.data, self.timestamp)
-        output_path = os.path.join(output_dir, f"{self.filename_base}.docx")
-        
-        try:
-            exporter.export(output_path)
-            logger.info(f"DOCX report saved to: {output_path}")
-            return output_path
-        except Exception as e:
-            logger.error(f"Error generating DOCX report: {str(e)}")
-            raise Exception(f"Error generating DOCX report: {str(e)}")
+        return self.export('docx', output_dir)[0]
             
     def export_to_pdf(self, output_dir):
         """
@@ -156,15 +170,4 @@ class ReportGenerator:
         Returns:
             str: Path to the generated PDF file
         """
-        logger.info("Generating PDF report")
-        
-        exporter = PDFExporter(self.data, self.timestamp)
-        output_path = os.path.join(output_dir, f"{self.filename_base}.pdf")
-        
-        try:
-            exporter.export(output_path)
-            logger.info(f"PDF report saved to: {output_path}")
-            return output_path
-        except Exception as e:
-            logger.error(f"Error generating PDF report: {str(e)}")
-            raise Exception(f"Error generating PDF report: {str(e)}")
+        return self.export('pdf', output_dir)[0]
@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Report columns and the vSphere properties behind them
+
+Every object section (VMware Tools, VMs, hosts, datastores, clusters,
+resource pools, networks) is described as a list of columns together with
+the property paths each column is computed from. DataCollector fetches only
+the paths of the columns a report needs, for all objects of a section in one
+paged PropertyCollector call:
+
+    columns = report_columns(['vmware_tools', 'vms'], ['csv'], {'vms': ['name', 'num_cpu']})
+    collector = DataCollector(client, columns)
+
+Without explicit columns, runs that only produce document reports (HTML,
+DOCX, PDF) collect the columns those reports show, all other runs collect
+every column. Snapshots and orphaned VMDKs come from snapshot trees and
+datastore searches and are not column-driven.
+"""
+
+import collections
+
+from pyVmomi import vim
+
+from core.exporters import DOCUMENT_FORMATS
+
+# Report column: record key, label, property paths, value(obj, props, collector), object type of the paths
+Column = collections.namedtuple('Column', ['key', 'label', 'paths', 'value', 'obj_type'])
+
+# Returned by a column value to leave the key out of the record
+OMIT = object()
+
+# guest.toolsVersionStatus2 -> the (deprecated) toolsVersionStatus values used in the reports
+TOOLS_VERSION_STATUS = {
+    'guestToolsCurrent': 'guestToolsCurrent',
+    'guestToolsSupportedNew': 'guestToolsCurrent',
+    'guestToolsTooNew': 'guestToolsCurrent',
+    'guestToolsNeedUpgrade': 'guestToolsNeedUpgrade',
+    'guestToolsSupportedOld': 'guestToolsNeedUpgrade',
+    'guestToolsTooOld': 'guestToolsNeedUpgrade',
+    'guestToolsBlacklisted': 'guestToolsNeedUpgrade',
+    'guestToolsNotInstalled': 'guestToolsNotInstalled',
+    'guestToolsUnmanaged': 'guestToolsUnmanaged'
+}
+
+def tools_status(version_status, running_status):
+    """
+    The (deprecated) guest.toolsStatus value derived from toolsVersionStatus2 and toolsRunningStatus
+
+    Returns:
+        str: toolsNotInstalled, toolsNotRunning, toolsOld or toolsOk (None if nothing is known)
+    """
+    if version_status is None and running_status is None:
+        return None
+    if version_status == 'guestToolsNotInstalled':
+        return 'toolsNotInstalled'
+    if running_status != 'guestToolsRunning':
+        return 'toolsNotRunning'
+    if TOOLS_VERSION_STATUS.get(version_status) == 'guestToolsNeedUpgrade':
+        return 'toolsOld'
+    return 'toolsOk'
+
+def _column(key, label, paths, value=None, default=None, obj_type=None):
+    """Column whose value is the first path (or default if unset) unless a value function is given"""
+    if isinstance(paths, str):
+        paths = [paths]
+    if value is None:
+        path = paths[0]
+
+        def value(obj, props, collector):
+            result = props.get(path)
+            return default if result is None else result
+    return Column(key, label, tuple(paths), value, obj_type)
+
+def _tools_version(obj, props, collector):
+    version_status = props.get('guest.toolsVersionStatus2')
+    return TOOLS_VERSION_STATUS.get(version_status, version_status or "Unknown")
+
+def _tools_status(obj, props, collector):
+    return tools_status(props.get('guest.toolsVersionStatus2'), props.get('guest.toolsRunningStatus')) or "Unknown"
+
+def _vm_disks(obj, props, collector):
+    disks = []
+    for device in props.get('config.hardware.device') or []:
+        if isinstance(device, vim.vm.device.VirtualDisk):
+            disks.append({
+                'label': device.deviceInfo.label,
+                'capacity_kb': device.capacityInKB,
+                'thin_provisioned': device.backing.thinProvisioned if hasattr(device.backing, 'thinProvisioned') else False,
+                'datastore': collector.names.name(device.backing.datastore),
+                'file_name': device.backing.fileName
+            })
+    return disks
+
+def _vm_networks(obj, props, collector):
+    networks = []
+    for device in props.get('config.hardware.device') or []:
+        if isinstance(device, vim.vm.device.VirtualEthernetCard):
+            if hasattr(device.backing, 'network'):
+                network_name = collector.names.name(device.backing.network)
+            elif hasattr(device.backing, 'port') and hasattr(device.backing.port, 'portgroupKey'):
+                # Der Portgruppen-Key ist die MoRef-ID der Portgruppe
+                portgroup_key = device.backing.port.portgroupKey
+                network_name = collector.names.name_of_id(portgroup_key, portgroup_key)
+            else:
+                network_name = "Unknown"
+            networks.append({
+                'mac_address': device.macAddress if hasattr(device, 'macAddress') else "Unknown",
+                'network_name': network_name,
+                'adapter_type': type(device).__name__
+            })
+    return networks
+
+def _vm_snapshots(obj, props, collector):
+    return collector._get_vm_snapshots(props.get('name'), props.get('snapshot'))
+
+def _storage(attribute):
+    def value(obj, props, collector):
+        storage = props.get('summary.storage')
+        if not storage:
+            return 0
+        if attribute == 'provisioned':
+            return (storage.committed or 0) + (storage.uncommitted or 0)
+        return storage.committed or 0
+    return value
+
+def _cpu_model(obj, props, collector):
+    packages = props.get('hardware.cpuPkg')
+    return packages[0].description if packages else "Unknown"
+
+def _cpu_info(attribute, scale=1):
+    def value(obj, props, collector):
+        cpu_info = props.get('hardware.cpuInfo')
+        if not cpu_info or not getattr(cpu_info, attribute):
+            return 0
+        # Kerne und Threads bleiben ganze Zahlen, nur hz wird umgerechnet
+        return getattr(cpu_info, attribute) / scale if scale != 1 else getattr(cpu_info, attribute)
+    return value
+
+def _parent_name(default):
+    def value(obj, props, collector):
+        parent = props.get('parent')
+        return collector.names.name(parent) if parent else default
+    return value
+
+def _usage_percent(obj, props, collector):
+    capacity = props.get('summary.capacity') or 0
+    if capacity > 0:
+        return ((capacity - (props.get('summary.freeSpace') or 0)) / capacity) * 100
+    return 0
+
+def _allocation(path, attribute, default):
+    def value(obj, props, collector):
+        allocation = props.get(path)
+        if not allocation:
+            return default
+        if attribute == 'shares':
+            return allocation.shares.shares if allocation.shares else default
+        return getattr(allocation, attribute)
+    return value
+
+def _pool_parent_type(obj, props, collector):
+    parent = props.get('parent')
+    if not parent:
+        return "None"
+    if isinstance(parent, vim.ClusterComputeResource):
+        return 'Cluster'
+    if isinstance(parent, vim.ResourcePool):
+        return 'Resource Pool'
+    return type(parent).__name__
+
+def _portgroup(value):
+    def column_value(obj, props, collector):
+        if not isinstance(obj, vim.dvs.DistributedVirtualPortgroup):
+            return OMIT
+        return value(props, collector)
+    return column_value
+
+def _vlan_id(props, collector):
+    vlan = props.get('config.defaultPortConfig.vlan')
+    if isinstance(vlan, vim.dvs.VmwareDistributedVirtualSwitch.VlanIdSpec) and hasattr(vlan, 'vlanId'):
+        return vlan.vlanId
+    return "Multiple or None"
+
+_PORTGROUP = vim.dvs.DistributedVirtualPortgroup
+
+# Section -> object type, paths every record needs and the report columns
+SECTION_SCHEMAS = {
+    'vmware_tools': {
+        'type': vim.VirtualMachine,
+        'paths': ['name', 'config.template', 'guest.toolsVersionStatus2', 'guest.toolsRunningStatus'],
+        'columns': [
+            _column('name', 'VM Name', 'name'),
+            _column('power_state', 'Power State', 'runtime.powerState'),
+            _column('guest_full_name', 'Guest OS', 'guest.guestFullName', default="Unknown"),
+            _column('vmware_tools_status', 'Tools Status', ['guest.toolsVersionStatus2', 'guest.toolsRunningStatus'],
+                    _tools_status),
+            _column('vmware_tools_version', 'Tools Version Status', 'guest.toolsVersionStatus2', _tools_version),
+            _column('vmware_tools_version_status', 'Tools Version Status (detailed)', 'guest.toolsVersionStatus2',
+                    default="Unknown"),
+            _column('vmware_tools_version_number', 'Tools Version', 'guest.toolsVersion', default="Unknown"),
+            _column('vmware_tools_running_status', 'Tools Running Status', 'guest.toolsRunningStatus',
+                    default="Unknown")
+        ]
+    },
+    'vms': {
+        'type': vim.VirtualMachine,
+        'paths': ['name'],
+        'columns': [
+            _column('name', 'VM Name', 'name'),
+            _column('power_state', 'Power State', 'runtime.powerState'),
+            _column('guest_full_name', 'Guest OS', 'config.guestFullName', default="Unknown"),
+            _column('vmware_tools_status', 'Tools Status', ['guest.toolsVersionStatus2', 'guest.toolsRunningStatus'],
+                    _tools_status),
+            _column('vmware_tools_version', 'Tools Version Status', 'guest.toolsVersionStatus2', _tools_version),
+            _column('uuid', 'UUID', 'config.uuid', default="Unknown"),
+            _column('num_cpu', 'CPUs', 'config.hardware.numCPU', default=0),
+            _column('memory_mb', 'Memory (MB)', 'config.hardware.memoryMB', default=0),
+            _column('ip_address', 'IP Address', 'guest.ipAddress'),
+            _column('hostname', 'Hostname', 'guest.hostName'),
+            _column('path', 'VMX Path', 'config.files.vmPathName', default="Unknown"),
+            _column('provisioned_space', 'Provisioned Space', 'summary.storage', _storage('provisioned')),
+            _column('used_space', 'Used Space', 'summary.storage', _storage('used')),
+            _column('disks', 'Disks', 'config.hardware.device', _vm_disks),
+            _column('networks', 'Network Adapters', 'config.hardware.device', _vm_networks),
+            _column('snapshots', 'Snapshots', 'snapshot', _vm_snapshots)
+        ]
+    },
+    'hosts': {
+        'type': vim.HostSystem,
+        'paths': ['name'],
+        'columns': [
+            _column('name', 'Host Name', 'name'),
+            _column('connection_state', 'Connection State', 'summary.runtime.connectionState'),
+            _column('power_state', 'Power State', 'summary.runtime.powerState'),
+            _column('in_maintenance_mode', 'Maintenance Mode', 'summary.runtime.inMaintenanceMode', default=False),
+            # Eigenständige Hosts hängen an einer ComputeResource statt an einem Cluster
+            _column('standalone', 'Standalone', 'parent',
+                    lambda obj, props, collector: not isinstance(props.get('parent'), vim.ClusterComputeResource)),
+            _column('cpu_model', 'CPU Model', 'hardware.cpuPkg', _cpu_model),
+            _column('cpu_cores', 'CPU Cores', 'hardware.cpuInfo', _cpu_info('numCpuCores')),
+            _column('cpu_threads', 'CPU Threads', 'hardware.cpuInfo', _cpu_info('numCpuThreads')),
+            _column('cpu_mhz', 'CPU MHz', 'hardware.cpuInfo', _cpu_info('hz', 1000000)),
+            _column('memory_size', 'Memory (GB)', 'hardware.memorySize',
+                    lambda obj, props, collector: (props.get('hardware.memorySize') or 0) / (1024 * 1024 * 1024)),
+            _column('model', 'Model', 'hardware.systemInfo.model', default="Unknown"),
+            _column('vendor', 'Vendor', 'hardware.systemInfo.vendor', default="Unknown"),
+            _column('version', 'Version', 'config.product.fullName', default="Unknown"),
+            _column('build', 'Build', 'config.product.build', default="Unknown"),
+            _column('cluster', 'Cluster', 'parent', _parent_name("Standalone"))
+        ]
+    },
+    'datastores': {
+        'type': vim.Datastore,
+        'paths': ['name'],
+        'columns': [
+            _column('name', 'Datastore', 'name'),
+            _column('type', 'Type', 'summary.type'),
+            _column('capacity', 'Capacity', 'summary.capacity', default=0),
+            _column('free_space', 'Free Space', 'summary.freeSpace', default=0),
+            _column('uncommitted', 'Uncommitted', 'summary.uncommitted', default=0),
+            _column('accessible', 'Accessible', 'summary.accessible', default=False),
+            _column('multipleHostAccess', 'Multiple Host Access', 'summary.multipleHostAccess'),
+            _column('url', 'URL', 'summary.url'),
+            _column('usage_percent', 'Usage %', ['summary.capacity', 'summary.freeSpace'], _usage_percent)
+        ]
+    },
+    'clusters': {
+        'type': vim.ClusterComputeResource,
+        'paths': ['name'],
+        'columns': [
+            _column('name', 'Cluster', 'name'),
+            _column('hosts', 'Hosts', 'host', lambda obj, props, collector: len(props.get('host') or [])),
+            # Die Cluster-Summary hat weder drsConfig/dasConfig noch usedCpu/usedMemory (früher daher
+            # immer False bzw. 0): DRS/HA stehen in configurationEx, die Auslastung als Bedarf in usageSummary
+            _column('drs_enabled', 'DRS Enabled', 'configurationEx.drsConfig.enabled', default=False),
+            _column('drs_behavior', 'DRS Behavior', 'configurationEx.drsConfig.defaultVmBehavior',
+                    default="Unknown"),
+            _column('ha_enabled', 'HA Enabled', 'configurationEx.dasConfig.enabled', default=False),
+            _column('total_cpu', 'Total CPU (MHz)', 'summary.totalCpu', default=0),
+            _column('total_memory', 'Total Memory', 'summary.totalMemory', default=0),
+            _column('used_cpu', 'CPU Demand (MHz)', 'summary.usageSummary.cpuDemandMhz', default=0),
+            _column('used_memory', 'Memory Demand', 'summary.usageSummary.memDemandMB',
+                    lambda obj, props, collector: (props.get('summary.usageSummary.memDemandMB') or 0) * 1024 * 1024),
+            _column('host_list', 'Host List', 'host',
+                    lambda obj, props, collector: [collector.names.name(host) for host in props.get('host') or []])
+        ]
+    },
+    'resource_pools': {
+        'type': vim.ResourcePool,
+        'paths': ['name'],
+        'columns': [
+            _column('name', 'Resource Pool', 'name'),
+            _column('cpu_shares', 'CPU Shares', 'config.cpuAllocation',
+                    _allocation('config.cpuAllocation', 'shares', 0)),
+            _column('cpu_limit', 'CPU Limit', 'config.cpuAllocation', _allocation('config.cpuAllocation', 'limit', -1)),
+            _column('cpu_reservation', 'CPU Reservation', 'config.cpuAllocation',
+                    _allocation('config.cpuAllocation', 'reservation', 0)),
+            _column('memory_shares', 'Memory Shares', 'config.memoryAllocation',
+                    _allocation('config.memoryAllocation', 'shares', 0)),
+            _column('memory_limit', 'Memory Limit', 'config.memoryAllocation',
+                    _allocation('config.memoryAllocation', 'limit', -1)),
+            _column('memory_reservation', 'Memory Reservation', 'config.memoryAllocation',
+                    _allocation('config.memoryAllocation', 'reservation', 0)),
+            _column('parent_type', 'Parent Type', 'parent', _pool_parent_type),
+            _column('parent_name', 'Parent', 'parent', _parent_name("None"))
+        ]
+    },
+    'networks': {
+        'type': vim.Network,
+        'paths': ['name'],
+        'columns': [
+            _column('name', 'Network', 'name'),
+            _column('accessible', 'Accessible', 'summary.accessible', default=False),
+            _column('type', 'Type', [], lambda obj, props, collector: type(obj).__name__),
+            _column('vlan_type', 'VLAN Type', 'config.defaultPortConfig.vlan',
+                    _portgroup(lambda props, collector: type(props['config.defaultPortConfig.vlan']).__name__
+                               if props.get('config.defaultPortConfig.vlan') else "Unknown"),
+                    obj_type=_PORTGROUP),
+            _column('vlan_id', 'VLAN ID', 'config.defaultPortConfig.vlan', _portgroup(_vlan_id), obj_type=_PORTGROUP),
+            _column('dvs_name', 'Distributed Switch', 'config.distributedVirtualSwitch',
+                    _portgroup(lambda props, collector: collector.names.name(props.get('config.distributedVirtualSwitch'))),
+                    obj_type=_PORTGROUP)
+        ]
+    }
+}
+
+# Columns shown by the HTML, DOCX and PDF reports
+DOCUMENT_COLUMNS = {
+    'vmware_tools': ['name', 'power_state', 'vmware_tools_status', 'vmware_tools_version'],
+    'vms': ['name', 'power_state', 'guest_full_name', 'num_cpu', 'memory_mb', 'used_space'],
+    'hosts': ['name', 'cluster', 'connection_state', 'cpu_model', 'cpu_cores', 'memory_size'],
+    'datastores': ['name', 'type', 'capacity', 'free_space', 'usage_percent'],
+    'clusters': ['name', 'hosts', 'drs_enabled', 'ha_enabled', 'total_memory'],
+    'resource_pools': ['name', 'parent_type', 'parent_name', 'cpu_shares', 'cpu_limit', 'memory_limit'],
+    'networks': ['name', 'type', 'accessible', 'vlan_id', 'dvs_name']
+}
+
+def column_keys(section):
+    """
+    All column keys of a section
+
+    Returns:
+        list: Column keys in report order
+    """
+    return [column.key for column in SECTION_SCHEMAS[section]['columns']]
+
+def selected_columns(section, keys=None):
+    """
+    Columns of a section to collect
+
+    Args:
+        section (str): Section key
+        keys (list): Column keys, None for all; the name column is always included
+
+    Returns:
+        list: Column tuples in report order
+    """
+    columns = SECTION_SCHEMAS[section]['columns']
+    if keys is None:
+        return list(columns)
+    keys = set(keys) | {'name'}
+    return [column for column in columns if column.key in keys]
+
+def property_specs(section, keys=None):
+    """
+    Minimal property paths per object type for the selected columns of a section
+
+    Returns:
+        dict: Object type -> sorted list of property paths (for VSphereClient.retrieve_properties)
+    """
+    schema = SECTION_SCHEMAS[section]
+    specs = {schema['type']: set(schema['paths'])}
+    for column in selected_columns(section, keys):
+        specs.setdefault(column.obj_type or schema['type'], set()).update(column.paths)
+    return {obj_type: sorted(paths) for obj_type, paths in specs.items()}
+
+def parse_columns(values):
+    """
+    Parse column selections given as SECTION=COLUMN,COLUMN,...
+
+    Returns:
+        dict: Section -> list of column keys
+
+    Raises:
+        ValueError: For unknown sections or columns
+    """
+    requested = {}
+    for value in values or []:
+        section, separator, keys = value.partition('=')
+        section = section.strip()
+        if not separator or section not in SECTION_SCHEMAS:
+            raise ValueError(f"Invalid column selection: {value} (expected SECTION=COLUMN,... with SECTION one of "
+                             f"{', '.join(SECTION_SCHEMAS)})")
+        keys = [key.strip() for key in keys.split(',') if key.strip()]
+        unknown = [key for key in keys if key not in column_keys(section)]
+        if unknown:
+            raise ValueError(f"Unknown columns for {section}: {', '.join(unknown)} "
+                             f"(available: {', '.join(column_keys(section))})")
+        requested.setdefault(section, []).extend(keys)
+    return requested
+
+def report_columns(sections, formats, requested=None):
+    """
+    Columns to collect for a report
+
+    Args:
+        sections (list): Section keys of the report
+        formats (list): Report formats that will be written
+        requested (dict): Optional section -> column keys picked by the user
+
+    Returns:
+        dict: Section -> column keys for every section that needs less than all columns
+    """
+    documents_only = bool(formats) and all(report_format in DOCUMENT_FORMATS for report_format in formats)
+    has_documents = any(report_format in DOCUMENT_FORMATS for report_format in formats or [])
+
+    columns = {}
+    for section in sections:
+        if section not in SECTION_SCHEMAS:
+            continue
+        if requested and section in requested:
+            keys = list(requested[section])
+            if has_documents:
+                keys.extend(DOCUMENT_COLUMNS[section])
+            columns[section] = list(dict.fromkeys(keys))
+        elif documents_only:
+            columns[section] = list(DOCUMENT_COLUMNS[section])
+    return columns
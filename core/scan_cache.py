@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+On-disk cache of datastore scans for the orphaned VMDK report
+
+Browsing every datastore for virtual disks is the slowest part of a run, even
+though most datastores do not change between runs. The disks found on a
+datastore are stored together with a cheap fingerprint of the datastore
+(capacity, free and uncommitted space, and a hash of its top-level folders
+with their modification times). The next run browses the datastore again
+only if the fingerprint changed or the stored scan is older than the maximum
+age, which forces a full rescan from time to time.
+
+Only the disk listing is cached. Which disks are orphaned is decided on every
+run from the current VM file layouts, so an unregistered VM shows up at once.
+Disk paths are stored relative to the datastore and get the datastore's
+current name when loaded, so renaming a datastore (which does not change its
+fingerprint) does not turn its disks into orphans.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import datetime
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCAN_CACHE_PATH = os.path.join(
+    os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache')),
+    'vsphere_reporter',
+    'datastore_scans.json'
+)
+
+# Stored scans older than this are browsed again even if the datastore looks unchanged
+DEFAULT_SCAN_MAX_AGE = 24 * 3600
+
+def datastore_fingerprint(capacity, free_space, uncommitted, folders):
+    """
+    Fingerprint of a datastore's state
+
+    Args:
+        capacity (int): summary.capacity
+        free_space (int): summary.freeSpace
+        uncommitted (int): summary.uncommitted
+        folders (list): (name, modification time) of the top-level folders
+
+    Returns:
+        str: Hex digest
+    """
+    state = [capacity, free_space, uncommitted,
+             sorted([name, modified.isoformat() if modified else None] for name, modified in folders)]
+    return hashlib.sha256(json.dumps(state).encode('utf-8')).hexdigest()
+
+def _relative_path(datastore_path):
+    """Path inside the datastore, e.g. 'vm/vm.vmdk' for '[ds1] vm/vm.vmdk'"""
+    if not datastore_path.startswith('['):
+        return datastore_path
+    rest = datastore_path.partition(']')[2]
+    return rest[1:] if rest.startswith(' ') else rest
+
+class DatastoreScanCache:
+    """Stores the disks found per datastore together with the datastore's fingerprint"""
+
+    def __init__(self, path=None, max_age=DEFAULT_SCAN_MAX_AGE):
+        """
+        Initialize the scan cache
+
+        Args:
+            path (str): Cache file location (defaults to ~/.cache/vsphere_reporter/datastore_scans.json)
+            max_age (float): Seconds after which a datastore is scanned again regardless of its fingerprint
+        """
+        self.path = os.path.expanduser(path or DEFAULT_SCAN_CACHE_PATH)
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._entries = None
+
+    def load(self, server, volume, fingerprint, name):
+        """
+        Get the stored disks of a datastore if it did not change
+
+        Args:
+            server (str): vCenter server address
+            volume (str): Volume key of the datastore (summary.url)
+            fingerprint (str): Current fingerprint, see datastore_fingerprint
+            name (str): Current datastore name, put in front of the stored relative paths
+
+        Returns:
+            list: Disk dicts as stored, or None if the datastore must be scanned
+        """
+        with self._lock:
+            entry = self._loaded().get(self._key(server, volume))
+        if not entry or entry.get('fingerprint') != fingerprint:
+            return None
+        if time.time() - entry.get('scanned_at', 0) > self.max_age:
+            return None
+
+        disks = []
+        for disk in entry.get('disks', []):
+            disk = dict(disk)
+            # Ältere Einträge enthalten noch den Datastore-Namen zur Zeit des Scans
+            disk['path'] = f"[{name}] {_relative_path(disk['path'])}"
+            if disk.get('modification'):
+                disk['modification'] = datetime.datetime.fromisoformat(disk['modification'])
+            disks.append(disk)
+        return disks
+
+    def store(self, server, scans):
+        """
+        Save the disks found on the datastores scanned in a run
+
+        Args:
+            server (str): vCenter server address
+            scans (dict): Volume key -> (fingerprint at scan time, list of disk dicts with the datastore
+                          'path', 'modification' as datetime and JSON-serializable other values)
+        """
+        if not scans:
+            return
+        now = int(time.time())
+        with self._lock:
+            # Vor dem Schreiben neu lesen, falls ein anderer Lauf die Datei inzwischen aktualisiert hat
+            entries = self._entries = self._read()
+            for volume, (fingerprint, disks) in scans.items():
+                stored = []
+                for disk in disks:
+                    disk = dict(disk)
+                    disk['path'] = _relative_path(disk['path'])
+                    if disk.get('modification'):
+                        disk['modification'] = disk['modification'].isoformat()
+                    stored.append(disk)
+                entries[self._key(server, volume)] = {
+                    'server': server,
+                    'volume': volume,
+                    'fingerprint': fingerprint,
+                    'scanned_at': now,
+                    'disks': stored
+                }
+            self._write(entries)
+
+    def _key(self, server, volume):
+        """Build the cache key for a datastore volume of a vCenter"""
+        return f"{server.lower()}|{volume}"
+
+    def _loaded(self):
+        """All cache entries, read from the file once"""
+        if self._entries is None:
+            self._entries = self._read()
+        return self._entries
+
+    def _read(self):
+        """Read all cache entries, ignoring missing or unreadable files"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable datastore scan cache {self.path}: {str(e)}")
+            return {}
+
+    def _write(self, entries):
+        """Write all cache entries atomically"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Cron-style schedules for the reporter daemon
+
+Supports the five standard fields (minute, hour, day of month, month, day of
+week) with "*", lists, ranges, steps and month/weekday names, plus the
+shortcuts @hourly, @daily, @weekly, @monthly and @yearly:
+
+    CronSchedule('*/15 6-18 * * mon-fri').next_after(datetime.datetime.now())
+"""
+
+import datetime
+
+SHORTCUTS = {
+    '@hourly': '0 * * * *',
+    '@daily': '0 0 * * *',
+    '@midnight': '0 0 * * *',
+    '@weekly': '0 0 * * 0',
+    '@monthly': '0 0 1 * *',
+    '@yearly': '0 0 1 1 *',
+    '@annually': '0 0 1 1 *'
+}
+
+MONTH_NAMES = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+WEEKDAY_NAMES = ['sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat']
+
+# (name, lowest value, highest value, names mapped to values)
+FIELDS = [
+    ('minute', 0, 59, None),
+    ('hour', 0, 23, None),
+    ('day of month', 1, 31, None),
+    ('month', 1, 12, {name: index + 1 for index, name in enumerate(MONTH_NAMES)}),
+    ('day of week', 0, 7, {name: index for index, name in enumerate(WEEKDAY_NAMES)})
+]
+
+# Every schedule fires at least once within this many years (29 February needs up to 8)
+SEARCH_YEARS = 8
+
+def _parse_value(text, names, field):
+    text = text.lower()
+    if names and text in names:
+        return names[text]
+    try:
+        return int(text)
+    except ValueError:
+        raise ValueError(f"Invalid {field} value: {text}")
+
+def _parse_field(text, field, low, high, names):
+    """Expand one cron field into the set of matching values"""
+    values = set()
+    for part in text.split(','):
+        expression, _, step = part.partition('/')
+        step = int(step) if step else 1
+        if step < 1:
+            raise ValueError(f"Invalid step in {field}: {part}")
+
+        if expression == '*':
+            start, end = low, high
+        elif '-' in expression:
+            start, end = (_parse_value(value, names, field) for value in expression.split('-', 1))
+        else:
+            start = _parse_value(expression, names, field)
+            end = high if step > 1 else start
+
+        if not low <= start <= end <= high:
+            raise ValueError(f"{field} out of range ({low}-{high}): {part}")
+        values.update(range(start, end + 1, step))
+    return values
+
+class CronSchedule:
+    """A parsed cron expression"""
+
+    def __init__(self, expression):
+        """
+        Parse a cron expression
+
+        Args:
+            expression (str): Five cron fields or one of the @-shortcuts
+
+        Raises:
+            ValueError: If the expression is invalid
+        """
+        self.expression = expression.strip()
+        fields = SHORTCUTS.get(self.expression.lower(), self.expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression}")
+
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            _parse_field(text, *spec) for text, spec in zip(fields, FIELDS))
+        # 0 und 7 stehen beide für Sonntag
+        self.weekdays = {day % 7 for day in weekdays}
+        # Wie bei cron gilt bei eingeschränktem Tag und Wochentag eine ODER-Verknüpfung
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+
+    def __repr__(self):
+        return f"CronSchedule({self.expression!r})"
+
+    def _day_matches(self, date):
+        day_match = date.day in self.days
+        weekday_match = (date.isoweekday() % 7) in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_match and weekday_match
+        return day_match or weekday_match
+
+    def matches(self, moment):
+        """Whether the schedule fires in the minute of the given datetime"""
+        return (moment.minute in self.minutes and moment.hour in self.hours and
+                moment.month in self.months and self._day_matches(moment))
+
+    def next_after(self, moment):
+        """
+        Next time the schedule fires, strictly after the given datetime
+
+        Args:
+            moment (datetime.datetime): Reference time
+
+        Returns:
+            datetime.datetime: Start of the next matching minute
+        """
+        candidate = moment.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        limit = candidate.replace(year=candidate.year + SEARCH_YEARS, month=1, day=1)
+
+        while candidate < limit:
+            if candidate.month not in self.months:
+                year, month = divmod(candidate.month, 12)
+                candidate = candidate.replace(year=candidate.year + year, month=month + 1, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + datetime.timedelta(days=1)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + datetime.timedelta(hours=1)
+                continue
+            if candidate.minute not in self.minutes:
+                candidate += datetime.timedelta(minutes=1)
+                continue
+            return candidate
+
+        raise ValueError(f"Cron expression never fires: {self.expression}")
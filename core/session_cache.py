@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+On-disk cache for vCenter session cookies
+
+Lets consecutive CLI runs resume an existing vCenter session instead of
+logging in again. Cookies are stored per server and user in a file that is
+only readable by the current user.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache')),
+    'vsphere_reporter',
+    'sessions.json'
+)
+
+class SessionCache:
+    """Stores vCenter session cookies with owner-only file permissions"""
+
+    def __init__(self, path=None):
+        """
+        Initialize the session cache
+
+        Args:
+            path (str): Cache file location (defaults to ~/.cache/vsphere_reporter/sessions.json)
+        """
+        self.path = os.path.expanduser(path or DEFAULT_CACHE_PATH)
+        self._lock = threading.Lock()
+
+    def load(self, server, username):
+        """
+        Get the cached session cookie for a server and user
+
+        Args:
+            server (str): vCenter server address
+            username (str): vCenter username
+
+        Returns:
+            str: Session cookie, or None if nothing is cached
+        """
+        entry = self._read().get(self._key(server, username))
+        if not entry:
+            return None
+        return entry.get('cookie')
+
+    def store(self, server, username, cookie):
+        """
+        Save the session cookie for a server and user
+
+        Args:
+            server (str): vCenter server address
+            username (str): vCenter username
+            cookie (str): Session cookie of the SOAP stub
+        """
+        with self._lock:
+            entries = self._read()
+            entries[self._key(server, username)] = {
+                'server': server,
+                'username': username,
+                'cookie': cookie,
+                'stored_at': int(time.time())
+            }
+            self._write(entries)
+
+    def invalidate(self, server, username):
+        """
+        Remove the cached session for a server and user
+
+        Args:
+            server (str): vCenter server address
+            username (str): vCenter username
+        """
+        with self._lock:
+            entries = self._read()
+            if entries.pop(self._key(server, username), None) is not None:
+                self._write(entries)
+
+    def _key(self, server, username):
+        """Build the cache key for a server and user"""
+        return hashlib.sha256(f"{server.lower()}|{username}".encode('utf-8')).hexdigest()
+
+    def _read(self):
+        """Read all cache entries, ignoring missing or unreadable files"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable session cache {self.path}: {str(e)}")
+            return {}
+
+    def _write(self, entries):
+        """Write all cache entries atomically with mode 0600"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+
+        tmp_path = f"{self.path}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entries, f)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Command line entry point of the vCenter simulator
+"""
+
+import sys
+import time
+import logging
+import argparse
+
+from core.simulator.inventory import SyntheticInventory
+from core.simulator.server import SimulatorServer
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Local vCenter simulator with a synthetic inventory')
+    parser.add_argument('--vms', type=int, default=1000, help='Number of virtual machines (default: 1000)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed of the inventory (default: 42)')
+    parser.add_argument('--host', default='127.0.0.1', help='Listen address (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8989, help='Listen port (default: 8989)')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Latency added to every request')
+    parser.add_argument('--latency-per-object-us', type=float, default=0.0,
+                        help='Additional latency per returned object or file')
+    parser.add_argument('--task-seconds', type=float, default=0.0,
+                        help='Time until datastore search tasks complete')
+    parser.add_argument('--username', help='Only accept this user name')
+    parser.add_argument('--password', help='Only accept this password')
+    parser.add_argument('--certfile', help='TLS certificate (serves https)')
+    parser.add_argument('--keyfile', help='TLS private key')
+    parser.add_argument('--no-gzip', action='store_true', help='Never compress responses')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Log every request')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s %(levelname)s %(message)s')
+
+    start = time.monotonic()
+    inventory = SyntheticInventory(vm_count=args.vms, seed=args.seed)
+    counts = ', '.join(f"{len(moids)} {kind}" for kind, moids in inventory.kinds.items())
+    print(f"Inventory generated in {time.monotonic() - start:.2f}s: {counts}")
+
+    server = SimulatorServer(
+        inventory,
+        host=args.host,
+        port=args.port,
+        latency_ms=args.latency_ms,
+        latency_per_object_us=args.latency_per_object_us,
+        task_seconds=args.task_seconds,
+        use_gzip=not args.no_gzip,
+        certfile=args.certfile,
+        keyfile=args.keyfile,
+        username=args.username,
+        password=args.password
+    )
+    print(f"vCenter simulator listening on {server.url} (stats: {server.url[:-4]}/stats)")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,1069 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Seeded synthetic vSphere inventory for the simulator
+
+The inventory keeps one small record per managed object and builds the
+pyVmomi property values (summary, config, layoutEx, ...) only when a client
+asks for them, so inventories with tens of thousands of VMs stay cheap to
+hold in memory. The same seed always produces the same inventory.
+"""
+
+import math
+import uuid
+import random
+import fnmatch
+import datetime
+
+from pyVmomi import vim, VmomiSupport
+
+# Naming pools for the generated objects
+VM_PREFIXES = ['app', 'db', 'web', 'srv', 'k8s', 'ctx', 'sql', 'file']
+GUEST_OS = [
+    ('windows2019srv_64Guest', 'Microsoft Windows Server 2019 (64-bit)'),
+    ('windows2022srvNext_64Guest', 'Microsoft Windows Server 2022 (64-bit)'),
+    ('rhel8_64Guest', 'Red Hat Enterprise Linux 8 (64-bit)'),
+    ('ubuntu64Guest', 'Ubuntu Linux (64-bit)'),
+    ('sles15_64Guest', 'SUSE Linux Enterprise 15 (64-bit)')
+]
+HOST_MODELS = [('Dell Inc.', 'PowerEdge R750'), ('HPE', 'ProLiant DL380 Gen10 Plus'), ('Lenovo', 'ThinkSystem SR650 V2')]
+CPU_MODEL = 'Intel(R) Xeon(R) Gold 6338 CPU @ 2.00GHz'
+
+# Tools states for powered-on VMs: (toolsStatus, toolsVersionStatus, toolsRunningStatus, weight)
+TOOLS_STATES = [
+    ('toolsOk', 'guestToolsCurrent', 'guestToolsRunning', 70),
+    ('toolsOld', 'guestToolsNeedUpgrade', 'guestToolsRunning', 20),
+    ('toolsNotRunning', 'guestToolsCurrent', 'guestToolsNotRunning', 5),
+    ('toolsNotInstalled', 'guestToolsNotInstalled', 'guestToolsNotRunning', 5)
+]
+
+GB = 1024 ** 3
+
+# File query types understood by the datastore browser and the files they match
+QUERY_TYPES = {
+    vim.host.DatastoreBrowser.VmDiskQuery: 'disk',
+    vim.host.DatastoreBrowser.FolderQuery: 'folder',
+    vim.host.DatastoreBrowser.VmConfigQuery: 'config',
+    vim.host.DatastoreBrowser.TemplateVmConfigQuery: 'template',
+    vim.host.DatastoreBrowser.VmLogQuery: 'log',
+    vim.host.DatastoreBrowser.VmNvramQuery: 'nvram',
+    vim.host.DatastoreBrowser.VmSnapshotQuery: 'snapshot'
+}
+
+# Properties exposed per object kind (used for 'all' in PropertySpec and validation)
+PROPERTIES = {
+    'folder': ['name', 'parent', 'childEntity', 'childType', 'overallStatus'],
+    'datacenter': ['name', 'parent', 'vmFolder', 'hostFolder', 'datastoreFolder', 'networkFolder',
+                   'datastore', 'network', 'overallStatus'],
+    'cluster': ['name', 'parent', 'host', 'datastore', 'network', 'resourcePool', 'summary',
+                'configuration', 'configurationEx', 'overallStatus'],
+    'pool': ['name', 'parent', 'owner', 'resourcePool', 'vm', 'summary', 'config', 'runtime', 'overallStatus'],
+    'host': ['name', 'parent', 'vm', 'datastore', 'network', 'summary', 'hardware', 'config', 'runtime',
+             'overallStatus'],
+    'datastore': ['name', 'parent', 'browser', 'host', 'vm', 'summary', 'info', 'overallStatus'],
+    'network': ['name', 'parent', 'host', 'vm', 'summary', 'overallStatus'],
+    'portgroup': ['name', 'parent', 'host', 'vm', 'summary', 'config', 'key', 'overallStatus'],
+    'dvs': ['name', 'parent', 'uuid', 'summary', 'portgroup', 'overallStatus'],
+    'vm': ['name', 'parent', 'resourcePool', 'datastore', 'network', 'runtime', 'summary', 'config', 'guest',
+           'snapshot', 'layoutEx', 'storage', 'overallStatus'],
+    'browser': ['datastore', 'supportedType']
+}
+
+def complete(value, now):
+    """
+    Fill all mandatory fields of a data object that were left unset
+
+    The SOAP serializer rejects data objects with unset mandatory fields; the
+    simulator only sets the fields that matter and fills the rest with neutral
+    defaults here.
+    """
+    if isinstance(value, list):
+        for item in value:
+            complete(item, now)
+        return value
+
+    if not isinstance(value, VmomiSupport.DataObject):
+        return value
+
+    for prop in type(value)._GetPropertyList():
+        current = getattr(value, prop.name)
+        if current is None and not prop.flags & VmomiSupport.F_OPTIONAL:
+            default = _default_value(prop.type, now)
+            if default is not None:
+                setattr(value, prop.name, default)
+        elif current is not None:
+            complete(current, now)
+
+    return value
+
+def _default_value(prop_type, now):
+    """Neutral default for a mandatory field"""
+    if issubclass(prop_type, list):
+        # Pflicht-Arrays dürfen nicht leer serialisiert werden
+        item = _default_value(prop_type.Item, now)
+        return prop_type([item]) if item is not None else None
+    if issubclass(prop_type, VmomiSupport.Enum):
+        return prop_type.values[0]
+    if issubclass(prop_type, bool):
+        return False
+    if issubclass(prop_type, (int, float)):
+        return prop_type(0)
+    if issubclass(prop_type, str):
+        return prop_type('')
+    if issubclass(prop_type, datetime.datetime):
+        return now
+    if issubclass(prop_type, VmomiSupport.DataObject):
+        return complete(prop_type(), now)
+    return None
+
+class SyntheticInventory:
+    """Deterministic synthetic vCenter inventory"""
+
+    def __init__(self, vm_count=1000, seed=42, vms_per_host=25, hosts_per_cluster=8,
+                 clusters_per_datacenter=10, vms_per_datastore=40, snapshot_ratio=0.1,
+                 template_ratio=0.02, orphan_ratio=0.02):
+        """
+        Generate the inventory
+
+        Args:
+            vm_count (int): Number of virtual machines (including templates)
+            seed (int): Random seed, identical seeds produce identical inventories
+            vms_per_host (int): Average VM density per host
+            hosts_per_cluster (int): Hosts per cluster
+            clusters_per_datacenter (int): Clusters per datacenter
+            vms_per_datastore (int): VMs placed on each datastore
+            snapshot_ratio (float): Share of VMs with a snapshot chain
+            template_ratio (float): Share of VMs that are templates
+            orphan_ratio (float): Orphaned VMDKs per VM
+        """
+        self.seed = seed
+        self.vm_count = vm_count
+        self.rng = random.Random(seed)
+        self.now = datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
+        self.instance_uuid = str(uuid.UUID(int=self.rng.getrandbits(128)))
+
+        self.objects = {}
+        self.kinds = {}
+        self._counter = 0
+
+        self.root_folder = self._add('folder', 'group-d1', name='Datacenters', parent=None,
+                                     children=[], child_type=['Folder', 'Datacenter'])
+        self._build(vms_per_host, hosts_per_cluster, clusters_per_datacenter, vms_per_datastore,
+                    snapshot_ratio, template_ratio, orphan_ratio)
+
+    # ------------------------------------------------------------------
+    # Generation
+    # ------------------------------------------------------------------
+
+    def _next_id(self):
+        self._counter += 1
+        return self._counter
+
+    def _add(self, kind, moid, **attrs):
+        """Register a managed object record"""
+        attrs['moid'] = moid
+        attrs['kind'] = kind
+        self.objects[moid] = attrs
+        self.kinds.setdefault(kind, []).append(moid)
+        return attrs
+
+    def _build(self, vms_per_host, hosts_per_cluster, clusters_per_datacenter, vms_per_datastore,
+               snapshot_ratio, template_ratio, orphan_ratio):
+        """Create datacenters, clusters, hosts, datastores, networks and VMs"""
+        rng = self.rng
+        host_count = max(1, math.ceil(self.vm_count / vms_per_host))
+        cluster_count = max(1, math.ceil(host_count / hosts_per_cluster))
+        datacenter_count = max(1, math.ceil(cluster_count / clusters_per_datacenter))
+
+        clusters = []
+        for dc_index in range(datacenter_count):
+            dc = self._add_datacenter(dc_index)
+            for _ in range(min(clusters_per_datacenter, cluster_count - len(clusters))):
+                clusters.append(self._add_cluster(dc))
+
+        # Hosts gleichmäßig auf die Cluster verteilen
+        for index in range(host_count):
+            self._add_host(clusters[index % len(clusters)], index)
+
+        # VMs den Hosts zuordnen und je Cluster Datastores anlegen
+        vms_by_cluster = {cluster['moid']: [] for cluster in clusters}
+        for index in range(self.vm_count):
+            host = self.objects[self.kinds['host'][index % host_count]]
+            vms_by_cluster[host['cluster']].append((index, host))
+
+        for cluster in clusters:
+            placements = vms_by_cluster[cluster['moid']]
+            datastore_count = max(1, math.ceil(len(placements) / vms_per_datastore))
+            datastores = [self._add_datastore(cluster) for _ in range(datastore_count)]
+            for position, (index, host) in enumerate(placements):
+                datastore = datastores[position % datastore_count]
+                self._add_vm(index, host, datastore, rng.random() < template_ratio,
+                             rng.random() < snapshot_ratio)
+
+        orphan_count = int(round(self.vm_count * orphan_ratio))
+        datastore_ids = self.kinds.get('datastore', [])
+        for index in range(orphan_count):
+            self._add_orphan(self.objects[rng.choice(datastore_ids)], index)
+
+    def _add_datacenter(self, index):
+        number = self._next_id()
+        dc = self._add('datacenter', f'datacenter-{number}', name=f'DC-{index + 1:02d}',
+                       parent=self.root_folder['moid'], datastores=[], networks=[])
+        for key, prefix, name, child_type in (
+                ('vm_folder', 'v', 'vm', ['Folder', 'VirtualMachine', 'VirtualApp']),
+                ('host_folder', 'h', 'host', ['Folder', 'ComputeResource']),
+                ('datastore_folder', 's', 'datastore', ['Folder', 'Datastore', 'StoragePod']),
+                ('network_folder', 'n', 'network', ['Folder', 'Network', 'DistributedVirtualSwitch'])):
+            folder = self._add('folder', f'group-{prefix}{self._next_id()}', name=name, parent=dc['moid'],
+                               children=[], child_type=child_type)
+            dc[key] = folder['moid']
+        self.root_folder['children'].append(dc['moid'])
+
+        # Standard-Portgruppe plus ein Distributed Switch mit drei Portgruppen
+        network_folder = self.objects[dc['network_folder']]
+        network = self._add('network', f'network-{self._next_id()}', name='VM Network',
+                            parent=network_folder['moid'], datacenter=dc['moid'])
+        dvs = self._add('dvs', f'dvs-{self._next_id()}', name=f'dvSwitch-{dc["name"]}',
+                        parent=network_folder['moid'], uuid=str(uuid.UUID(int=self.rng.getrandbits(128))),
+                        portgroups=[])
+        network_folder['children'].extend([network['moid'], dvs['moid']])
+        dc['networks'].append(network['moid'])
+        for vlan in (10, 20, 30):
+            portgroup = self._add('portgroup', f'dvportgroup-{self._next_id()}', name=f'PG-VLAN{vlan}',
+                                  parent=network_folder['moid'], dvs=dvs['moid'], vlan=vlan,
+                                  datacenter=dc['moid'])
+            dvs['portgroups'].append(portgroup['moid'])
+            network_folder['children'].append(portgroup['moid'])
+            dc['networks'].append(portgroup['moid'])
+        return dc
+
+    def _add_cluster(self, dc):
+        number = self._next_id()
+        cluster = self._add('cluster', f'domain-c{number}', name=f'{dc["name"]}-Cluster-{len(self.kinds.get("cluster", [])) + 1:02d}',
+                            parent=dc['host_folder'], datacenter=dc['moid'], hosts=[], datastores=[],
+                            drs=self.rng.random() < 0.8, ha=self.rng.random() < 0.9)
+        self.objects[dc['host_folder']]['children'].append(cluster['moid'])
+        root_pool = self._add('pool', f'resgroup-{self._next_id()}', name='Resources', parent=cluster['moid'],
+                              owner=cluster['moid'], pools=[], vms=[], shares=4000)
+        cluster['root_pool'] = root_pool['moid']
+        for name, shares in (('Produktion', 8000), ('Test', 2000)):
+            pool = self._add('pool', f'resgroup-{self._next_id()}', name=name, parent=root_pool['moid'],
+                             owner=cluster['moid'], pools=[], vms=[], shares=shares)
+            root_pool['pools'].append(pool['moid'])
+        return cluster
+
+    def _add_host(self, cluster, index):
+        vendor, model = HOST_MODELS[index % len(HOST_MODELS)]
+        host = self._add('host', f'host-{self._next_id()}', name=f'esx{index + 1:04d}.lab.local',
+                         parent=cluster['moid'], cluster=cluster['moid'], vms=[], vendor=vendor, model=model,
+                         cpu_packages=2, cpu_cores=self.rng.choice([32, 48, 64]),
+                         memory=self.rng.choice([512, 768, 1024]) * GB,
+                         maintenance=self.rng.random() < 0.02,
+                         uuid=str(uuid.UUID(int=self.rng.getrandbits(128))))
+        cluster['hosts'].append(host['moid'])
+        return host
+
+    def _add_datastore(self, cluster):
+        number = self._next_id()
+        dc = self.objects[cluster['datacenter']]
+        name = f'{cluster["name"]}-DS{len(cluster["datastores"]) + 1:02d}'
+        datastore = self._add('datastore', f'datastore-{number}', name=name, parent=dc['datastore_folder'],
+                              cluster=cluster['moid'], vms=[], folders={},
+                              capacity=self.rng.choice([4, 8, 16]) * 1024 * GB,
+                              accessible=self.rng.random() > 0.01,
+                              vmfs_uuid=f'{self.rng.getrandbits(32):08x}-{self.rng.getrandbits(32):08x}-'
+                                        f'{self.rng.getrandbits(16):04x}-{self.rng.getrandbits(48):012x}')
+        datastore['url'] = f'ds:///vmfs/volumes/{datastore["vmfs_uuid"]}/'
+        self._add('browser', f'datastoreBrowser-{datastore["moid"]}', datastore=datastore['moid'])
+        cluster['datastores'].append(datastore['moid'])
+        dc['datastores'].append(datastore['moid'])
+        self.objects[dc['datastore_folder']]['children'].append(datastore['moid'])
+        return datastore
+
+    def _add_vm(self, index, host, datastore, template, with_snapshots):
+        rng = self.rng
+        cluster = self.objects[host['cluster']]
+        dc = self.objects[cluster['datacenter']]
+        name = f'{VM_PREFIXES[index % len(VM_PREFIXES)]}-{index + 1:05d}'
+        guest_id, guest_name = rng.choice(GUEST_OS)
+
+        power_roll = rng.random()
+        if template:
+            power_state = 'poweredOff'
+        elif power_roll < 0.85:
+            power_state = 'poweredOn'
+        elif power_roll < 0.97:
+            power_state = 'poweredOff'
+        else:
+            power_state = 'suspended'
+
+        if power_state == 'poweredOn':
+            tools = rng.choices(TOOLS_STATES, weights=[state[3] for state in TOOLS_STATES])[0][:3]
+        else:
+            tools = ('toolsNotRunning', 'guestToolsCurrent', 'guestToolsNotRunning')
+
+        pools = self.objects[cluster['root_pool']]['pools']
+        pool = rng.choice(pools + [cluster['root_pool']])
+        portgroups = [moid for moid in dc['networks'] if self.objects[moid]['kind'] == 'portgroup']
+
+        vm = self._add('vm', f'vm-{self._next_id()}', name=name, parent=dc['vm_folder'], host=host['moid'],
+                       cluster=cluster['moid'], pool=pool, datastore=datastore['moid'],
+                       network=rng.choice(portgroups), template=template, power_state=power_state,
+                       tools=tools, tools_version=rng.choice([11365, 12352, 12389]) if tools[0] != 'toolsNotInstalled' else 0,
+                       guest_id=guest_id, guest_name=guest_name, num_cpu=rng.choice([1, 2, 4, 8]),
+                       memory_mb=rng.choice([2048, 4096, 8192, 16384]),
+                       uuid=str(uuid.UUID(int=rng.getrandbits(128))),
+                       instance_uuid=str(uuid.UUID(int=rng.getrandbits(128))),
+                       ip=f'10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}',
+                       cbt=rng.random() < 0.3, disks=[], snapshots=[],
+                       created=self.now - datetime.timedelta(days=rng.randint(30, 1500)))
+
+        folder = f'{name}/'
+        for disk_index in range(rng.choice([1, 1, 2, 3])):
+            base = name if disk_index == 0 else f'{name}_{disk_index}'
+            capacity = rng.choice([40, 60, 100, 200, 500]) * GB
+            thin = rng.random() < 0.6
+            vm['disks'].append({
+                'key': 2000 + disk_index,
+                'unit': disk_index,
+                'base': base,
+                'capacity': capacity,
+                'thin': thin,
+                'used': int(capacity * (rng.uniform(0.2, 0.9) if thin else 1)),
+                'uuid': '6000C29' + f'{rng.getrandbits(100):025x}'
+            })
+
+        if with_snapshots and not template:
+            age_days = sorted((rng.randint(1, 400) for _ in range(rng.randint(1, 3))), reverse=True)
+            for level, age in enumerate(age_days, start=1):
+                vm['snapshots'].append({
+                    'moid': f'snapshot-{self._next_id()}',
+                    'id': level,
+                    'name': f'Snapshot {level}' if level > 1 else 'Vor Update',
+                    'description': f'Automatisch erstellt ({age} Tage)',
+                    'created': self.now - datetime.timedelta(days=age, hours=rng.randint(0, 23)),
+                    'quiesced': rng.random() < 0.5,
+                    'delta_size': rng.randint(1, 50) * GB // 4
+                })
+
+        self.objects[vm['pool']]['vms'].append(vm['moid'])
+        self.objects[dc['vm_folder']]['children'].append(vm['moid'])
+        host['vms'].append(vm['moid'])
+        datastore['vms'].append(vm['moid'])
+        datastore['folders'][folder] = vm['moid']
+        return vm
+
+    def _add_orphan(self, datastore, index):
+        """Add an orphaned disk, either in its own folder or next to a registered VM"""
+        rng = self.rng
+        capacity = rng.choice([20, 40, 100]) * GB
+        orphan = {
+            'capacity': capacity,
+            'used': int(capacity * rng.uniform(0.1, 1.0)),
+            'modified': self.now - datetime.timedelta(days=rng.randint(60, 1200))
+        }
+        if datastore['vms'] and rng.random() < 0.3:
+            vm = self.objects[rng.choice(datastore['vms'])]
+            orphan['folder'] = f'{vm["name"]}/'
+            orphan['base'] = f'{vm["name"]}_old{index}'
+        else:
+            orphan['folder'] = f'old-vm-{index + 1:04d}/'
+            orphan['base'] = f'old-vm-{index + 1:04d}'
+            datastore['folders'].setdefault(orphan['folder'], None)
+        datastore.setdefault('orphans', []).append(orphan)
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def moref(self, moid):
+        """Managed object reference for a moid"""
+        return self.type_of(moid)(moid)
+
+    def type_of(self, moid):
+        """vim type of a moid"""
+        kind = self.objects[moid]['kind']
+        return {
+            'folder': vim.Folder,
+            'datacenter': vim.Datacenter,
+            'cluster': vim.ClusterComputeResource,
+            'pool': vim.ResourcePool,
+            'host': vim.HostSystem,
+            'datastore': vim.Datastore,
+            'network': vim.Network,
+            'portgroup': vim.dvs.DistributedVirtualPortgroup,
+            'dvs': vim.dvs.VmwareDistributedVirtualSwitch,
+            'vm': vim.VirtualMachine,
+            'browser': vim.host.DatastoreBrowser
+        }[kind]
+
+    def children(self, moid):
+        """Direct children of an object in the containment hierarchy (as used by ContainerView)"""
+        record = self.objects[moid]
+        kind = record['kind']
+        if kind == 'folder':
+            return list(record['children'])
+        if kind == 'datacenter':
+            return [record['vm_folder'], record['host_folder'], record['datastore_folder'], record['network_folder']]
+        if kind == 'cluster':
+            return list(record['hosts']) + [record['root_pool']]
+        if kind == 'pool':
+            return list(record['pools']) + list(record['vms'])
+        return []
+
+    def find_by_path(self, path):
+        """
+        Object at an inventory path like SearchIndex.FindByInventoryPath (e.g. DC-01/host/DC-01-Cluster-01)
+
+        Returns:
+            str: moid, or None if the path does not exist
+        """
+        moid = self.root_folder['moid']
+        for name in [segment for segment in path.split('/') if segment]:
+            moid = next((child for child in self.children(moid) if self.objects[child]['name'] == name), None)
+            if moid is None:
+                return None
+        return moid
+
+    # ------------------------------------------------------------------
+    # Property values
+    # ------------------------------------------------------------------
+
+    def property_names(self, moid):
+        """Names of all properties of an object"""
+        return PROPERTIES.get(self.objects[moid]['kind'], [])
+
+    def get_property(self, moid, path):
+        """
+        Resolve a (dotted) property path of an object
+
+        Returns:
+            Property value, or None if the path is unset
+
+        Raises:
+            KeyError: If the first path segment is not a property of the object type
+            AttributeError: If a nested path segment does not exist
+        """
+        name, _, rest = path.partition('.')
+        if name not in self.property_names(moid):
+            try:
+                # Gültige, aber nicht simulierte Properties bleiben wie bei vCenter ungesetzt
+                self.type_of(moid)._GetPropertyInfo(name)
+            except AttributeError:
+                raise KeyError(path)
+            return None
+
+        value = getattr(self, f'_{self.objects[moid]["kind"]}_property')(self.objects[moid], name)
+        if isinstance(value, list) and not isinstance(value, VmomiSupport.Array):
+            # Typisiertes Array wie in der Property-Definition, sonst kann der Serializer es nicht abbilden
+            value = self.type_of(moid)._GetPropertyInfo(name).type(value)
+        for segment in rest.split('.') if rest else []:
+            if value is None:
+                return None
+            value = getattr(value, segment)
+        return value
+
+    def _common(self, record, name):
+        """Properties shared by all managed entities"""
+        if name == 'name':
+            return record['name']
+        if name == 'parent':
+            return self.moref(record['parent']) if record.get('parent') else None
+        if name == 'overallStatus':
+            return 'green'
+        raise KeyError(name)
+
+    def _folder_property(self, record, name):
+        if name == 'childEntity':
+            return [self.moref(moid) for moid in record['children']]
+        if name == 'childType':
+            return list(record['child_type'])
+        return self._common(record, name)
+
+    def _datacenter_property(self, record, name):
+        if name in ('vmFolder', 'hostFolder', 'datastoreFolder', 'networkFolder'):
+            key = {'vmFolder': 'vm_folder', 'hostFolder': 'host_folder',
+                   'datastoreFolder': 'datastore_folder', 'networkFolder': 'network_folder'}[name]
+            return vim.Folder(record[key])
+        if name == 'datastore':
+            return [vim.Datastore(moid) for moid in record['datastores']]
+        if name == 'network':
+            return [self.moref(moid) for moid in record['networks']]
+        return self._common(record, name)
+
+    def _cluster_property(self, record, name):
+        dc = self.objects[record['datacenter']]
+        if name == 'host':
+            return [vim.HostSystem(moid) for moid in record['hosts']]
+        if name == 'datastore':
+            return [vim.Datastore(moid) for moid in record['datastores']]
+        if name == 'network':
+            return [self.moref(moid) for moid in dc['networks']]
+        if name == 'resourcePool':
+            return vim.ResourcePool(record['root_pool'])
+        if name in ('configuration', 'configurationEx'):
+            drs = vim.cluster.DrsConfigInfo(enabled=record['drs'], defaultVmBehavior='fullyAutomated',
+                                            vmotionRate=3)
+            das = vim.cluster.DasConfigInfo(enabled=record['ha'], hostMonitoring='enabled')
+            if name == 'configuration':
+                return complete(vim.cluster.ConfigInfo(drsConfig=drs, dasConfig=das), self.now)
+            return complete(vim.cluster.ConfigInfoEx(drsConfig=drs, dasConfig=das), self.now)
+        if name == 'summary':
+            hosts = [self.objects[moid] for moid in record['hosts']]
+            total_cpu = sum(h['cpu_cores'] * 2000 for h in hosts)
+            total_memory = sum(h['memory'] for h in hosts)
+            return complete(vim.ClusterComputeResource.Summary(
+                totalCpu=total_cpu, totalMemory=total_memory,
+                numCpuCores=sum(h['cpu_cores'] for h in hosts),
+                numCpuThreads=sum(h['cpu_cores'] * 2 for h in hosts),
+                effectiveCpu=int(total_cpu * 0.9), effectiveMemory=int(total_memory * 0.9 / (1024 * 1024)),
+                numHosts=len(hosts), numEffectiveHosts=len([h for h in hosts if not h['maintenance']]),
+                overallStatus='green', currentFailoverLevel=1 if record['ha'] else 0,
+                usageSummary=complete(vim.cluster.UsageSummary(
+                    totalCpuCapacityMhz=total_cpu, totalMemCapacityMB=total_memory // (1024 * 1024),
+                    cpuDemandMhz=int(total_cpu * 0.35), memDemandMB=int(total_memory * 0.4 / (1024 * 1024))
+                ), self.now)
+            ), self.now)
+        return self._common(record, name)
+
+    def _pool_property(self, record, name):
+        if name == 'owner':
+            return vim.ClusterComputeResource(record['owner'])
+        if name == 'resourcePool':
+            return [vim.ResourcePool(moid) for moid in record['pools']]
+        if name == 'vm':
+            return [vim.VirtualMachine(moid) for moid in record['vms']]
+        if name in ('config', 'summary', 'runtime'):
+            allocation = dict(reservation=0, expandableReservation=True, limit=-1)
+            config = vim.ResourceConfigSpec(
+                entity=vim.ResourcePool(record['moid']), changeVersion='1',
+                cpuAllocation=vim.ResourceAllocationInfo(
+                    shares=vim.SharesInfo(shares=record['shares'], level='custom'), **allocation),
+                memoryAllocation=vim.ResourceAllocationInfo(
+                    shares=vim.SharesInfo(shares=record['shares'] * 40, level='custom'), **allocation)
+            )
+            runtime = vim.ResourcePool.RuntimeInfo(overallStatus='green')
+            if name == 'config':
+                return complete(config, self.now)
+            if name == 'runtime':
+                return complete(runtime, self.now)
+            return complete(vim.ResourcePool.Summary(name=record['name'], config=config, runtime=runtime),
+                            self.now)
+        return self._common(record, name)
+
+    def _esx_product(self):
+        return complete(vim.AboutInfo(
+            name='VMware ESXi', fullName='VMware ESXi 8.0.3 build-24022510', vendor='VMware, Inc.',
+            version='8.0.3', build='24022510', osType='vmnix-x86', productLineId='embeddedEsx',
+            apiType='HostAgent', apiVersion='8.0.3.0'
+        ), self.now)
+
+    def _host_property(self, record, name):
+        cluster = self.objects[record['cluster']]
+        dc = self.objects[cluster['datacenter']]
+        if name == 'vm':
+            return [vim.VirtualMachine(moid) for moid in record['vms']]
+        if name == 'datastore':
+            return [vim.Datastore(moid) for moid in cluster['datastores']]
+        if name == 'network':
+            return [self.moref(moid) for moid in dc['networks']]
+
+        runtime = vim.host.RuntimeInfo(
+            connectionState='connected', powerState='poweredOn', inMaintenanceMode=record['maintenance'],
+            bootTime=self.now - datetime.timedelta(days=42)
+        )
+        if name == 'runtime':
+            return complete(runtime, self.now)
+        if name == 'hardware':
+            return complete(vim.host.HardwareInfo(
+                systemInfo=vim.host.SystemInfo(vendor=record['vendor'], model=record['model'], uuid=record['uuid']),
+                cpuInfo=vim.host.CpuInfo(numCpuPackages=record['cpu_packages'], numCpuCores=record['cpu_cores'],
+                                         numCpuThreads=record['cpu_cores'] * 2, hz=2000000000),
+                cpuPkg=[vim.host.CpuPackage(index=i, vendor='intel', hz=2000000000, busHz=100000000,
+                                            description=CPU_MODEL,
+                                            threadId=list(range(i * record['cpu_cores'], (i + 1) * record['cpu_cores'])))
+                        for i in range(record['cpu_packages'])],
+                memorySize=record['memory']
+            ), self.now)
+        if name == 'config':
+            return complete(vim.host.ConfigInfo(host=vim.HostSystem(record['moid']), product=self._esx_product()),
+                            self.now)
+        if name == 'summary':
+            return complete(vim.host.Summary(
+                host=vim.HostSystem(record['moid']),
+                hardware=vim.host.Summary.HardwareSummary(
+                    vendor=record['vendor'], model=record['model'], uuid=record['uuid'],
+                    memorySize=record['memory'], cpuModel=CPU_MODEL, cpuMhz=2000,
+                    numCpuPkgs=record['cpu_packages'], numCpuCores=record['cpu_cores'],
+                    numCpuThreads=record['cpu_cores'] * 2, numNics=4, numHBAs=2),
+                runtime=runtime,
+                config=vim.host.Summary.ConfigSummary(name=record['name'], port=443,
+                                                      product=self._esx_product(), vmotionEnabled=True),
+                quickStats=vim.host.Summary.QuickStats(overallCpuUsage=len(record['vms']) * 250,
+                                                       overallMemoryUsage=len(record['vms']) * 4096,
+                                                       uptime=42 * 86400),
+                overallStatus='green', rebootRequired=False
+            ), self.now)
+        return self._common(record, name)
+
+    def _datastore_used(self, record):
+        """Bytes used on a datastore by VM files and orphans"""
+        used = 0
+        for vm_id in record['vms']:
+            vm = self.objects[vm_id]
+            used += sum(disk['used'] for disk in vm['disks'])
+            used += sum(snapshot['delta_size'] for snapshot in vm['snapshots'])
+        used += sum(orphan['used'] for orphan in record.get('orphans', []))
+        return used
+
+    def _datastore_property(self, record, name):
+        cluster = self.objects[record['cluster']]
+        if name == 'browser':
+            return vim.host.DatastoreBrowser(f'datastoreBrowser-{record["moid"]}')
+        if name == 'vm':
+            return [vim.VirtualMachine(moid) for moid in record['vms']]
+        if name == 'host':
+            return [vim.Datastore.HostMount(
+                key=vim.HostSystem(moid),
+                mountInfo=complete(vim.host.MountInfo(path=f'/vmfs/volumes/{record["vmfs_uuid"]}',
+                                                      accessMode='readWrite', mounted=True,
+                                                      accessible=record['accessible']), self.now)
+            ) for moid in cluster['hosts']]
+
+        capacity = record['capacity']
+        used = self._datastore_used(record)
+        # Kapazität so wählen, dass die belegten Daten auch wirklich Platz haben
+        while capacity < used * 1.1:
+            capacity *= 2
+        free = capacity - used
+        if name == 'summary':
+            return complete(vim.Datastore.Summary(
+                datastore=vim.Datastore(record['moid']), name=record['name'], url=record['url'],
+                capacity=capacity, freeSpace=free,
+                uncommitted=sum(disk['capacity'] - disk['used'] for vm_id in record['vms']
+                                for disk in self.objects[vm_id]['disks']),
+                accessible=record['accessible'], multipleHostAccess=len(cluster['hosts']) > 1,
+                type='VMFS', maintenanceMode='normal'
+            ), self.now)
+        if name == 'info':
+            return complete(vim.host.VmfsDatastoreInfo(
+                name=record['name'], url=record['url'], freeSpace=free, maxFileSize=62 * 1024 * GB,
+                timestamp=self.now,
+                vmfs=vim.host.VmfsVolume(name=record['name'], capacity=capacity, blockSizeMb=1,
+                                         maxBlocks=capacity // (1024 * 1024), majorVersion=6,
+                                         version='6.82', uuid=record['vmfs_uuid'], type='VMFS',
+                                         vmfsUpgradable=False,
+                                         extent=[vim.host.ScsiDisk.Partition(
+                                             diskName=f'naa.6000{record["vmfs_uuid"].replace("-", "")}',
+                                             partition=1)])
+            ), self.now)
+        return self._common(record, name)
+
+    def _network_property(self, record, name):
+        dc = self.objects[record['datacenter']]
+        cluster_hosts = [host for cluster_id in self.kinds.get('cluster', [])
+                         if self.objects[cluster_id]['datacenter'] == dc['moid']
+                         for host in self.objects[cluster_id]['hosts']]
+        if name == 'host':
+            return [vim.HostSystem(moid) for moid in cluster_hosts]
+        if name == 'vm':
+            return [vim.VirtualMachine(moid) for moid in self.kinds.get('vm', [])
+                    if self.objects[moid]['network'] == record['moid']]
+        if name == 'summary':
+            return complete(vim.Network.Summary(network=self.moref(record['moid']), name=record['name'],
+                                                accessible=True), self.now)
+        if name == 'key':
+            return record['moid']
+        return self._common(record, name)
+
+    def _portgroup_property(self, record, name):
+        if name == 'config':
+            return complete(vim.dvs.DistributedVirtualPortgroup.ConfigInfo(
+                key=record['moid'], name=record['name'], numPorts=128, type='earlyBinding',
+                distributedVirtualSwitch=vim.dvs.VmwareDistributedVirtualSwitch(record['dvs']),
+                defaultPortConfig=vim.dvs.VmwareDistributedVirtualSwitch.VmwarePortConfigPolicy(
+                    vlan=vim.dvs.VmwareDistributedVirtualSwitch.VlanIdSpec(vlanId=record['vlan'], inherited=False))
+            ), self.now)
+        return self._network_property(record, name)
+
+    def _dvs_property(self, record, name):
+        if name == 'uuid':
+            return record['uuid']
+        if name == 'portgroup':
+            return [vim.dvs.DistributedVirtualPortgroup(moid) for moid in record['portgroups']]
+        if name == 'summary':
+            return complete(vim.DistributedVirtualSwitch.Summary(
+                name=record['name'], uuid=record['uuid'], numPorts=128 * len(record['portgroups']),
+                portgroupName=[self.objects[moid]['name'] for moid in record['portgroups']]
+            ), self.now)
+        return self._common(record, name)
+
+    def _browser_property(self, record, name):
+        if name == 'datastore':
+            return [vim.Datastore(record['datastore'])]
+        if name == 'supportedType':
+            return [query() for query in QUERY_TYPES]
+        raise KeyError(name)
+
+    # ------------------------------------------------------------------
+    # Virtual machines
+    # ------------------------------------------------------------------
+
+    def vm_files(self, record):
+        """
+        Files of a VM on its datastore
+
+        Returns:
+            list: dicts with name, size, type (layoutEx file type), modified, and for disks
+                  'disk' (device key) and 'chain' (snapshot level, 0 = base disk)
+        """
+        ds_name = self.objects[record['datastore']]['name']
+        prefix = f'[{ds_name}] {record["name"]}/'
+        modified = record['created']
+        files = [
+            {'name': f'{prefix}{record["name"]}.{"vmtx" if record["template"] else "vmx"}', 'size': 3412,
+             'type': 'config', 'modified': modified},
+            {'name': f'{prefix}{record["name"]}.vmsd', 'size': 0 if not record['snapshots'] else 1024,
+             'type': 'snapshotList', 'modified': modified},
+            {'name': f'{prefix}{record["name"]}.nvram', 'size': 270840, 'type': 'nvram', 'modified': modified},
+            {'name': f'{prefix}vmware.log', 'size': 211345, 'type': 'log', 'modified': self.now}
+        ]
+        for disk in record['disks']:
+            files.append({'name': f'{prefix}{disk["base"]}.vmdk', 'size': 612, 'type': 'diskDescriptor',
+                          'modified': modified, 'disk': disk['key'], 'chain': 0})
+            files.append({'name': f'{prefix}{disk["base"]}-flat.vmdk', 'size': disk['used'], 'type': 'diskExtent',
+                          'modified': modified, 'disk': disk['key'], 'chain': 0})
+            if record['cbt']:
+                files.append({'name': f'{prefix}{disk["base"]}-ctk.vmdk', 'size': disk['capacity'] // 8192,
+                              'type': 'ctk', 'modified': modified, 'disk': disk['key']})
+            for snapshot in record['snapshots']:
+                files.append({'name': f'{prefix}{disk["base"]}-{snapshot["id"]:06d}.vmdk', 'size': 420,
+                              'type': 'diskDescriptor', 'modified': snapshot['created'],
+                              'disk': disk['key'], 'chain': snapshot['id']})
+                files.append({'name': f'{prefix}{disk["base"]}-{snapshot["id"]:06d}-sesparse.vmdk',
+                              'size': snapshot['delta_size'] // len(record['disks']), 'type': 'diskExtent',
+                              'modified': snapshot['created'], 'disk': disk['key'], 'chain': snapshot['id']})
+        for snapshot in record['snapshots']:
+            files.append({'name': f'{prefix}{record["name"]}-Snapshot{snapshot["id"]}.vmsn', 'size': 31544,
+                          'type': 'snapshotData', 'modified': snapshot['created'], 'snapshot': snapshot['moid']})
+        return files
+
+    def _current_disk_file(self, record, disk):
+        """Descriptor the disk backing currently points at (latest snapshot delta or base)"""
+        ds_name = self.objects[record['datastore']]['name']
+        if record['snapshots']:
+            return f'[{ds_name}] {record["name"]}/{disk["base"]}-{record["snapshots"][-1]["id"]:06d}.vmdk'
+        return f'[{ds_name}] {record["name"]}/{disk["base"]}.vmdk'
+
+    def _vm_devices(self, record):
+        """Virtual hardware devices of a VM"""
+        datastore = vim.Datastore(record['datastore'])
+        devices = [complete(vim.vm.device.ParaVirtualSCSIController(
+            key=1000, busNumber=0, sharedBus='noSharing', device=[disk['key'] for disk in record['disks']],
+            deviceInfo=vim.Description(label='SCSI controller 0', summary='VMware paravirtual SCSI')
+        ), self.now)]
+        for disk in record['disks']:
+            devices.append(complete(vim.vm.device.VirtualDisk(
+                key=disk['key'], controllerKey=1000, unitNumber=disk['unit'],
+                capacityInKB=disk['capacity'] // 1024, capacityInBytes=disk['capacity'],
+                deviceInfo=vim.Description(label=f'Hard disk {disk["unit"] + 1}',
+                                           summary=f'{disk["capacity"] // 1024:,} KB'),
+                backing=vim.vm.device.VirtualDisk.FlatVer2BackingInfo(
+                    fileName=self._current_disk_file(record, disk), datastore=datastore, diskMode='persistent',
+                    thinProvisioned=disk['thin'], uuid=disk['uuid'])
+            ), self.now))
+
+        portgroup = self.objects[record['network']]
+        dvs = self.objects[portgroup['dvs']]
+        devices.append(complete(vim.vm.device.VirtualVmxnet3(
+            key=4000, controllerKey=100, unitNumber=7, addressType='assigned',
+            macAddress='00:50:56:%02x:%02x:%02x' % tuple(int(part) % 256 for part in record['ip'].split('.')[1:]),
+            deviceInfo=vim.Description(label='Network adapter 1', summary=portgroup['name']),
+            backing=vim.vm.device.VirtualEthernetCard.DistributedVirtualPortBackingInfo(
+                port=vim.dvs.PortConnection(switchUuid=dvs['uuid'], portgroupKey=portgroup['moid']))
+        ), self.now))
+        return devices
+
+    def _vm_storage(self, record):
+        committed = sum(disk['used'] for disk in record['disks']) + 3412 + 270840 + 211345
+        committed += sum(snapshot['delta_size'] for snapshot in record['snapshots'])
+        uncommitted = sum(disk['capacity'] - disk['used'] for disk in record['disks'])
+        return committed, uncommitted
+
+    def _vm_property(self, record, name):
+        tools_status, tools_version_status, tools_running = record['tools']
+        powered_on = record['power_state'] == 'poweredOn'
+        vm_path = f'[{self.objects[record["datastore"]]["name"]}] {record["name"]}/{record["name"]}.' \
+                  f'{"vmtx" if record["template"] else "vmx"}'
+
+        if name == 'resourcePool':
+            return None if record['template'] else vim.ResourcePool(record['pool'])
+        if name == 'datastore':
+            return [vim.Datastore(record['datastore'])]
+        if name == 'network':
+            return [self.moref(record['network'])]
+
+        runtime = vim.vm.RuntimeInfo(host=vim.HostSystem(record['host']), connectionState='connected',
+                                     powerState=record['power_state'],
+                                     bootTime=self.now - datetime.timedelta(days=7) if powered_on else None)
+        if name == 'runtime':
+            return complete(runtime, self.now)
+
+        if name == 'guest':
+            return complete(vim.vm.GuestInfo(
+                toolsStatus=tools_status, toolsVersionStatus=tools_version_status,
+                toolsVersionStatus2=tools_version_status, toolsRunningStatus=tools_running,
+                toolsVersion=str(record['tools_version']), guestId=record['guest_id'],
+                guestFullName=record['guest_name'], guestState='running' if powered_on else 'notRunning',
+                hostName=record['name'] if tools_running == 'guestToolsRunning' else None,
+                ipAddress=record['ip'] if tools_running == 'guestToolsRunning' else None
+            ), self.now)
+
+        if name == 'config':
+            return complete(vim.vm.ConfigInfo(
+                name=record['name'], template=record['template'], uuid=record['uuid'],
+                instanceUuid=record['instance_uuid'], guestId=record['guest_id'],
+                guestFullName=record['guest_name'], version='vmx-19', changeVersion=record['created'].isoformat(),
+                modified=record['created'], createDate=record['created'],
+                hardware=vim.vm.VirtualHardware(numCPU=record['num_cpu'], numCoresPerSocket=1,
+                                                memoryMB=record['memory_mb'], device=self._vm_devices(record)),
+                files=vim.vm.FileInfo(vmPathName=vm_path,
+                                      snapshotDirectory=vm_path.rsplit('/', 1)[0] + '/',
+                                      suspendDirectory=vm_path.rsplit('/', 1)[0] + '/',
+                                      logDirectory=vm_path.rsplit('/', 1)[0] + '/'),
+                tools=vim.vm.ToolsConfigInfo(toolsVersion=record['tools_version'])
+            ), self.now)
+
+        if name == 'snapshot':
+            if not record['snapshots']:
+                return None
+            tree = None
+            for snapshot in reversed(record['snapshots']):
+                node = vim.vm.SnapshotTree(
+                    snapshot=vim.vm.Snapshot(snapshot['moid']), vm=vim.VirtualMachine(record['moid']),
+                    name=snapshot['name'], description=snapshot['description'], id=snapshot['id'],
+                    createTime=snapshot['created'], state=record['power_state'], quiesced=snapshot['quiesced'],
+                    childSnapshotList=[tree] if tree else []
+                )
+                tree = node
+            return complete(vim.vm.SnapshotInfo(
+                currentSnapshot=vim.vm.Snapshot(record['snapshots'][-1]['moid']), rootSnapshotList=[tree]
+            ), self.now)
+
+        if name == 'layoutEx':
+            files = self.vm_files(record)
+            layout_files = []
+            keys = {}
+            for key, entry in enumerate(entry for entry in files if entry['type'] != 'ctk'):
+                keys[entry['name']] = key
+                layout_files.append(vim.vm.FileLayoutEx.FileInfo(
+                    key=key, name=entry['name'], type=entry['type'], size=entry['size'],
+                    uniqueSize=entry['size'], accessible=True))
+
+            def disk_units(disk, max_level):
+                units = []
+                for level in range(max_level + 1):
+                    unit_keys = [keys[entry['name']] for entry in files
+                                 if entry.get('disk') == disk['key'] and entry.get('chain') == level]
+                    units.append(vim.vm.FileLayoutEx.DiskUnit(fileKey=unit_keys))
+                return units
+
+            current_level = record['snapshots'][-1]['id'] if record['snapshots'] else 0
+            disks = [vim.vm.FileLayoutEx.DiskLayout(key=disk['key'], chain=disk_units(disk, current_level))
+                     for disk in record['disks']]
+            snapshots = []
+            for snapshot in record['snapshots']:
+                data_key = next(keys[entry['name']] for entry in files if entry.get('snapshot') == snapshot['moid'])
+                snapshots.append(vim.vm.FileLayoutEx.SnapshotLayout(
+                    key=vim.vm.Snapshot(snapshot['moid']), dataKey=data_key, memoryKey=-1,
+                    disk=[vim.vm.FileLayoutEx.DiskLayout(key=disk['key'], chain=disk_units(disk, snapshot['id'] - 1))
+                          for disk in record['disks']]))
+            return complete(vim.vm.FileLayoutEx(file=layout_files, disk=disks, snapshot=snapshots,
+                                                timestamp=self.now), self.now)
+
+        committed, uncommitted = self._vm_storage(record)
+        if name == 'storage':
+            return complete(vim.vm.StorageInfo(
+                perDatastoreUsage=[vim.vm.StorageInfo.UsageOnDatastore(
+                    datastore=vim.Datastore(record['datastore']), committed=committed,
+                    uncommitted=uncommitted, unshared=committed)],
+                timestamp=self.now
+            ), self.now)
+
+        if name == 'summary':
+            return complete(vim.vm.Summary(
+                vm=vim.VirtualMachine(record['moid']), runtime=runtime,
+                guest=vim.vm.Summary.GuestSummary(
+                    guestId=record['guest_id'], guestFullName=record['guest_name'], toolsStatus=tools_status,
+                    toolsVersionStatus=tools_version_status, toolsVersionStatus2=tools_version_status,
+                    toolsRunningStatus=tools_running,
+                    hostName=record['name'] if tools_running == 'guestToolsRunning' else None,
+                    ipAddress=record['ip'] if tools_running == 'guestToolsRunning' else None),
+                config=vim.vm.Summary.ConfigSummary(
+                    name=record['name'], template=record['template'], vmPathName=vm_path,
+                    memorySizeMB=record['memory_mb'], numCpu=record['num_cpu'], numEthernetCards=1,
+                    numVirtualDisks=len(record['disks']), uuid=record['uuid'],
+                    instanceUuid=record['instance_uuid'], guestId=record['guest_id'],
+                    guestFullName=record['guest_name']),
+                storage=vim.vm.Summary.StorageSummary(committed=committed, uncommitted=uncommitted,
+                                                      unshared=committed, timestamp=self.now),
+                quickStats=vim.vm.Summary.QuickStats(
+                    overallCpuUsage=100 if powered_on else 0,
+                    guestMemoryUsage=record['memory_mb'] // 4 if powered_on else 0,
+                    guestHeartbeatStatus='green' if tools_running == 'guestToolsRunning' else 'gray'),
+                overallStatus='green'
+            ), self.now)
+
+        return self._common(record, name)
+
+    # ------------------------------------------------------------------
+    # Datastore browser
+    # ------------------------------------------------------------------
+
+    def datastore_listing(self, datastore_id):
+        """
+        All files on a datastore grouped by folder
+
+        Returns:
+            dict: folder name (e.g. 'vm-00001/') -> list of file dicts (relative names)
+        """
+        record = self.objects[datastore_id]
+        listing = {}
+        for folder, vm_id in record['folders'].items():
+            entries = listing.setdefault(folder, [])
+            if vm_id:
+                for entry in self.vm_files(self.objects[vm_id]):
+                    relative = dict(entry)
+                    relative['name'] = entry['name'].split('/', 1)[1]
+                    entries.append(relative)
+        for orphan in record.get('orphans', []):
+            listing.setdefault(orphan['folder'], []).extend([
+                {'name': f'{orphan["base"]}.vmdk', 'size': 612, 'type': 'diskDescriptor',
+                 'modified': orphan['modified'], 'orphan': orphan},
+                {'name': f'{orphan["base"]}-flat.vmdk', 'size': orphan['used'], 'type': 'diskExtent',
+                 'modified': orphan['modified'], 'orphan': orphan}
+            ])
+        return listing
+
+    def search_datastore(self, datastore_id, datastore_path, search_spec, recursive):
+        """
+        Run a datastore browser search
+
+        Args:
+            datastore_id (str): moid of the datastore
+            datastore_path (str): '[name]' or '[name] folder/'
+            search_spec (vim.host.DatastoreBrowser.SearchSpec): Search specification
+            recursive (bool): SearchDatastoreSubFolders (True) or SearchDatastore (False)
+
+        Returns:
+            list or HostDatastoreBrowserSearchResults
+        """
+        record = self.objects[datastore_id]
+        prefix = f'[{record["name"]}]'
+        sub_path = datastore_path[len(prefix):].strip() if datastore_path.startswith(prefix) else ''
+        if sub_path and not sub_path.endswith('/'):
+            sub_path += '/'
+
+        listing = self.datastore_listing(datastore_id)
+        patterns = list(search_spec.matchPattern or []) or ['*']
+        case_insensitive = search_spec.searchCaseInsensitive
+        details = search_spec.details
+        query_kinds = [QUERY_TYPES.get(type(query), 'file') for query in (search_spec.query or [])]
+
+        def matches(name):
+            if case_insensitive:
+                return any(fnmatch.fnmatch(name.lower(), pattern.lower()) for pattern in patterns)
+            return any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)
+
+        def disk_info(entry, files, folder):
+            """Disk descriptor as VmDiskFileInfo, extents are folded into it"""
+            if 'orphan' in entry:
+                chain_files = [f for f in files if f.get('orphan') is entry['orphan'] and f['type'] == 'diskExtent']
+                disk = {'capacity': entry['orphan']['capacity'], 'thin': False}
+            else:
+                chain_files = [f for f in files if f.get('disk') == entry['disk']
+                               and f.get('chain') == entry['chain'] and f['type'] == 'diskExtent']
+                vm = self.objects[record['folders'][folder]]
+                disk = next(disk for disk in vm['disks'] if disk['key'] == entry['disk'])
+            size = entry['size'] + sum(f['size'] for f in chain_files)
+            info = vim.host.DatastoreBrowser.VmDiskInfo(path=entry['name'])
+            disk_query = next((q for q in search_spec.query or []
+                               if isinstance(q, vim.host.DatastoreBrowser.VmDiskQuery)), None)
+            disk_details = disk_query.details if disk_query else None
+            if disk_details:
+                if disk_details.diskType:
+                    info.diskType = 'vim.vm.device.VirtualDisk.FlatVer2BackingInfo' if entry.get('chain', 0) == 0 \
+                        else 'vim.vm.device.VirtualDisk.SeSparseBackingInfo'
+                if disk_details.capacityKb:
+                    info.capacityKb = disk['capacity'] // 1024
+                if disk_details.hardwareVersion:
+                    info.hardwareVersion = 19
+                if disk_details.diskExtents:
+                    info.diskExtents = [f['name'] for f in chain_files]
+                if disk_details.thin:
+                    info.thin = disk['thin']
+            return info, size
+
+        def folder_results(folder):
+            files = listing.get(folder, [])
+            found = []
+            for entry in files:
+                if entry['type'] == 'ctk':
+                    kind = 'file'
+                elif entry['type'] == 'diskDescriptor':
+                    kind = 'disk'
+                elif entry['type'] == 'diskExtent':
+                    kind = 'extent'
+                elif entry['name'].endswith('.vmtx'):
+                    kind = 'template'
+                else:
+                    kind = {'config': 'config', 'log': 'log', 'nvram': 'nvram',
+                            'snapshotData': 'snapshot'}.get(entry['type'], 'file')
+
+                if not matches(entry['name']):
+                    continue
+
+                if query_kinds:
+                    if kind == 'extent':
+                        # Extents gehören zur Disk und werden bei typisierten Abfragen nicht einzeln gelistet
+                        continue
+                    if kind not in query_kinds and 'file' not in query_kinds:
+                        continue
+
+                if query_kinds and kind == 'disk' and 'disk' in query_kinds:
+                    info, size = disk_info(entry, files, folder)
+                else:
+                    info, size = vim.host.DatastoreBrowser.FileInfo(path=entry['name']), entry['size']
+
+                if details is None or details.fileSize:
+                    info.fileSize = size
+                if details is None or details.modification:
+                    info.modification = entry['modified']
+                if details is not None and details.fileOwner:
+                    info.owner = 'root'
+                if details is not None and details.fileType and type(info) is vim.host.DatastoreBrowser.FileInfo:
+                    info.friendlyName = entry['name']
+                found.append(info)
+            return vim.host.DatastoreBrowser.SearchResults(
+                datastore=vim.Datastore(datastore_id),
+                folderPath=f'{prefix} {folder}' if folder else prefix,
+                file=found
+            )
+
+        if not recursive:
+            folder = sub_path
+            result = folder_results(folder) if folder else vim.host.DatastoreBrowser.SearchResults(
+                datastore=vim.Datastore(datastore_id), folderPath=prefix, file=[])
+            if not folder and (not query_kinds or 'folder' in query_kinds):
+                for name in sorted(listing):
+                    if matches(name.rstrip('/')):
+                        result.file.append(vim.host.DatastoreBrowser.FolderInfo(path=name.rstrip('/')))
+            return result
+
+        results = [vim.host.DatastoreBrowser.SearchResults(datastore=vim.Datastore(datastore_id),
+                                                           folderPath=prefix, file=[])] if not sub_path else []
+        for folder in sorted(listing):
+            if folder.startswith(sub_path):
+                results.append(folder_results(folder))
+        return results
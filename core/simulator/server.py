@@ -0,0 +1,921 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SOAP front end of the vCenter simulator
+
+Implements the subset of the vSphere API the reporter uses (service content,
+login, container views, PropertyCollector retrieval and update filters,
+datastore browser tasks) on top of a SyntheticInventory. Requests are
+deserialized and responses serialized with pyVmomi itself, so the wire format
+matches what the collectors see against a real vCenter.
+"""
+
+import re
+import ssl
+import gzip
+import json
+import time
+import uuid
+import logging
+import datetime
+import threading
+from collections import deque
+from xml.parsers import expat
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pyVmomi import vim, vmodl, VmomiSupport, SoapAdapter
+
+from core.simulator.inventory import complete
+
+logger = logging.getLogger(__name__)
+
+API_VERSION = '8.0.3.0'
+DEFAULT_VERSION = VmomiSupport.versionMap[f'vim25/{API_VERSION}']
+
+SERVICE_VERSIONS_XML = f"""<?xml version="1.0" encoding="UTF-8" ?>
+<namespaces version="1.0">
+ <namespace>
+  <name>urn:vim25</name>
+  <version>{API_VERSION}</version>
+  <priorVersions>
+   <version>8.0.0.0</version>
+   <version>7.0.3.0</version>
+   <version>7.0.0.0</version>
+   <version>6.7</version>
+  </priorVersions>
+ </namespace>
+</namespaces>
+"""
+
+PARAM_NAMESPACES = (b' xmlns="urn:vim25" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"'
+                    b' xmlns:xsd="http://www.w3.org/2001/XMLSchema"')
+COOKIE_PATTERN = re.compile(r'vmware_soap_session="?([^";]+)')
+
+# Singletons of the service instance and the object type they are reported as
+SERVICE_OBJECTS = {
+    'ServiceInstance': vim.ServiceInstance,
+    'propertyCollector': vmodl.query.PropertyCollector,
+    'ViewManager': vim.view.ViewManager,
+    'SessionManager': vim.SessionManager,
+    'TaskManager': vim.TaskManager,
+    'SearchIndex': vim.SearchIndex
+}
+
+# Property accessor used by pyVmomi for lazy property reads (result type depends on the property)
+FETCH_METHOD = VmomiSupport.Object(name='Fetch', wsdlName='Fetch', result=object,
+                                   params=(VmomiSupport.Object(name='prop', type=str, flags=0),))
+
+# Methods that can be called without a session
+ANONYMOUS_METHODS = ('RetrieveServiceContent', 'Login', 'Fetch', 'CurrentTime')
+
+class SoapFault(Exception):
+    """A vmodl fault to be returned to the client"""
+
+    def __init__(self, fault):
+        super().__init__(fault.msg or type(fault).__name__)
+        self.fault = fault
+
+def _fault(fault_type, message, **fields):
+    """Create a SoapFault with the given vmodl fault type"""
+    fault = fault_type(**fields)
+    fault.msg = message
+    return SoapFault(fault)
+
+def parse_request(body):
+    """
+    Split a SOAP request into method, target and parameter fragments
+
+    Args:
+        body (bytes): Request body
+
+    Returns:
+        tuple: (method wsdl name, (_this type, _this moid), [(param name, xml fragment)])
+    """
+    parser = expat.ParserCreate()
+    state = {'depth': 0, 'method': None, 'this': None, 'start': None, 'tag': None, 'text': []}
+    params = []
+
+    def start_element(tag, attrs):
+        state['depth'] += 1
+        if state['depth'] == 3:
+            state['method'] = tag.split(':')[-1]
+        elif state['depth'] == 4:
+            state['start'] = parser.CurrentByteIndex
+            state['tag'] = tag
+            state['attrs'] = attrs
+            state['text'] = []
+
+    def end_element(tag):
+        if state['depth'] == 4:
+            name = tag.split(':')[-1]
+            if name == '_this':
+                state['this'] = (state['attrs'].get('type'), ''.join(state['text']).strip())
+            else:
+                start = state['start']
+                end = parser.CurrentByteIndex
+                if body[end:end + 2] == b'</':
+                    end = body.index(b'>', end) + 1
+                else:
+                    # <tag/> ohne Inhalt
+                    end = body.index(b'>', start) + 1
+                fragment = body[start:end]
+                tag_end = 1 + len(state['tag'].encode('utf-8'))
+                params.append((name, fragment[:tag_end] + PARAM_NAMESPACES + fragment[tag_end:]))
+        state['depth'] -= 1
+
+    def character_data(data):
+        if state['depth'] == 4:
+            state['text'].append(data)
+
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+    parser.CharacterDataHandler = character_data
+    parser.Parse(body, True)
+    return state['method'], state['this'], params
+
+def find_method(mo_type, wsdl_name):
+    """Find the method info of a managed object type by its wsdl name"""
+    for cls in mo_type.__mro__:
+        for info in getattr(cls, '_methodInfo', {}).values():
+            if info.wsdlName == wsdl_name:
+                return info
+    return None
+
+class SimulatorServer:
+    """vCenter SOAP endpoint backed by a synthetic inventory"""
+
+    def __init__(self, inventory, host='127.0.0.1', port=8989, latency_ms=0.0, latency_per_object_us=0.0,
+                 task_seconds=0.0, use_gzip=True, certfile=None, keyfile=None, username=None, password=None):
+        """
+        Initialize the simulator
+
+        Args:
+            inventory (SyntheticInventory): Inventory to serve
+            host (str): Listen address
+            port (int): Listen port (0 picks a free port)
+            latency_ms (float): Fixed latency added to every SOAP request
+            latency_per_object_us (float): Additional latency per returned object or file
+            task_seconds (float): Time until datastore search tasks complete
+            use_gzip (bool): Compress responses for clients that accept gzip
+            certfile (str): TLS certificate, serves https if given
+            keyfile (str): TLS private key
+            username (str): Accepted user name (any user if None)
+            password (str): Accepted password (any non-empty password if None)
+        """
+        self.inventory = inventory
+        self.latency_ms = latency_ms
+        self.latency_per_object_us = latency_per_object_us
+        self.task_seconds = task_seconds
+        self.use_gzip = use_gzip
+        self.username = username
+        self.password = password
+
+        self.sessions = {}
+        self.views = {}
+        self.tasks = {}
+        self.filters = {}
+        self.collectors = {}
+        self.continuations = {}
+        self._lock = threading.Lock()
+        self._counter = 0
+        self.reset_stats()
+
+        self.httpd = ThreadingHTTPServer((host, port), _RequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.simulator = self
+        self.scheme = 'http'
+        if certfile:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile, keyfile)
+            self.httpd.socket = context.wrap_socket(self.httpd.socket, server_side=True)
+            self.scheme = 'https'
+        self._thread = None
+
+    @property
+    def host(self):
+        return self.httpd.server_address[0]
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    @property
+    def url(self):
+        return f"{self.scheme}://{self.host}:{self.port}/sdk"
+
+    def start(self):
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='vcsim', daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve in the calling thread until interrupted"""
+        self.httpd.serve_forever()
+
+    def stop(self):
+        """Stop serving and close the listening socket"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    # ------------------------------------------------------------------
+    # Statistics
+    # ------------------------------------------------------------------
+
+    def reset_stats(self):
+        """Reset the per-method request statistics"""
+        with self._lock:
+            self.stats = {'requests': 0, 'request_bytes': 0, 'response_bytes': 0, 'methods': {}}
+
+    def get_stats(self):
+        """Copy of the request statistics"""
+        with self._lock:
+            return json.loads(json.dumps(self.stats))
+
+    def _record(self, method, request_bytes, response_bytes, objects, seconds):
+        with self._lock:
+            self.stats['requests'] += 1
+            self.stats['request_bytes'] += request_bytes
+            self.stats['response_bytes'] += response_bytes
+            entry = self.stats['methods'].setdefault(method, {
+                'calls': 0, 'request_bytes': 0, 'response_bytes': 0, 'objects': 0, 'seconds': 0.0})
+            entry['calls'] += 1
+            entry['request_bytes'] += request_bytes
+            entry['response_bytes'] += response_bytes
+            entry['objects'] += objects
+            entry['seconds'] += seconds
+
+    # ------------------------------------------------------------------
+    # SOAP dispatch
+    # ------------------------------------------------------------------
+
+    def handle_soap(self, body, soap_action, cookie_header):
+        """
+        Process one SOAP request
+
+        Returns:
+            tuple: (HTTP status, response body, session cookie to set or None)
+        """
+        start = time.monotonic()
+        version = self._version(soap_action)
+        method = 'unknown'
+        session = self._session(cookie_header)
+        new_cookie = None
+        objects = 0
+
+        try:
+            method, this, raw_params = parse_request(body)
+            this_type, this_moid = this or ('ServiceInstance', 'ServiceInstance')
+            mo_type = VmomiSupport.GetWsdlType('urn:vim25', this_type)
+            info = FETCH_METHOD if method == 'Fetch' else find_method(mo_type, method)
+            if info is None:
+                raise _fault(vmodl.fault.MethodNotFound, f"Method {method} not found",
+                             receiver=mo_type(this_moid), method=method)
+            params = self._deserialize_params(info, raw_params)
+
+            if session is None and method not in ANONYMOUS_METHODS:
+                raise _fault(vim.fault.NotAuthenticated, "The session is not authenticated.",
+                             object=mo_type(this_moid), privilegeId='System.View')
+
+            handler = getattr(self, f'_m_{method}', None)
+            if handler is None:
+                raise _fault(vmodl.fault.MethodNotFound, f"Method {method} is not simulated",
+                             receiver=mo_type(this_moid), method=method)
+
+            result = handler(session, this_moid, **params)
+            if method == 'Login':
+                session, result = result
+                new_cookie = session['key']
+            elif method == 'Logout':
+                new_cookie = ''
+
+            result_type = info.result
+            if method == 'Fetch':
+                result_type = self._fetch_type(this_moid, params['prop'])
+            objects = self._count_objects(result)
+            payload = self._serialize_response(method, result, result_type, version)
+            status = 200
+
+        except SoapFault as e:
+            payload = self._serialize_fault(e.fault, version)
+            status = 500
+        except Exception as e:
+            logger.exception(f"Simulator error in {method}")
+            fault = vmodl.fault.SystemError(reason=str(e))
+            fault.msg = str(e)
+            payload = self._serialize_fault(fault, version)
+            status = 500
+
+        delay = self.latency_ms / 1000.0 + objects * self.latency_per_object_us / 1000000.0
+        if delay > 0:
+            time.sleep(delay)
+
+        self._record(method, len(body), len(payload), objects, time.monotonic() - start)
+        return status, payload, new_cookie
+
+    def _version(self, soap_action):
+        """vmodl version requested by the client (SOAPAction: urn:vim25/8.0.3.0)"""
+        action = (soap_action or '').strip('"')
+        if action.startswith('urn:'):
+            return VmomiSupport.versionMap.get(action[4:], DEFAULT_VERSION)
+        return DEFAULT_VERSION
+
+    def _session(self, cookie_header):
+        match = COOKIE_PATTERN.search(cookie_header or '')
+        if not match:
+            return None
+        with self._lock:
+            session = self.sessions.get(match.group(1))
+            if session:
+                session['info'].lastActiveTime = datetime.datetime.now(datetime.timezone.utc)
+                session['info'].callCount = (session['info'].callCount or 0) + 1
+            return session
+
+    def _deserialize_params(self, info, raw_params):
+        """Deserialize the parameter fragments with pyVmomi"""
+        param_info = {param.name: param for param in info.params}
+        params = {}
+        for name, fragment in raw_params:
+            param = param_info.get(name)
+            if param is None:
+                raise _fault(vmodl.fault.InvalidRequest, f"Unexpected parameter {name}")
+            if issubclass(param.type, list):
+                params.setdefault(name, param.type()).append(SoapAdapter.Deserialize(fragment, param.type.Item))
+            else:
+                params[name] = SoapAdapter.Deserialize(fragment, param.type)
+        return params
+
+    def _serialize_response(self, method, result, result_type, version):
+        ns_map = SoapAdapter.SOAP_NSMAP.copy()
+        ns_map['urn:vim25'] = ''
+        info = VmomiSupport.Object(name='returnval', type=result_type, version=version,
+                                   flags=VmomiSupport.F_OPTIONAL)
+        returnval = SoapAdapter.SerializeToStr(result, info, version, ns_map) if result is not None else ''
+        return ''.join([
+            SoapAdapter.XML_HEADER, '\n', SoapAdapter.SOAP_ENVELOPE_START, SoapAdapter.SOAP_BODY_START,
+            f'<{method}Response xmlns="urn:vim25">', returnval, f'</{method}Response>',
+            SoapAdapter.SOAP_BODY_END, SoapAdapter.SOAP_ENVELOPE_END
+        ]).encode('utf-8')
+
+    def _serialize_fault(self, fault, version):
+        ns_map = SoapAdapter.SOAP_NSMAP.copy()
+        ns_map['urn:vim25'] = ''
+        name = type(fault)._wsdlName
+        info = VmomiSupport.Object(name=f'{name}Fault', type=type(fault), version=version, flags=0)
+        detail = SoapAdapter.SerializeFaultDetail(fault, info, version, ns_map)
+        message = SoapAdapter.XmlEscape(fault.msg or name)
+        return ''.join([
+            SoapAdapter.XML_HEADER, '\n', SoapAdapter.SOAP_ENVELOPE_START, SoapAdapter.SOAP_BODY_START,
+            '<soapenv:Fault><faultcode>ServerFaultCode</faultcode>',
+            f'<faultstring>{message}</faultstring><detail>{detail}</detail></soapenv:Fault>',
+            SoapAdapter.SOAP_BODY_END, SoapAdapter.SOAP_ENVELOPE_END
+        ]).encode('utf-8')
+
+    def _count_objects(self, result):
+        """Number of objects in a result, used for per-object latency and statistics"""
+        if isinstance(result, vmodl.query.PropertyCollector.RetrieveResult):
+            return len(result.objects)
+        if isinstance(result, vmodl.query.PropertyCollector.UpdateSet):
+            return sum(len(update.objectSet) for update in result.filterSet)
+        if isinstance(result, list):
+            return len(result)
+        return 1 if result is not None else 0
+
+    # ------------------------------------------------------------------
+    # Object model
+    # ------------------------------------------------------------------
+
+    def _next_id(self):
+        with self._lock:
+            self._counter += 1
+            return self._counter
+
+    def type_of(self, moid):
+        """vim type of any managed object known to the simulator"""
+        if moid in SERVICE_OBJECTS:
+            return SERVICE_OBJECTS[moid]
+        if moid in self.inventory.objects:
+            return self.inventory.type_of(moid)
+        if moid in self.views:
+            return vim.view.ContainerView
+        if moid in self.tasks:
+            return vim.Task
+        if moid in self.filters:
+            return vmodl.query.PropertyCollector.Filter
+        if moid in self.collectors:
+            return vmodl.query.PropertyCollector
+        raise _fault(vmodl.fault.ManagedObjectNotFound, f"The object '{moid}' has already been deleted "
+                     "or has not been completely created", obj=vim.ManagedEntity(moid))
+
+    def moref(self, moid):
+        return self.type_of(moid)(moid)
+
+    def get_property(self, session, moid, path):
+        """Resolve a property path on any managed object"""
+        mo_type = self.type_of(moid)
+        try:
+            if moid in self.inventory.objects:
+                return self.inventory.get_property(moid, path)
+
+            name, _, rest = path.partition('.')
+            value = self._service_property(session, moid, name)
+            for segment in rest.split('.') if rest else []:
+                if value is None:
+                    return None
+                value = getattr(value, segment)
+            return value
+        except (KeyError, AttributeError):
+            raise _fault(vmodl.query.InvalidProperty, f"{mo_type._wsdlName}.{path} is not a valid property",
+                         name=path)
+
+    def property_names(self, moid):
+        """Simulated properties of an object, used for 'all' in PropertySpec"""
+        if moid in self.inventory.objects:
+            return self.inventory.property_names(moid)
+        if moid in self.views:
+            return ['view', 'container', 'type', 'recursive']
+        if moid in self.tasks:
+            return ['info']
+        if moid in self.filters:
+            return ['spec', 'partialUpdates']
+        return []
+
+    def _service_property(self, session, moid, name):
+        if moid == 'ServiceInstance':
+            if name == 'content':
+                return self.service_content()
+            if name == 'serverClock':
+                return datetime.datetime.now(datetime.timezone.utc)
+        elif moid == 'SessionManager':
+            if name == 'currentSession':
+                return session['info'] if session else None
+            if name == 'sessionList':
+                with self._lock:
+                    return vim.UserSession.Array([s['info'] for s in self.sessions.values()])
+        elif moid == 'propertyCollector' or moid in self.collectors:
+            if name == 'filter':
+                return vmodl.query.PropertyCollector.Filter.Array(
+                    [vmodl.query.PropertyCollector.Filter(key) for key, value in self.filters.items()
+                     if session and value['session'] == session['key'] and value['collector'] == moid])
+        elif moid in self.views:
+            view = self.views[moid]
+            if name == 'view':
+                return vim.ManagedObject.Array([self.moref(m) for m in self._view_members(view)])
+            if name == 'container':
+                return self.moref(view['container'])
+            if name == 'type':
+                return [t._wsdlName for t in view['types']]
+            if name == 'recursive':
+                return view['recursive']
+        elif moid in self.tasks:
+            if name == 'info':
+                return self._task_info(moid)
+        elif moid in self.filters:
+            if name == 'spec':
+                return self.filters[moid]['spec']
+            if name == 'partialUpdates':
+                return self.filters[moid]['partial']
+
+        # Gültige Property ohne Simulation bleibt ungesetzt
+        self.type_of(moid)._GetPropertyInfo(name)
+        return None
+
+    def _fetch_type(self, moid, prop):
+        return self.type_of(moid)._GetPropertyInfo(prop).type
+
+    def service_content(self):
+        """ServiceInstanceContent of the simulated vCenter"""
+        inventory = self.inventory
+        about = vim.AboutInfo(
+            name='VMware vCenter Server', fullName=f'VMware vCenter Server {API_VERSION[:5]} build-24022515 (Simulator)',
+            vendor='VMware, Inc.', version=API_VERSION[:5], build='24022515', osType='linux-x64',
+            productLineId='vpx', apiType='VirtualCenter', apiVersion=API_VERSION,
+            instanceUuid=inventory.instance_uuid, licenseProductName='VMware VirtualCenter Server',
+            licenseProductVersion='8.0'
+        )
+        content = vim.ServiceInstanceContent(
+            rootFolder=vim.Folder(inventory.root_folder['moid']),
+            propertyCollector=vmodl.query.PropertyCollector('propertyCollector'),
+            viewManager=vim.view.ViewManager('ViewManager'),
+            sessionManager=vim.SessionManager('SessionManager'),
+            taskManager=vim.TaskManager('TaskManager'),
+            searchIndex=vim.SearchIndex('SearchIndex'),
+            about=about
+        )
+        return complete(content, inventory.now)
+
+    def _view_members(self, view):
+        """Objects of a container view"""
+        members = []
+        seen = set()
+        pending = deque(self.inventory.children(view['container']))
+        while pending:
+            moid = pending.popleft()
+            if moid in seen:
+                continue
+            seen.add(moid)
+            if not view['types'] or issubclass(self.inventory.type_of(moid), tuple(view['types'])):
+                members.append(moid)
+            if view['recursive']:
+                pending.extend(self.inventory.children(moid))
+        return members
+
+    # ------------------------------------------------------------------
+    # PropertyCollector
+    # ------------------------------------------------------------------
+
+    def evaluate(self, session, spec_set):
+        """
+        Evaluate FilterSpecs like the PropertyCollector
+
+        Returns:
+            list: (moid, [(path, value)]) for every selected object, in traversal order
+        """
+        results = []
+        seen = set()
+        for spec in spec_set:
+            named = {}
+            self._collect_named(spec.objectSet, named)
+
+            # dict als geordnete Menge: Traversierungsreihenfolge bleibt erhalten
+            selected = {}
+            for object_spec in spec.objectSet:
+                self._traverse(session, object_spec.obj._moId, object_spec.skip, object_spec.selectSet or [],
+                               named, set(), selected)
+
+            for moid in selected:
+                if moid in seen:
+                    continue
+                mo_type = self.type_of(moid)
+                prop_specs = [p for p in spec.propSet if issubclass(mo_type, p.type)]
+                if not prop_specs:
+                    continue
+                seen.add(moid)
+
+                values = []
+                for prop_spec in prop_specs:
+                    if prop_spec.all:
+                        paths = self.property_names(moid)
+                    else:
+                        paths = prop_spec.pathSet or []
+                    for path in paths:
+                        value = self.get_property(session, moid, path)
+                        if value is None or (isinstance(value, list) and len(value) == 0):
+                            continue
+                        if isinstance(value, list) and not isinstance(value, VmomiSupport.Array):
+                            value = self._path_type(mo_type, path)(value)
+                        values.append((path, value))
+                results.append((moid, values))
+        return results
+
+    def _path_type(self, mo_type, path):
+        """Declared type of a (dotted) property path"""
+        value_type = mo_type
+        for segment in path.split('.'):
+            if issubclass(value_type, list):
+                value_type = value_type.Item
+            value_type = value_type._GetPropertyInfo(segment).type
+        return value_type
+
+    def _collect_named(self, specs, named):
+        for spec in specs:
+            for select in getattr(spec, 'selectSet', None) or []:
+                if isinstance(select, vmodl.query.PropertyCollector.TraversalSpec) and select.name \
+                        and select.name not in named:
+                    named[select.name] = select
+                    self._collect_named([select], named)
+
+    def _traverse(self, session, moid, skip, select_set, named, visited, selected):
+        if not skip:
+            selected.setdefault(moid)
+
+        mo_type = self.type_of(moid)
+        for select in select_set:
+            if not isinstance(select, vmodl.query.PropertyCollector.TraversalSpec):
+                select = named.get(select.name)
+                if select is None:
+                    continue
+            if not issubclass(mo_type, select.type):
+                continue
+            key = (moid, select.name or id(select))
+            if key in visited:
+                continue
+            visited.add(key)
+
+            value = self.get_property(session, moid, select.path)
+            targets = value if isinstance(value, list) else [value]
+            for target in targets:
+                if isinstance(target, VmomiSupport.ManagedObject):
+                    self._traverse(session, target._moId, select.skip, select.selectSet or [], named,
+                                   visited, selected)
+
+    def _object_contents(self, results):
+        return [vmodl.query.PropertyCollector.ObjectContent(
+            obj=self.moref(moid),
+            propSet=[vmodl.DynamicProperty(name=path, val=value) for path, value in values]
+        ) for moid, values in results]
+
+    # ------------------------------------------------------------------
+    # Method handlers
+    # ------------------------------------------------------------------
+
+    def _m_RetrieveServiceContent(self, session, this):
+        return self.service_content()
+
+    def _m_CurrentTime(self, session, this):
+        return datetime.datetime.now(datetime.timezone.utc)
+
+    def _m_Login(self, session, this, userName, password, locale=None):
+        if not password or (self.username and userName != self.username) or \
+                (self.password and password != self.password):
+            raise _fault(vim.fault.InvalidLogin, "Cannot complete login due to an incorrect user name or password.")
+        now = datetime.datetime.now(datetime.timezone.utc)
+        info = vim.UserSession(key=str(uuid.uuid4()), userName=userName, fullName=userName,
+                               loginTime=now, lastActiveTime=now, locale=locale or 'en',
+                               messageLocale=locale or 'en', extensionSession=False, ipAddress='127.0.0.1',
+                               userAgent='pyvmomi', callCount=0)
+        new_session = {'key': info.key, 'info': info, 'update_version': 0}
+        with self._lock:
+            self.sessions[info.key] = new_session
+        return new_session, info
+
+    def _m_Logout(self, session, this):
+        with self._lock:
+            self.sessions.pop(session['key'], None)
+            for registry in (self.views, self.filters, self.collectors):
+                for key in [key for key, value in registry.items() if value['session'] == session['key']]:
+                    del registry[key]
+        return None
+
+    def _m_Fetch(self, session, this, prop):
+        if session is None and (this, prop) not in (('ServiceInstance', 'content'),
+                                                     ('SessionManager', 'currentSession')):
+            raise _fault(vim.fault.NotAuthenticated, "The session is not authenticated.",
+                         object=self.moref(this), privilegeId='System.View')
+        return self.get_property(session, this, prop)
+
+    def _m_CreateContainerView(self, session, this, container, type=None, recursive=False):
+        moid = f"session[{session['key']}]{uuid.uuid4()}"
+        self.type_of(container._moId)
+        with self._lock:
+            self.views[moid] = {'session': session['key'], 'container': container._moId,
+                                'types': list(type or []), 'recursive': recursive}
+        return vim.view.ContainerView(moid)
+
+    def _m_FindByInventoryPath(self, session, this, inventoryPath):
+        moid = self.inventory.find_by_path(inventoryPath)
+        return self.moref(moid) if moid else None
+
+    def _m_DestroyView(self, session, this):
+        with self._lock:
+            self.views.pop(this, None)
+        return None
+
+    def _m_RetrieveProperties(self, session, this, specSet):
+        return self._object_contents(self.evaluate(session, specSet))
+
+    def _m_RetrievePropertiesEx(self, session, this, specSet, options=None):
+        contents = self._object_contents(self.evaluate(session, specSet))
+        return self._page(session, contents, options.maxObjects if options else None)
+
+    def _m_ContinueRetrievePropertiesEx(self, session, this, token):
+        with self._lock:
+            entry = self.continuations.pop(token, None)
+        if entry is None or entry['session'] != session['key']:
+            raise _fault(vmodl.fault.InvalidArgument, "A specified parameter was not correct: token",
+                         invalidProperty='token')
+        return self._page(session, entry['objects'], entry['page_size'])
+
+    def _m_CancelRetrievePropertiesEx(self, session, this, token):
+        with self._lock:
+            self.continuations.pop(token, None)
+        return None
+
+    def _page(self, session, contents, page_size):
+        if not contents:
+            return None
+        if not page_size or len(contents) <= page_size:
+            return vmodl.query.PropertyCollector.RetrieveResult(objects=contents)
+        token = str(self._next_id())
+        with self._lock:
+            self.continuations[token] = {'session': session['key'], 'objects': contents[page_size:],
+                                         'page_size': page_size}
+        return vmodl.query.PropertyCollector.RetrieveResult(objects=contents[:page_size], token=token)
+
+    def _m_CreatePropertyCollector(self, session, this):
+        moid = f"session[{session['key']}]propertyCollector-{self._next_id()}"
+        with self._lock:
+            self.collectors[moid] = {'session': session['key']}
+        return vmodl.query.PropertyCollector(moid)
+
+    def _m_DestroyPropertyCollector(self, session, this):
+        # Mit dem Collector verschwinden auch seine Filter
+        with self._lock:
+            self.collectors.pop(this, None)
+            for key in [key for key, value in self.filters.items() if value['collector'] == this]:
+                del self.filters[key]
+        return None
+
+    def _m_CreateFilter(self, session, this, spec, partialUpdates):
+        moid = f"session[{session['key']}]filter-{self._next_id()}"
+        with self._lock:
+            self.filters[moid] = {'session': session['key'], 'collector': this, 'spec': spec,
+                                  'partial': partialUpdates, 'known': None}
+        return vmodl.query.PropertyCollector.Filter(moid)
+
+    def _m_DestroyPropertyFilter(self, session, this):
+        with self._lock:
+            self.filters.pop(this, None)
+        return None
+
+    def _m_CheckForUpdates(self, session, this, version=None):
+        return self._wait_for_updates(session, this, version, 0)
+
+    def _m_WaitForUpdates(self, session, this, version=None):
+        return self._wait_for_updates(session, this, version, None)
+
+    def _m_WaitForUpdatesEx(self, session, this, version=None, options=None):
+        max_wait = options.maxWaitSeconds if options else None
+        return self._wait_for_updates(session, this, version, max_wait)
+
+    def _wait_for_updates(self, session, collector, version, max_wait):
+        """Block until one of the collector's filters reports a change"""
+        deadline = None if max_wait is None else time.monotonic() + max_wait
+        while True:
+            filter_updates = [update for update in (
+                self._filter_update(session, moid, entry)
+                for moid, entry in list(self.filters.items())
+                if entry['session'] == session['key'] and entry['collector'] == collector)
+                if update is not None]
+            if filter_updates or not version:
+                session['update_version'] += 1
+                return vmodl.query.PropertyCollector.UpdateSet(version=str(session['update_version']),
+                                                               filterSet=filter_updates)
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(0.05)
+
+    def _filter_update(self, session, moid, entry):
+        """Changes of one filter since the last reported state"""
+        current = {}
+        values_by_object = {}
+        for object_moid, values in self.evaluate(session, [entry['spec']]):
+            values_by_object[object_moid] = dict(values)
+            current[object_moid] = {path: self._fingerprint(value) for path, value in values}
+
+        known = entry['known'] or {}
+        object_updates = []
+        for object_moid, fingerprints in current.items():
+            previous = known.get(object_moid)
+            if previous is None:
+                kind = 'enter'
+                changed = list(fingerprints)
+            else:
+                kind = 'modify'
+                changed = [path for path, fp in fingerprints.items() if previous.get(path) != fp]
+            removed = [path for path in (previous or {}) if path not in fingerprints]
+            if not changed and not removed and previous is not None:
+                continue
+            change_set = [vmodl.query.PropertyCollector.Change(name=path, op='assign',
+                                                               val=values_by_object[object_moid][path])
+                          for path in changed]
+            change_set.extend(vmodl.query.PropertyCollector.Change(name=path, op='assign') for path in removed)
+            object_updates.append(vmodl.query.PropertyCollector.ObjectUpdate(
+                kind=kind, obj=self.moref(object_moid), changeSet=change_set))
+        for object_moid in known:
+            if object_moid not in current:
+                object_updates.append(vmodl.query.PropertyCollector.ObjectUpdate(
+                    kind='leave', obj=vim.ManagedEntity(object_moid)))
+
+        entry['known'] = current
+        if not object_updates:
+            return None
+        return vmodl.query.PropertyCollector.FilterUpdate(filter=vmodl.query.PropertyCollector.Filter(moid),
+                                                          objectSet=object_updates)
+
+    def _fingerprint(self, value):
+        return SoapAdapter.SerializeToStr(value, VmomiSupport.Object(name='v', type=object, version=DEFAULT_VERSION,
+                                                                     flags=0), DEFAULT_VERSION)
+
+    # ------------------------------------------------------------------
+    # Datastore browser and tasks
+    # ------------------------------------------------------------------
+
+    def _search(self, session, this, datastorePath, searchSpec, recursive):
+        record = self.inventory.objects.get(this)
+        if record is None or record['kind'] != 'browser':
+            self.type_of(this)
+            raise _fault(vmodl.fault.InvalidArgument, "Not a datastore browser", invalidProperty='_this')
+        datastore = self.inventory.objects[record['datastore']]
+        if not datastorePath.startswith(f"[{datastore['name']}]"):
+            raise _fault(vim.fault.FileNotFound, f"File {datastorePath} was not found", file=datastorePath)
+        if not self.inventory.objects[datastore['moid']]['accessible']:
+            raise _fault(vim.fault.InaccessibleDatastore, f"Datastore {datastore['name']} is not accessible",
+                         datastore=vim.Datastore(datastore['moid']), name=datastore['name'])
+
+        result = self.inventory.search_datastore(datastore['moid'], datastorePath, searchSpec, recursive)
+        if recursive:
+            result = vim.host.DatastoreBrowser.SearchResults.Array(result)
+
+        moid = f'task-{self._next_id()}'
+        now = datetime.datetime.now(datetime.timezone.utc)
+        with self._lock:
+            self.tasks[moid] = {
+                'session': session['key'],
+                'method': 'SearchDatastoreSubFolders_Task' if recursive else 'SearchDatastore_Task',
+                'entity': datastore['moid'],
+                'result': result,
+                'queued': now,
+                'started': time.monotonic()
+            }
+        return vim.Task(moid)
+
+    def _m_SearchDatastore_Task(self, session, this, datastorePath, searchSpec=None):
+        return self._search(session, this, datastorePath, searchSpec or vim.host.DatastoreBrowser.SearchSpec(),
+                            False)
+
+    def _m_SearchDatastoreSubFolders_Task(self, session, this, datastorePath, searchSpec=None):
+        return self._search(session, this, datastorePath, searchSpec or vim.host.DatastoreBrowser.SearchSpec(),
+                            True)
+
+    def _task_info(self, moid):
+        task = self.tasks[moid]
+        elapsed = time.monotonic() - task['started']
+        done = elapsed >= self.task_seconds
+        entity = self.inventory.objects[task['entity']]
+        info = vim.TaskInfo(
+            key=moid, task=vim.Task(moid), descriptionId=f"HostDatastoreBrowser.{task['method'][:-5]}",
+            entity=vim.Datastore(entity['moid']), entityName=entity['name'],
+            state='success' if done else 'running', cancelable=True, cancelled=False,
+            reason=vim.TaskReasonUser(userName='simulator'), queueTime=task['queued'],
+            startTime=task['queued'], eventChainId=int(moid.split('-')[1])
+        )
+        if done:
+            info.result = task['result']
+            info.progress = 100
+            info.completeTime = task['queued'] + datetime.timedelta(seconds=self.task_seconds)
+        else:
+            info.progress = int(100 * elapsed / self.task_seconds)
+        return info
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """HTTP/1.1 keep-alive handler for the SOAP endpoint"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'VMware-vCenter-Simulator'
+    # Header und Body gehen getrennt raus, ohne TCP_NODELAY kostet jede Antwort ~40 ms Delayed-ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+    def _send(self, status, body, content_type, extra_headers=None):
+        simulator = self.server.simulator
+        if simulator.use_gzip and len(body) > 512 and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body, compresslevel=1)
+            extra_headers = dict(extra_headers or {}, **{'Content-Encoding': 'gzip'})
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        simulator = self.server.simulator
+        if self.path == '/sdk/vimServiceVersions.xml':
+            self._send(200, SERVICE_VERSIONS_XML.encode('utf-8'), 'text/xml; charset=utf-8')
+        elif self.path == '/stats':
+            self._send(200, json.dumps(simulator.get_stats()).encode('utf-8'), 'application/json')
+        else:
+            self._send(404, b'Not Found', 'text/plain')
+
+    def do_POST(self):
+        simulator = self.server.simulator
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+
+        if self.path == '/stats/reset':
+            simulator.reset_stats()
+            self._send(204, b'', 'text/plain')
+            return
+        if self.path != '/sdk':
+            self._send(404, b'Not Found', 'text/plain')
+            return
+
+        status, payload, cookie = simulator.handle_soap(body, self.headers.get('SOAPAction'),
+                                                        self.headers.get('Cookie'))
+        headers = {}
+        if cookie is not None:
+            headers['Set-Cookie'] = f'vmware_soap_session="{cookie}"; Path=/; HttpOnly'
+        self._send(status, payload, 'text/xml; charset=utf-8', headers)
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SOAP round-trip instrumentation for pyVmomi stubs
+
+SoapMetrics wraps the stub of a connected service instance and records every
+SOAP call: calls, errors, bytes sent and received and a latency histogram per
+managed method and per collector section. Lazy property reads are recorded as
+"Fetch <Type>.<property>", so a collector dereferencing vm.summary for every
+VM shows up as thousands of "Fetch VirtualMachine.summary" calls.
+
+    metrics = SoapMetrics()
+    metrics.instrument(service_instance._stub)
+    with metrics.section('vms'):
+        collect_vms()
+    metrics.log_summary()
+    metrics.write('metrics.json')
+"""
+
+import json
+import time
+import logging
+import datetime
+import threading
+from http.client import HTTPResponse
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the latency histogram buckets in milliseconds (plus one overflow bucket)
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+_local = threading.local()
+
+def _new_entry():
+    return {
+        'calls': 0,
+        'errors': 0,
+        'seconds': 0.0,
+        'max_seconds': 0.0,
+        'request_bytes': 0,
+        'response_bytes': 0,
+        'histogram': [0] * (len(LATENCY_BUCKETS_MS) + 1)
+    }
+
+def _add(entry, seconds, request_bytes, response_bytes, error):
+    entry['calls'] += 1
+    entry['errors'] += 1 if error else 0
+    entry['seconds'] += seconds
+    entry['max_seconds'] = max(entry['max_seconds'], seconds)
+    entry['request_bytes'] += request_bytes
+    entry['response_bytes'] += response_bytes
+    milliseconds = seconds * 1000
+    for index, bound in enumerate(LATENCY_BUCKETS_MS):
+        if milliseconds <= bound:
+            entry['histogram'][index] += 1
+            break
+    else:
+        entry['histogram'][-1] += 1
+
+def percentile(entry, fraction):
+    """
+    Estimate a latency percentile from the histogram of an entry
+
+    Returns:
+        float: Upper bound of the bucket in milliseconds (None without calls)
+    """
+    if not entry['calls']:
+        return None
+    rank = fraction * entry['calls']
+    seen = 0
+    for index, count in enumerate(entry['histogram']):
+        seen += count
+        if seen >= rank:
+            if index < len(LATENCY_BUCKETS_MS):
+                return float(LATENCY_BUCKETS_MS[index])
+            break
+    return round(entry['max_seconds'] * 1000, 1)
+
+class _CountingFile:
+    """Socket file wrapper counting the bytes read for the current call"""
+
+    def __init__(self, fp):
+        self._fp = fp
+
+    def _count(self, data):
+        _local.response_bytes = getattr(_local, 'response_bytes', 0) + len(data)
+        return data
+
+    def read(self, *args):
+        return self._count(self._fp.read(*args))
+
+    def read1(self, *args):
+        return self._count(self._fp.read1(*args))
+
+    def readline(self, *args):
+        return self._count(self._fp.readline(*args))
+
+    def readinto(self, buffer):
+        count = self._fp.readinto(buffer)
+        _local.response_bytes = getattr(_local, 'response_bytes', 0) + (count or 0)
+        return count
+
+    def __getattr__(self, name):
+        return getattr(self._fp, name)
+
+class _CountingResponse(HTTPResponse):
+    """HTTPResponse that counts the bytes received on the wire"""
+
+    def __init__(self, sock, *args, **kwargs):
+        super().__init__(sock, *args, **kwargs)
+        self.fp = _CountingFile(self.fp)
+
+class SoapMetrics:
+    """Thread-safe SOAP call statistics"""
+
+    def __init__(self):
+        """Initialize empty statistics"""
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Discard all recorded calls"""
+        with self._lock:
+            self.started = datetime.datetime.now()
+            self.total = _new_entry()
+            self.methods = {}
+            self.sections = {}
+
+    @contextmanager
+    def section(self, name):
+        """Attribute the calls of the current thread to a collector section"""
+        previous = getattr(_local, 'section', None)
+        _local.section = name
+        try:
+            yield self
+        finally:
+            _local.section = previous
+
+    def instrument(self, stub):
+        """
+        Record all calls made through a pyVmomi SoapStubAdapter
+
+        Instrumenting the same stub again has no effect.
+
+        Args:
+            stub (SoapStubAdapter): Stub of a service instance (service_instance._stub)
+        """
+        if getattr(stub, '_soap_metrics', None) is self:
+            return
+        stub._soap_metrics = self
+
+        invoke_method = stub.InvokeMethod
+        get_connection = stub.GetConnection
+        metrics = self
+
+        def count_request(request):
+            _local.request_bytes = len(request)
+            return request
+
+        def instrumented_get_connection():
+            conn = get_connection()
+            conn.response_class = _CountingResponse
+            return conn
+
+        def instrumented_invoke_method(mo, info, args, *rest, **kwargs):
+            if info.wsdlName == 'Fetch':
+                label = f"Fetch {type(mo)._wsdlName}.{info.name}"
+            else:
+                label = info.wsdlName
+            _local.request_bytes = 0
+            _local.response_bytes = 0
+            start = time.perf_counter()
+            error = False
+            try:
+                result = invoke_method(mo, info, args, *rest, **kwargs)
+                # Mit outerStub liefert der Stub (status, obj) statt einer Exception
+                if isinstance(result, tuple) and len(result) == 2 and result[0] == 500:
+                    error = True
+                return result
+            except Exception:
+                error = True
+                raise
+            finally:
+                metrics.record(label, time.perf_counter() - start, _local.request_bytes,
+                               _local.response_bytes, error)
+
+        stub.requestModifierList.append(count_request)
+        stub.GetConnection = instrumented_get_connection
+        stub.InvokeMethod = instrumented_invoke_method
+        # Bereits geöffnete Verbindungen zählen erst nach dem nächsten Aufbau mit
+        stub.DropConnections()
+
+    def record(self, method, seconds, request_bytes=0, response_bytes=0, error=False, section=None):
+        """Record one SOAP call"""
+        section = section or getattr(_local, 'section', None)
+        with self._lock:
+            _add(self.total, seconds, request_bytes, response_bytes, error)
+            _add(self.methods.setdefault(method, _new_entry()), seconds, request_bytes, response_bytes, error)
+            if section:
+                entry = self.sections.setdefault(section, {'total': _new_entry(), 'methods': {}})
+                _add(entry['total'], seconds, request_bytes, response_bytes, error)
+                entry['methods'][method] = entry['methods'].get(method, 0) + 1
+
+    def summary(self):
+        """
+        Statistics as a JSON-serializable dictionary
+
+        Returns:
+            dict: Totals, per-method and per-section statistics with latency percentiles
+        """
+        def describe(entry):
+            result = dict(entry)
+            result['seconds'] = round(entry['seconds'], 4)
+            result['max_seconds'] = round(entry['max_seconds'], 4)
+            result['p50_ms'] = percentile(entry, 0.5)
+            result['p95_ms'] = percentile(entry, 0.95)
+            result['p99_ms'] = percentile(entry, 0.99)
+            return result
+
+        with self._lock:
+            return {
+                'started': self.started.isoformat(timespec='seconds'),
+                'finished': datetime.datetime.now().isoformat(timespec='seconds'),
+                'buckets_ms': list(LATENCY_BUCKETS_MS),
+                'total': describe(self.total),
+                'methods': {name: describe(entry) for name, entry in
+                            sorted(self.methods.items(), key=lambda item: -item[1]['calls'])},
+                'sections': {name: dict(describe(entry['total']), methods=dict(
+                    sorted(entry['methods'].items(), key=lambda item: -item[1])))
+                    for name, entry in self.sections.items()}
+            }
+
+    def log_summary(self, log=None, top=10):
+        """
+        Write the statistics to the log
+
+        Args:
+            log (logging.Logger): Logger to use (default: this module's logger)
+            top (int): Number of methods listed overall and per section
+        """
+        log = log or logger
+        summary = self.summary()
+        total = summary['total']
+        log.info(f"SOAP calls: {total['calls']} ({total['errors']} errors) in {total['seconds']:.1f}s, "
+                 f"sent {total['request_bytes'] / 1024:.0f} KB, received {total['response_bytes'] / 1024:.0f} KB, "
+                 f"p50 {total['p50_ms']} ms, p95 {total['p95_ms']} ms")
+
+        for name, section in summary['sections'].items():
+            methods = ', '.join(f"{method}={calls}" for method, calls in list(section['methods'].items())[:top])
+            log.info(f"SOAP section {name}: {section['calls']} calls in {section['seconds']:.1f}s, "
+                     f"received {section['response_bytes'] / 1024:.0f} KB ({methods})")
+
+        for name, entry in list(summary['methods'].items())[:top]:
+            log.info(f"SOAP method {name}: {entry['calls']} calls, {entry['seconds']:.2f}s, "
+                     f"p50 {entry['p50_ms']} ms, p95 {entry['p95_ms']} ms, max {entry['max_seconds'] * 1000:.0f} ms")
+
+    def write(self, path):
+        """Write the statistics as JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
+        logger.info(f"SOAP metrics written to: {path}")
@@ -8,15 +8,39 @@ VMware vSphere API client using pyVmomi
 import ssl
 import atexit
 import logging
-from pyVim.connect import SmartConnect, Disconnect
-from pyVmomi import vim
+from pyVim.connect import SmartConnect, SmartStubAdapter, Disconnect
+from pyVim.task import WaitForTask
+from pyVmomi import vim, vmodl
+
+from core.soap_metrics import SoapMetrics
 
 logger = logging.getLogger(__name__)
 
+# Objects per RetrievePropertiesEx page
+DEFAULT_PAGE_SIZE = 1000
+
+# Object types a collection can be scoped to (valid ContainerView roots)
+SCOPE_TYPES = (vim.Folder, vim.Datacenter, vim.ComputeResource, vim.ResourcePool, vim.HostSystem)
+
+# Types outside the subtree of a scope that belong to it through a property of its hosts and VMs
+SCOPE_ATTACHED = {vim.Datastore: 'datastore', vim.Network: 'network'}
+
+# MoRef ID prefix -> object type, for scopes given as a bare MoRef ID (e.g. domain-c7)
+MOREF_PREFIXES = [
+    ('datacenter-', vim.Datacenter),
+    ('domain-c', vim.ClusterComputeResource),
+    ('domain-s', vim.ComputeResource),
+    ('resgroup-v', vim.VirtualApp),
+    ('resgroup-', vim.ResourcePool),
+    ('group-', vim.Folder),
+    ('host-', vim.HostSystem)
+]
+
 class VSphereClient:
     """Client for connecting to vSphere environment"""
     
-    def __init__(self, server, username, password, ignore_ssl=False):
+    def __init__(self, server, username, password, ignore_ssl=False, session_cache=None, port=443, protocol='https',
+                 metrics=None, scope=None):
         """
         Initialize the vSphere client
         
@@ -25,13 +49,26 @@ class VSphereClient:
             username (str): vCenter username
             password (str): vCenter password
             ignore_ssl (bool): Whether to ignore SSL certificate verification
+            session_cache (SessionCache): Optional cache to resume sessions across runs
+            port (int): vCenter API port
+            protocol (str): 'https', or 'http' for a local simulator (see core.simulator)
+            metrics (SoapMetrics): Statistics to record the SOAP calls in (may be shared by clients)
+            scope (list): Optional inventory paths (DC/host/Cluster) or MoRef IDs (domain-c7,
+                          ClusterComputeResource:domain-c7) to limit the collection to, see scope_containers
         """
         self.server = server
         self.username = username
         self.password = password
         self.ignore_ssl = ignore_ssl
+        self.session_cache = session_cache
+        self.port = port
+        self.protocol = protocol
+        self.metrics = metrics or SoapMetrics()
+        self.scope = list(scope or [])
         self.service_instance = None
         self.content = None
+        self._scope_containers = None
+        self._scope_attached = None
         
     def connect(self):
         """
@@ -47,15 +84,28 @@ class VSphereClient:
             else:
                 context = None
                 
+            if self.session_cache and self._resume_session(context):
+                self.metrics.instrument(self.service_instance._stub)
+                logger.info(f"Resumed cached session on vCenter server: {self.server}")
+                return True
+                
             self.service_instance = SmartConnect(
                 host=self.server,
                 user=self.username,
                 pwd=self.password,
+                port=self.port,
+                protocol=self.protocol,
                 sslContext=context
             )
             
-            # Register disconnect function to run at exit
-            atexit.register(Disconnect, self.service_instance)
+            if self.session_cache:
+                # Keep the session alive for the next run instead of logging out at exit
+                self.session_cache.store(self.server, self.username, self.service_instance._stub.cookie)
+            else:
+                # Register disconnect function to run at exit
+                atexit.register(Disconnect, self.service_instance)
+            
+            self.metrics.instrument(self.service_instance._stub)
             
             # Get the vSphere service content
             self.content = self.service_instance.RetrieveContent()
@@ -67,14 +117,98 @@ class VSphereClient:
             logger.error(f"Failed to connect to vCenter: {str(e)}")
             raise Exception(f"Failed to connect to vCenter: {str(e)}")
             
-    def disconnect(self):
-        """Disconnect from the vCenter server"""
+    def _resume_session(self, context):
+        """
+        Try to reuse the cached session cookie instead of logging in
+        
+        Args:
+            context (ssl.SSLContext): SSL context for the connection
+            
+        Returns:
+            bool: True if the cached session is still valid
+        """
+        cookie = self.session_cache.load(self.server, self.username)
+        if not cookie:
+            return False
+            
+        try:
+            stub = SmartStubAdapter(host=self.server, port=self.port, protocol=self.protocol, sslContext=context)
+            stub.cookie = cookie
+            service_instance = vim.ServiceInstance('ServiceInstance', stub)
+            content = service_instance.RetrieveContent()
+            
+            # currentSession is empty once the session has expired or was terminated
+            if content.sessionManager.currentSession is None:
+                raise Exception("session expired")
+        except Exception as e:
+            logger.info(f"Cached session for {self.username}@{self.server} is no longer valid ({str(e)}), logging in")
+            self.session_cache.invalidate(self.server, self.username)
+            return False
+            
+        self.service_instance = service_instance
+        self.content = content
+        return True
+        
+    def disconnect(self, logout=None):
+        """
+        Disconnect from the vCenter server
+        
+        Args:
+            logout (bool): Whether to end the vCenter session. Defaults to True
+                unless a session cache is used, so the session can be resumed.
+        """
+        if logout is None:
+            logout = self.session_cache is None
+            
         if self.service_instance:
-            Disconnect(self.service_instance)
+            if logout:
+                Disconnect(self.service_instance)
+                if self.session_cache:
+                    self.session_cache.invalidate(self.server, self.username)
             self.service_instance = None
             self.content = None
+            self.clear_scope()
             logger.info(f"Disconnected from vCenter server: {self.server}")
             
+    def async_transport(self, max_connections=16):
+        """
+        Create an asyncio transport that shares this client's session
+        
+        Calls made through it are recorded in the client's SOAP statistics.
+        
+        Args:
+            max_connections (int): Maximum number of concurrent HTTP connections
+            
+        Returns:
+            AsyncSoapTransport: Transport for non-blocking SOAP calls
+        """
+        if not self.service_instance:
+            raise Exception("Not connected to vCenter")
+            
+        from core.async_transport import AsyncSoapTransport
+        return AsyncSoapTransport(
+            self.service_instance._stub,
+            property_collector=self.content.propertyCollector,
+            max_connections=max_connections,
+            metrics=self.metrics
+        )
+        
+    def wait_for_task(self, task):
+        """
+        Wait for a vCenter task to finish
+        
+        Args:
+            task (vim.Task): Task to wait for
+            
+        Returns:
+            Result of the task
+            
+        Raises:
+            vmodl.MethodFault: The fault of a failed task
+        """
+        WaitForTask(task)
+        return task.info.result
+        
     def get_container_view(self, obj_type, container=None):
         """
         Get a view of container objects of a specific type
@@ -101,9 +235,218 @@ class VSphereClient:
         
         return container_view
         
+    def resolve_container(self, spec):
+        """
+        Resolve an inventory path or MoRef ID to a container object
+
+        Args:
+            spec (str): Inventory path (e.g. DC-01/host/Cluster-01), MoRef ID (domain-c7)
+                        or type and MoRef ID (ClusterComputeResource:domain-c7)
+
+        Returns:
+            vim.ManagedEntity: Folder, datacenter, cluster, resource pool or host
+
+        Raises:
+            ValueError: If the object does not exist or cannot contain other objects
+        """
+        if not self.content:
+            raise Exception("Not connected to vCenter")
+
+        spec = spec.strip()
+        type_name, separator, moid = spec.partition(':')
+        if separator and '/' not in spec:
+            obj_type = getattr(vim, type_name, None)
+            if isinstance(obj_type, type) and issubclass(obj_type, vim.ManagedEntity):
+                obj = obj_type(moid, self.service_instance._stub)
+            else:
+                obj = None
+        else:
+            obj_type = next((t for prefix, t in MOREF_PREFIXES if spec.startswith(prefix) and '/' not in spec
+                             and spec[len(prefix):].isdigit()), None)
+            if obj_type:
+                obj = obj_type(spec, self.service_instance._stub)
+            else:
+                obj = self.content.searchIndex.FindByInventoryPath(spec.strip('/'))
+
+        if obj is None or not isinstance(obj, SCOPE_TYPES):
+            raise ValueError(f"Scope {spec} is not a folder, datacenter, cluster, resource pool or host")
+        try:
+            # Existenz prüfen, unbekannte MoRef-IDs schlagen erst hier fehl
+            logger.info(f"Collection scope: {spec} ({obj.name}, {obj._moId})")
+        except vmodl.fault.ManagedObjectNotFound:
+            raise ValueError(f"Scope {spec} not found")
+        return obj
+
+    def clear_scope(self):
+        """Forget the resolved scope, it is resolved again on next use (e.g. after datastores were mounted)"""
+        self._scope_containers = None
+        self._scope_attached = None
+
+    def scope_containers(self):
+        """
+        Containers the collection is limited to
+
+        Returns:
+            list: Resolved scope containers, empty if the whole inventory is collected
+        """
+        if self._scope_containers is None:
+            containers = {}
+            for spec in self.scope:
+                obj = self.resolve_container(spec)
+                containers.setdefault(obj._moId, obj)
+            self._scope_containers = list(containers.values())
+        return self._scope_containers
+
+    def scope_datastores(self):
+        """
+        Datastores belonging to the scope
+
+        Datastores live in the datastore folders of their datacenter, not below
+        clusters or hosts. A scope therefore includes the datastores inside its
+        subtree plus the datastores mounted by its hosts or used by its VMs.
+
+        Returns:
+            list: Datastore references, None if the collection is not scoped
+        """
+        return self.scope_attached(vim.Datastore)
+
+    def scope_attached(self, obj_type):
+        """
+        Objects of a SCOPE_ATTACHED type belonging to the scope (in its subtree or used by its hosts and VMs)
+
+        Returns:
+            list: Object references, None if the collection is not scoped
+        """
+        if not self.scope_containers():
+            return None
+        if self._scope_attached is None:
+            attached = {attached_type: {} for attached_type in SCOPE_ATTACHED}
+            paths = list(SCOPE_ATTACHED.values())
+            specs = {attached_type: [] for attached_type in SCOPE_ATTACHED}
+            specs.update({vim.HostSystem: paths, vim.VirtualMachine: paths})
+            for container in self.scope_containers():
+                for obj, props in self._retrieve_view(specs, container, DEFAULT_PAGE_SIZE):
+                    for attached_type, path in SCOPE_ATTACHED.items():
+                        refs = [obj] if isinstance(obj, attached_type) else props.get(path) or []
+                        for ref in refs:
+                            attached[attached_type].setdefault(ref._moId, ref)
+            self._scope_attached = {attached_type: list(refs.values()) for attached_type, refs in attached.items()}
+            logger.info(f"Collection scope includes {len(self._scope_attached[vim.Datastore])} datastores "
+                        f"and {len(self._scope_attached[vim.Network])} networks")
+        return self._scope_attached[obj_type]
+
+    def retrieve_properties(self, property_specs, container=None, page_size=DEFAULT_PAGE_SIZE):
+        """
+        Retrieve selected properties of all objects of one or more types
+        
+        Uses a single PropertyCollector filter over a container view and
+        follows the continuation tokens of RetrievePropertiesEx, so the number
+        of round-trips depends on the number of pages, not of objects.
+        Without an explicit container the objects of the collection scope are
+        returned (one filter per scope container).
+        
+        Args:
+            property_specs (dict): Object type -> list of property paths (e.g. {vim.HostSystem: ['name']})
+            container (vim.ManagedEntity): Container to start the view from (default: scope or root folder)
+            page_size (int): Maximum number of objects per page
+            
+        Returns:
+            list: (managed object, dict of property path -> value) for every object
+        """
+        return list(self.iter_properties(property_specs, container, page_size))
+
+    def iter_properties(self, property_specs, container=None, page_size=DEFAULT_PAGE_SIZE):
+        """
+        Like retrieve_properties, but yield the objects page by page
+        
+        The next page is only requested when the objects of the current one
+        have been consumed, so at most one page is held in memory.
+        
+        Yields:
+            tuple: (managed object, dict of property path -> value)
+        """
+        if container is not None or not self.scope_containers():
+            yield from self._retrieve_view(property_specs, container or self.content.rootFolder, page_size)
+            return
+
+        containers = self.scope_containers()
+        seen = set()
+        # Die Scope-Objekte selbst (z.B. der Cluster) gehören nicht zu ihrer ContainerView
+        own = [container for container in containers if isinstance(container, tuple(property_specs))]
+        sources = [self.retrieve_object_properties(own, property_specs, page_size)]
+        sources.extend(self._retrieve_view(property_specs, container, page_size) for container in containers)
+        for source in sources:
+            for obj, props in source:
+                if obj._moId not in seen:
+                    seen.add(obj._moId)
+                    yield obj, props
+        for attached_type in SCOPE_ATTACHED:
+            specs = {obj_type: paths for obj_type, paths in property_specs.items()
+                     if issubclass(obj_type, attached_type)}
+            if specs:
+                missing = [ref for ref in self.scope_attached(attached_type) if ref._moId not in seen]
+                for obj, props in self.retrieve_object_properties(missing, specs, page_size):
+                    seen.add(obj._moId)
+                    yield obj, props
+
+    def _retrieve_view(self, property_specs, container, page_size):
+        """Properties of all objects below a container (through a temporary container view), page by page"""
+        view = self.get_container_view(list(property_specs), container)
+        try:
+            traversal_spec = vmodl.query.PropertyCollector.TraversalSpec(
+                name='traverseView', path='view', skip=False, type=vim.view.ContainerView)
+            object_specs = [vmodl.query.PropertyCollector.ObjectSpec(obj=view, skip=True, selectSet=[traversal_spec])]
+            yield from self._retrieve(object_specs, property_specs, page_size)
+        finally:
+            view.Destroy()
+
+    def retrieve_object_properties(self, objects, property_specs, page_size=DEFAULT_PAGE_SIZE):
+        """
+        Retrieve selected properties of explicitly listed objects in one paged call
+
+        Args:
+            objects (list): Managed object references
+            property_specs (dict): Object type -> list of property paths
+
+        Returns:
+            list: (managed object, dict of property path -> value) for every object
+        """
+        if not objects:
+            return []
+        object_specs = [vmodl.query.PropertyCollector.ObjectSpec(obj=obj, skip=False) for obj in objects]
+        return list(self._retrieve(object_specs, property_specs, page_size))
+
+    def _retrieve(self, object_specs, property_specs, page_size):
+        """Yield (object, properties) of a PropertyCollector filter, one RetrievePropertiesEx page at a time"""
+        filter_spec = vmodl.query.PropertyCollector.FilterSpec(
+            objectSet=object_specs,
+            propSet=[vmodl.query.PropertyCollector.PropertySpec(type=obj_type, pathSet=list(paths))
+                     for obj_type, paths in property_specs.items()]
+        )
+        property_collector = self.content.propertyCollector
+        options = vmodl.query.PropertyCollector.RetrieveOptions(maxObjects=page_size)
+        
+        result = property_collector.RetrievePropertiesEx([filter_spec], options)
+        token = None
+        try:
+            while result:
+                token = result.token
+                for content in result.objects:
+                    yield content.obj, {prop.name: prop.val for prop in content.propSet or []}
+                if not token:
+                    break
+                result, token = property_collector.ContinueRetrievePropertiesEx(token), None
+        finally:
+            # Abgebrochene Iteration: offene Ergebnismenge auf dem Server freigeben
+            if token:
+                try:
+                    property_collector.CancelRetrievePropertiesEx(token)
+                except Exception as e:
+                    logger.debug(f"Could not cancel property retrieval: {str(e)}")
+        
     def get_all_objects(self, obj_type):
         """
-        Get all objects of a specific type
+        Get all objects of a specific type (within the collection scope)
         
         Args:
             obj_type (list): List of object types to get
@@ -111,11 +454,24 @@ class VSphereClient:
         Returns:
             list: List of objects of the specified type
         """
-        container_view = self.get_container_view(obj_type)
-        objects = container_view.view
-        container_view.Destroy()
-        
-        return objects
+        if not self.scope_containers():
+            container_view = self.get_container_view(obj_type)
+            objects = container_view.view
+            container_view.Destroy()
+            return objects
+
+        objects = {container._moId: container for container in self.scope_containers()
+                   if isinstance(container, tuple(obj_type))}
+        for container in self.scope_containers():
+            container_view = self.get_container_view(obj_type, container)
+            for obj in container_view.view:
+                objects.setdefault(obj._moId, obj)
+            container_view.Destroy()
+        for attached_type in SCOPE_ATTACHED:
+            if attached_type in obj_type:
+                for ref in self.scope_attached(attached_type):
+                    objects.setdefault(ref._moId, ref)
+        return list(objects.values())
     
     def get_virtual_machines(self):
         """
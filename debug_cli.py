@@ -42,6 +42,14 @@ except ImportError:
     print("    pip install pyVmomi")
     sys.exit(1)
 
+try:
+    # Profiler aus dem Reporter-Paket, fehlt bei eigenständiger Weitergabe des Tools
+    from core.profiling import PhaseProfiler, PROFILE_FORMATS, DEFAULT_PROFILE_DIR
+except ImportError:
+    PhaseProfiler = None
+    PROFILE_FORMATS = ('pstats', 'collapsed')
+    DEFAULT_PROFILE_DIR = 'profiles'
+
 @contextmanager
 def suppress_stdout_stderr():
     """
@@ -565,8 +573,26 @@ def main():
     parser.add_argument('-p', '--password', help='vCenter-Passwort (wenn nicht angegeben, wird nachgefragt)')
     parser.add_argument('-k', '--insecure', action='store_true', help='SSL-Zertifikatsüberprüfung ignorieren')
     parser.add_argument('-o', '--output', default='debug_report', help='Ausgabedateiname (ohne Erweiterung)')
+    parser.add_argument('--profile', nargs='?', const='pstats', choices=PROFILE_FORMATS,
+                        help='Jede Sammelphase und die Berichtsausgabe profilieren, eine Datei pro Phase '
+                             '(pstats über cProfile oder Collapsed Stacks für Flame Graphs, Standard: pstats)')
+    parser.add_argument('--profile-output', default=DEFAULT_PROFILE_DIR, metavar='DIR',
+                        help=f'Verzeichnis für die Profildateien (Standard: {DEFAULT_PROFILE_DIR})')
     args = parser.parse_args()
     
+    if args.profile and PhaseProfiler is None:
+        parser.error('--profile benötigt das Modul core.profiling des vSphere Reporters')
+    profiler = PhaseProfiler(args.profile_output if args.profile else None, args.profile or 'pstats') \
+        if PhaseProfiler else None
+    
+    @contextmanager
+    def phase(name):
+        if profiler is None:
+            yield
+        else:
+            with profiler.phase(name):
+                yield
+    
     # Passwort abfragen, wenn nicht angegeben
     password = args.password
     if not password:
@@ -588,12 +614,14 @@ def main():
         
         # Snapshots sammeln
         print("\nSammle Informationen über Snapshots...")
-        snapshots = collector.collect_snapshot_info()
+        with phase('collect_snapshots'):
+            snapshots = collector.collect_snapshot_info()
         print(f"{len(snapshots)} Snapshots gefunden.")
         
         # Verwaiste VMDKs sammeln
         print("\nSammle Informationen über verwaiste VMDK-Dateien...")
-        orphaned_vmdks = collector.collect_orphaned_vmdks()
+        with phase('collect_orphaned_vmdks'):
+            orphaned_vmdks = collector.collect_orphaned_vmdks()
         print(f"{len(orphaned_vmdks)} verwaiste VMDK-Dateien gefunden.")
         
         # Einfache Textausgabe in Konsole
@@ -613,7 +641,7 @@ def main():
             
         # Ausführlicheren Bericht in Datei schreiben
         output_file = f"{args.output}.txt"
-        with open(output_file, 'w', encoding='utf-8') as f:
+        with phase('export_txt'), open(output_file, 'w', encoding='utf-8') as f:
             f.write(f"VMware vSphere Reporter - Debug Report\n")
             f.write(f"======================================\n\n")
             f.write(f"Server: {args.server}\n")
@@ -655,6 +683,8 @@ def main():
         # Verbindung trennen
         if 'client' in locals():
             client.disconnect()
+        if profiler:
+            profiler.print_summary()
             
     print("\nProgramm beendet.")
 
@@ -49,6 +49,12 @@ class ConnectionDialog(QDialog):
         self.password_edit.setEchoMode(QLineEdit.Password)
         form_layout.addWidget(self.password_edit, 2, 1)
         
+        # Scope field (optional)
+        form_layout.addWidget(QLabel("Scope:"), 3, 0)
+        self.scope_edit = QLineEdit()
+        self.scope_edit.setPlaceholderText("optional, e.g. DC/host/Cluster or domain-c7; several separated by ;")
+        form_layout.addWidget(self.scope_edit, 3, 1)
+        
         layout.addLayout(form_layout)
         
         # Ignore SSL verification checkbox
@@ -96,3 +102,12 @@ class ConnectionDialog(QDialog):
             return
             
         super().accept()
+        
+    def get_scope(self):
+        """
+        Inventory paths or MoRef IDs entered as collection scope
+        
+        Returns:
+            list: Scope entries, empty for the whole inventory
+        """
+        return [entry.strip() for entry in self.scope_edit.text().split(';') if entry.strip()]
@@ -20,9 +20,6 @@ from PyQt5.QtGui import QIcon, QFont, QColor, QPalette
 from gui.connection_dialog import ConnectionDialog
 from gui.report_options import ReportOptionsWidget
 from gui.progress_dialog import ProgressDialog
-from core.vsphere_client import VSphereClient
-from core.report_generator import ReportGenerator
-from core.data_collector import DataCollector
 from utils.helper import get_save_directory
 from utils.logger import set_log_level, get_log_level_name, get_log_level_from_name
 from images.bechtle_logo import get_bechtle_logo_for_qt, BECHTLE_COLORS
@@ -289,13 +286,14 @@ class MainWindow(QMainWindow):
             username = dialog.username_edit.text()
             password = dialog.password_edit.text()
             ignore_ssl = dialog.ignore_ssl_check.isChecked()
+            scope = dialog.get_scope()
             
             # Show progress dialog
             progress = ProgressDialog("Connecting to vCenter", "Establishing connection to vCenter server...", self)
             progress.show()
             
             # Create connection worker
-            self.connection_worker = ConnectionWorker(server, username, password, ignore_ssl)
+            self.connection_worker = ConnectionWorker(server, username, password, ignore_ssl, scope)
             self.connection_worker.finished.connect(progress.close)
             self.connection_worker.finished.connect(self.connection_finished)
             self.connection_worker.start()
@@ -535,23 +533,30 @@ class ConnectionWorker(QThread):
     """Thread worker for vCenter connection"""
     finished = pyqtSignal(bool, object, str)
     
-    def __init__(self, server, username, password, ignore_ssl):
+    def __init__(self, server, username, password, ignore_ssl, scope=None):
         super().__init__()
         self.server = server
         self.username = username
         self.password = password
         self.ignore_ssl = ignore_ssl
+        self.scope = scope
         
     def run(self):
         """Run the connection process"""
         try:
+            # pyVmomi erst bei der ersten Verbindung laden, nicht beim Programmstart
+            from core.vsphere_client import VSphereClient
+            
             client = VSphereClient(
                 self.server,
                 self.username,
                 self.password,
-                self.ignore_ssl
+                self.ignore_ssl,
+                scope=self.scope
             )
             client.connect()
+            # Scope gleich prüfen, damit Tippfehler beim Verbinden gemeldet werden
+            client.scope_containers()
             self.finished.emit(True, client, None)
         except Exception as e:
             logger.error(f"Connection error: {str(e)}")
@@ -574,11 +579,17 @@ class ReportWorker(QThread):
     def run(self):
         """Run the report generation process"""
         try:
+            from core.data_collector import DataCollector
+            from core.report_generator import ReportGenerator
+            from core.exporters import DOCUMENT_FORMATS
+            from core.report_schema import report_columns
+            
             # Create data collector
             self.progress_update.emit("Collecting data from vCenter...")
             self.progress_value.emit(10)
             
-            collector = DataCollector(self.vsphere_client)
+            # Die GUI erzeugt nur Dokumentberichte, nur deren Spalten sammeln
+            collector = DataCollector(self.vsphere_client, report_columns(self.options, DOCUMENT_FORMATS))
             
             # Collect data based on selected options
             data = {}
@@ -611,28 +622,16 @@ class ReportWorker(QThread):
             self.progress_update.emit("Generating reports...")
             self.progress_value.emit(60)
             
-            report_generator = ReportGenerator(data)
+            report_generator = ReportGenerator(data, vcenter=self.server)
             
             output_files = []
             
-            # Export based on selected format
-            if self.export_format in ["HTML", "All Formats"]:
-                self.progress_update.emit("Generating HTML report...")
-                self.progress_value.emit(70)
-                html_path = report_generator.export_to_html(self.save_dir)
-                output_files.append(html_path)
-                
-            if self.export_format in ["DOCX", "All Formats"]:
-                self.progress_update.emit("Generating DOCX report...")
-                self.progress_value.emit(80)
-                docx_path = report_generator.export_to_docx(self.save_dir)
-                output_files.append(docx_path)
-                
-            if self.export_format in ["PDF", "All Formats"]:
-                self.progress_update.emit("Generating PDF report...")
-                self.progress_value.emit(90)
-                pdf_path = report_generator.export_to_pdf(self.save_dir)
-                output_files.append(pdf_path)
+            # Export based on selected format, through the exporter registry like the CLI
+            formats = DOCUMENT_FORMATS if self.export_format == "All Formats" else [self.export_format.lower()]
+            for i, fmt in enumerate(formats):
+                self.progress_update.emit(f"Generating {fmt.upper()} report...")
+                self.progress_value.emit(int(70 + (i / len(formats)) * 30))
+                output_files.extend(report_generator.export(fmt, self.save_dir))
             
             self.progress_value.emit(100)
             self.finished.emit(True, output_files, None)
@@ -13,10 +13,231 @@ import os
 import logging
 import argparse
 import getpass
+import datetime
 from utils.logger import setup_logger
 from core.vsphere_client import VSphereClient
+from core.session_cache import SessionCache, DEFAULT_CACHE_PATH
+from core.scan_cache import DatastoreScanCache, DEFAULT_SCAN_CACHE_PATH, DEFAULT_SCAN_MAX_AGE
+from core.checkpoint import CollectionCheckpoint, DEFAULT_CHECKPOINT_PATH
+from core.soap_metrics import SoapMetrics
+from core.profiling import PhaseProfiler, PROFILE_FORMATS, DEFAULT_PROFILE_DIR
 from core.data_collector import DataCollector
-from core.report_generator import ReportGenerator
+from core.report_schema import SECTION_SCHEMAS, column_keys, parse_columns, report_columns
+from core.report_generator import ReportGenerator, report_filename_base
+from core.exporters import DOCUMENT_FORMATS, available_formats, get_exporter, is_streaming
+from core.multi_vcenter import MultiVCenterCollector, load_inventory, resolve_password, merge_results
+from core.history import HistoryStore, DEFAULT_HISTORY_PATH
+
+# Progress messages per report section
+SECTION_LABELS = {
+    'vmware_tools': 'VMware Tools information',
+    'snapshots': 'snapshot information',
+    'orphaned_vmdks': 'orphaned VMDK information',
+    'vms': 'VM information',
+    'hosts': 'host information',
+    'datastores': 'datastore information',
+    'clusters': 'cluster information',
+    'resource_pools': 'resource pool information',
+    'networks': 'network information'
+}
+
+def write_reports(data, output_dir, report_format, profiler=None, label=None, vcenter=None):
+    """
+    Write the report in the requested formats
+    
+    Args:
+        data (dict): Collected report data
+        output_dir (str): Output directory for the reports
+        report_format (str): A registered format (html, docx, pdf, csv, jsonl, ...) or all
+        profiler (PhaseProfiler): Optional profiler, each exporter is one phase
+        label (str): Optional prefix for the phase names (e.g. the vCenter name)
+        vcenter (str): vCenter the data was collected from (see ReportGenerator)
+        
+    Returns:
+        list: Paths of the generated report files
+    """
+    profiler = profiler or PhaseProfiler()
+    prefix = f"{label}_" if label else ""
+    report_generator = ReportGenerator(data, vcenter=vcenter)
+    output_files = []
+    
+    for fmt in DOCUMENT_FORMATS if report_format == 'all' else [report_format]:
+        print(f"- Generating {fmt.upper()} report...")
+        with profiler.phase(f"{prefix}export_{fmt}"):
+            output_files.extend(report_generator.export(fmt, output_dir))
+        
+    return output_files
+
+def stream_report(collector, sections, output_dir, report_format, profiler=None, history_run=None):
+    """
+    Collect the sections and write every record as soon as it is collected
+    
+    Only for streaming formats (csv, jsonl), which keep no report data in memory.
+    
+    Args:
+        collector (DataCollector): Collector of the connected vCenter
+        sections (list): Section keys to collect
+        output_dir (str): Output directory for the report
+        report_format (str): Streaming report format
+        profiler (PhaseProfiler): Optional profiler, each section is one phase
+        history_run (HistoryRun): Optional history run that gets every record as well
+        
+    Returns:
+        list: Paths of the generated report files
+    """
+    profiler = profiler or PhaseProfiler()
+    exporter_class, extension = get_exporter(report_format)
+    timestamp = datetime.datetime.now()
+    exporter = exporter_class(None, timestamp)
+    exporter.columns = collector.columns
+    exporter.open(os.path.join(output_dir, f"{report_filename_base(timestamp)}.{extension}"))
+    
+    try:
+        for section in sections:
+            print(f"- Collecting {SECTION_LABELS[section]}...")
+            with profiler.phase(f"collect_{section}"):
+                for record in collector.iter_section(section):
+                    exporter.write(section, record)
+                    if history_run:
+                        history_run.write(section, record)
+    finally:
+        output_files = exporter.close()
+        
+    return output_files
+
+def record_history(path, data, vcenters, label=None):
+    """
+    Save the collected data of the run in the history database
+    
+    Args:
+        path (str): History database
+        data (dict): Collected report data
+        vcenters (list): vCenters the data was collected from
+        label (str): Optional run label (e.g. the collection scope)
+    """
+    try:
+        with HistoryStore(path) as store:
+            run_id = store.record_run(data, vcenters, label=label)
+        print(f"Run saved to history: {path} (run {run_id})")
+    except Exception as e:
+        print(f"Could not save run to history: {str(e)}")
+
+def scope_label(scope):
+    """History label of a scoped run, so its diffs are not mistaken for a full inventory"""
+    return f"scope: {', '.join(scope)}" if scope else None
+
+def report_metrics(metrics, path):
+    """
+    Log the SOAP statistics of the run and optionally write them to a file
+    
+    Args:
+        metrics (SoapMetrics): Statistics of the run
+        path (str): Metrics file (JSON) or None
+    """
+    metrics.log_summary(logging.getLogger(__name__))
+    if path:
+        try:
+            metrics.write(path)
+            print(f"SOAP metrics written to: {path}")
+        except OSError as e:
+            print(f"Could not write SOAP metrics: {str(e)}")
+
+def open_checkpoint(args, sections, columns):
+    """
+    Open the checkpoint journal of this run if requested
+
+    Returns:
+        CollectionCheckpoint: Journal, or None without --checkpoint/--resume
+    """
+    path = args.checkpoint or (DEFAULT_CHECKPOINT_PATH if args.resume else None)
+    if not path:
+        return None
+    run = {'server': args.server, 'inventory': args.inventory, 'scope': args.scope, 'sections': sections,
+           'columns': columns}
+    checkpoint = CollectionCheckpoint(path, run, resume=args.resume)
+    if checkpoint.resumed:
+        print(f"Resuming from checkpoint {checkpoint.path} ({checkpoint.summary()})")
+    elif args.resume:
+        print(f"No checkpoint of this run in {checkpoint.path}, starting from the beginning")
+    return checkpoint
+
+def close_checkpoint(checkpoint, completed):
+    """Delete the checkpoint of a completed run, keep it otherwise"""
+    if not checkpoint:
+        return
+    if completed:
+        checkpoint.remove()
+    else:
+        checkpoint.close()
+        print(f"Progress saved to checkpoint {checkpoint.path}, continue with --resume")
+
+def run_inventory(args, sections, session_cache, metrics, profiler, columns=None, scan_cache=None,
+                  checkpoint=None):
+    """
+    Collect from all vCenters of an inventory file concurrently
+    
+    Writes one merged report to the output directory and one sub-report per
+    vCenter into a subdirectory named after the vCenter.
+    
+    Returns:
+        tuple: (exit code, non-zero if any vCenter failed;
+                True if every section of every vCenter was collected completely)
+    """
+    inventory = load_inventory(args.inventory)
+    for vcenter in inventory['vcenters']:
+        if args.scope and not vcenter.get('scope'):
+            vcenter['scope'] = args.scope
+        vcenter['password'] = resolve_password(
+            vcenter,
+            prompt=lambda vc: getpass.getpass(f"Enter password for {vc['username']}@{vc['server']}: ")
+        )
+    
+    print(f"Collecting from {len(inventory['vcenters'])} vCenter servers "
+          f"({inventory['max_parallel']} in parallel)...")
+    collector = MultiVCenterCollector(
+        inventory,
+        sections,
+        session_cache=session_cache,
+        scan_cache=scan_cache,
+        checkpoint=checkpoint,
+        metrics=metrics,
+        profiler=profiler,
+        columns=columns,
+        progress=lambda name, message: print(f"- [{name}] {message}")
+    )
+    results = collector.collect()
+    
+    output_files = []
+    for name, result in results.items():
+        if result['error']:
+            continue
+        print(f"\nGenerating reports for {name}...")
+        vcenter_dir = os.path.join(args.output_dir, name)
+        os.makedirs(vcenter_dir, exist_ok=True)
+        output_files.extend(write_reports(result['data'], vcenter_dir, args.format, profiler, label=name,
+                                          vcenter=name))
+    
+    failed = [name for name, result in results.items() if result['error']]
+    if len(failed) < len(results):
+        print("\nGenerating merged report...")
+        merged = merge_results(results, sections)
+        if args.history:
+            record_history(args.history, merged, [name for name, result in results.items() if not result['error']],
+                           scope_label(args.scope))
+        output_files.extend(write_reports(merged, args.output_dir, args.format, profiler, label='merged'))
+    
+    print("\nReport generation completed" + (" with errors" if failed else " successfully") + "!")
+    for name, result in results.items():
+        status = f"failed: {result['error']}" if result['error'] else "ok"
+        if result['incomplete']:
+            status += f", incomplete: {', '.join(result['incomplete'])}"
+        print(f"- {name}: {status} ({result['duration']:.1f}s)")
+    print("Report files:")
+    for file in output_files:
+        print(f"- {file}")
+    
+    completed = not failed and not any(result['incomplete'] for result in results.values())
+    return (1 if failed else 0), completed
 
 def main():
     """Main entry point for the CLI application"""
@@ -27,13 +248,46 @@ def main():
     
     # Parse command-line arguments
     parser = argparse.ArgumentParser(description='VMware vSphere Reporter CLI')
-    parser.add_argument('--server', '-s', required=True, help='vCenter server address')
-    parser.add_argument('--username', '-u', required=True, help='vCenter username')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--server', '-s', help='vCenter server address')
+    target.add_argument('--inventory', '-i', metavar='FILE',
+                        help='JSON inventory of vCenter servers to collect from concurrently')
+    parser.add_argument('--username', '-u', help='vCenter username (required with --server)')
     parser.add_argument('--password', '-p', help='vCenter password (omit for secure prompt)')
     parser.add_argument('--ignore-ssl', '-k', action='store_true', help='Ignore SSL certificate validation')
+    parser.add_argument('--scope', action='append', metavar='PATH|MOREF',
+                        help='Only collect below this datacenter, cluster, folder, resource pool or host, given as '
+                             'inventory path (DC/host/Cluster) or MoRef ID (domain-c7); repeatable. With '
+                             '--inventory it applies to vCenters without their own "scope"')
+    parser.add_argument('--session-cache', nargs='?', const=DEFAULT_CACHE_PATH, metavar='PATH',
+                        help='Reuse the vCenter session across runs (cookie stored with mode 0600, '
+                             f'default: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--scan-cache', nargs='?', const=DEFAULT_SCAN_CACHE_PATH, metavar='PATH',
+                        help='Reuse the orphaned VMDK scan of datastores that did not change since the last run '
+                             f'(default: {DEFAULT_SCAN_CACHE_PATH})')
+    parser.add_argument('--scan-max-age', type=float, default=DEFAULT_SCAN_MAX_AGE / 3600, metavar='HOURS',
+                        help='With --scan-cache, scan every datastore again after this many hours '
+                             f'(default: {DEFAULT_SCAN_MAX_AGE / 3600:g})')
+    parser.add_argument('--checkpoint', nargs='?', const=DEFAULT_CHECKPOINT_PATH, metavar='PATH',
+                        help='Record finished sections and datastore scans so an interrupted run can be '
+                             f'continued with --resume (default: {DEFAULT_CHECKPOINT_PATH})')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue an interrupted run with the same settings from its checkpoint '
+                             '(implies --checkpoint)')
+    parser.add_argument('--metrics-file', metavar='PATH',
+                        help='Write SOAP call statistics (calls, bytes, latencies per method and section) as JSON')
+    parser.add_argument('--profile', nargs='?', const='pstats', choices=PROFILE_FORMATS,
+                        help='Profile each collection section and exporter, one file per phase '
+                             '(pstats via cProfile or sampled collapsed stacks for flame graphs, default: pstats)')
+    parser.add_argument('--profile-output', default=DEFAULT_PROFILE_DIR, metavar='DIR',
+                        help=f'Directory for the profile files (default: {DEFAULT_PROFILE_DIR})')
+    parser.add_argument('--history', nargs='?', const=DEFAULT_HISTORY_PATH, metavar='PATH',
+                        help='Save the collected data in the run history database for diffs between runs '
+                             f'(python -m core.history, default: {DEFAULT_HISTORY_PATH})')
     parser.add_argument('--output-dir', '-o', default=os.getcwd(), help='Output directory for reports')
-    parser.add_argument('--format', '-f', choices=['html', 'docx', 'pdf', 'all'], default='all', 
-                        help='Report format (html, docx, pdf, or all)')
+    parser.add_argument('--format', '-f', choices=available_formats() + ['all'], default='all', 
+                        help='Report format (all = html, docx and pdf; csv and jsonl are written '
+                             'while collecting)')
     parser.add_argument('--include-all', '-a', action='store_true', 
                         help='Include all optional sections in the report')
     
@@ -44,85 +298,117 @@ def main():
     parser.add_argument('--clusters', action='store_true', help='Include clusters section')
     parser.add_argument('--resource-pools', action='store_true', help='Include resource pools section')
     parser.add_argument('--networks', action='store_true', help='Include networks section')
+    parser.add_argument('--columns', action='append', metavar='SECTION=COL,...',
+                        help='Collect only these columns of a section (repeatable, e.g. vms=name,num_cpu); '
+                             'document reports add the columns they show')
+    parser.add_argument('--list-columns', action='store_true', help='List the columns of every section and exit')
     
     args = parser.parse_args()
     
+    if args.list_columns:
+        for section in SECTION_SCHEMAS:
+            print(f"{section}: {', '.join(column_keys(section))}")
+        return 0
+    
+    if not args.server and not args.inventory:
+        parser.error('one of the arguments --server/-s --inventory/-i is required')
+    if args.server and not args.username:
+        parser.error('--username is required with --server')
+    
+    session_cache = SessionCache(args.session_cache) if args.session_cache else None
+    scan_cache = DatastoreScanCache(args.scan_cache, args.scan_max_age * 3600) if args.scan_cache else None
+    metrics = SoapMetrics()
+    profiler = PhaseProfiler(args.profile_output if args.profile else None, args.profile or 'pstats')
+    
+    sections = ['vmware_tools', 'snapshots', 'orphaned_vmdks']
+    for section in ['vms', 'hosts', 'datastores', 'clusters', 'resource_pools', 'networks']:
+        if args.include_all or getattr(args, section):
+            sections.append(section)
+    
+    try:
+        requested = parse_columns(args.columns)
+    except ValueError as e:
+        parser.error(str(e))
+    formats = DOCUMENT_FORMATS if args.format == 'all' else [args.format]
+    # Die Historie vergleicht ganze Datensätze, ohne Spaltenauswahl alles sammeln
+    columns = report_columns(sections, formats, requested) if requested or not args.history else {}
+    
+    if args.inventory:
+        checkpoint = None
+        completed = False
+        try:
+            checkpoint = open_checkpoint(args, sections, columns)
+            # Auch unvollständige Abschnitte einzelner vCenter halten den Checkpoint für --resume
+            exit_code, completed = run_inventory(args, sections, session_cache, metrics, profiler, columns,
+                                                 scan_cache, checkpoint)
+            return exit_code
+        except Exception as e:
+            logger.error(f"Error: {str(e)}")
+            print(f"Error: {str(e)}")
+            return 1
+        finally:
+            close_checkpoint(checkpoint, completed)
+            report_metrics(metrics, args.metrics_file)
+            profiler.print_summary()
+    
     # Get password if not provided
     password = args.password
     if not password:
         password = getpass.getpass(f"Enter password for {args.username}@{args.server}: ")
     
+    checkpoint = None
+    completed = False
     try:
+        checkpoint = open_checkpoint(args, sections, columns)
+        
         # Connect to vCenter
         print(f"Connecting to vCenter server: {args.server}")
-        client = VSphereClient(args.server, args.username, password, args.ignore_ssl)
+        client = VSphereClient(args.server, args.username, password, args.ignore_ssl,
+                               session_cache=session_cache, metrics=metrics, scope=args.scope)
         client.connect()
         print("Connected successfully")
+        if client.scope:
+            print(f"Collection scope: {', '.join(obj.name for obj in client.scope_containers())}")
         
         # Initialize data collector
-        collector = DataCollector(client)
+        collector = DataCollector(client, columns, progress=lambda message: print(f"  {message}"),
+                                  scan_cache=scan_cache, checkpoint=checkpoint)
         
         # Collect data with progress indication
         print("\nCollecting data from vCenter (this may take a while)...")
-        data = {}
-        
-        # Required sections
-        print("- Collecting VMware Tools information...")
-        data['vmware_tools'] = collector.collect_vmware_tools_info()
-        
-        print("- Collecting snapshot information...")
-        data['snapshots'] = collector.collect_snapshot_info()
-        
-        print("- Collecting orphaned VMDK information...")
-        data['orphaned_vmdks'] = collector.collect_orphaned_vmdks()
         
-        # Optional sections
-        if args.include_all or args.vms:
-            print("- Collecting VM information...")
-            data['vms'] = collector.collect_vm_info()
-            
-        if args.include_all or args.hosts:
-            print("- Collecting host information...")
-            data['hosts'] = collector.collect_host_info()
-            
-        if args.include_all or args.datastores:
-            print("- Collecting datastore information...")
-            data['datastores'] = collector.collect_datastore_info()
-            
-        if args.include_all or args.clusters:
-            print("- Collecting cluster information...")
-            data['clusters'] = collector.collect_cluster_info()
+        if args.format != 'all' and is_streaming(args.format):
+            history = HistoryStore(args.history) if args.history else None
+            history_run = history.start_run([args.server], label=scope_label(args.scope)) if history else None
+            try:
+                output_files = stream_report(collector, sections, args.output_dir, args.format, profiler,
+                                             history_run)
+                if history_run:
+                    print(f"Run saved to history: {args.history} (run {history_run.close(sections)})")
+            except Exception:
+                if history_run:
+                    history_run.abort()
+                raise
+            finally:
+                if history:
+                    history.close()
+        else:
+            data = {}
+            for section in sections:
+                print(f"- Collecting {SECTION_LABELS[section]}...")
+                with profiler.phase(f"collect_{section}"):
+                    data[section] = collector.collect_section(section)
+            if args.history:
+                record_history(args.history, data, [args.server], scope_label(args.scope))
             
-        if args.include_all or args.resource_pools:
-            print("- Collecting resource pool information...")
-            data['resource_pools'] = collector.collect_resource_pool_info()
-            
-        if args.include_all or args.networks:
-            print("- Collecting network information...")
-            data['networks'] = collector.collect_network_info()
-        
-        # Generate reports
-        print("\nGenerating reports...")
-        report_generator = ReportGenerator(data)
-        output_files = []
-        
-        if args.format == 'html' or args.format == 'all':
-            print("- Generating HTML report...")
-            html_file = report_generator.export_to_html(args.output_dir)
-            output_files.append(html_file)
-            
-        if args.format == 'docx' or args.format == 'all':
-            print("- Generating DOCX report...")
-            docx_file = report_generator.export_to_docx(args.output_dir)
-            output_files.append(docx_file)
-            
-        if args.format == 'pdf' or args.format == 'all':
-            print("- Generating PDF report...")
-            pdf_file = report_generator.export_to_pdf(args.output_dir)
-            output_files.append(pdf_file)
+            # Generate reports
+            print("\nGenerating reports...")
+            output_files = write_reports(data, args.output_dir, args.format, profiler, vcenter=args.server)
         
         # Disconnect from vCenter
         client.disconnect()
+        # Mit fehlgeschlagenen Teilen den Checkpoint behalten, --resume holt nur diese nach
+        completed = not collector.incomplete_sections
         
         # Show success message
         print("\nReport generation completed successfully!")
@@ -136,6 +422,11 @@ def main():
         logger.error(f"Error: {str(e)}")
         print(f"Error: {str(e)}")
         return 1
+    
+    finally:
+        close_checkpoint(checkpoint, completed)
+        report_metrics(metrics, args.metrics_file)
+        profiler.print_summary()
 
 if __name__ == "__main__":
     sys.exit(main())
\ No newline at end of file
@@ -20,6 +20,7 @@ from utils.logger import setup_logger, set_log_level, get_log_level_name, get_lo
 from core.vsphere_client import VSphereClient
 from core.data_collector import DataCollector
 from core.report_generator import ReportGenerator
+from core.exporters import DOCUMENT_FORMATS
 from images.bechtle_logo import get_bechtle_logo_for_tkinter
 
 class VSphereReporterGUI:
@@ -842,23 +843,14 @@ class VSphereReporterGUI:
                 
                 # Generate reports
                 update_status("Generating reports...")
-                report_generator = ReportGenerator(data)
+                report_generator = ReportGenerator(data, vcenter=self.vsphere_client.server)
                 output_files = []
                 
-                if export_format == 'html' or export_format == 'all':
-                    update_status("Generating HTML report...")
-                    html_file = report_generator.export_to_html(save_dir)
-                    output_files.append(html_file)
-                    
-                if export_format == 'docx' or export_format == 'all':
-                    update_status("Generating DOCX report...")
-                    docx_file = report_generator.export_to_docx(save_dir)
-                    output_files.append(docx_file)
-                    
-                if export_format == 'pdf' or export_format == 'all':
-                    update_status("Generating PDF report...")
-                    pdf_file = report_generator.export_to_pdf(save_dir)
-                    output_files.append(pdf_file)
+                # Export über die Exporter-Registry wie die CLI
+                formats = DOCUMENT_FORMATS if export_format == 'all' else [export_format]
+                for fmt in formats:
+                    update_status(f"Generating {fmt.upper()} report...")
+                    output_files.extend(report_generator.export(fmt, save_dir))
                 
                 # Close dialog and show success
                 self.root.after(0, lambda: self.report_finished(True, output_files, progress_dialog))